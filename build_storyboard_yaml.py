@@ -11,50 +11,50 @@ methods = {
     '3': 'img2vid',
     '4': 'img2vid',
     '5': 't2v',
-    '6': 't2v',
+    '6': 'card',
     '7': 'img2vid',
     '8': 'img2vid',
     '9': 't2v',
-    '10': 't2v',
+    '10': 'card',
     '11': 'img2vid',
     '12': 't2v',
     '13': 'img2vid',
     '14': 'img2vid',
-    '15': 't2v',
+    '15': 'card',
     '16': 'img2vid',
     '17': 'img2vid',
-    '18': 't2v',
+    '18': 'card',
     '19': 'img2vid',
     '20': 'img2vid',
-    '21': 't2v',
+    '21': 'card',
     '22': 'img2vid',
     '23': 'img2vid',
     '24': 'img2vid',
-    '25': 't2v',
+    '25': 'card',
     '26': 't2v',
     '27': 't2v',
     '28': 'img2vid',
-    '29': 't2v',
+    '29': 'card',
     '30': 't2v',
     '31': 'img2vid',
     '32': 't2v',
     '33': 'img2vid',
-    '34': 't2v',
+    '34': 'card',
     '35': 'img2vid',
     '36': 't2v',
     '37': 't2v',
-    '38': 't2v',
+    '38': 'card',
     '39': 'img2vid',
-    '40': 't2v',
+    '40': 'card',
     '41': 'img2vid',
     '42': 'img2vid',
     '43': 'img2vid',
-    '44': 't2v',
+    '44': 'card',
     '45': 'img2vid',
     '46': 'img2vid',
-    '47': 't2v',
+    '47': 'card',
     '48': 'img2vid',
-    '49': 't2v',
+    '49': 'card',
     '50': 't2v',
     '51': 't2v',
     '52': 't2v',
@@ -238,10 +238,15 @@ for scene_name, row_nos in scene_order:
         shot = {
             'row_no': int(row_no),
             'method': methods[row_no],
+        }
+        if methods[row_no] == 'card':
+            # Rendered by utils/cards.py; the prompt stays for reference.
+            shot['card'] = {'title': scene_name, 'template': 'navy'}
+        shot.update({
             'prompt': prompts[row_no],
             'duration_s': adjusted_duration(row_no),
             'narration': narration,
-        }
+        })
         overlay = overlay_texts.get(row_no)
         if overlay:
             shot['overlay_text'] = overlay
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Reproducible benchmarks for the render pipeline with stubbed models.
+
+Synthetic stills, frames and audio are generated deterministically and SDXL,
+SVD and XTTS are replaced by the fakes in utils/fakes.py, so this runs on a
+CPU-only Linux box with just ffmpeg installed.
+
+    python benchmarks/bench_pipeline.py run                       # stages + 54-shot end-to-end, HD and 4K
+    python benchmarks/bench_pipeline.py run --no-e2e --resolutions hd --repeat 5
+    python benchmarks/bench_pipeline.py compare results/BASE.json results/NEW.json --threshold 0.10
+
+`run` writes results/<commit>-<host>.json; pass --compare BASE.json to fail
+(exit 1) when any benchmark's median is slower than BASE by more than the threshold.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+import soundfile as sf
+from PIL import Image
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR))
+
+import orchestrate  # noqa: E402
+from utils import audio as audio_utils  # noqa: E402
+from utils import fakes  # noqa: E402
+from utils import report as report_utils  # noqa: E402
+from utils import subtitles as subtitle_utils  # noqa: E402
+from utils import video as video_utils  # noqa: E402
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+STORYBOARD = BASE_DIR / "storyboard.swav2025.yaml"
+FPS = 30
+CLIP_SECONDS = 3.0
+DEFAULT_THRESHOLD = 0.10
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _ffmpeg_version() -> str:
+    result = subprocess.run(["ffmpeg", "-version"], capture_output=True, text=True, check=True)
+    return result.stdout.splitlines()[0]
+
+
+def _timeit(fn: Callable[[], None], repeat: int, setup: Callable[[], None] | None = None) -> Dict:
+    runs: List[float] = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - start)
+    return {"median_s": statistics.median(runs), "min_s": min(runs), "runs": runs}
+
+
+# -- synthetic inputs --------------------------------------------------------
+def synthetic_still(width: int, height: int) -> Image.Image:
+    return fakes.FakeSDXLPipeline()(prompt="benchmark still", width=width, height=height).images[0]
+
+
+def synthetic_frames(width: int, height: int, seconds: float = CLIP_SECONDS) -> np.ndarray:
+    count = int(round(seconds * FPS))
+    base = np.asarray(synthetic_still(width, height))
+    frames = np.empty((count, height, width, 3), dtype=np.uint8)
+    for idx in range(count):
+        frames[idx] = np.roll(base, idx * 8, axis=1)
+    return frames
+
+
+def synthetic_voice_blocks(count: int = 54) -> List[Dict]:
+    rng = np.random.default_rng(0)
+    words = "innovation indigenisation navy fleet sailors engineers trials capability".split()
+    blocks, start = [], 0.0
+    for row in range(1, count + 1):
+        duration = float(rng.uniform(4.5, 8.0))
+        text = " ".join(rng.choice(words, size=int(rng.integers(12, 45))))
+        blocks.append({"row_no": row, "text": text.capitalize() + ".", "duration": duration, "start": start})
+        start += duration
+    return blocks
+
+
+def write_synthetic_audio(path: Path, seconds: float, sample_rate: int) -> None:
+    rng = np.random.default_rng(1)
+    t = np.arange(int(seconds * sample_rate), dtype=np.float32) / sample_rate
+    wav = 0.2 * np.sin(2 * np.pi * 220.0 * t) + 0.02 * rng.standard_normal(t.size).astype(np.float32)
+    sf.write(path, wav.astype(np.float32), sample_rate)
+
+
+# -- benchmarks --------------------------------------------------------------
+def bench_stages(res_name: str, size: tuple, repeat: int, tmp: Path) -> Dict[str, Dict]:
+    width, height = size
+    results: Dict[str, Dict] = {}
+    still = synthetic_still(width, height)
+    frames = synthetic_frames(width, height)
+    clip = tmp / f"{res_name}_clip.mp4"
+
+    results["kenburns_from_still"] = _timeit(
+        lambda: video_utils.kenburns_from_still(still, tmp / f"{res_name}_kb.mp4", CLIP_SECONDS, FPS, size=size),
+        repeat,
+    )
+    results["write_video"] = _timeit(lambda: video_utils.write_video(frames, clip, FPS), repeat)
+
+    overlay_src = tmp / f"{res_name}_overlay.mp4"
+    results["overlay_texts"] = _timeit(
+        lambda: video_utils.overlay_texts(overlay_src, ["SWAVLAMBAN 2025", "BENCHMARK OVERLAY"], size),
+        repeat,
+        setup=lambda: overlay_src.write_bytes(clip.read_bytes()),
+    )
+
+    clips = [clip] * 6
+    results["concat_videos"] = _timeit(lambda: orchestrate.concat_videos(clips, tmp / f"{res_name}_concat.mp4"), repeat)
+
+    timeline = tmp / f"{res_name}_concat.mp4"
+    seconds = CLIP_SECONDS * len(clips)
+    vo_wav, music_wav = tmp / "vo.wav", tmp / "music.wav"
+    write_synthetic_audio(vo_wav, seconds, 24000)
+    write_synthetic_audio(music_wav, seconds, 48000)
+    for key, mixer in (("mix_audio", "ffmpeg"), ("mix_audio_numpy", "numpy")):
+        results[key] = _timeit(
+            lambda mixer=mixer: audio_utils.mix_audio(
+                str(timeline), str(vo_wav), str(music_wav), str(tmp / f"{res_name}_mixed.mp4"), mixer=mixer
+            ),
+            repeat,
+        )
+    return results
+
+
+def bench_resolution_free(repeat: int, tmp: Path) -> Dict[str, Dict]:
+    blocks = synthetic_voice_blocks() * 20
+    vo_wav = tmp / "captions_vo.wav"
+    timings = audio_utils.synthesize_voiceover(blocks, vo_wav)
+    wav, sample_rate = sf.read(str(vo_wav), dtype="float32")
+
+    def captions() -> None:
+        cues = subtitle_utils.build_cues(blocks, timings, wav=wav, sample_rate=sample_rate, word_timings=True)
+        subtitle_utils.write_captions(cues, tmp / "captions")
+
+    return {"captions": _timeit(captions, repeat)}
+
+
+def bench_end_to_end(res_name: str, shots: str | None, tmp: Path) -> Dict[str, Dict]:
+    outdir = tmp / f"e2e_{res_name}"
+    cmd = [
+        sys.executable,
+        str(BASE_DIR / "orchestrate.py"),
+        "--storyboard", str(STORYBOARD),
+        "--outdir", str(outdir),
+        "--preset", res_name,
+        "--fake-models",
+    ]
+    if shots:
+        cmd.extend(["--shot-range", shots])
+    start = time.perf_counter()
+    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    wall = time.perf_counter() - start
+    results = {"end_to_end": {"median_s": wall, "min_s": wall, "runs": [wall]}}
+    summary = report_utils.summarise(report_utils.load_events(outdir / "run_events.jsonl"))
+    for name, count, stage_wall, *_ in summary["stages"]:
+        results[f"end_to_end.{name}"] = {"median_s": stage_wall, "min_s": stage_wall, "runs": [stage_wall], "calls": count}
+    return results
+
+
+def run(args: argparse.Namespace) -> int:
+    fakes.install()
+    results: Dict[str, Dict] = {}
+    resolutions = [name.strip() for name in args.resolutions.split(",") if name.strip()]
+    with tempfile.TemporaryDirectory(prefix="swav_bench_") as tmp_name:
+        tmp = Path(tmp_name)
+        for key, value in bench_resolution_free(args.repeat, tmp).items():
+            results[key] = value
+        for res_name in resolutions:
+            size = orchestrate.PRESET_RESOLUTIONS[res_name]
+            print(f"[{res_name}] stage benchmarks at {size[0]}x{size[1]}")
+            for key, value in bench_stages(res_name, size, args.repeat, tmp).items():
+                results[f"{res_name}/{key}"] = value
+                print(f"  {key:<22} {value['median_s']:8.3f} s")
+            if args.e2e:
+                print(f"[{res_name}] end-to-end storyboard ({args.e2e_shots or 'all 54 shots'})")
+                for key, value in bench_end_to_end(res_name, args.e2e_shots, tmp).items():
+                    results[f"{res_name}/{key}"] = value
+                print(f"  end_to_end             {results[f'{res_name}/end_to_end']['median_s']:8.1f} s")
+
+    payload = {
+        "commit": _git_commit(),
+        "host": platform.node(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "ffmpeg": _ffmpeg_version(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "repeat": args.repeat,
+        "results": results,
+    }
+    out_path = args.out or RESULTS_DIR / f"{payload['commit']}-{payload['host']}.json"
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    out_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    print(f"Results written to {out_path}")
+
+    if args.compare:
+        return compare(args.compare, out_path, args.threshold)
+    return 0
+
+
+def compare(base_path: Path, new_path: Path, threshold: float) -> int:
+    base = json.loads(Path(base_path).read_text(encoding="utf-8"))
+    new = json.loads(Path(new_path).read_text(encoding="utf-8"))
+    print(f"Comparing {new.get('commit')} against {base.get('commit')} (threshold +{threshold:.0%})")
+    print(f"{'benchmark':<40} {'base s':>10} {'new s':>10} {'change':>9}")
+    regressions = []
+    for key in sorted(set(base["results"]) & set(new["results"])):
+        before = base["results"][key]["median_s"]
+        after = new["results"][key]["median_s"]
+        change = (after - before) / before if before > 0 else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(key)
+        print(f"{key:<40} {before:10.3f} {after:10.3f} {change:+8.1%}{flag}")
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed beyond {threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    print("\nNo regressions.")
+    return 0
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_p = sub.add_parser("run", help="Run the benchmarks and store results")
+    run_p.add_argument("--resolutions", default="hd,4k")
+    run_p.add_argument("--repeat", type=int, default=3, help="Runs per stage benchmark (median is reported)")
+    run_p.add_argument("--e2e", action=argparse.BooleanOptionalAction, default=True, help="Run the end-to-end storyboard")
+    run_p.add_argument("--e2e-shots", help="Limit the end-to-end run to a --shot-range, e.g. '1-10'")
+    run_p.add_argument("--out", type=Path, help="Results file (default: results/<commit>-<host>.json)")
+    run_p.add_argument("--compare", type=Path, help="Baseline results file to check for regressions")
+    run_p.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+
+    cmp_p = sub.add_parser("compare", help="Compare two results files")
+    cmp_p.add_argument("base", type=Path)
+    cmp_p.add_argument("new", type=Path)
+    cmp_p.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if args.command == "compare":
+        sys.exit(compare(args.base, args.new, args.threshold))
+    sys.exit(run(args))
+
+
+if __name__ == "__main__":
+    main()
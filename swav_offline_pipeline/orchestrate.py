@@ -10,20 +10,48 @@ after models are downloaded.
 from __future__ import annotations
 
 import argparse
+import hashlib
+import json
 import os
-from dataclasses import dataclass
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
 from pathlib import Path
-from typing import Dict, Iterable, List, Tuple
+from typing import Dict, Iterable, List, Set, Tuple
 
 import subprocess
 
+import numpy as np
+import soundfile as sf
 import yaml
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn, TimeElapsedColumn
 
 from utils import audio as audio_utils
+from utils import backends as backend_utils
+from utils import cards as card_utils
+from utils import dag as dag_utils
+from utils import deliverables as deliverable_utils
+from utils import encoders as encoder_utils
+from utils import farm as farm_utils
+from utils import ffmpeg as ffmpeg_utils
+from utils import framering
+from utils import framestore
+from utils import frames as frame_utils
+from utils import instrument
 from utils import models as model_utils
+from utils import music as music_utils
+from utils import preview as preview_utils
+from utils import profiling
+from utils import progress as progress_utils
+from utils import prompt_cache
+from utils import qc as qc_utils
+from utils import report as report_utils
+from utils import samplers as sampler_utils
+from utils import speaker_cache
+from utils import storage as storage_utils
 from utils import subtitles as subtitle_utils
+from utils import textlayer
 from utils import video as video_utils
 
 console = Console()
@@ -38,12 +66,16 @@ class ShotSpec:
     narration: str
     overlay_text: List[str] | None = None
     source_path: str | None = None  # used for raw footage
+    card: Dict | None = None  # used for title cards
+    seed: int | None = None  # fixes the diffusion sampling; part of the frame store key
+    priority: str = "normal"  # "low" lets CPU-backend farm workers take the shot
 
 
 @dataclass
 class RenderedShot:
     spec: ShotSpec
     video_path: Path
+    scene_index: int = 0
 
 
 PRESET_RESOLUTIONS: Dict[str, Tuple[int, int]] = {
@@ -51,17 +83,239 @@ PRESET_RESOLUTIONS: Dict[str, Tuple[int, int]] = {
     "4k": (3840, 2160),
 }
 
+# Shot methods that need no GPU model.
+CPU_METHODS = ("raw", "card")
+
+# Farm role for shots a CPU inference backend can take (t2v stills and low-priority rows); GPU workers take them too.
+LITE_ROLE = "lite"
+
+MASTER_PROFILES: Dict[str, str] = {
+    "h264": "delivery",
+    "prores": "prores_master",
+}
+
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Swavlamban 2025 offline render orchestrator")
     parser.add_argument("--storyboard", required=True, type=Path, help="Path to storyboard YAML")
     parser.add_argument("--outdir", required=True, type=Path, help="Output directory for renders")
     parser.add_argument("--gpus", default="0", help="Comma-separated GPU indices to expose (CUDA_VISIBLE_DEVICES)")
+    parser.add_argument(
+        "--backend",
+        choices=["auto", *sorted(backend_utils.BACKENDS)],
+        default="auto",
+        help="Inference backend for SDXL/SVD (auto = cuda when available, else cpu)",
+    )
+    parser.add_argument("--threads", type=int, default=0, help="Intra-op threads for CPU backends (0 = all usable cores)")
+    parser.add_argument("--numa-node", type=int, help="Pin this process to the CPUs of one NUMA node")
     parser.add_argument("--preset", choices=PRESET_RESOLUTIONS.keys(), default="4k", help="Output resolution preset")
-    parser.add_argument("--master", choices=("h264", "prores"), default="h264", help="Final master codec")
+    parser.add_argument("--master", choices=MASTER_PROFILES.keys(), default="h264", help="Final master codec")
+    parser.add_argument(
+        "--intermediate-profile",
+        choices=sorted(encoder_utils.PROFILES),
+        default="intermediate",
+        help="Encoder profile for per-shot intermediates and overlay passes",
+    )
+    parser.add_argument(
+        "--encode-jobs",
+        type=int,
+        default=max(1, min(4, (os.cpu_count() or 1) // 4)),
+        help="Number of scene encodes to run in parallel during final assembly",
+    )
+    parser.add_argument(
+        "--encoder-threads",
+        type=int,
+        default=0,
+        help="ffmpeg threads per encode (0 = split cores evenly across --encode-jobs)",
+    )
+    parser.add_argument(
+        "--ffmpeg-slots",
+        type=int,
+        default=0,
+        help="Maximum ffmpeg processes running at once across the whole render (0 = one per core)",
+    )
+    parser.add_argument(
+        "--frame-ring",
+        type=int,
+        default=0,
+        help="Hand img2vid frames to the encoder through N shared-memory slots while rendering continues (0 = whole-clip encode)",
+    )
+    parser.add_argument(
+        "--burn-captions",
+        action="store_true",
+        help="Burn captions into the master during the assembly encode (open captions)",
+    )
+    parser.add_argument(
+        "--deliverables",
+        type=deliverable_utils.parse,
+        help=(
+            "Comma-separated outputs encoded together from one decode of the assembled timeline "
+            f"(replaces --master): {', '.join(deliverable_utils.DELIVERABLES)}"
+        ),
+    )
+    parser.add_argument(
+        "--mixer",
+        choices=("numpy", "ffmpeg"),
+        default="numpy",
+        help="Mix voiceover and music in-process (numpy) or through the ffmpeg loudnorm/sidechaincompress chain",
+    )
+    parser.add_argument(
+        "--shot-range",
+        help="Render only these rows, e.g. '1-14' or '3,7,20-25' (for sharding across GPUs/hosts)",
+    )
+    parser.add_argument("--worker-id", help="Name reported in live progress (default: host:outdir)")
+    parser.add_argument(
+        "--farm-coordinator",
+        metavar="[HOST:]PORT",
+        help="Serve the storyboard's job graph to --farm-worker processes instead of rendering locally",
+    )
+    parser.add_argument(
+        "--farm-worker",
+        metavar="HOST:PORT",
+        help="Lease and run jobs from a farm coordinator; --outdir must be the coordinator's shared directory",
+    )
+    parser.add_argument(
+        "--farm-local-workers",
+        type=int,
+        default=0,
+        help="With --farm-coordinator, also start N workers on this host (same arguments)",
+    )
+    parser.add_argument(
+        "--farm-lease",
+        type=float,
+        default=farm_utils.DEFAULT_LEASE_S,
+        help="Seconds without a heartbeat before a worker's job is requeued",
+    )
+    parser.add_argument(
+        "--farm-roles",
+        help=f"Job roles this farm worker accepts (gpu,{LITE_ROLE},cpu; default: all, or {LITE_ROLE},cpu on a CPU backend)",
+    )
+    parser.add_argument(
+        "--status-root",
+        type=Path,
+        help="Directory whose worker status files the status endpoint aggregates (default: --outdir)",
+    )
+    parser.add_argument(
+        "--status-port",
+        type=int,
+        help=(
+            "Serve aggregated progress on http://127.0.0.1:PORT/status while this run lasts "
+            "(sharded batches run tools/status.py --serve instead)"
+        ),
+    )
+    parser.add_argument("--status-socket", type=Path, help="Serve aggregated progress over this Unix socket")
+    parser.add_argument(
+        "--costs-file",
+        type=Path,
+        help="Learned per-method cost file used for ETA (default: <outdir>/method_costs.json; share it across shards)",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-run every task even when its outputs are up to date with its inputs and settings",
+    )
+    parser.add_argument(
+        "--frame-store",
+        type=Path,
+        help=(
+            "Directory of stored SDXL stills and SVD frames keyed by generation inputs, reused when only duration, "
+            "fps, preset or overlays change (default: <outdir>/frame_store; share it between preview and master runs)"
+        ),
+    )
+    parser.add_argument("--no-frame-store", action="store_true", help="Always run the models and store nothing")
+    parser.add_argument(
+        "--sampler",
+        choices=sorted(sampler_utils.PROFILES),
+        help="SDXL sampler profile for every method, overriding project.samplers (e.g. a fast profile for drafts)",
+    )
+    parser.add_argument(
+        "--prompt-cache",
+        type=Path,
+        help="Directory of cached SDXL prompt embeddings (default: <outdir>/prompt_cache; safe to share between runs)",
+    )
+    parser.add_argument(
+        "--speaker-cache",
+        type=Path,
+        help="Directory of cached XTTS speaker conditioning (default: <outdir>/speaker_cache; safe to share between runs)",
+    )
+    parser.add_argument(
+        "--music-cache",
+        type=Path,
+        help="Directory of cached music bed segments (default: <outdir>/music_cache; safe to share between runs)",
+    )
+    parser.add_argument(
+        "--overlay-fonts",
+        type=lambda value: [item for item in value.split(",") if item],
+        help=(
+            "Comma-separated font stack for overlay text, first font covering a line wins (default: DejaVu Sans, "
+            "then Noto/Lohit Devanagari); relative paths are looked up under /usr/share/fonts and assets/fonts"
+        ),
+    )
+    parser.add_argument(
+        "--no-auto-cards",
+        action="store_true",
+        help="Keep t2v rows whose prompt is a title card on SDXL instead of rendering them as card shots",
+    )
+    parser.add_argument(
+        "--no-preview",
+        action="store_true",
+        help="Do not maintain the progressive HLS preview (<outdir>/preview/preview.m3u8) while rendering",
+    )
+    parser.add_argument(
+        "--storage-quota",
+        type=storage_utils.parse_size,
+        help=(
+            "Cap on the tracked artefacts under --outdir, e.g. 200G; least recently used intermediates are deleted "
+            "(cheap re-derivations before model output) and regenerated only when a task needs them again"
+        ),
+    )
+    parser.add_argument(
+        "--scratch-dir",
+        type=Path,
+        help="Directory for temporary files (default: /dev/shm when the file fits, else <outdir>/intermediate/scratch)",
+    )
+    parser.add_argument(
+        "--qc-retries",
+        type=int,
+        default=0,
+        help=(
+            "Regenerate t2v/img2vid shots that fail QC (black, frozen, flicker, wrong duration/fps/size) with a new "
+            "seed up to N times; shots that failed in an earlier run are queued again (0 = only report)"
+        ),
+    )
+    parser.add_argument("--no-qc", action="store_true", help="Skip shot QC (frame statistics and container checks)")
+    parser.add_argument("--dry-run", action="store_true", help="List the tasks that would run and why, then exit")
+    parser.add_argument(
+        "--fake-models",
+        action="store_true",
+        help="Replace SDXL/SVD/XTTS with deterministic CPU fakes (benchmarks and smoke tests)",
+    )
+    parser.add_argument(
+        "--profile",
+        help=(
+            "Profile selected shots, e.g. 'shots=17,23' (options: mode=cprofile,sample,py-spy interval=0.005); "
+            "writes pstats, folded stacks and ffmpeg -benchmark timings to <outdir>/profiles"
+        ),
+    )
     return parser.parse_args()
 
 
+def parse_shot_range(value: str | None) -> Set[int] | None:
+    if not value:
+        return None
+    rows: Set[int] = set()
+    for part in value.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, end = (int(x) for x in part.split("-", 1))
+            rows.update(range(start, end + 1))
+        else:
+            rows.add(int(part))
+    return rows
+
+
 def load_storyboard(path: Path) -> Dict:
     data = yaml.safe_load(path.read_text(encoding="utf-8"))
     if "project" not in data or "scenes" not in data:
@@ -71,24 +325,95 @@ def load_storyboard(path: Path) -> Dict:
 
 def ensure_env(args: argparse.Namespace, outdir: Path) -> Tuple[int, int]:
     os.environ["CUDA_VISIBLE_DEVICES"] = args.gpus
+    backend = backend_utils.configure(args.backend, args.threads, args.numa_node)
+    if backend.cpu and not args.fake_models:
+        console.log(f"Inference backend {backend.name} ({backend.threads} threads); SDXL capped at {backend.max_size}")
     width, height = PRESET_RESOLUTIONS[args.preset]
+    encoder_utils.set_stage_profile("shot", args.intermediate_profile)
+    encoder_utils.set_stage_profile("overlay", args.intermediate_profile)
+    if args.deliverables:
+        # The timeline is only a mezzanine for the deliverable encodes, so stream-copy the shots.
+        encoder_utils.set_stage_profile("assembly", args.intermediate_profile)
+    else:
+        encoder_utils.set_stage_profile("assembly", MASTER_PROFILES[args.master])
+    encoder_utils.set_threads(args.encoder_threads or encoder_utils.threads_per_job(args.encode_jobs))
+    framering.configure(args.frame_ring)
+    if not args.no_frame_store:
+        framestore.configure(args.frame_store or outdir / "frame_store")
+    ffmpeg_utils.configure(args.ffmpeg_slots)
+    prompt_cache.configure(args.prompt_cache or outdir / "prompt_cache")
+    speaker_cache.configure(args.speaker_cache or outdir / "speaker_cache")
+    music_utils.configure(args.music_cache or outdir / "music_cache")
+    textlayer.configure(outdir / "intermediate" / "text_layers", args.overlay_fonts)
+    qc_utils.configure(None if args.no_qc else outdir / "qc")
     outdir.mkdir(parents=True, exist_ok=True)
     (outdir / "intermediate").mkdir(parents=True, exist_ok=True)
+    storage_utils.configure(outdir, args.storage_quota, args.scratch_dir)
     return width, height
 
 
+# SVD settings. They are part of the frame store key (as is the SDXL sampler profile), so edit them here.
+SVD_SAMPLER: Dict[str, float] = {
+    "min_guidance_scale": 1.0,
+    "max_guidance_scale": 3.0,
+    "motion_bucket_id": 127,
+    "noise_aug_strength": 0.1,
+}
+SVD_MAX_FRAMES = 40
+
+
+def _store_key(store: framestore.FrameStore, shot: ShotSpec) -> str:
+    if shot.method == "t2v":
+        models = model_utils.generation_fingerprint("sdxl-base")
+        return store.key("t2v", models, shot.prompt, shot.seed, sampler_utils.profile_for("t2v").key())
+    # The base still's size follows the preset, but SVD resizes it to its own input size, so it is left out.
+    models = model_utils.generation_fingerprint("sdxl-base", "svd-img2vid")
+    profile = sampler_utils.profile_for("img2vid").key()
+    return store.key("img2vid", models, shot.prompt, shot.seed, profile, SVD_SAMPLER)
+
+
+def _sdxl_sampler(pipe, method: str) -> Dict[str, float]:
+    """Put ``pipe`` on the method's sampler profile and return its step/guidance arguments."""
+    profile = sampler_utils.profile_for(method)
+    model_utils.set_sdxl_scheduler(pipe, profile.scheduler, profile.karras)
+    return profile.pipe_kwargs()
+
+
+def stored_generation(shot: ShotSpec, width: int, height: int, fps: int) -> framestore.Entry | None:
+    """Frame store entry that can stand in for this shot's model calls, if there is one."""
+    store = framestore.default()
+    if store is None or shot.method not in ("t2v", "img2vid"):
+        return None
+    if shot.method == "t2v":
+        return store.lookup(_store_key(store, shot), size=backend_utils.current().generation_size(width, height))
+    return store.lookup(_store_key(store, shot), frames=min(max(int(round(shot.duration_s * fps)), 1), SVD_MAX_FRAMES))
+
+
 def render_t2v(shot: ShotSpec, width: int, height: int, fps: int, out_path: Path) -> None:
-    pipe = model_utils.get_t2i()
-    console.log(f"Generating still for row {shot.row_no} with SDXL")
-    image = pipe(
-        prompt=shot.prompt,
-        height=height,
-        width=width,
-        guidance_scale=7.0,
-        num_inference_steps=30,
-        output_type="pil",
-    ).images[0]
-    video_utils.kenburns_from_still(image, out_path, shot.duration_s, fps, size=(width, height))
+    store = framestore.default()
+    entry = stored_generation(shot, width, height, fps)
+    if entry is not None:
+        console.log(f"Reusing stored SDXL still for row {shot.row_no}")
+        image = store.load_still(entry)
+    else:
+        pipe = model_utils.get_t2i()
+        gen_w, gen_h = backend_utils.current().generation_size(width, height)
+        console.log(f"Generating still for row {shot.row_no} with SDXL")
+        with instrument.stage("sdxl", sampler=sampler_utils.profile_for("t2v").name):
+            image = pipe(
+                height=gen_h,
+                width=gen_w,
+                generator=model_utils.generator(shot.seed),
+                output_type="pil",
+                **prompt_cache.default().embeds(pipe, shot.prompt),
+                **_sdxl_sampler(pipe, "t2v"),
+            ).images[0]
+        if store is not None:
+            store.put_still(_store_key(store, shot), image, row_no=shot.row_no, prompt=shot.prompt)
+    if store is not None:
+        store.record(entry is not None, shot.row_no, shot.method)
+    with instrument.stage("encode", outputs=[out_path]):
+        video_utils.kenburns_from_still(image, out_path, shot.duration_s, fps, size=(width, height))
 
 
 def _safe_frame_dimensions(width: int, height: int) -> Tuple[int, int]:
@@ -97,53 +422,67 @@ def _safe_frame_dimensions(width: int, height: int) -> Tuple[int, int]:
     return max(64, safe_w), max(64, safe_h)
 
 
-def render_img2vid(shot: ShotSpec, width: int, height: int, fps: int, out_path: Path) -> None:
-    safe_w, safe_h = _safe_frame_dimensions(width, height)
+def _generate_img2vid(shot: ShotSpec, width: int, height: int, request_frames: int) -> np.ndarray:
+    """SDXL base frame animated by SVD, as uint8 (T, H, W, 3) at SVD's output size."""
+    safe_w, safe_h = _safe_frame_dimensions(*backend_utils.current().generation_size(width, height))
     base_pipe = model_utils.get_t2i()
     console.log(f"Generating base frame for row {shot.row_no}")
-    base_image = base_pipe(
-        prompt=shot.prompt,
-        height=safe_h,
-        width=safe_w,
-        guidance_scale=6.5,
-        num_inference_steps=25,
-        output_type="pil",
-    ).images[0]
+    with instrument.stage("sdxl", sampler=sampler_utils.profile_for("img2vid").name):
+        base_image = base_pipe(
+            height=safe_h,
+            width=safe_w,
+            generator=model_utils.generator(shot.seed),
+            output_type="pil",
+            **prompt_cache.default().embeds(base_pipe, shot.prompt),
+            **_sdxl_sampler(base_pipe, "img2vid"),
+        ).images[0]
 
     img2vid_pipe = model_utils.get_img2vid()
+    console.log(f"Animating row {shot.row_no} with Stable Video Diffusion ({request_frames} frames)")
+    with instrument.stage("svd", frames=request_frames):
+        result = img2vid_pipe(
+            image=base_image,
+            num_frames=request_frames,
+            generator=model_utils.generator(shot.seed),
+            **SVD_SAMPLER,
+        )
+    return frame_utils.to_uint8_hwc(frame_utils.first_batch(result.frames)[:request_frames])
+
+
+def render_img2vid(shot: ShotSpec, width: int, height: int, fps: int, out_path: Path) -> None:
+    store = framestore.default()
     target_frames = max(int(round(shot.duration_s * fps)), 1)
-    request_frames = min(target_frames, 40)
+    request_frames = min(target_frames, SVD_MAX_FRAMES)
+    entry = stored_generation(shot, width, height, fps)
+    if entry is not None:
+        # SVD's motion depends on the clip length, so a longer stored clip is retimed whole rather than cut short.
+        console.log(f"Reusing {entry.frames} stored SVD frames for row {shot.row_no}")
+        frames = store.load_frames(entry)
+    else:
+        frames = _generate_img2vid(shot, width, height, request_frames)
+        if store is not None:
+            store.put_frames(_store_key(store, shot), frames, row_no=shot.row_no, prompt=shot.prompt)
+    if store is not None:
+        store.record(entry is not None, shot.row_no, shot.method)
 
-    console.log(f"Animating row {shot.row_no} with Stable Video Diffusion ({request_frames} frames)")
-    result = img2vid_pipe(
-        image=base_image,
-        num_frames=request_frames,
-        min_guidance_scale=1.0,
-        max_guidance_scale=3.0,
-        motion_bucket_id=127,
-        noise_aug_strength=0.1,
-    )
-    frames = result.frames  # shape (batch, frames, channels, height, width)
-    if isinstance(frames, list):
-        frames = frames[0]
-    if hasattr(frames, "cpu"):
-        frames = frames.cpu().numpy()
-    if frames.shape[0] != request_frames:
-        frames = frames[:request_frames]
-    import numpy as np
-
-    frames = (frames * 255.0).clip(0, 255).astype("uint8").transpose(0, 2, 3, 1)
-    if frames.shape[0] != target_frames:
-        idx = np.linspace(0, frames.shape[0] - 1, target_frames).round().astype(int)
-        frames = frames[idx]
-    if (frames.shape[2], frames.shape[1]) != (width, height):
-        from PIL import Image
-
-        resized = []
-        for frame in frames:
-            resized.append(Image.fromarray(frame).resize((width, height), Image.BICUBIC))
-        frames = np.stack([np.array(f) for f in resized], axis=0)
-    video_utils.write_video(frames, out_path, fps)
+    if framering.default_slots():
+        # Resizing happens per frame inside the ring hand-off.
+        _encode_via_ring(frames, target_frames, width, height, fps, out_path)
+        return
+    with instrument.stage("retime_resize", frames=target_frames):
+        frames = frame_utils.retime_resize(frames, target_frames, (width, height))
+    with instrument.stage("encode", outputs=[out_path], frames=target_frames):
+        video_utils.write_video(frames, out_path, fps)
+
+
+def _encode_via_ring(frames, target_frames: int, width: int, height: int, fps: int, out_path: Path) -> None:
+    """Retime/resize each frame straight into a shared-memory slot while the ring encoder drains it."""
+    with instrument.stage("encode", outputs=[out_path], frames=target_frames, frame_ring=framering.default_slots()):
+        with framering.RingEncoder(out_path, width, height, fps) as encoder:
+            for src in frame_utils.retime_indices(frames.shape[0], target_frames):
+                slot, buf = encoder.acquire()
+                frame_utils.resize_into(frames[src], buf)
+                encoder.submit(slot)
 
 
 def render_raw(shot: ShotSpec, width: int, height: int, fps: int, out_path: Path) -> None:
@@ -152,32 +491,43 @@ def render_raw(shot: ShotSpec, width: int, height: int, fps: int, out_path: Path
     src = Path(shot.source_path)
     if not src.exists():
         raise FileNotFoundError(f"Raw media for shot {shot.row_no} not found: {src}")
-    subprocess.run(
-        [
-            "ffmpeg",
-            "-y",
-            "-i",
-            str(src),
-            "-vf",
-            f"scale={width}:{height}:force_original_aspect_ratio=decrease,pad={width}:{height}:(ow-iw)/2:(oh-ih)/2",
-            "-r",
-            str(fps),
-            "-c:v",
-            "libx264",
-            "-crf",
-            "10",
-            "-pix_fmt",
-            "yuv420p",
-            str(out_path),
-        ],
-        check=True,
-    )
+    with instrument.stage("encode", outputs=[out_path]):
+        _encode_raw(src, width, height, fps, out_path)
+
+
+def render_card(shot: ShotSpec, width: int, height: int, fps: int, out_path: Path) -> None:
+    if not shot.card or not shot.card.get("title"):
+        raise ValueError(f"Shot {shot.row_no} is marked as card but has no card title.")
+    console.log(f"Rendering title card for row {shot.row_no}: {shot.card['title']}")
+    with instrument.stage("encode", outputs=[out_path], template=shot.card.get("template", "navy")):
+        card_utils.render_card(shot.card, out_path, shot.duration_s, fps, size=(width, height))
+
+
+def _encode_raw(src: Path, width: int, height: int, fps: int, out_path: Path) -> None:
+    cmd = [
+        "ffmpeg",
+        "-y",
+        "-i",
+        str(src),
+        "-vf",
+        f"scale={width}:{height}:force_original_aspect_ratio=decrease,pad={width}:{height}:(ow-iw)/2:(oh-ih)/2",
+        "-r",
+        str(fps),
+        *encoder_utils.profile_for("shot").ffmpeg_args(),
+        str(out_path),
+    ]
+    ffmpeg_utils.run(cmd)
 
 
 def concat_videos(paths: Iterable[Path], out_path: Path) -> None:
+    with instrument.stage("concat", outputs=[out_path]):
+        _concat_copy(paths, out_path)
+
+
+def _concat_copy(paths: Iterable[Path], out_path: Path) -> None:
     concat_file = out_path.with_suffix(".txt")
     concat_file.write_text("".join(f"file '{p.as_posix()}'\n" for p in paths), encoding="utf-8")
-    subprocess.run(
+    ffmpeg_utils.run(
         [
             "ffmpeg",
             "-y",
@@ -190,12 +540,140 @@ def concat_videos(paths: Iterable[Path], out_path: Path) -> None:
             "-c",
             "copy",
             str(out_path),
-        ],
-        check=True,
+        ]
     )
     concat_file.unlink(missing_ok=True)
 
 
+def encode_scene(paths: List[Path], out_path: Path, captions: Path | None = None) -> None:
+    """Re-encode one scene's intermediates with the assembly profile, optionally burning in ``captions`` (ASS)."""
+    concat_file = out_path.with_suffix(".txt")
+    concat_file.write_text("".join(f"file '{p.as_posix()}'\n" for p in paths), encoding="utf-8")
+    burn = ["-vf", video_utils.caption_filter(captions)] if captions is not None else []
+    with instrument.stage("encode", outputs=[out_path], scene=out_path.stem, captions=captions is not None) as stage:
+        result = ffmpeg_utils.run(
+            [
+                "ffmpeg",
+                "-y",
+                "-f",
+                "concat",
+                "-safe",
+                "0",
+                "-i",
+                str(concat_file),
+                *burn,
+                *encoder_utils.profile_for("assembly").ffmpeg_args(),
+                str(out_path),
+            ]
+        )
+        stage.tags.update(speed=result.progress.get("speed"), queued_s=round(result.queued_s, 3))
+    concat_file.unlink(missing_ok=True)
+
+
+def assemble_timeline(
+    shots: List[RenderedShot],
+    intermediate_dir: Path,
+    jobs: int,
+    cues: List[subtitle_utils.Cue] | None = None,
+    size: Tuple[int, int] | None = None,
+    reuse_segments: bool = False,
+) -> Path:
+    """Build the video-only master timeline.
+
+    When intermediates already use the assembly profile they are stream-copied.
+    Otherwise each scene is encoded with the delivery profile in parallel and the
+    resulting segments are stream-copied together, so the slow high-quality encode
+    runs once per frame and scales across cores. Passing ``cues`` burns captions
+    in during that same scene encode (forcing it even when shots could be
+    stream-copied) instead of a separate full re-encode of the master.
+    ``reuse_segments`` keeps scene segments that already exist (farm workers
+    encode them as separate jobs).
+    """
+    assembly = encoder_utils.profile_for("assembly")
+    out_path = intermediate_dir / f"timeline_no_audio{assembly.extension}"
+    if not needs_scene_encodes(bool(cues)):
+        concat_videos([shot.video_path for shot in shots], out_path)
+        return out_path
+
+    plan = plan_scenes(shots, intermediate_dir)
+    pending = [
+        (paths, segment, write_scene_captions(cues, intermediate_dir, idx, start, size) if cues else None)
+        for idx, paths, segment, start in plan
+        if not (reuse_segments and segment.exists())
+    ]
+
+    burn = " with burned-in captions" if cues else ""
+    console.log(f"Encoding {len(pending)} scenes with '{assembly.name}' profile{burn} ({jobs} parallel jobs)")
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as pool:
+        futures = [pool.submit(encode_scene, paths, segment, captions) for paths, segment, captions in pending]
+        for future in futures:
+            future.result()
+
+    concat_videos([segment for _, _, segment, _ in plan], out_path)
+    return out_path
+
+
+def needs_scene_encodes(burn_captions: bool) -> bool:
+    """Whether assembly re-encodes per scene rather than stream-copying the shot intermediates."""
+    return encoder_utils.profile_for("shot") != encoder_utils.profile_for("assembly") or burn_captions
+
+
+def plan_scenes(shots: List[RenderedShot], intermediate_dir: Path) -> List[Tuple[int, List[Path], Path, float]]:
+    """Group shots into ``(scene_index, shot paths, segment path, start on the timeline)``."""
+    extension = encoder_utils.profile_for("assembly").extension
+    scenes: Dict[int, List[Path]] = {}
+    scene_starts: Dict[int, float] = {}
+    timeline = 0.0
+    for shot in shots:
+        scenes.setdefault(shot.scene_index, []).append(shot.video_path)
+        scene_starts.setdefault(shot.scene_index, timeline)
+        timeline += shot.spec.duration_s
+    return [
+        (idx, paths, intermediate_dir / f"scene_{idx:03d}{extension}", scene_starts[idx]) for idx, paths in scenes.items()
+    ]
+
+
+def write_scene_captions(
+    cues: List[subtitle_utils.Cue], intermediate_dir: Path, scene_index: int, start: float, size: Tuple[int, int] | None
+) -> Path:
+    path = intermediate_dir / f"scene_{scene_index:03d}.ass"
+    subtitle_utils.write_ass(cues, path, size=size or (3840, 2160), offset=start)
+    return path
+
+
+def collect_shots(
+    storyboard: Dict, rows: Set[int] | None = None, auto_cards: bool = True
+) -> List[Tuple[int, str, ShotSpec]]:
+    """Flatten the storyboard into (scene_index, scene_name, spec), optionally keeping only ``rows``.
+
+    With ``auto_cards`` t2v rows whose prompt describes a title card are rendered as ``card`` shots.
+    """
+    shots: List[Tuple[int, str, ShotSpec]] = []
+    for scene_index, scene in enumerate(storyboard["scenes"]):
+        scene_name = scene.get("name", "Unnamed Scene")
+        for shot_dict in scene["shots"]:
+            spec = ShotSpec(
+                row_no=int(shot_dict["row_no"]),
+                method=shot_dict["method"],
+                prompt=shot_dict["prompt"],
+                duration_s=float(shot_dict["duration_s"]),
+                narration=shot_dict["narration"],
+                overlay_text=shot_dict.get("overlay_text"),
+                source_path=shot_dict.get("path"),
+                card=shot_dict.get("card"),
+                seed=shot_dict.get("seed"),
+                priority=shot_dict.get("priority", "normal"),
+            )
+            if auto_cards and spec.method == "t2v":
+                title = card_utils.detect_title(spec.prompt, scene_name)
+                if title:
+                    console.log(f"Row {spec.row_no}: title-card prompt, rendering as a card ('{title}')")
+                    spec.method, spec.card = "card", {"title": title}
+            if rows is None or spec.row_no in rows:
+                shots.append((scene_index, scene_name, spec))
+    return shots
+
+
 def build_voice_blocks(shots: List[RenderedShot]) -> List[Dict]:
     blocks: List[Dict] = []
     timeline = 0.0
@@ -212,91 +690,873 @@ def build_voice_blocks(shots: List[RenderedShot]) -> List[Dict]:
     return blocks
 
 
+def rendered_shots(shots: List[Tuple[int, str, ShotSpec]], intermediate_dir: Path) -> List[RenderedShot]:
+    shot_ext = encoder_utils.profile_for("shot").extension
+    return [
+        RenderedShot(spec=spec, video_path=intermediate_dir / f"shot_{spec.row_no:03d}{shot_ext}", scene_index=idx)
+        for idx, _, spec in shots
+    ]
+
+
 def determine_master_path(outdir: Path, master: str) -> Path:
     if master == "h264":
         return outdir / "final_swavlamban.mp4"
     return outdir / "final_swavlamban.mov"
 
 
-def mux_audio(master_codec: str, video_path: Path, vo_wav: Path, music_wav: Path, out_path: Path) -> None:
-    audio_utils.mix_audio(str(video_path), str(vo_wav), str(music_wav), str(out_path), codec=master_codec)
+def mux_audio(
+    master_codec: str, video_path: Path, vo_wav: Path, music_wav: Path, out_path: Path, mixer: str = "numpy"
+) -> None:
+    with instrument.stage("mix", outputs=[out_path], mixer=mixer) as stage:
+        report = audio_utils.mix_audio(
+            str(video_path), str(vo_wav), str(music_wav), str(out_path), codec=master_codec, mixer=mixer
+        )
+        if report:
+            stage.tags.update(report)
+            console.log(
+                f"Mix: voiceover {report['vo_lufs']:.1f} LUFS, output {report['output_lufs']:.1f} LUFS, "
+                f"peak {report['output_peak_db']:.1f} dBFS, limiter up to {report['max_limit_db']:.1f} dB"
+            )
 
 
 def main() -> None:
     args = parse_args()
+    if args.fake_models:
+        from utils import fakes
+
+        fakes.install()
     storyboard = load_storyboard(args.storyboard)
     fps = storyboard["project"].get("fps", 30)
     voice_choice = storyboard["project"].get("voice", "male")
     music_tag = storyboard["project"].get("music_tag", "")
+    sampler_utils.configure(storyboard["project"].get("samplers"), args.sampler)
 
     width, height = ensure_env(args, args.outdir)
     intermediate_dir = args.outdir / "intermediate"
+    events_path = args.outdir / "run_events.jsonl"
+    run_id = instrument.configure(events_path)
+    if args.profile:
+        profiling.configure(profiling.parse_spec(args.profile, args.outdir / "profiles"))
+
+    shots = collect_shots(storyboard, parse_shot_range(args.shot_range), auto_cards=not args.no_auto_cards)
+    if not shots:
+        raise ValueError(f"No storyboard rows match --shot-range {args.shot_range!r}")
+    if not args.no_preview and preview_utils.supported():
+        preview_utils.configure(
+            args.outdir / "preview", [(spec.row_no, spec.duration_s) for _, _, spec in shots], (width, height), fps
+        )
+    if args.dry_run:
+        print_plan(render_scheduler(args, shots, width, height, fps, voice_choice, music_tag, intermediate_dir))
+        return
+    publisher = progress_utils.ProgressPublisher(
+        args.outdir,
+        [(spec.row_no, spec.method, spec.duration_s) for _, _, spec in shots],
+        worker_id=args.worker_id,
+        costs_path=args.costs_file,
+    )
+    instrument.add_listener(publisher)
+    publisher.publish()
+    if args.status_port or args.status_socket:
+        server = progress_utils.start_server(
+            args.status_root or args.outdir, port=args.status_port, unix_socket=args.status_socket
+        )
+        if server is not None:
+            console.log(f"Serving live progress on {args.status_socket or f'http://127.0.0.1:{args.status_port}/status'}")
+
+    if args.farm_worker:
+        run_farm_worker(args, shots, width, height, fps, voice_choice, music_tag, intermediate_dir)
+        return
+    if args.farm_coordinator:
+        run_farm_coordinator(args, shots, fps, intermediate_dir)
+        return
 
     console.rule("[bold blue]Swavlamban 2025 Offline Render")
+    ok = False
+    try:
+        scheduler = render_scheduler(args, shots, width, height, fps, voice_choice, music_tag, intermediate_dir)
+        stale = {name for name, reason in scheduler.plan() if reason != "up to date"}
+        expect_prompts([spec for _, _, spec in shots if f"shot:{spec.row_no}" in stale], width, height, fps)
+        render_storyboard(args, scheduler, intermediate_dir)
+        ok = True
+    finally:
+        summary = publisher.finish(ok)
+        instrument.remove_listener(publisher)
+        md_path, html_path = report_utils.write_report(events_path, args.outdir, run_id)
+        console.print(f"Run report: {md_path} ({html_path.name})")
+        profile_summary = profiling.write_summary()
+        if profile_summary is not None:
+            console.print(f"Shot profiles: {profile_summary.parent}")
+        console.print(f"ETA mean absolute error: {summary['mean_abs_error_s']:.0f} s over {summary['predictions']} updates")
+
+
+def expect_prompts(specs: Iterable[ShotSpec], width: int, height: int, fps: int) -> None:
+    """Register the SDXL prompts these shots will run, so the first SDXL call encodes them all in one pass."""
+    prompts = {
+        spec.prompt
+        for spec in specs
+        if spec.method in ("t2v", "img2vid") and stored_generation(qc_seeded(spec), width, height, fps) is None
+    }
+    if prompts:
+        pending = prompt_cache.default().expect(sorted(prompts))
+        console.log(f"Prompt cache: {len(prompts) - pending} of {len(prompts)} SDXL prompts already encoded")
+
+
+def render_shot(spec: ShotSpec, width: int, height: int, fps: int, out_path: Path) -> None:
+    if spec.method == "t2v":
+        render_t2v(spec, width, height, fps, out_path)
+    elif spec.method == "img2vid":
+        render_img2vid(spec, width, height, fps, out_path)
+    elif spec.method == "raw":
+        render_raw(spec, width, height, fps, out_path)
+    elif spec.method == "card":
+        render_card(spec, width, height, fps, out_path)
+    else:
+        raise ValueError(f"Unsupported method '{spec.method}' in row {spec.row_no}")
+
+
+def qc_seeded(spec: ShotSpec) -> ShotSpec:
+    """The row with the seed QC last rendered it with (the storyboard's unless a regeneration replaced it)."""
+    report = qc_utils.last_render(spec.row_no, spec.prompt, spec.seed)
+    if not report or not report["attempt"]:
+        return spec
+    return replace(spec, seed=qc_utils.seed_for(spec.row_no, spec.seed, report["attempt"]))
+
 
-    rendered: List[RenderedShot] = []
+def _failed_qc(spec: ShotSpec, report: Dict | None) -> bool:
+    return spec.method in qc_utils.RESEED_METHODS and report is not None and not report["passed"]
 
+
+def render_checked(spec: ShotSpec, width: int, height: int, fps: int, out_path: Path, retries: int = 0) -> None:
+    """Render a shot while QC taps its frames, then check the file; failing generated shots get new seeds.
+
+    A row keeps the seed it was last rendered with; with ``retries`` a row
+    whose last render failed QC moves on to the next seed instead of repeating it.
+    """
+    if not qc_utils.enabled():
+        render_shot(spec, width, height, fps, out_path)
+        return
+    previous = qc_utils.last_render(spec.row_no, spec.prompt, spec.seed)
+    attempt = previous["attempt"] if previous else 0
+    if retries and _failed_qc(spec, previous):
+        attempt += 1
+    for tries_left in range(retries, -1, -1):
+        seed = qc_utils.seed_for(spec.row_no, spec.seed, attempt)
+        with qc_utils.tap() as frame_tap:
+            render_shot(replace(spec, seed=seed), width, height, fps, out_path)
+        with instrument.stage("qc"):
+            report = qc_utils.check(
+                out_path, frame_tap, row_no=spec.row_no, method=spec.method, prompt=spec.prompt,
+                storyboard_seed=spec.seed, seed=seed, attempt=attempt, size=(width, height), fps=fps,
+                duration_s=spec.duration_s,
+            )
+        for issue in report.warnings:
+            console.log(f"[yellow]Row {spec.row_no} QC: {issue.detail}[/yellow]")
+        if report.passed:
+            return
+        failures = "; ".join(issue.detail for issue in report.failures)
+        if not tries_left or spec.method not in qc_utils.RESEED_METHODS:
+            console.log(f"[red]Row {spec.row_no} failed QC: {failures}[/red]")
+            return
+        attempt += 1
+        console.log(f"[yellow]Row {spec.row_no} failed QC ({failures}); regenerating with a new seed[/yellow]")
+
+
+def qc_requeue(specs: Iterable[ShotSpec], retries: int) -> Dict[str, str]:
+    """Shot tasks to run again because their last render failed QC and a new seed may fix it."""
+    requeue: Dict[str, str] = {}
+    if not retries or not qc_utils.enabled():
+        return requeue
+    for spec in specs:
+        report = qc_utils.last_render(spec.row_no, spec.prompt, spec.seed)
+        if _failed_qc(spec, report):
+            checks = ", ".join(issue["check"] for issue in report["issues"] if issue["severity"] == "fail")
+            requeue[f"shot:{spec.row_no}"] = f"failed QC ({checks})"
+    return requeue
+
+
+def render_scheduler(
+    args: argparse.Namespace,
+    shots: List[Tuple[int, str, ShotSpec]],
+    width: int,
+    height: int,
+    fps: int,
+    voice_choice: str,
+    music_tag: str,
+    intermediate_dir: Path,
+) -> dag_utils.Scheduler:
+    rendered = rendered_shots(shots, intermediate_dir)
+    tasks = build_render_tasks(args, rendered, width, height, fps, voice_choice, music_tag, intermediate_dir)
+    return dag_utils.Scheduler(
+        dag_utils.Graph(tasks),
+        {"gpu": 1, "cpu": max(args.encode_jobs, 1)},
+        state_path=intermediate_dir / "dag_state.json",
+        force=args.force,
+        log=console.log,
+        evicted=storage_utils.default().evicted(),
+        requeue=qc_requeue([spec for _, _, spec in shots], args.qc_retries),
+    )
+
+
+def print_plan(scheduler: dag_utils.Scheduler) -> None:
+    for name, reason in scheduler.plan():
+        console.print(f"{name:<16} {scheduler.graph.tasks[name].pool:<4} {reason}")
+
+
+def render_storyboard(args: argparse.Namespace, scheduler: dag_utils.Scheduler, intermediate_dir: Path) -> None:
+    graph = scheduler.graph
+    preview = preview_utils.default()
+    if preview is not None:
+        preview.write()
+        console.log(f"Timeline preview: {preview.path} (reopen in an HLS player to see newly finished shots)")
     with Progress(
         SpinnerColumn(),
         TextColumn("[progress.description]{task.description}"),
         TimeElapsedColumn(),
         console=console,
     ) as progress:
-        task = progress.add_task("Rendering storyboard", total=None)
-        for scene in storyboard["scenes"]:
-            scene_name = scene.get("name", "Unnamed Scene")
-            console.log(f"[green]Scene: {scene_name}")
-            for shot_dict in scene["shots"]:
-                spec = ShotSpec(
-                    row_no=int(shot_dict["row_no"]),
-                    method=shot_dict["method"],
-                    prompt=shot_dict["prompt"],
-                    duration_s=float(shot_dict["duration_s"]),
-                    narration=shot_dict["narration"],
-                    overlay_text=shot_dict.get("overlay_text"),
-                    source_path=shot_dict.get("path"),
+        # A shot counts as rendered once its final intermediate exists (after the overlay, if any).
+        dependents = graph.dependents()
+        shot_tasks = {
+            name
+            for name, task in graph.tasks.items()
+            if task.kind in ("shot", "overlay") and not any(graph.tasks[dep].kind == "overlay" for dep in dependents[name])
+        }
+        task = progress.add_task("Rendering storyboard", total=len(shot_tasks))
+
+        def on_finish(result: dag_utils.TaskResult) -> None:
+            if result.name in shot_tasks and result.state in ("done", "skipped"):
+                progress.advance(task)
+            if result.state == "done":
+                track_storage(scheduler, result.name)
+
+        scheduler.on_finish = on_finish
+        results = scheduler.run()
+    storage = storage_utils.default()
+    storage.enforce()
+    usage = storage.summary()
+    instrument.emit({"event": "storage", **usage})
+
+    skipped = sum(result.state == "skipped" for result in results.values())
+    console.rule("[bold green]Render complete")
+    console.print(f"Tasks: {len(results) - skipped} run, {skipped} up to date (cpu pool {scheduler.pools['cpu']})")
+    store = framestore.default()
+    if store is not None and store.hits + store.misses:
+        console.print(
+            f"Frame store: {store.hits} of {store.hits + store.misses} generated shots re-derived from stored frames"
+        )
+    cache = prompt_cache.default()
+    if cache.hits or cache.encoded:
+        console.print(f"Prompt cache: {cache.encoded} prompts encoded, {cache.hits} SDXL calls served from the cache")
+    voices = speaker_cache.default()
+    if voices.hits or voices.computed:
+        console.print(f"Speaker cache: {voices.computed} voices conditioned, {voices.hits} served from the cache")
+    if qc_utils.enabled():
+        rows = [int(name.split(":")[1]) for name, task in graph.tasks.items() if task.kind == "shot"]
+        reports = [report for report in map(qc_utils.last_report, rows) if report is not None]
+        failed = [str(report["row_no"]) for report in reports if not report["passed"]]
+        reseeded = sum(1 for report in reports if report["attempt"])
+        console.print(
+            f"Shot QC: {len(reports) - len(failed)} of {len(reports)} shots passed"
+            + (f", failing rows {', '.join(failed)}" if failed else "")
+            + (f", {reseeded} on a regenerated seed" if reseeded else "")
+            + f" ({args.outdir / 'qc'})"
+        )
+    console.print("Critical path:")
+    for line in dag_utils.format_critical_path(dag_utils.critical_path(graph, results)):
+        console.print(f"  {line}")
+    for final_path in master_paths(args, intermediate_dir):
+        if final_path.suffix != ".wav":
+            console.print(f"Final master: {final_path}")
+    console.print(f"Captions: {args.outdir / 'captions.srt'}")
+    if preview is not None:
+        done, total = preview.status()
+        console.print(f"Timeline preview: {preview.path} ({done} of {total} shots)")
+    size = storage_utils.format_size
+    quota = f" of {size(usage['quota'])} quota" if usage["quota"] is not None else ""
+    evicted = f", {usage['evicted_files']} evicted this run ({size(usage['evicted_bytes'])})" if usage["evicted_files"] else ""
+    console.print(
+        f"Storage: {size(usage['usage'])} tracked{quota}{evicted}; artefacts written {size(usage['artefact_bytes_written'])}, "
+        f"read {size(usage['artefact_bytes_read'])}; block I/O written {size(usage['block_bytes_written'])}, "
+        f"read {size(usage['block_bytes_read'])}"
+    )
+
+
+def storage_tier(task: dag_utils.Task, path: Path, outdir: Path) -> str:
+    """Retention tier of a task output: model output, a cheap re-derivation, or something a person looks at."""
+    if path.parent == outdir or task.kind == "preview":
+        return "kept"
+    if task.kind in ("shot", "tts"):
+        return "generated"
+    return "derived"
+
+
+def track_storage(scheduler: dag_utils.Scheduler, name: str) -> None:
+    """Record a finished task's outputs and reads, then evict down to the quota around what pending tasks need."""
+    storage = storage_utils.default()
+    task = scheduler.graph.tasks[name]
+    storage.touch(task.inputs)
+    for path in task.outputs:
+        storage.record([path], name, storage_tier(task, path, storage.root))
+    pending = [scheduler.graph.tasks[other] for other, result in scheduler.results.items() if result.state == "pending"]
+    if storage.enforce(path for other in pending for path in other.inputs + other.outputs):
+        scheduler.evicted.update(storage.evicted())
+
+
+def _base_path(shot: RenderedShot) -> Path:
+    """Where a shot with overlay text is rendered before its overlay task, so a re-run overlay never stacks text twice."""
+    if not shot.spec.overlay_text:
+        return shot.video_path
+    return shot.video_path.with_name(f"{shot.video_path.stem}_base{shot.video_path.suffix}")
+
+
+def report_text_layer(row_no: int, layer: textlayer.TextLayer) -> None:
+    for line in layer.uncovered:
+        console.log(f"[yellow]Row {row_no}: no overlay font covers {line!r}; add one with --overlay-fonts[/yellow]")
+    for line in layer.unshaped:
+        console.log(f"[yellow]Row {row_no}: {line!r} drawn unshaped (Pillow was built without raqm)[/yellow]")
+
+
+def build_render_tasks(
+    args: argparse.Namespace,
+    rendered: List[RenderedShot],
+    width: int,
+    height: int,
+    fps: int,
+    voice_choice: str,
+    music_tag: str,
+    intermediate_dir: Path,
+) -> List[dag_utils.Task]:
+    """Task graph of a local render.
+
+    Shots (GPU pool; raw footage, cards and shots whose model output is
+    already in the frame store on the CPU pool) feed overlays and scene
+    encodes; the voiceover, its captions and the music bed depend on the
+    storyboard text only, so they run alongside the shots. Preview tasks
+    stream-copy each finished shot (and the voiceover) into the HLS preview.
+    The master task concatenates the timeline and mixes/muxes once everything
+    has landed.
+    """
+    size = PRESET_RESOLUTIONS[args.preset]
+    shot_profile = encoder_utils.profile_for("shot").name
+    assembly_profile = encoder_utils.profile_for("assembly").name
+    voice_blocks = build_voice_blocks(rendered)
+    vo_wav = intermediate_dir / "voiceover.wav"
+    vo_timings = intermediate_dir / "voiceover_timings.json"
+    music_wav = intermediate_dir / "music.wav"
+    caption_paths = [args.outdir / f"captions{ext}" for ext in (".srt", ".vtt", ".ass")]
+    burn = args.burn_captions and not args.deliverables
+    scene_encodes = needs_scene_encodes(burn)
+    plan = plan_scenes(rendered, intermediate_dir) if scene_encodes else []
+    scene_captions = {idx: intermediate_dir / f"scene_{idx:03d}.ass" for idx, _, _, _ in plan} if burn else {}
+    tasks: List[dag_utils.Task] = []
+
+    for shot in rendered:
+        spec, base = shot.spec, _base_path(shot)
+
+        def run_shot(spec: ShotSpec = spec, base: Path = base) -> None:
+            with instrument.stage("shot", row_no=spec.row_no, method=spec.method, outputs=[base]):
+                with profiling.shot(spec.row_no):
+                    render_checked(spec, width, height, fps, base, args.qc_retries)
+
+        tasks.append(
+            dag_utils.Task(
+                f"shot:{spec.row_no}",
+                "shot",
+                run_shot,
+                inputs=[Path(spec.source_path)] if spec.method == "raw" and spec.source_path else [],
+                outputs=[base],
+                pool="cpu" if spec.method in CPU_METHODS or stored_generation(qc_seeded(spec), width, height, fps) else "gpu",
+                signature=dag_utils.signature(
+                    spec.method, spec.prompt, spec.duration_s, spec.source_path, spec.card, spec.seed, size, fps,
+                    shot_profile, args.fake_models,
+                    sampler_utils.profile_for(spec.method).key() if spec.method in sampler_utils.METHODS else None,
+                    backend_utils.current().generation_size(*size) if spec.method in sampler_utils.METHODS else None,
+                ),
+            )
+        )
+        if spec.overlay_text:
+
+            def run_overlay(shot: RenderedShot = shot, base: Path = base) -> None:
+                with instrument.stage("overlay", row_no=shot.spec.row_no, outputs=[shot.video_path]) as stage:
+                    layer = video_utils.overlay_texts(base, shot.spec.overlay_text, size, out_path=shot.video_path)
+                    stage.tags["layout"] = layer.layout
+                report_text_layer(shot.spec.row_no, layer)
+
+            tasks.append(
+                dag_utils.Task(
+                    f"overlay:{spec.row_no}",
+                    "overlay",
+                    run_overlay,
+                    inputs=[base],
+                    outputs=[shot.video_path],
+                    signature=dag_utils.signature(
+                        spec.overlay_text, shot_profile, size, textlayer.CACHE_VERSION, textlayer.layout_engine(),
+                        [path.name for path in textlayer.resolve_fonts()],
+                    ),
                 )
-                out_path = intermediate_dir / f"shot_{spec.row_no:03d}.mp4"
+            )
 
-                if spec.method == "t2v":
-                    render_t2v(spec, width, height, fps, out_path)
-                elif spec.method == "img2vid":
-                    render_img2vid(spec, width, height, fps, out_path)
-                elif spec.method == "raw":
-                    render_raw(spec, width, height, fps, out_path)
-                else:
-                    raise ValueError(f"Unsupported method '{spec.method}' in row {spec.row_no}")
+    def run_tts() -> None:
+        render_voiceover(rendered, voice_choice, intermediate_dir)
 
-                if spec.overlay_text:
-                    video_utils.overlay_texts(out_path, spec.overlay_text)
+    tasks.append(
+        dag_utils.Task(
+            "tts",
+            "tts",
+            run_tts,
+            inputs=audio_utils.reference_clips(voice_choice),
+            outputs=[vo_wav, vo_timings],
+            pool="gpu",
+            signature=dag_utils.signature(
+                [(block["text"], block["duration"]) for block in voice_blocks], voice_choice, args.fake_models,
+                audio_utils.MAX_SENTENCE_CHARS, audio_utils.BLOCK_GAP_S, audio_utils.SENTENCE_GAP_S,
+            ),
+        )
+    )
 
-                rendered.append(RenderedShot(spec=spec, video_path=out_path))
-                progress.advance(task)
+    def run_captions() -> None:
+        timings = json.loads(vo_timings.read_text(encoding="utf-8"))
+        console.log("Writing captions...")
+        with instrument.stage("captions", outputs=caption_paths):
+            cues = caption_cues(voice_blocks, timings, vo_wav)
+            subtitle_utils.write_captions(cues, args.outdir / "captions", size=size)
+            for idx, _, _, start in plan:
+                if idx in scene_captions:
+                    write_scene_captions(cues, intermediate_dir, idx, start, size)
+
+    tasks.append(
+        dag_utils.Task(
+            "captions",
+            "captions",
+            run_captions,
+            inputs=[vo_wav, vo_timings],
+            outputs=caption_paths + list(scene_captions.values()),
+            signature=dag_utils.signature(size, burn, [(s.scene_index, s.spec.duration_s) for s in rendered]),
+        )
+    )
+
+    def run_music() -> None:
+        make_music_bed(music_tag, music_wav, sum(block["duration"] for block in voice_blocks))
+
+    tasks.append(
+        dag_utils.Task(
+            "music",
+            "music",
+            run_music,
+            inputs=music_utils.stem_files(music_tag),
+            outputs=[music_wav],
+            signature=dag_utils.signature(
+                music_tag, sum(block["duration"] for block in voice_blocks), music_utils.bed_source(music_tag)
+            ),
+        )
+    )
+
+    preview = preview_utils.default()
+    if preview is not None:
+        # Stream copies into the HLS preview; slates stand in for shots until their intermediate lands.
+        tasks.append(
+            dag_utils.Task(
+                "preview:slates",
+                "preview",
+                preview.add_slates,
+                outputs=[preview.pending_playlist(shot.spec.row_no) for shot in rendered],
+                signature=dag_utils.signature(sorted(preview.starts.items()), size, fps, shot_profile),
+            )
+        )
+        for shot in rendered:
+
+            def run_preview(shot: RenderedShot = shot) -> None:
+                preview.add_shot(shot.spec.row_no, shot.video_path)
+
+            tasks.append(
+                dag_utils.Task(
+                    f"preview:{shot.spec.row_no}",
+                    "preview",
+                    run_preview,
+                    inputs=[shot.video_path],
+                    outputs=[preview.shot_playlist(shot.spec.row_no)],
+                    signature=dag_utils.signature(preview.starts[shot.spec.row_no]),
+                )
+            )
 
-    concat_path = intermediate_dir / "timeline_no_audio.mp4"
-    concat_videos([shot.video_path for shot in rendered], concat_path)
+        def run_preview_vo() -> None:
+            preview.add_voiceover(vo_wav)
 
+        tasks.append(
+            dag_utils.Task(
+                "preview:vo",
+                "preview",
+                run_preview_vo,
+                inputs=[vo_wav],
+                outputs=[preview.audio_playlist],
+            )
+        )
+
+    timeline_sources: List[Path] = []
+    for idx, paths, segment, _ in plan:
+        captions = scene_captions.get(idx)
+
+        def run_scene(paths: List[Path] = paths, segment: Path = segment, captions: Path | None = captions) -> None:
+            encode_scene(paths, segment, captions)
+
+        tasks.append(
+            dag_utils.Task(
+                f"scene:{idx}",
+                "scene",
+                run_scene,
+                inputs=paths + ([captions] if captions else []),
+                outputs=[segment],
+                signature=dag_utils.signature(assembly_profile),
+            )
+        )
+        timeline_sources.append(segment)
+    if not scene_encodes:
+        timeline_sources = [shot.video_path for shot in rendered]
+
+    timeline = intermediate_dir / f"timeline_no_audio{encoder_utils.profile_for('assembly').extension}"
+    master_captions = [args.outdir / "captions.ass"] if args.deliverables and args.burn_captions else []
+
+    def run_master() -> None:
+        with instrument.stage("finalise"):
+            concat_videos(timeline_sources, timeline)
+            master_outputs(args, timeline, vo_wav, music_wav, intermediate_dir)
+
+    tasks.append(
+        dag_utils.Task(
+            "master",
+            "master",
+            run_master,
+            inputs=timeline_sources + [vo_wav, music_wav] + master_captions,
+            outputs=[timeline] + master_paths(args, intermediate_dir),
+            signature=dag_utils.signature(
+                args.master, [item.name for item in args.deliverables or []], args.mixer, args.burn_captions, assembly_profile
+            ),
+        )
+    )
+    return tasks
+
+
+def render_voiceover(
+    rendered: List[RenderedShot], voice_choice: str, intermediate_dir: Path
+) -> Tuple[List[Dict], Path, List[Dict]]:
+    """Synthesise voiceover.wav and its block timings (also saved as voiceover_timings.json)."""
     voice_blocks = build_voice_blocks(rendered)
     vo_wav = intermediate_dir / "voiceover.wav"
     console.log("Synthesizing voiceover...")
-    audio_utils.synthesize_voiceover(voice_blocks, vo_wav, voice=voice_choice)
+    with instrument.stage("tts", outputs=[vo_wav], blocks=len(voice_blocks)):
+        vo_timings = audio_utils.synthesize_voiceover(voice_blocks, vo_wav, voice=voice_choice)
+    (intermediate_dir / "voiceover_timings.json").write_text(json.dumps(vo_timings, indent=2), encoding="utf-8")
+    return voice_blocks, vo_wav, vo_timings
+
+
+def finish_master(
+    args: argparse.Namespace,
+    rendered: List[RenderedShot],
+    voice_blocks: List[Dict],
+    vo_wav: Path,
+    vo_timings: List[Dict],
+    music_tag: str,
+    intermediate_dir: Path,
+    reuse_segments: bool = False,
+) -> Tuple[List[Path], Path]:
+    """Write captions, assemble the timeline, build the music bed and mix/mux the master(s)."""
+    size = PRESET_RESOLUTIONS[args.preset]
+    # Captions come before assembly so they can be burned in during the scene encodes.
+    subtitles_path = args.outdir / "captions.srt"
+    console.log("Writing captions...")
+    with instrument.stage("captions", outputs=[subtitles_path]):
+        cues = caption_cues(voice_blocks, vo_timings, vo_wav)
+        subtitle_utils.write_captions(cues, args.outdir / "captions", size=size)
+
+    # With deliverables, captions are burned once in the shared decode instead of per scene.
+    burn_in_assembly = args.burn_captions and not args.deliverables
+    concat_path = assemble_timeline(
+        rendered,
+        intermediate_dir,
+        args.encode_jobs,
+        cues=cues if burn_in_assembly else None,
+        size=size,
+        reuse_segments=reuse_segments,
+    )
 
     music_wav = intermediate_dir / "music.wav"
-    total_duration = sum(block["duration"] for block in voice_blocks)
-    console.log("Preparing music bed (silence placeholder)...")
-    audio_utils.make_music(music_tag, music_wav, total_duration)
+    make_music_bed(music_tag, music_wav, sum(block["duration"] for block in voice_blocks))
+    return master_outputs(args, concat_path, vo_wav, music_wav, intermediate_dir), subtitles_path
+
+
+def make_music_bed(music_tag: str, music_wav: Path, duration: float) -> None:
+    console.log(f"Preparing music bed ({music_tag or 'untagged'})...")
+    with instrument.stage("music", outputs=[music_wav]) as stage:
+        stage.tags["source"] = audio_utils.make_music(music_tag, music_wav, duration)
+
+
+def master_paths(args: argparse.Namespace, intermediate_dir: Path) -> List[Path]:
+    """Files written by ``master_outputs``: the master or the deliverables (plus their shared mix)."""
+    if args.deliverables:
+        return [item.path(args.outdir) for item in args.deliverables] + [intermediate_dir / "mix.wav"]
+    return [determine_master_path(args.outdir, args.master)]
+
+
+def master_outputs(
+    args: argparse.Namespace, timeline: Path, vo_wav: Path, music_wav: Path, intermediate_dir: Path
+) -> List[Path]:
+    """Mix the audio and mux it with the assembled timeline into the master or the deliverables."""
+    if args.deliverables:
+        mix_wav = intermediate_dir / "mix.wav"
+        console.log(f"Mixing final audio ({args.mixer})...")
+        with instrument.stage("mix", outputs=[mix_wav], mixer=args.mixer) as stage:
+            stage.tags.update(audio_utils.render_mix(vo_wav, music_wav, mix_wav, mixer=args.mixer) or {})
+        captions = args.outdir / "captions.ass" if args.burn_captions else None
+        size = PRESET_RESOLUTIONS[args.preset]
+        return encode_deliverables(args, timeline, mix_wav, size, captions)
 
     final_path = determine_master_path(args.outdir, args.master)
     console.log(f"Mixing final audio and muxing into {final_path.name}...")
-    mux_audio(args.master, concat_path, vo_wav, music_wav, final_path)
+    mux_audio(args.master, timeline, vo_wav, music_wav, final_path, mixer=args.mixer)
+    return [final_path]
 
-    subtitles_path = args.outdir / "captions.srt"
-    console.log("Writing captions...")
-    subtitle_utils.write_srt(voice_blocks, subtitles_path)
 
+def encode_deliverables(
+    args: argparse.Namespace,
+    timeline: Path,
+    mix_wav: Path,
+    size: Tuple[int, int],
+    captions: Path | None,
+) -> List[Path]:
+    """Encode all requested deliverables from one decode of the timeline and log per-deliverable timings."""
+    deliverables = args.deliverables
+    threads = args.encoder_threads or encoder_utils.threads_per_job(len(deliverables))
+    names = ", ".join(item.name for item in deliverables)
+    console.log(f"Encoding {len(deliverables)} deliverables from one decode ({names})...")
+    paths = [item.path(args.outdir) for item in deliverables]
+    with instrument.stage("deliver", outputs=paths, deliverables=names):
+        results = deliverable_utils.encode(timeline, mix_wav, deliverables, args.outdir, size, captions, threads)
+    for name, result in results.items():
+        instrument.emit({"event": "deliverable", "name": name, **result})
+        console.log(
+            f"  {name:<10} done at {result['wall_s']:7.1f} s, encoder CPU {result['cpu_s']:7.1f} s, "
+            f"{result['bytes'] / 1e6:8.1f} MB"
+        )
+    return paths
+
+
+def caption_cues(voice_blocks: List[Dict], vo_timings: List[Dict], vo_wav: Path) -> List[subtitle_utils.Cue]:
+    wav, sample_rate = sf.read(str(vo_wav), dtype="float32", always_2d=False)
+    return subtitle_utils.build_cues(voice_blocks, vo_timings, wav=wav, sample_rate=sample_rate, word_timings=True)
+
+
+# -- render farm -------------------------------------------------------------
+def _lease_path(path: Path, lease: str) -> Path:
+    """Per-attempt temporary name; outputs are renamed into place only when the attempt succeeds."""
+    return path.with_name(f"{path.stem}.{lease[:8]}{path.suffix}")
+
+
+def build_farm_jobs(
+    args: argparse.Namespace, rendered: List[RenderedShot], fps: int, intermediate_dir: Path
+) -> List[farm_utils.Job]:
+    """Job graph: shot -> overlay -> scene encode -> master, with TTS feeding captions and the mix."""
+    jobs: List[farm_utils.Job] = [farm_utils.Job("tts", "tts", role="gpu")]
+    width, height = PRESET_RESOLUTIONS[args.preset]
+    ready: Dict[int, str] = {}
+    for shot in rendered:
+        row = shot.spec.row_no
+        if shot.spec.method in CPU_METHODS or stored_generation(qc_seeded(shot.spec), width, height, fps):
+            role = "cpu"
+        elif shot.spec.method == "t2v" or shot.spec.priority == "low":
+            role = LITE_ROLE
+        else:
+            role = "gpu"
+        jobs.append(farm_utils.Job(f"shot:{row}", "shot", {"row": row}, role=role))
+        ready[row] = f"shot:{row}"
+        if shot.spec.overlay_text:
+            jobs.append(farm_utils.Job(f"overlay:{row}", "overlay", {"row": row}, deps=[f"shot:{row}"]))
+            ready[row] = f"overlay:{row}"
+
+    burn = args.burn_captions and not args.deliverables
+    master_deps = ["tts"]
+    if needs_scene_encodes(burn):
+        rows_by_scene: Dict[int, List[int]] = {}
+        for shot in rendered:
+            rows_by_scene.setdefault(shot.scene_index, []).append(shot.spec.row_no)
+        for idx, _, _, _ in plan_scenes(rendered, intermediate_dir):
+            deps = [ready[row] for row in rows_by_scene[idx]] + (["tts"] if burn else [])
+            jobs.append(farm_utils.Job(f"scene:{idx}", "scene", {"scene": idx}, deps=deps))
+            master_deps.append(f"scene:{idx}")
+    else:
+        master_deps.extend(ready.values())
+    jobs.append(farm_utils.Job("master", "master", deps=master_deps))
+    return jobs
+
+
+def _farm_signature(args: argparse.Namespace) -> str:
+    """Journal entries from a run with a different storyboard or output settings are ignored."""
+    digest = hashlib.sha256(args.storyboard.read_bytes())
+    for value in (args.preset, args.master, args.intermediate_profile, args.shot_range, args.burn_captions):
+        digest.update(repr(value).encode("utf-8"))
+    digest.update(repr([item.name for item in args.deliverables or []]).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def _strip_options(argv: List[str], names: Set[str]) -> List[str]:
+    kept: List[str] = []
+    skip = False
+    for arg in argv:
+        if skip:
+            skip = False
+        elif arg in names:
+            skip = True
+        elif arg.split("=", 1)[0] not in names:
+            kept.append(arg)
+    return kept
+
+
+def run_farm_coordinator(
+    args: argparse.Namespace, shots: List[Tuple[int, str, ShotSpec]], fps: int, intermediate_dir: Path
+) -> None:
+    rendered = rendered_shots(shots, intermediate_dir)
+    graph = farm_utils.JobGraph(
+        build_farm_jobs(args, rendered, fps, intermediate_dir),
+        lease_s=args.farm_lease,
+        journal=args.outdir / "farm_journal.jsonl",
+        signature=_farm_signature(args),
+    )
+    address = farm_utils.parse_address(args.farm_coordinator, default_host="0.0.0.0")
+    console.rule("[bold blue]Swavlamban 2025 Render Farm Coordinator")
+    console.log(f"{len(graph.jobs)} jobs ({graph.status()['counts'].get('done', 0)} already done), serving on {address[0]}:{address[1]}")
+    preview = preview_utils.default()
+    if preview is not None:
+        # Workers segment each shot they finish into the preview; the coordinator only lays out the slates.
+        preview.add_slates()
+        console.log(f"Timeline preview: {preview.path}")
+
+    workers: List[subprocess.Popen] = []
+    if args.farm_local_workers:
+        base = _strip_options(sys.argv[1:], {"--farm-coordinator", "--farm-local-workers", "--worker-id"})
+        # CPU inference workers are spread over NUMA nodes, each with its share of that node's cores.
+        pinning = args.numa_node is None and not args.threads and backend_utils.current().cpu and not args.fake_models
+        placement = backend_utils.plan_workers(args.farm_local_workers) if pinning else []
+        for idx in range(args.farm_local_workers):
+            cmd = [sys.executable, str(Path(__file__).resolve()), *base]
+            cmd += ["--farm-worker", f"127.0.0.1:{address[1]}", "--worker-id", f"local{idx}"]
+            if placement:
+                cmd += ["--numa-node", str(placement[idx][0]), "--threads", str(placement[idx][1])]
+            workers.append(subprocess.Popen(cmd))
+
+    def on_change(graph: farm_utils.JobGraph) -> None:
+        counts = graph.status()["counts"]
+        console.log(
+            f"Farm: {counts.get('done', 0)}/{len(graph.jobs)} done, {counts.get('leased', 0)} running, "
+            f"{graph.retries} retried"
+        )
+
+    try:
+        ok = farm_utils.serve(graph, address, status_path=args.outdir / "farm_status.json", on_change=on_change)
+    finally:
+        for proc in workers:
+            try:
+                proc.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+    if not ok:
+        failed = {job_id: graph.jobs[job_id].error for job_id in graph.stuck()}
+        raise RuntimeError(f"Farm render failed after {graph.max_attempts} attempts: {failed}")
     console.rule("[bold green]Render complete")
-    console.print(f"Final master: {final_path}")
-    console.print(f"Captions: {subtitles_path}")
+    master = graph.jobs["master"].result
+    for path in master.get("outputs", []):
+        console.print(f"Final master: {path}")
+    console.print(f"Captions: {master.get('captions')}")
+    console.print(f"Retried jobs: {graph.retries}")
+
+
+def farm_roles(args: argparse.Namespace) -> List[str]:
+    """Roles this worker leases: everything by default, only lite and cpu jobs on a CPU inference backend."""
+    if args.farm_roles:
+        roles = [role.strip() for role in args.farm_roles.split(",") if role.strip()]
+    elif backend_utils.current().cpu and not args.fake_models:
+        roles = [LITE_ROLE, "cpu"]
+    else:
+        roles = ["gpu", LITE_ROLE, "cpu"]
+    if "gpu" in roles and LITE_ROLE not in roles:
+        roles.append(LITE_ROLE)
+    return roles
+
+
+def run_farm_worker(
+    args: argparse.Namespace,
+    shots: List[Tuple[int, str, ShotSpec]],
+    width: int,
+    height: int,
+    fps: int,
+    voice_choice: str,
+    music_tag: str,
+    intermediate_dir: Path,
+) -> None:
+    rendered = rendered_shots(shots, intermediate_dir)
+    by_row = {shot.spec.row_no: shot for shot in rendered}
+    burn = args.burn_captions and not args.deliverables
+    worker = args.worker_id or f"{os.uname().nodename}:{os.getpid()}"
+    preview = preview_utils.default()
+    # One event log per worker; the shared run_events.jsonl belongs to the coordinator's outdir layout.
+    instrument.configure(args.outdir / "farm" / f"events_{worker.replace('/', '_').replace(':', '_')}.jsonl")
+    if {"gpu", LITE_ROLE} & set(farm_roles(args)):
+        # Any GPU shot may come this worker's way; workers sharing the outdir reuse each other's encodings.
+        expect_prompts([shot.spec for shot in rendered], width, height, fps)
+
+    def execute(job: Dict, lease: str) -> Dict:
+        kind, payload = job["kind"], job["payload"]
+        if kind == "shot":
+            shot = by_row[payload["row"]]
+            out_path = _base_path(shot)
+            tmp = _lease_path(out_path, lease)
+            with instrument.stage("shot", row_no=shot.spec.row_no, method=shot.spec.method, outputs=[tmp]):
+                render_checked(shot.spec, width, height, fps, tmp, args.qc_retries)
+            os.replace(tmp, out_path)
+            if out_path == shot.video_path and preview is not None:
+                preview.add_shot(shot.spec.row_no, out_path)
+            return {"path": str(out_path)}
+        if kind == "overlay":
+            shot = by_row[payload["row"]]
+            tmp = _lease_path(shot.video_path, lease)
+            with instrument.stage("overlay", row_no=shot.spec.row_no, outputs=[tmp]) as stage:
+                layer = video_utils.overlay_texts(_base_path(shot), shot.spec.overlay_text, (width, height), out_path=tmp)
+                stage.tags["layout"] = layer.layout
+            report_text_layer(shot.spec.row_no, layer)
+            os.replace(tmp, shot.video_path)
+            if preview is not None:
+                preview.add_shot(shot.spec.row_no, shot.video_path)
+            return {"path": str(shot.video_path)}
+        if kind == "tts":
+            _, vo_wav, _ = render_voiceover(rendered, voice_choice, intermediate_dir)
+            if preview is not None:
+                preview.add_voiceover(vo_wav)
+            return {"path": str(vo_wav)}
+        if kind == "scene":
+            idx, paths, segment, start = next(entry for entry in plan_scenes(rendered, intermediate_dir) if entry[0] == payload["scene"])
+            captions = None
+            if burn:
+                vo_wav = intermediate_dir / "voiceover.wav"
+                timings = json.loads((intermediate_dir / "voiceover_timings.json").read_text(encoding="utf-8"))
+                cues = caption_cues(build_voice_blocks(rendered), timings, vo_wav)
+                captions = write_scene_captions(cues, intermediate_dir, idx, start, PRESET_RESOLUTIONS[args.preset])
+            tmp = _lease_path(segment, lease)
+            encode_scene(paths, tmp, captions)
+            os.replace(tmp, segment)
+            return {"path": str(segment)}
+        if kind == "master":
+            vo_wav = intermediate_dir / "voiceover.wav"
+            timings = json.loads((intermediate_dir / "voiceover_timings.json").read_text(encoding="utf-8"))
+            with instrument.stage("finalise"):
+                outputs, captions_path = finish_master(
+                    args, rendered, build_voice_blocks(rendered), vo_wav, timings, music_tag, intermediate_dir,
+                    reuse_segments=True,
+                )
+            return {"outputs": [str(path) for path in outputs], "captions": str(captions_path)}
+        raise ValueError(f"Unknown farm job kind '{kind}'")
+
+    roles = farm_roles(args)
+    address = farm_utils.parse_address(args.farm_worker)
+    count = farm_utils.run_worker(address, worker, execute, roles=roles, log=console.log)
+    console.log(f"{worker}: farm finished after {count} job(s)")
 
 
 if __name__ == "__main__":
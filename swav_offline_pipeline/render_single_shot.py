@@ -11,7 +11,11 @@ import yaml
 import subprocess
 from rich.console import Console
 
+from utils import cards as card_utils
+from utils import frames as frame_utils
 from utils import models as model_utils
+from utils import prompt_cache
+from utils import samplers as sampler_utils
 from utils import video as video_utils
 
 console = Console()
@@ -22,6 +26,9 @@ PRESET_RESOLUTIONS = {
     "4k": (3840, 2160),
 }
 
+# Unlike orchestrate.py, single shots have always been sampled at guidance 7.5.
+SAMPLER_DEFAULTS = {"t2v": "single_shot_t2v", "img2vid": "single_shot_img2vid"}
+
 def load_shot_from_yaml(storyboard_path: str, shot_id: str):
     """Load a specific shot by ID from storyboard v2 yaml"""
     with open(storyboard_path, 'r') as f:
@@ -40,10 +47,11 @@ def render_t2v(shot, width, height, fps, out_path):
     console.print(f"[cyan]Generating still for {shot['id']} with SDXL[/cyan]")
 
     pipe = model_utils.get_t2i()
+    profile = sampler_utils.profile_for('t2v')
+    model_utils.set_sdxl_scheduler(pipe, profile.scheduler, profile.karras)
     image = pipe(
-        prompt=shot['prompt'],
-        num_inference_steps=30,
-        guidance_scale=7.5,
+        **prompt_cache.default().embeds(pipe, shot['prompt']),
+        **profile.pipe_kwargs(),
         width=width,
         height=height
     ).images[0]
@@ -54,7 +62,7 @@ def render_t2v(shot, width, height, fps, out_path):
 
     # Add overlay text if present
     if shot.get('overlay_text'):
-        video_utils.overlay_texts(out_path, shot['overlay_text'])
+        video_utils.overlay_texts(out_path, shot['overlay_text'], (width, height))
     console.print(f"[green]✓ {shot['id']} rendered to {out_path}[/green]")
 
 def render_img2vid(shot, width, height, fps, out_path):
@@ -63,10 +71,11 @@ def render_img2vid(shot, width, height, fps, out_path):
 
     # Generate base frame with SDXL
     t2i_pipe = model_utils.get_t2i()
+    profile = sampler_utils.profile_for('img2vid')
+    model_utils.set_sdxl_scheduler(t2i_pipe, profile.scheduler, profile.karras)
     base_frame = t2i_pipe(
-        prompt=shot['prompt'],
-        num_inference_steps=25,
-        guidance_scale=7.5,
+        **prompt_cache.default().embeds(t2i_pipe, shot['prompt']),
+        **profile.pipe_kwargs(),
         width=width,
         height=height
     ).images[0]
@@ -84,15 +93,23 @@ def render_img2vid(shot, width, height, fps, out_path):
         noise_aug_strength=0.02
     ).frames[0]
 
-    # Convert PIL images to numpy array
-    frames = np.array([np.array(frame) for frame in result])
+    # Convert PIL images to one contiguous uint8 array
+    frames = frame_utils.to_uint8_hwc(result)
 
     # Write video
     video_utils.write_video(frames, out_path, fps)
 
     # Add overlay text if present
     if shot.get('overlay_text'):
-        video_utils.overlay_texts(out_path, shot['overlay_text'])
+        video_utils.overlay_texts(out_path, shot['overlay_text'], (frames.shape[2], frames.shape[1]))
+    console.print(f"[green]✓ {shot['id']} rendered to {out_path}[/green]")
+
+def render_card(shot, card, width, height, fps, out_path):
+    """Title card rendered on CPU (no diffusion)"""
+    console.print(f"[cyan]Rendering title card for {shot['id']}: {card['title']}[/cyan]")
+    card_utils.render_card(card, out_path, shot['duration_s'], fps, size=(width, height))
+    if shot.get('overlay_text'):
+        video_utils.overlay_texts(out_path, shot['overlay_text'], (width, height))
     console.print(f"[green]✓ {shot['id']} rendered to {out_path}[/green]")
 
 def main():
@@ -101,6 +118,12 @@ def main():
     parser.add_argument("--shot-id", required=True, help="Shot ID (e.g. r001, r002)")
     parser.add_argument("--outdir", required=True, help="Output directory")
     parser.add_argument("--preset", default="1080p", choices=["hd", "1080p", "4k"])
+    parser.add_argument(
+        "--sampler",
+        choices=sorted(sampler_utils.PROFILES),
+        help="SDXL sampler profile override (default: project.samplers, else single_shot_t2v/single_shot_img2vid, "
+        "the 7.5-guidance settings this script has always used)",
+    )
 
     args = parser.parse_args()
 
@@ -108,6 +131,11 @@ def main():
     out_dir = Path(args.outdir)
     inter_dir = out_dir / "intermediate"
     inter_dir.mkdir(parents=True, exist_ok=True)
+    prompt_cache.configure(out_dir / "prompt_cache")
+    with open(args.storyboard, 'r') as f:
+        project = yaml.safe_load(f).get('project', {})
+    samplers = {**SAMPLER_DEFAULTS, **(project.get('samplers') or {})}
+    sampler_utils.configure(samplers, args.sampler)
 
     width, height = PRESET_RESOLUTIONS[args.preset]
     fps = 30
@@ -121,8 +149,15 @@ def main():
 
     # Render based on method
     method = shot['method']
-
-    if method == 't2v':
+    card = shot.get('card')
+    if method == 't2v' and card is None:
+        title = card_utils.detect_title(shot['prompt'])
+        if title:
+            method, card = 'card', {'title': title}
+
+    if method == 'card':
+        render_card(shot, card, width, height, fps, out_path)
+    elif method == 't2v':
         render_t2v(shot, width, height, fps, out_path)
     elif method == 'img2vid':
         render_img2vid(shot, width, height, fps, out_path)
@@ -15,6 +15,10 @@ GPU1_SHOTS="15-28"   # 14 shots
 GPU2_SHOTS="29-41"   # 13 shots
 GPU3_SHOTS="42-54"   # 13 shots
 
+# Live progress: one status server of its own aggregates all four shards, so
+# the endpoint outlives whichever shard finishes first
+STATUS_PORT="${STATUS_PORT:-8765}"
+
 # Environment setup
 if ! command -v conda >/dev/null 2>&1; then
   echo "[ERROR] conda command not found. Please install Miniconda or Anaconda."
@@ -65,6 +69,14 @@ echo "Starting parallel renders..."
 echo "=========================================="
 echo ""
 
+# Status server (background), stopped when the batch script exits
+python "${ROOT_DIR}/tools/status.py" "$OUTDIR_BASE" --serve --port "$STATUS_PORT" \
+  > "${OUTDIR_BASE}/status_server.log" 2>&1 &
+STATUS_PID=$!
+trap 'kill "$STATUS_PID" 2>/dev/null || true' EXIT
+echo "[STATUS] Serving http://127.0.0.1:${STATUS_PORT}/status (PID: $STATUS_PID)"
+echo ""
+
 # Launch 4 parallel renders (one per GPU)
 # NOTE: This requires orchestrate.py to accept --shot-range parameter
 # If not implemented, modify orchestrate.py to support this first
@@ -76,6 +88,9 @@ CUDA_VISIBLE_DEVICES=0 python "${ROOT_DIR}/orchestrate.py" \
   --shot-range "$GPU0_SHOTS" \
   --preset "4k" \
   --master "h264" \
+  --worker-id "gpu0" \
+  --status-root "$OUTDIR_BASE" \
+  --costs-file "${OUTDIR_BASE}/method_costs.json" \
   > "${OUTDIR_BASE}/gpu0/render.log" 2>&1 &
 PID0=$!
 echo "[GPU 0] Started (PID: $PID0) - Shots ${GPU0_SHOTS}"
@@ -87,6 +102,9 @@ CUDA_VISIBLE_DEVICES=1 python "${ROOT_DIR}/orchestrate.py" \
   --shot-range "$GPU1_SHOTS" \
   --preset "4k" \
   --master "h264" \
+  --worker-id "gpu1" \
+  --status-root "$OUTDIR_BASE" \
+  --costs-file "${OUTDIR_BASE}/method_costs.json" \
   > "${OUTDIR_BASE}/gpu1/render.log" 2>&1 &
 PID1=$!
 echo "[GPU 1] Started (PID: $PID1) - Shots ${GPU1_SHOTS}"
@@ -98,6 +116,9 @@ CUDA_VISIBLE_DEVICES=2 python "${ROOT_DIR}/orchestrate.py" \
   --shot-range "$GPU2_SHOTS" \
   --preset "4k" \
   --master "h264" \
+  --worker-id "gpu2" \
+  --status-root "$OUTDIR_BASE" \
+  --costs-file "${OUTDIR_BASE}/method_costs.json" \
   > "${OUTDIR_BASE}/gpu2/render.log" 2>&1 &
 PID2=$!
 echo "[GPU 2] Started (PID: $PID2) - Shots ${GPU2_SHOTS}"
@@ -109,6 +130,9 @@ CUDA_VISIBLE_DEVICES=3 python "${ROOT_DIR}/orchestrate.py" \
   --shot-range "$GPU3_SHOTS" \
   --preset "4k" \
   --master "h264" \
+  --worker-id "gpu3" \
+  --status-root "$OUTDIR_BASE" \
+  --costs-file "${OUTDIR_BASE}/method_costs.json" \
   > "${OUTDIR_BASE}/gpu3/render.log" 2>&1 &
 PID3=$!
 echo "[GPU 3] Started (PID: $PID3) - Shots ${GPU3_SHOTS}"
@@ -117,7 +141,8 @@ echo ""
 echo "All 4 renders launched in parallel!"
 echo ""
 echo "Monitor progress with:"
-echo "  watch -n 10 'bash ${ROOT_DIR}/../monitor_progress.sh'"
+echo "  python ${ROOT_DIR}/tools/status.py ${OUTDIR_BASE} --watch 10"
+echo "  curl http://127.0.0.1:${STATUS_PORT}/status"
 echo ""
 echo "Check logs:"
 echo "  tail -f ${OUTDIR_BASE}/gpu0/render.log"
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Pipeline modules import each other as ``utils.*`` with the pipeline directory on the path, as the tools do.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
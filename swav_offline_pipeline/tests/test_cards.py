@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from tools import migrate_cards
+from utils import cards as card_utils
+
+
+def test_detect_title_maps_and_to_scene_ampersand():
+    prompt = "navy blue title card for sensors and silicon with clean typography"
+    assert card_utils.detect_title(prompt, "Sensors & Silicon") == "Sensors & Silicon"
+
+
+def test_detect_title_falls_back_to_prompt_text():
+    assert card_utils.detect_title("title card reading Autonomy at Sea", "Other Scene") == "Autonomy at Sea"
+    assert card_utils.detect_title("SECTION SLATE — Closing Remarks") == "Closing Remarks"
+    assert card_utils.detect_title("aerial shot of a carrier deck at dawn", "Sensors & Silicon") is None
+
+
+def test_migrate_applies_scene_spelling_to_card_titles():
+    storyboard = {
+        "scenes": [
+            {
+                "name": "Sensors & Silicon",
+                "shots": [
+                    {
+                        "id": "s1",
+                        "row_no": 7,
+                        "method": "card",
+                        "prompt": "navy blue title card for sensors and silicon",
+                        "card": {"title": "sensors and silicon"},
+                    }
+                ],
+            }
+        ]
+    }
+    changed = migrate_cards.migrate(storyboard, "navy")
+    assert storyboard["scenes"][0]["shots"][0]["card"]["title"] == "Sensors & Silicon"
+    assert (7, "Sensors & Silicon") in changed
+
+
+def test_card_frames_shape_and_fade():
+    frames = [frame.copy() for frame in card_utils.card_frames({"title": "Test"}, (160, 90), duration=2.0, fps=10)]
+    assert len(frames) == 20
+    assert frames[0].shape == (90, 160, 3) and frames[0].dtype == np.uint8
+    # Nothing is drawn on the first frame; the title is fully in between the fades.
+    assert np.array_equal(frames[10], frames[12])
+    assert not np.array_equal(frames[0], frames[10])
+
+
+def test_unknown_template_rejected():
+    with pytest.raises(ValueError, match="Unknown card template"):
+        card_utils.get_template("neon")
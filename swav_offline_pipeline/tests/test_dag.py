@@ -0,0 +1,221 @@
+import os
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from utils import dag
+
+
+def _writer(path: Path, text: str = "x", calls: list | None = None, name: str = ""):
+    def run() -> None:
+        if calls is not None:
+            calls.append(name or path.name)
+        path.write_text(text, encoding="utf-8")
+
+    return run
+
+
+def _copy(src: Path, dst: Path, calls: list):
+    def run() -> None:
+        calls.append(dst.name)
+        dst.write_text(src.read_text(encoding="utf-8") + "+", encoding="utf-8")
+
+    return run
+
+
+def _chain(tmp_path: Path, calls: list, sig: str = "v1"):
+    """source -> a.txt -> b.txt, with the source file written by hand."""
+    source, a, b = tmp_path / "source.txt", tmp_path / "a.txt", tmp_path / "b.txt"
+    return dag.Graph(
+        [
+            dag.Task("a", "step", _copy(source, a, calls), inputs=[source], outputs=[a], signature=sig),
+            dag.Task("b", "step", _copy(a, b, calls), inputs=[a], outputs=[b]),
+        ]
+    )
+
+
+def _scheduler(graph: dag.Graph, tmp_path: Path, **kwargs) -> dag.Scheduler:
+    return dag.Scheduler(graph, {"cpu": 2}, state_path=tmp_path / "dag_state.json", log=lambda _: None, **kwargs)
+
+
+def _touch_later(path: Path, seconds: float = 10.0) -> None:
+    stamp = path.stat().st_mtime_ns + int(seconds * 1e9)
+    os.utime(path, ns=(stamp, stamp))
+
+
+def test_edges_come_from_declared_files(tmp_path):
+    graph = _chain(tmp_path, [])
+    assert graph.deps == {"a": [], "b": ["a"]}
+    assert graph.order == ["a", "b"]
+
+
+def test_cycle_is_rejected(tmp_path):
+    x, y = tmp_path / "x", tmp_path / "y"
+    with pytest.raises(ValueError, match="cycle"):
+        dag.Graph(
+            [
+                dag.Task("x", "step", _writer(x), inputs=[y], outputs=[x]),
+                dag.Task("y", "step", _writer(y), inputs=[x], outputs=[y]),
+            ]
+        )
+
+
+def test_up_to_date_tasks_are_skipped(tmp_path):
+    (tmp_path / "source.txt").write_text("s", encoding="utf-8")
+    calls: list = []
+    _scheduler(_chain(tmp_path, calls), tmp_path).run()
+    assert calls == ["a.txt", "b.txt"]
+
+    calls.clear()
+    results = _scheduler(_chain(tmp_path, calls), tmp_path).run()
+    assert calls == []
+    assert {name: result.state for name, result in results.items()} == {"a": "skipped", "b": "skipped"}
+
+
+def test_newer_input_rebuilds_task_and_dependents(tmp_path):
+    source = tmp_path / "source.txt"
+    source.write_text("s", encoding="utf-8")
+    calls: list = []
+    _scheduler(_chain(tmp_path, calls), tmp_path).run()
+
+    _touch_later(source)
+    calls.clear()
+    scheduler = _scheduler(_chain(tmp_path, calls), tmp_path)
+    assert scheduler.plan() == [("a", "inputs newer"), ("b", "after a")]
+    scheduler.run()
+    assert calls == ["a.txt", "b.txt"]
+
+
+def test_signature_change_rebuilds(tmp_path):
+    (tmp_path / "source.txt").write_text("s", encoding="utf-8")
+    calls: list = []
+    _scheduler(_chain(tmp_path, calls, sig="v1"), tmp_path).run()
+
+    calls.clear()
+    scheduler = _scheduler(_chain(tmp_path, calls, sig="v2"), tmp_path)
+    assert scheduler.plan()[0] == ("a", "settings changed")
+    scheduler.run()
+    assert calls == ["a.txt", "b.txt"]
+
+
+def test_signature_ignores_key_order():
+    assert dag.signature({"steps": 30, "cfg": 7.0}, "tag") == dag.signature({"cfg": 7.0, "steps": 30}, "tag")
+    assert dag.signature({"steps": 30}, "tag") != dag.signature({"steps": 31}, "tag")
+    assert dag.signature("a", "b") != dag.signature("ab")
+
+
+def test_missing_output_and_force(tmp_path):
+    (tmp_path / "source.txt").write_text("s", encoding="utf-8")
+    calls: list = []
+    _scheduler(_chain(tmp_path, calls), tmp_path).run()
+
+    (tmp_path / "b.txt").unlink()
+    assert _scheduler(_chain(tmp_path, calls), tmp_path).plan() == [("a", "up to date"), ("b", "output missing")]
+    assert [reason for _, reason in _scheduler(_chain(tmp_path, calls), tmp_path, force=True).plan()] == [
+        "forced",
+        "forced",
+    ]
+
+
+def test_requeue_runs_an_up_to_date_task(tmp_path):
+    (tmp_path / "source.txt").write_text("s", encoding="utf-8")
+    calls: list = []
+    _scheduler(_chain(tmp_path, calls), tmp_path).run()
+
+    calls.clear()
+    _scheduler(_chain(tmp_path, calls), tmp_path, requeue={"a": "failed QC (frozen)"}).run()
+    assert calls == ["a.txt", "b.txt"]
+
+
+def test_evicted_input_counts_as_present(tmp_path):
+    (tmp_path / "source.txt").write_text("s", encoding="utf-8")
+    calls: list = []
+    _scheduler(_chain(tmp_path, calls), tmp_path).run()
+
+    a = tmp_path / "a.txt"
+    evicted = {a: a.stat().st_mtime_ns}
+    a.unlink()
+    calls.clear()
+    results = _scheduler(_chain(tmp_path, calls), tmp_path, evicted=evicted).run()
+    assert calls == []
+    assert not a.exists()
+    assert results["b"].state == "skipped"
+
+
+def test_evicted_input_is_restored_when_its_consumer_must_run(tmp_path):
+    (tmp_path / "source.txt").write_text("s", encoding="utf-8")
+    calls: list = []
+    _scheduler(_chain(tmp_path, calls), tmp_path).run()
+
+    a, b = tmp_path / "a.txt", tmp_path / "b.txt"
+    stamp = a.stat().st_mtime_ns
+    a.unlink()
+    b.unlink()
+    calls.clear()
+    scheduler = _scheduler(_chain(tmp_path, calls), tmp_path, evicted={a: stamp})
+    assert scheduler.plan() == [("a", "restore evicted a.txt"), ("b", "output missing")]
+    scheduler.run()
+    assert calls == ["a.txt", "b.txt"]
+    # The restored file keeps the timestamp consumers were built against.
+    assert a.stat().st_mtime_ns == stamp
+
+
+def test_pool_limits_concurrency(tmp_path):
+    lock = threading.Lock()
+    active = {"gpu": 0, "cpu": 0}
+    peak = {"gpu": 0, "cpu": 0}
+
+    def job(pool: str, out: Path):
+        def run() -> None:
+            with lock:
+                active[pool] += 1
+                peak[pool] = max(peak[pool], active[pool])
+            time.sleep(0.05)
+            with lock:
+                active[pool] -= 1
+            out.write_text(pool, encoding="utf-8")
+
+        return run
+
+    outs = {(pool, idx): tmp_path / f"{pool}{idx}" for pool in ("gpu", "cpu") for idx in range(6)}
+    tasks = [
+        dag.Task(out.name, "job", job(pool, out), outputs=[out], pool=pool) for (pool, _), out in outs.items()
+    ]
+    results = dag.Scheduler(dag.Graph(tasks), {"gpu": 1, "cpu": 3}, log=lambda _: None).run()
+    assert all(result.state == "done" for result in results.values())
+    assert peak == {"gpu": 1, "cpu": 3}
+
+
+def test_unknown_pool_is_rejected(tmp_path):
+    graph = dag.Graph([dag.Task("t", "job", _writer(tmp_path / "t"), outputs=[tmp_path / "t"], pool="tpu")])
+    with pytest.raises(ValueError, match="unknown pool"):
+        dag.Scheduler(graph, {"cpu": 1})
+
+
+def test_failure_cancels_dependents_and_is_not_recorded(tmp_path):
+    out, after = tmp_path / "out", tmp_path / "after"
+
+    def boom() -> None:
+        raise RuntimeError("boom")
+
+    graph = dag.Graph(
+        [
+            dag.Task("fails", "job", boom, outputs=[out]),
+            dag.Task("after", "job", _writer(after), inputs=[out], outputs=[after]),
+        ]
+    )
+    scheduler = _scheduler(graph, tmp_path)
+    with pytest.raises(RuntimeError, match="boom"):
+        scheduler.run()
+    assert scheduler.results["fails"].state == "failed"
+    assert scheduler.results["after"].state == "cancelled"
+    assert _scheduler(graph, tmp_path).stale_reason(graph.tasks["fails"]) == "not built"
+
+
+def test_critical_path_follows_the_dependency_that_finished_last(tmp_path):
+    (tmp_path / "source.txt").write_text("s", encoding="utf-8")
+    graph = _chain(tmp_path, [])
+    results = _scheduler(graph, tmp_path).run()
+    assert [result.name for result in dag.critical_path(graph, results)] == ["a", "b"]
@@ -0,0 +1,93 @@
+import json
+import socket
+import threading
+
+import pytest
+
+from utils import farm
+
+
+def _graph(tmp_path=None, **options) -> farm.JobGraph:
+    jobs = [farm.Job("a", "shot"), farm.Job("b", "scene", deps=["a"])]
+    return farm.JobGraph(jobs, journal=tmp_path / "journal.jsonl" if tmp_path else None, **options)
+
+
+def test_expired_lease_is_requeued():
+    graph = _graph(lease_s=10.0)
+    job = graph.lease("w1", ["cpu"])
+    old_lease = job.lease
+    assert graph.lease("w2", ["cpu"]) is None  # "b" waits on "a"
+
+    assert graph.expire(now=job.expires + 1) == ["a"]
+    assert (job.state, job.error, graph.retries) == ("pending", "lease expired on w1", 1)
+    assert not graph.heartbeat(old_lease)
+    again = graph.lease("w2", ["cpu"])
+    assert (again.id, again.worker, again.attempts) == ("a", "w2", 2)
+    assert again.lease != old_lease
+
+
+def test_job_fails_for_good_after_max_attempts():
+    graph = _graph(max_attempts=2)
+    for _ in range(2):
+        assert graph.fail(graph.lease("w1", ["cpu"]).lease, "boom")
+    assert graph.jobs["a"].state == "failed"
+    assert graph.stuck() == ["a"]
+    assert graph.lease("w1", ["cpu"]) is None
+    assert farm._dispatch(graph, {"op": "lease", "roles": ["cpu"]}) == {"done": True, "failed": ["a"]}
+
+
+def test_stale_completion_from_a_revoked_lease_is_rejected():
+    graph = _graph()
+    stale = graph.lease("w1", ["cpu"])
+    stale_lease = stale.lease
+    graph.expire(now=stale.expires + 1)
+    fresh = graph.lease("w2", ["cpu"]).lease
+
+    assert not graph.complete(stale_lease, {"path": "from-w1"})
+    assert graph.jobs["a"].state == "leased"
+    assert graph.complete(fresh, {"path": "from-w2"})
+    assert graph.jobs["a"].result == {"path": "from-w2"}
+
+
+def test_replay_skips_entries_with_another_signature(tmp_path):
+    graph = _graph(tmp_path, signature="v1")
+    assert graph.complete(graph.lease("w1", ["cpu"]).lease, {"path": "a.mp4"})
+    with (tmp_path / "journal.jsonl").open("a", encoding="utf-8") as fh:
+        fh.write("not json\n")
+        fh.write(json.dumps({"id": "b", "sig": "v0", "result": {}}) + "\n")
+
+    resumed = _graph(tmp_path, signature="v1")
+    assert resumed.jobs["a"].state == "done" and resumed.jobs["a"].result == {"path": "a.mp4"}
+    assert resumed.jobs["b"].state == "pending"
+    assert _graph(tmp_path, signature="v2").jobs["a"].state == "pending"
+
+
+def test_unknown_dependency_rejected():
+    with pytest.raises(ValueError, match="unknown job"):
+        farm.JobGraph([farm.Job("b", "scene", deps=["a"])])
+
+
+def test_worker_retries_a_failed_job_over_tcp(monkeypatch):
+    monkeypatch.setattr(farm, "_IDLE_POLL_S", 0.05)
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        address = probe.getsockname()
+    graph = _graph(lease_s=5.0)
+    outcome = {}
+    coordinator = threading.Thread(target=lambda: outcome.update(ok=farm.serve(graph, address)))
+    coordinator.start()
+
+    attempts = []
+
+    def execute(job, lease):
+        attempts.append(job["id"])
+        if attempts == ["a"]:
+            raise RuntimeError("transient")
+        return {"lease": lease}
+
+    ran = farm.run_worker(address, "w1", execute, roles=["cpu"], log=lambda message: None)
+    coordinator.join(timeout=10)
+    assert outcome == {"ok": True}
+    assert (ran, attempts) == (2, ["a", "a", "b"])
+    assert (graph.jobs["a"].attempts, graph.jobs["a"].error) == (2, None)
+    assert graph.retries == 1
@@ -0,0 +1,52 @@
+import numpy as np
+from PIL import Image
+
+from utils import backends, framestore, models
+
+
+def _clip(frames: int, width: int = 32, height: int = 16) -> np.ndarray:
+    return np.stack([np.full((height, width, 3), idx * 10, dtype=np.uint8) for idx in range(frames)])
+
+
+def test_key_ignores_mapping_order_but_not_inputs(tmp_path):
+    store = framestore.FrameStore(tmp_path)
+    assert store.key("img2vid", {"a": 1, "b": 2}) == store.key("img2vid", {"b": 2, "a": 1})
+    assert store.key("t2v", "fp-1", "prompt", 7) != store.key("t2v", "fp-2", "prompt", 7)
+
+
+def test_clip_serves_shorter_shots_whole(tmp_path):
+    store = framestore.FrameStore(tmp_path)
+    store.put_frames("k" * 32, _clip(6), row_no=3)
+    assert store.lookup("k" * 32, frames=7) is None
+    entry = store.lookup("k" * 32, frames=4)
+    assert (entry.frames, entry.size, entry.meta["row_no"]) == (6, (32, 16), 3)
+    frames = store.load_frames(entry)
+    assert frames.shape == (6, 16, 32, 3)
+    np.testing.assert_array_equal(frames, _clip(6))
+
+
+def test_still_serves_sizes_up_to_its_own(tmp_path):
+    store = framestore.FrameStore(tmp_path)
+    store.put_still("s" * 32, Image.new("RGB", (64, 32), (1, 2, 3)))
+    assert store.lookup("s" * 32, size=(64, 32)) is not None
+    assert store.lookup("s" * 32, size=(128, 64)) is None
+    assert store.load_still(store.lookup("s" * 32)).getpixel((0, 0)) == (1, 2, 3)
+    assert store.lookup("m" * 32) is None
+
+
+def test_generation_fingerprint_tracks_weights_and_backend(tmp_path, monkeypatch):
+    weights = tmp_path / "svd-img2vid" / "unet" / "model.safetensors"
+    weights.parent.mkdir(parents=True)
+    weights.write_bytes(b"\0" * 8)
+    monkeypatch.setattr(models, "MODEL_ROOT", tmp_path)
+    monkeypatch.setattr(models, "_FINGERPRINTS", {})
+    monkeypatch.setattr(backends, "_CURRENT", backends.BACKENDS["cuda"])
+    fp16 = models.generation_fingerprint("svd-img2vid")
+
+    monkeypatch.setattr(backends, "_CURRENT", backends.BACKENDS["cpu_fp32"])
+    fp32 = models.generation_fingerprint("svd-img2vid")
+    assert fp32 != fp16
+
+    weights.write_bytes(b"\0" * 16)
+    models._FINGERPRINTS.clear()
+    assert models.generation_fingerprint("svd-img2vid") != fp32
@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+import soundfile as sf
+from scipy.signal import resample_poly
+
+from utils import mixer
+
+
+def _sine(seconds: float, rate: int, dbfs: float, freq: float = 997.0, channels: int = 2) -> np.ndarray:
+    t = np.arange(int(seconds * rate)) / rate
+    tone = (10 ** (dbfs / 20) * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+    return np.repeat(tone[:, None], channels, axis=1)
+
+
+def test_loudness_of_a_reference_tone(tmp_path):
+    # BS.1770: a 997 Hz tone at -20 dBFS in both channels of a stereo file reads -20 LUFS.
+    path = tmp_path / "tone.wav"
+    sf.write(path, _sine(5.0, 48000, -20.0), 48000, subtype="FLOAT")
+    assert mixer.integrated_loudness(path, block_s=1.3) == pytest.approx(-20.0, abs=0.1)
+
+
+def test_gates_ignore_silence():
+    # Silence falls below the absolute gate and a -50 dBFS tail below the relative one; only the
+    # few 400 ms blocks straddling the edge of the tone still count.
+    meter = mixer.LoudnessMeter()
+    meter.add(_sine(20.0, 48000, -20.0))
+    loud = meter.integrated()
+    meter.add(np.zeros((48000 * 10, 2), dtype=np.float32))
+    meter.add(_sine(10.0, 48000, -50.0))
+    assert meter.integrated() == pytest.approx(loud, abs=0.1)
+    assert mixer.gated_loudness(np.zeros(3)) == float("-inf")
+
+
+def test_blockwise_resampling_matches_whole_file(tmp_path):
+    rng = np.random.default_rng(0)
+    audio = rng.standard_normal((22050 * 3 + 17, 1)).astype(np.float32) * 0.1
+    path = tmp_path / "noise.wav"
+    sf.write(path, audio, 22050, subtype="FLOAT")
+    blocks = np.concatenate(list(mixer._blocks(path, 48000, 4800, 1)))
+    whole = resample_poly(audio, 320, 147, axis=0)
+    assert blocks.shape == whole.shape
+    assert np.max(np.abs(blocks - whole)) < 1e-4
+
+
+def test_ramps_never_raise_gain_and_limit_slopes():
+    curve = np.zeros(200)
+    curve[100] = -12.0
+    ramped = mixer._ramps(curve, attack_db=1.0, release_db=0.5)
+    assert np.all(ramped <= curve + 1e-12)
+    assert ramped[100] == -12.0
+    # Look-ahead attack before the dip, slower release after it.
+    assert ramped[95] == pytest.approx(-7.0)
+    assert ramped[110] == pytest.approx(-7.0)
+    assert np.all(np.abs(np.diff(ramped[:100])) <= 1.0 + 1e-9)
+    assert np.all(np.abs(np.diff(ramped[100:])) <= 0.5 + 1e-9)
+
+
+def test_mix_meets_loudness_and_true_peak_targets(tmp_path):
+    rate = 48000
+    voice = np.zeros((rate * 6, 1), dtype=np.float32)
+    voice[rate * 2 : rate * 4] = _sine(2.0, rate, -6.0, freq=300.0, channels=1)
+    music = _sine(5.0, 44100, -3.0, freq=110.0)
+    sf.write(tmp_path / "vo.wav", voice, rate, subtype="FLOAT")
+    sf.write(tmp_path / "music.wav", music, 44100, subtype="FLOAT")
+
+    report = mixer.mix(tmp_path / "vo.wav", tmp_path / "music.wav", tmp_path / "mix.wav", block_s=1.0)
+    out, out_rate = sf.read(tmp_path / "mix.wav", dtype="float32")
+    assert out_rate == rate and out.shape[1] == mixer.CHANNELS
+    # The longer input (the voiceover) sets the length.
+    assert report.duration_s == pytest.approx(6.0, abs=1e-3)
+    assert report.output_lufs == pytest.approx(mixer.TARGET_LUFS, abs=0.5)
+    assert report.output_peak_db <= mixer.TRUE_PEAK_DB + 0.01
+    assert sf.info(tmp_path / "mix.wav").subtype == "PCM_24"
+
+
+def test_music_ducks_under_the_voice(tmp_path):
+    rate = 48000
+    voice = np.zeros((rate * 6, 1), dtype=np.float32)
+    voice[rate * 3 :] = _sine(3.0, rate, -10.0, freq=300.0, channels=1)
+    sf.write(tmp_path / "vo.wav", voice, rate, subtype="FLOAT")
+    sf.write(tmp_path / "music.wav", _sine(6.0, rate, -10.0, freq=110.0), rate, subtype="FLOAT")
+    sf.write(tmp_path / "quiet.wav", np.zeros((rate * 6, 1), dtype=np.float32), rate, subtype="FLOAT")
+
+    mixer.mix(tmp_path / "vo.wav", tmp_path / "music.wav", tmp_path / "ducked.wav", block_s=1.0)
+    mixer.mix(tmp_path / "quiet.wav", tmp_path / "music.wav", tmp_path / "music_only.wav", block_s=1.0)
+    ducked, _ = sf.read(tmp_path / "ducked.wav", dtype="float32")
+    music_only, _ = sf.read(tmp_path / "music_only.wav", dtype="float32")
+
+    def music_level(mixed: np.ndarray) -> float:
+        # Correlate with the 110 Hz music tone to separate it from the 300 Hz voice.
+        t = np.arange(len(mixed)) / rate
+        return float(np.abs(mixed[:, 0] @ np.exp(-2j * np.pi * 110.0 * t)))
+
+    before = music_level(ducked[: rate * 3]) / music_level(music_only[: rate * 3])
+    during = music_level(ducked[rate * 4 :]) / music_level(music_only[rate * 4 :])
+    assert during < before * 0.5
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from utils import music, storage
+
+
+def test_looped_blocks_skips_empty_segments():
+    segments = [np.zeros((0, 2), dtype=np.float32), np.ones((300, 2), dtype=np.float32)]
+    blocks = list(music._looped_blocks(segments, 1000, 30))
+    assert sum(len(block) for block in blocks) == 1000
+
+    with pytest.raises(ValueError, match="no non-empty segments"):
+        list(music._looped_blocks([np.zeros((0, 2), dtype=np.float32)], 1000, 30))
+
+
+def test_segment_cache_is_tracked_and_reused(tmp_path, monkeypatch):
+    monkeypatch.setattr(music, "_CACHE_DIR", tmp_path / "music_cache")
+    monkeypatch.setattr(storage, "_DEFAULT", storage.StorageManager(tmp_path))
+    calls = []
+
+    def build():
+        calls.append(1)
+        return np.full((10, 2), 0.5)
+
+    first = music._cached(("procedural", "calm", 0), build, "derived")
+    second = music._cached(("procedural", "calm", 0), build, "derived")
+    assert len(calls) == 1
+    np.testing.assert_array_equal(first, second)
+    files = list((tmp_path / "music_cache").iterdir())
+    assert [path.suffix for path in files] == [".npy"]  # no temporary files left behind
+    artefact = storage.default().artefacts[f"music_cache/{files[0].name}"]
+    assert (artefact.producer, artefact.tier) == ("music", "derived")
+
+
+def test_bed_source_prefers_stems(tmp_path, monkeypatch):
+    monkeypatch.setattr(music, "STEMS_DIR", tmp_path)
+    monkeypatch.setattr(music, "musicgen_available", lambda: False)
+    assert music.bed_source("Calm Ambient") == "procedural"
+    (tmp_path / "calm-ambient").mkdir()
+    (tmp_path / "calm-ambient" / "a.wav").write_bytes(b"")
+    assert music.bed_source("Calm Ambient") == "stems"
+    assert music.stem_files("Calm Ambient") == [tmp_path / "calm-ambient" / "a.wav"]
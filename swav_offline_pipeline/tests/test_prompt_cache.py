@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from utils import prompt_cache
+
+
+class _Bf16:
+    """Stands in for a bf16 torch tensor: NumPy cannot take it until it is cast."""
+
+    def __init__(self, array: np.ndarray, half: bool = False) -> None:
+        self.array, self.halved = array, half
+
+    def detach(self):
+        return self
+
+    def is_floating_point(self) -> bool:
+        return True
+
+    def half(self):
+        return _Bf16(self.array, half=True)
+
+    def cpu(self):
+        return self
+
+    def __array__(self, dtype=None, copy=None):
+        if not self.halved:
+            raise TypeError("Got unsupported ScalarType BFloat16")
+        return self.array.astype(np.float16)
+
+
+class _Pipe:
+    _execution_device = "cpu"
+    text_encoder_2 = object()  # encoders already attached: nothing to load
+
+    def __init__(self, wrap=_Bf16) -> None:
+        self.calls = 0
+        self.wrap = wrap
+
+    def encode_prompt(self, prompt, **kwargs):
+        self.calls += 1
+        embeds = np.stack([np.full((4, 8), len(text), dtype=np.float32) for text in prompt])
+        pooled = embeds[:, 0, :].copy()
+        return tuple(self.wrap(array) for array in (embeds, embeds * 0, pooled, pooled * 0))
+
+
+def test_bf16_outputs_are_stored_as_fp16(tmp_path):
+    cache = prompt_cache.PromptCache(tmp_path, fingerprint="test")
+    cache.expect(["a tank", "a drone over the desert"])
+    cache._encode_pending(_Pipe())
+    assert len(list(tmp_path.glob("*.npz"))) == 2
+
+    reloaded = prompt_cache.PromptCache(tmp_path, fingerprint="test").get("a drone over the desert")
+    assert reloaded["prompt_embeds"].dtype == np.float16
+    assert reloaded["prompt_embeds"].shape == (1, 4, 8)
+    assert float(reloaded["prompt_embeds"][0, 0, 0]) == len("a drone over the desert")
+
+
+def test_integer_fake_embeddings_are_kept_exact():
+    # The fake pipeline hashes prompts into int64 "embeddings"; casting those to fp16 would lose the seed.
+    values = np.array([[[2**40 + 3]]], dtype=np.int64)
+    assert prompt_cache._to_numpy(values).dtype == np.int64
+
+
+def test_one_batched_encode_then_hits(tmp_path):
+    cache = prompt_cache.PromptCache(tmp_path, fingerprint="test")
+    pipe = _Pipe(wrap=lambda array: array)
+    assert cache.expect(["one", "two", "three"]) == 3
+    cache._encode_pending(pipe)
+    assert pipe.calls == 1 and cache.encoded == 3
+    assert cache.expect(["one", "two", "three"]) == 0
+    # A different fingerprint (other text-encoder weights) misses.
+    assert prompt_cache.PromptCache(tmp_path, fingerprint="other").get("one") is None
+
+
+def test_bf16_tensor_round_trip(tmp_path):
+    torch = pytest.importorskip("torch")
+    cache = prompt_cache.PromptCache(tmp_path, fingerprint="test")
+    pipe = _Pipe(wrap=lambda array: torch.from_numpy(array).to(torch.bfloat16))
+    kwargs = cache.embeds(pipe, "a tank")
+    assert kwargs["prompt_embeds"].dtype == torch.float16
+    assert prompt_cache.PromptCache(tmp_path, fingerprint="test").get("a tank")["pooled_prompt_embeds"].shape == (1, 8)
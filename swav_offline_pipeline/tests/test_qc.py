@@ -0,0 +1,158 @@
+import json
+import shutil
+import subprocess
+
+import numpy as np
+import pytest
+
+from utils import qc
+
+HEIGHT, WIDTH = 180, 320
+
+
+@pytest.fixture
+def qc_root(tmp_path, monkeypatch):
+    monkeypatch.setattr(qc, "_ROOT", None)
+    qc.configure(tmp_path / "qc")
+    return tmp_path / "qc"
+
+
+def _texture(seed: int = 0) -> np.ndarray:
+    """Smooth random texture wider than the frame, so it can pan."""
+    rng = np.random.default_rng(seed)
+    coarse = rng.uniform(40, 215, size=(HEIGHT // 10 + 1, (WIDTH + 400) // 10 + 1))
+    fine = np.kron(coarse, np.ones((10, 10)))[:HEIGHT, : WIDTH + 400]
+    return np.repeat(fine[:, :, None], 3, axis=2).astype(np.uint8)
+
+
+def _pan(frames: int, px_per_frame: int) -> np.ndarray:
+    texture = _texture()
+    return np.stack([texture[:, i * px_per_frame : i * px_per_frame + WIDTH] for i in range(frames)])
+
+
+def _report(frames: np.ndarray, method: str = "img2vid") -> qc.ShotReport:
+    frame_tap = qc.FrameTap()
+    frame_tap.observe(frames)
+    report = qc.ShotReport(1, method, "prompt", 7, 7, 0)
+    qc._frame_checks(report, frame_tap)
+    return report
+
+
+def test_tap_is_thread_local_and_scoped():
+    frame = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
+    qc.observe(frame)  # no tap: ignored
+    assert qc.current() is None
+    with qc.tap() as outer:
+        qc.observe(frame)
+        with qc.tap() as inner:
+            qc.observe(np.stack([frame, frame]))
+        assert qc.current() is outer
+    assert qc.current() is None
+    assert (len(outer.luma), len(inner.luma)) == (1, 2)
+
+
+def test_stream_observes_frames_as_they_are_pulled():
+    frames = list(_pan(4, 3))
+    with qc.tap() as frame_tap:
+        pulled = qc.stream(iter(frames))
+    assert frame_tap.luma == []
+    assert sum(1 for _ in pulled) == 4
+    assert len(frame_tap.luma) == 4 and len(frame_tap.change) == 3
+
+
+def test_batches_and_single_frames_agree():
+    frames = _pan(20, 4)
+    batched, single = qc.FrameTap(), qc.FrameTap()
+    batched.observe(frames)
+    for frame in frames:
+        single.observe(frame)
+    assert batched.luma == pytest.approx(single.luma)
+    assert batched.change == pytest.approx(single.change)
+
+
+def test_panning_shot_passes_and_motion_tracks_the_pan():
+    slow, fast = _report(_pan(24, 2)), _report(_pan(24, 8))
+    assert slow.passed and fast.passed
+    assert slow.motion > qc.FROZEN_MOTION
+    assert fast.motion > 2 * slow.motion
+
+
+def test_frozen_motion_shot_fails():
+    frames = np.repeat(_pan(1, 0), 24, axis=0)
+    report = _report(frames)
+    assert report.motion == 0.0
+    assert [issue.check for issue in report.failures] == ["frozen"]
+    # Ken Burns and cards may hold still.
+    assert _report(frames, method="kenburns").passed
+
+
+def test_retimed_repeats_do_not_count_as_frozen():
+    frames = _pan(12, 4)
+    assert _report(np.repeat(frames, 3, axis=0)).motion == pytest.approx(_report(frames).motion)
+
+
+def test_black_frames_fail():
+    frames = _pan(20, 4)
+    frames[:8] = 0
+    report = _report(frames)
+    assert report.black_frames == 8
+    assert "black" in [issue.check for issue in report.failures]
+
+
+def test_flicker_fails():
+    frames = _pan(30, 2).astype(np.int16)
+    frames[1::2] += 40
+    report = _report(np.clip(frames, 0, 255).astype(np.uint8))
+    assert report.flicker > 10
+    assert "flicker" in [issue.check for issue in report.failures]
+
+
+def test_clipping_only_warns():
+    frames = _pan(12, 4)
+    frames[:, :, : WIDTH // 2] = 255
+    report = _report(frames)
+    assert report.passed
+    assert [issue.check for issue in report.warnings] == ["clipped"]
+
+
+def test_container_checks():
+    report = qc.ShotReport(1, "raw", "", None, None, 0)
+    qc._container_checks(report, qc.Container(1280, 720, 25.0, 4.0), (1920, 1080), 30, 5.0)
+    assert sorted(issue.check for issue in report.failures) == ["duration", "fps", "resolution"]
+    ok = qc.ShotReport(1, "raw", "", None, None, 0)
+    qc._container_checks(ok, qc.Container(1920, 1080, 30.0, 5.05), (1920, 1080), 30, 5.0)
+    assert ok.passed
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="needs ffmpeg")
+def test_check_probes_the_file_and_writes_the_report(tmp_path, qc_root):
+    clip = tmp_path / "shot.mp4"
+    subprocess.run(
+        ["ffmpeg", "-v", "error", "-f", "lavfi", "-i", "testsrc2=size=320x180:rate=10:duration=2",
+         "-pix_fmt", "yuv420p", str(clip)],
+        check=True,
+    )
+    assert qc.probe(clip) == qc.Container(320, 180, 10.0, 2.0)
+
+    frame_tap = qc.FrameTap()
+    frame_tap.observe(_pan(20, 4))
+    report = qc.check(
+        clip, frame_tap, row_no=3, method="img2vid", prompt="p", storyboard_seed=7, seed=7, attempt=0,
+        size=(320, 180), fps=10, duration_s=3.0,
+    )
+    assert [issue.check for issue in report.failures] == ["duration"]
+    written = json.loads((qc_root / "shot_003.json").read_text(encoding="utf-8"))
+    assert written["passed"] is False and len(written["series"]["luma"]) == 20
+    assert "series" not in qc.last_report(3)
+
+
+def test_reseeding(qc_root):
+    assert qc.seed_for(3, 7, 0) == 7
+    assert qc.seed_for(3, 7, 1) == qc.reseed(3, 7, 1) != qc.reseed(3, 7, 2)
+    assert 0 <= qc.reseed(3, None, 1) < 2**31
+
+    qc._write(qc.ShotReport(3, "img2vid", "p", 7, qc.reseed(3, 7, 1), 1), None)
+    assert qc.last_render(3, "p", 7)["attempt"] == 1
+    # A new prompt or storyboard seed starts over from the storyboard's seed.
+    assert qc.last_render(3, "other prompt", 7) is None
+    assert qc.last_render(3, "p", 8) is None
@@ -0,0 +1,24 @@
+import pytest
+
+from utils import fakes, speaker_cache
+
+
+def test_clip_conditioning_is_cached_by_content(tmp_path):
+    clip = tmp_path / "voice.wav"
+    clip.write_bytes(b"take one")
+    model = fakes.FakeXtts([])
+    cache = speaker_cache.SpeakerCache(tmp_path / "cache")
+    first = cache.conditioning(model, "fp", [clip])
+    assert speaker_cache.SpeakerCache(tmp_path / "cache").conditioning(model, "fp", [clip]).keys() == first.keys()
+    assert (cache.computed, cache.hits) == (1, 0)
+
+    cache.conditioning(model, "fp", [clip])
+    clip.write_bytes(b"take two")
+    cache.conditioning(model, "fp", [clip])
+    assert (cache.computed, cache.hits) == (2, 1)
+
+
+def test_built_in_speakers_are_not_cached(tmp_path):
+    cache = speaker_cache.SpeakerCache(tmp_path)
+    with pytest.raises(ValueError, match="reference clips"):
+        cache.conditioning(fakes.FakeXtts(["male-en-2"]), "fp", [])
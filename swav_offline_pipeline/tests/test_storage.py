@@ -0,0 +1,131 @@
+import os
+
+import pytest
+
+from utils import dag, storage
+
+
+def _write(path, size: int):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"\0" * size)
+    return path
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return storage.StorageManager(tmp_path, quota=None)
+
+
+def test_parse_and_format_sizes():
+    assert storage.parse_size("500M") == 500 << 20
+    assert storage.parse_size("1.5T") == int(1.5 * (1 << 40))
+    assert storage.parse_size("200GiB") == 200 << 30
+    assert storage.parse_size("4096") == 4096
+    with pytest.raises(ValueError, match="Invalid size"):
+        storage.parse_size("lots")
+    assert storage.format_size(512) == "512 B"
+    assert storage.format_size(3 << 20) == "3.0 MiB"
+
+
+def test_manifest_survives_a_reload(tmp_path, manager):
+    shot = _write(tmp_path / "intermediate" / "shot_001.mp4", 100)
+    manager.record([shot], "shot:1", "generated")
+    reloaded = storage.StorageManager(tmp_path)
+    artefact = reloaded.artefacts["intermediate/shot_001.mp4"]
+    assert (artefact.producer, artefact.tier, artefact.size) == ("shot:1", "generated", 100)
+
+    # A tracked file deleted by hand is forgotten, not treated as evicted.
+    shot.unlink()
+    assert storage.StorageManager(tmp_path).artefacts == {}
+
+
+def test_unknown_tier_is_rejected(tmp_path, manager):
+    with pytest.raises(ValueError, match="Unknown storage tier"):
+        manager.record([_write(tmp_path / "x", 1)], "x", "precious")
+
+
+def test_enforce_evicts_cheapest_tier_then_least_recently_used(tmp_path):
+    manager = storage.StorageManager(tmp_path, quota=250)
+    inter = tmp_path / "intermediate"
+    paths = {
+        "master": _write(tmp_path / "final.mp4", 100),
+        "shot_old": _write(inter / "shot_001.mp4", 100),
+        "shot_new": _write(inter / "shot_002.mp4", 100),
+        "overlay": _write(inter / "shot_002_overlay.mp4", 100),
+        "segment": _write(inter / "scene_01.mp4", 100),
+    }
+    manager.record([paths["master"]], "finalise", "kept")
+    manager.record([paths["shot_old"]], "shot:1", "generated")
+    manager.record([paths["shot_new"]], "shot:2", "generated")
+    manager.record([paths["overlay"], paths["segment"]], "overlay", "derived")
+    manager.touch([paths["shot_new"]])  # used more recently than shot_001
+
+    evicted = manager.enforce(pinned=[paths["segment"]])
+    assert [artefact.path for artefact in evicted] == [
+        "intermediate/shot_002_overlay.mp4",  # derived first; the pinned segment is skipped
+        "intermediate/shot_001.mp4",  # then the least recently used generated file
+        "intermediate/shot_002.mp4",
+    ]
+    assert manager.usage() <= 250
+    assert paths["master"].exists() and paths["segment"].exists()
+    assert not paths["shot_old"].exists()
+    assert set(manager.evicted()) == {paths["overlay"], paths["shot_old"], paths["shot_new"]}
+    assert manager.summary()["tiers"]["generated"]["evicted"] == 2
+
+
+def test_no_quota_never_evicts(tmp_path, manager):
+    manager.record([_write(tmp_path / "a", 10)], "a", "derived")
+    assert manager.enforce() == []
+
+
+def test_evicted_file_is_restored_with_its_mtime_when_a_consumer_reruns(tmp_path):
+    manager = storage.StorageManager(tmp_path, quota=0)
+    overlay, scene = tmp_path / "overlay.mp4", tmp_path / "scene.mp4"
+    calls = []
+
+    def make_overlay():
+        calls.append("overlay")
+        overlay.write_bytes(b"o" * 10)
+
+    def make_scene():
+        calls.append("scene")
+        scene.write_bytes(overlay.read_bytes() + b"s")
+
+    def graph():
+        return dag.Graph(
+            [
+                dag.Task("overlay", "overlay", make_overlay, outputs=[overlay]),
+                dag.Task("scene", "scene", make_scene, inputs=[overlay], outputs=[scene]),
+            ]
+        )
+
+    state = tmp_path / "dag_state.json"
+    dag.Scheduler(graph(), {"cpu": 1}, state_path=state, log=lambda _: None).run()
+    manager.record([overlay], "overlay", "derived")
+    stamp = overlay.stat().st_mtime_ns
+    assert [artefact.path for artefact in manager.enforce(pinned=[scene])] == ["overlay.mp4"]
+
+    scene.unlink()
+    calls.clear()
+    dag.Scheduler(graph(), {"cpu": 1}, state_path=state, log=lambda _: None, evicted=manager.evicted()).run()
+    assert calls == ["overlay", "scene"]
+    assert overlay.stat().st_mtime_ns == stamp
+
+
+def test_scratch_prefers_the_first_directory_with_room(tmp_path, monkeypatch):
+    fast, slow = tmp_path / "fast", tmp_path / "slow"
+    monkeypatch.setattr(storage, "_SCRATCH", [fast, slow])
+    monkeypatch.setattr(storage, "_free", lambda path: 1000 if path == fast else 10**12)
+    assert storage.scratch_file(".npy", 10).parent == fast
+    # Too big for the first directory: the last one always takes it.
+    assert storage.scratch_file(".npy", 10_000).parent == slow
+
+
+def test_configure_with_explicit_scratch(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "_SCRATCH", [])
+    monkeypatch.setattr(storage, "_DEFAULT", None)
+    storage.configure(tmp_path / "out", quota=storage.parse_size("1G"), scratch=tmp_path / "scratch")
+    assert storage.default().quota == 1 << 30
+    path = storage.scratch_file(".wav")
+    assert path.parent == tmp_path / "scratch" and path.suffix == ".wav"
+    assert not os.path.exists(path)
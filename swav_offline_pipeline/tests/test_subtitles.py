@@ -0,0 +1,90 @@
+import numpy as np
+
+from utils import subtitles
+
+LONG = (
+    "Narrator (measured, ceremonial): Strength and power through innovation and indigenisation, "
+    "presented by the Indian Army at the Manekshaw Centre. Seventy startups, one mission, self-reliance in defence."
+)
+
+
+def _blocks():
+    return [
+        {"row_no": 1, "start": 0.0, "duration": 1.2, "text": "Welcome."},
+        {"row_no": 2, "start": 1.25, "duration": 14.0, "text": LONG},
+    ]
+
+
+def test_delivery_note_is_dropped():
+    cues = subtitles.build_cues(_blocks())
+    assert not any("Narrator" in cue.text for cue in cues)
+    assert cues[1].text.startswith("Strength and power")
+
+
+def test_cues_fit_two_lines_and_never_overlap():
+    cues = subtitles.build_cues(_blocks())
+    assert len(cues) > 2
+    for cue in cues:
+        assert len(cue.text) <= subtitles.MAX_LINE_CHARS * subtitles.MAX_LINES
+        assert all(len(line) <= subtitles.MAX_LINE_CHARS for line in subtitles._wrap(cue.text))
+        assert cue.end - cue.start <= subtitles.MAX_DURATION + 1e-9
+    for current, following in zip(cues, cues[1:]):
+        assert current.end <= following.start
+
+
+def test_short_cue_floor_does_not_overlap_the_next_cue():
+    blocks = [
+        {"row_no": 1, "start": 0.0, "duration": 0.3, "text": "Hi."},
+        {"row_no": 2, "start": 0.3, "duration": 2.0, "text": "Next line."},
+    ]
+    first, second = subtitles.build_cues(blocks)
+    assert first.end <= second.start
+    assert first.end > first.start
+
+
+def test_timings_override_block_spans():
+    timings = [{"row_no": 1, "start": 2.0, "end": 3.5}, {"row_no": 2, "start": 4.0, "end": 18.0}]
+    cues = subtitles.build_cues(_blocks(), timings=timings)
+    assert cues[0].start == 2.0
+    assert cues[1].start == 4.0
+
+
+def test_voiced_audio_moves_onsets_past_leading_silence():
+    rate = 16000
+    wav = np.zeros(rate * 3, dtype=np.float32)
+    wav[rate:] = 0.3 * np.sin(np.arange(rate * 2) * 2 * np.pi * 220 / rate)
+    block = {"row_no": 1, "start": 0.0, "duration": 3.0, "text": "Speech starts late."}
+    cues = subtitles.build_cues([block], wav=wav, sample_rate=rate)
+    assert abs(cues[0].start - 1.0) < 0.05
+
+
+def test_word_timings_are_ordered_within_the_cue():
+    cues = subtitles.build_cues(_blocks(), word_timings=True)
+    for cue in cues:
+        assert [word for _, word in cue.words] == cue.text.split()
+        onsets = [onset for onset, _ in cue.words]
+        assert onsets == sorted(onsets)
+        assert cue.start <= onsets[0] and onsets[-1] <= cue.end
+
+
+def test_writers(tmp_path):
+    cues = subtitles.build_cues(_blocks(), word_timings=True)
+    paths = subtitles.write_captions(cues, tmp_path / "captions", size=(1920, 1080))
+    srt, vtt, ass = (path.read_text(encoding="utf-8") for path in paths)
+    assert srt.startswith("1\n00:00:00,000 --> ")
+    assert vtt.startswith("WEBVTT\n")
+    assert "Dialogue: 0,0:00:00.00," in ass and "PlayResX: 1920" in ass
+    # Word-timed VTT cues break between timestamp tags where the plain text wraps.
+    wrapped = next(cue for cue in cues if len(subtitles._wrap(cue.text)) == 2)
+    body = vtt.split(subtitles._format_timestamp(wrapped.start, "."), 1)[1].split("\n\n", 1)[0]
+    lines = body.split("\n")[1:]
+    assert len(lines) == 2
+    assert [len(line.split()) for line in lines] == [len(part.split()) for part in subtitles._wrap(wrapped.text)]
+
+
+def test_ass_offset_cuts_to_a_segment(tmp_path):
+    cues = [subtitles.Cue(0.0, 1.0, "gone"), subtitles.Cue(5.0, 7.0, "kept")]
+    subtitles.write_ass(cues, tmp_path / "seg.ass", offset=4.0)
+    text = (tmp_path / "seg.ass").read_text(encoding="utf-8")
+    assert "gone" not in text
+    assert "Dialogue: 0,0:00:01.00,0:00:03.00,Caption,,0,0,0,,kept" in text
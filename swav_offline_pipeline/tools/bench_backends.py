@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Throughput of SDXL stills per inference backend and worker layout.
+
+For each backend and worker count, N worker processes are started at once
+(CPU backends pinned and sized with ``backends.plan_workers``, as the farm's
+local workers are), each loads SDXL and renders ``--images`` stills of
+storyboard prompts at the backend's generation size for the chosen preset.
+Reported per run: model load time, seconds per image inside a worker, and
+aggregate stills per hour across workers, the figure to compare when deciding
+what a CPU node can take on.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import yaml
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR))
+
+from utils import backends as backend_utils  # noqa: E402
+from utils import models as model_utils  # noqa: E402
+from utils import prompt_cache  # noqa: E402
+from utils import samplers as sampler_utils  # noqa: E402
+
+RESOLUTIONS: Dict[str, tuple] = {
+    "hd": (1920, 1080),
+    "4k": (3840, 2160),
+}
+
+
+def storyboard_prompts(path: Path) -> List[str]:
+    storyboard = yaml.safe_load(path.read_text(encoding="utf-8"))
+    return [shot["prompt"] for scene in storyboard["scenes"] for shot in scene["shots"] if shot.get("method") == "t2v"]
+
+
+def worker(args: argparse.Namespace) -> Dict:
+    if args.fake_models:
+        from utils import fakes
+
+        fakes.install()
+    backend = backend_utils.configure(args.backend, args.threads, args.numa_node)
+    profile = sampler_utils.get_profile(args.sampler)
+    prompts = storyboard_prompts(args.storyboard)
+    prompts = [prompts[(args.worker_index + idx) % len(prompts)] for idx in range(args.images)]
+    width, height = backend.generation_size(*RESOLUTIONS[args.preset])
+
+    start = time.perf_counter()
+    pipe = model_utils.get_t2i()
+    load_s = time.perf_counter() - start
+    cache = prompt_cache.configure(None)
+    cache.expect(prompts)
+    cache.embeds(pipe, prompts[0])  # the batched encode, outside the timed loop
+    model_utils.set_sdxl_scheduler(pipe, profile.scheduler, profile.karras)
+    times = []
+    for idx, prompt in enumerate(prompts):
+        start = time.perf_counter()
+        pipe(
+            **cache.embeds(pipe, prompt),
+            **profile.pipe_kwargs(),
+            width=width,
+            height=height,
+            generator=model_utils.generator(idx),
+            output_type="pil",
+        )
+        times.append(time.perf_counter() - start)
+    return {"backend": backend.name, "threads": backend.threads, "size": [width, height], "load_s": load_s, "times": times}
+
+
+def run_layout(args: argparse.Namespace, backend: str, workers: int, tmp: Path) -> Dict:
+    placement = backend_utils.plan_workers(workers) if backend_utils.get_backend(backend).cpu else []
+    procs = []
+    start = time.perf_counter()
+    for idx in range(workers):
+        out = tmp / f"{backend}_{workers}_{idx}.json"
+        cmd = [
+            sys.executable, __file__, "--worker-json", str(out), "--backend", backend, "--worker-index", str(idx),
+            "--storyboard", str(args.storyboard), "--preset", args.preset, "--sampler", args.sampler,
+            "--images", str(args.images),
+        ]
+        if placement:
+            cmd += ["--numa-node", str(placement[idx][0]), "--threads", str(placement[idx][1])]
+        if args.fake_models:
+            cmd.append("--fake-models")
+        procs.append((subprocess.Popen(cmd), out))
+    results = []
+    for proc, out in procs:
+        if proc.wait() != 0:
+            raise RuntimeError(f"{backend} worker failed with exit code {proc.returncode}")
+        results.append(json.loads(out.read_text()))
+    wall = time.perf_counter() - start
+    images = sum(len(result["times"]) for result in results)
+    per_image = [t for result in results for t in result["times"]]
+    return {
+        "backend": backend,
+        "workers": workers,
+        "threads": [result["threads"] for result in results],
+        "size": results[0]["size"],
+        "load_s": max(result["load_s"] for result in results),
+        "s_per_image": sum(per_image) / len(per_image),
+        # Steady state: excludes model load, which a long-running farm worker pays once.
+        "stills_per_hour": 3600.0 * images / max(wall - max(result["load_s"] for result in results), 1e-9),
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--storyboard", type=Path, default=BASE_DIR / "storyboard.swav2025.yaml")
+    parser.add_argument("--backends", default="cuda,cpu", help="Comma-separated backends to compare")
+    parser.add_argument("--workers", default="1", help="Comma-separated worker counts per backend, e.g. 1,2")
+    parser.add_argument("--preset", choices=RESOLUTIONS.keys(), default="hd")
+    parser.add_argument("--sampler", default="dpmpp_2m_karras_12", choices=sorted(sampler_utils.PROFILES))
+    parser.add_argument("--images", type=int, default=4, help="Stills per worker")
+    parser.add_argument("--fake-models", action="store_true", help="Smoke-test the tool with the CPU fakes")
+    parser.add_argument("--json", type=Path, help="Optional path to write raw results as JSON")
+    # Internal: one worker process of a layout.
+    parser.add_argument("--worker-json", type=Path, help=argparse.SUPPRESS)
+    parser.add_argument("--worker-index", type=int, default=0, help=argparse.SUPPRESS)
+    parser.add_argument("--backend", help=argparse.SUPPRESS)
+    parser.add_argument("--numa-node", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--threads", type=int, default=0, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if args.worker_json:
+        args.worker_json.write_text(json.dumps(worker(args)))
+        return
+
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="swav_backends_") as tmp_name:
+        for backend in args.backends.split(","):
+            for workers in (int(count) for count in args.workers.split(",")):
+                rows.append(run_layout(args, backend, workers, Path(tmp_name)))
+
+    print(f"{args.images} stills per worker, {args.sampler}, preset {args.preset}")
+    print(f"{'backend':<14} {'workers':>7} {'threads':>9} {'size':>10} {'load s':>7} {'s/image':>8} {'stills/h':>9}")
+    for row in rows:
+        threads = "/".join(str(t) for t in row["threads"])
+        size = f"{row['size'][0]}x{row['size'][1]}"
+        print(
+            f"{row['backend']:<14} {row['workers']:>7} {threads:>9} {size:>10} {row['load_s']:>7.1f} "
+            f"{row['s_per_image']:>8.2f} {row['stills_per_hour']:>9.0f}"
+        )
+    if args.json:
+        args.json.write_text(json.dumps(rows, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark open-caption burn-in: inside the assembly encode vs a separate pass over the master.
+
+Synthetic shots (testsrc2 + noise, intermediate profile) are grouped into
+scenes and assembled with the delivery profile exactly as orchestrate.py
+does. ``separate`` assembles and then re-encodes the whole master through
+the ass filter; ``integrated`` burns the per-scene caption scripts during
+the scene encodes. With --assembly-profile equal to the shot profile the
+separate path stream-copies, so the comparison is one encode either way.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR))
+
+import orchestrate  # noqa: E402
+from utils import encoders as encoder_utils  # noqa: E402
+from utils import subtitles as subtitle_utils  # noqa: E402
+from utils import video as video_utils  # noqa: E402
+
+RESOLUTIONS: Dict[str, tuple] = {
+    "hd": (1920, 1080),
+    "4k": (3840, 2160),
+}
+
+
+def make_shots(tmp: Path, size: tuple, scenes: int, shots_per_scene: int, seconds: float, fps: int) -> List:
+    profile = encoder_utils.profile_for("shot")
+    shots = []
+    row = 1
+    for scene in range(scenes):
+        for _ in range(shots_per_scene):
+            path = tmp / f"shot_{row:03d}{profile.extension}"
+            source = f"testsrc2=size={size[0]}x{size[1]}:rate={fps},noise=alls=6:allf=t"
+            subprocess.run(
+                ["ffmpeg", "-y", "-loglevel", "error", "-f", "lavfi", "-i", source, "-t", f"{seconds:.3f}",
+                 *profile.ffmpeg_args(), str(path)],
+                check=True,
+            )
+            spec = orchestrate.ShotSpec(row_no=row, method="raw", prompt="", duration_s=seconds, narration="")
+            shots.append(orchestrate.RenderedShot(spec=spec, video_path=path, scene_index=scene))
+            row += 1
+    return shots
+
+
+def make_cues(total: float) -> List[subtitle_utils.Cue]:
+    cues, start = [], 0.0
+    while start < total:
+        text = "Strength and power through innovation and indigenisation"
+        cues.append(subtitle_utils.Cue(start=start, end=min(start + 2.8, total), text=text))
+        start += 3.0
+    return cues
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--resolution", choices=RESOLUTIONS.keys(), default="hd")
+    parser.add_argument("--scenes", type=int, default=3)
+    parser.add_argument("--shots-per-scene", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=3.0, help="Shot length")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--jobs", type=int, default=2, help="Parallel scene encodes")
+    parser.add_argument("--assembly-profile", choices=sorted(encoder_utils.PROFILES), default="delivery")
+    parser.add_argument("--json", type=Path, help="Optional path to write raw results as JSON")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    size = RESOLUTIONS[args.resolution]
+    encoder_utils.set_stage_profile("assembly", args.assembly_profile)
+    encoder_utils.set_threads(encoder_utils.threads_per_job(args.jobs))
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="swav_burnin_") as tmp_name:
+        tmp = Path(tmp_name)
+        shots = make_shots(tmp, size, args.scenes, args.shots_per_scene, args.seconds, args.fps)
+        cues = make_cues(sum(shot.spec.duration_s for shot in shots))
+
+        separate_dir, integrated_dir = tmp / "separate", tmp / "integrated"
+        separate_dir.mkdir()
+        integrated_dir.mkdir()
+
+        start = time.perf_counter()
+        timeline = orchestrate.assemble_timeline(shots, separate_dir, args.jobs)
+        assembled = time.perf_counter() - start
+        subtitle_utils.write_ass(cues, separate_dir / "captions.ass", size=size)
+        video_utils.burn_captions(timeline, separate_dir / "captions.ass", separate_dir / f"burned{timeline.suffix}")
+        results["separate"] = {"wall_s": time.perf_counter() - start, "assembly_s": assembled}
+
+        start = time.perf_counter()
+        orchestrate.assemble_timeline(shots, integrated_dir, args.jobs, cues=cues, size=size)
+        results["integrated"] = {"wall_s": time.perf_counter() - start}
+
+    print(
+        f"{len(shots)} shots in {args.scenes} scenes at {size[0]}x{size[1]}, "
+        f"'{args.assembly_profile}' profile, {args.jobs} parallel jobs"
+    )
+    separate = results["separate"]
+    print(f"  separate pass : {separate['wall_s']:7.2f} s (assembly {separate['assembly_s']:.2f} s + burn-in)")
+    print(f"  integrated    : {results['integrated']['wall_s']:7.2f} s")
+    if args.json:
+        args.json.write_text(json.dumps({"resolution": args.resolution, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark deriving several deliverables from one decode vs one ffmpeg run per deliverable.
+
+A synthetic timeline (testsrc2 + noise, intermediate profile) and a silent
+24-bit mix stand in for the assembled render. ``shared`` is
+utils/deliverables.encode (one decode, split filter, all encoders in one
+process); ``separate`` runs the same encode once per deliverable, decoding
+the timeline each time. Per-deliverable encoder CPU comes from ffmpeg's named
+encoder threads.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR))
+
+from utils import deliverables as deliverable_utils  # noqa: E402
+from utils import encoders as encoder_utils  # noqa: E402
+
+RESOLUTIONS: Dict[str, tuple] = {
+    "hd": (1920, 1080),
+    "4k": (3840, 2160),
+}
+
+
+def make_sources(tmp: Path, size: tuple, seconds: float, fps: int) -> tuple:
+    profile = encoder_utils.get_profile("intermediate")
+    timeline = tmp / f"timeline{profile.extension}"
+    source = f"testsrc2=size={size[0]}x{size[1]}:rate={fps},noise=alls=6:allf=t"
+    subprocess.run(
+        ["ffmpeg", "-y", "-loglevel", "error", "-f", "lavfi", "-i", source, "-t", f"{seconds:.3f}",
+         *profile.ffmpeg_args(), str(timeline)],
+        check=True,
+    )
+    mix_wav = tmp / "mix.wav"
+    subprocess.run(
+        ["ffmpeg", "-y", "-loglevel", "error", "-f", "lavfi", "-i", "anullsrc=r=48000:cl=stereo",
+         "-t", f"{seconds:.3f}", "-c:a", "pcm_s24le", str(mix_wav)],
+        check=True,
+    )
+    return timeline, mix_wav
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--resolution", choices=RESOLUTIONS.keys(), default="hd", help="Timeline resolution")
+    parser.add_argument("--deliverables", type=deliverable_utils.parse, default="hd-h264,web")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--json", type=Path, help="Optional path to write raw results as JSON")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    size = RESOLUTIONS[args.resolution]
+    threads = encoder_utils.threads_per_job(len(args.deliverables))
+    results: Dict[str, Dict] = {}
+    with tempfile.TemporaryDirectory(prefix="swav_deliver_") as tmp_name:
+        tmp = Path(tmp_name)
+        timeline, mix_wav = make_sources(tmp, size, args.seconds, args.fps)
+
+        start = time.perf_counter()
+        shared = deliverable_utils.encode(timeline, mix_wav, args.deliverables, tmp, size, threads=threads)
+        results["shared"] = {"wall_s": time.perf_counter() - start, "deliverables": shared}
+
+        separate: Dict[str, Dict] = {}
+        start = time.perf_counter()
+        for item in args.deliverables:
+            item_start = time.perf_counter()
+            out = deliverable_utils.encode(timeline, mix_wav, [item], tmp, size, threads=threads)[item.name]
+            separate[item.name] = {**out, "wall_s": time.perf_counter() - item_start}
+        results["separate"] = {"wall_s": time.perf_counter() - start, "deliverables": separate}
+
+    names = ", ".join(item.name for item in args.deliverables)
+    print(f"{args.seconds:.0f} s {size[0]}x{size[1]} timeline -> {names}")
+    print(f"  shared decode : {results['shared']['wall_s']:7.2f} s")
+    print(f"  separate runs : {results['separate']['wall_s']:7.2f} s")
+    print(f"  {'deliverable':<12} {'encoder cpu s':>14} {'separate wall s':>16}")
+    for item in args.deliverables:
+        print(f"  {item.name:<12} {shared[item.name]['cpu_s']:14.2f} {separate[item.name]['wall_s']:16.2f}")
+    if args.json:
+        args.json.write_text(json.dumps({"resolution": args.resolution, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
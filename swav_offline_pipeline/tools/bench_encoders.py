@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Benchmark encoder profiles across resolutions: encode fps, file size and PSNR.
+
+A lossless synthetic reference clip is generated per resolution with ffmpeg's
+testsrc2 (plus temporal noise so the encoder has grain to work on), then every
+profile encodes it and is scored against the reference.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR))
+
+from utils import encoders as encoder_utils  # noqa: E402
+
+RESOLUTIONS: Dict[str, tuple] = {
+    "hd": (1920, 1080),
+    "4k": (3840, 2160),
+}
+
+PSNR_RE = re.compile(r"average:([0-9.]+|inf)")
+
+
+def make_reference(width: int, height: int, seconds: float, fps: int, out_path: Path) -> None:
+    source = f"testsrc2=size={width}x{height}:rate={fps},noise=alls=6:allf=t"
+    subprocess.run(
+        [
+            "ffmpeg", "-y", "-loglevel", "error",
+            "-f", "lavfi", "-i", source,
+            "-t", f"{seconds:.3f}",
+            "-c:v", "ffv1", "-level", "3", "-pix_fmt", "yuv420p",
+            str(out_path),
+        ],
+        check=True,
+    )
+
+
+def encode(reference: Path, profile: encoder_utils.EncoderProfile, threads: int | None, out_path: Path) -> float:
+    start = time.perf_counter()
+    subprocess.run(
+        ["ffmpeg", "-y", "-loglevel", "error", "-i", str(reference), *profile.ffmpeg_args(threads), str(out_path)],
+        check=True,
+    )
+    return time.perf_counter() - start
+
+
+def psnr(reference: Path, encoded: Path, fps: int) -> float:
+    # Containers round timestamps differently (Matroska uses milliseconds), so both
+    # streams are renumbered by frame index before the psnr filter pairs them up.
+    align = f"format=yuv444p,settb=expr=1/{fps},setpts=N"
+    result = subprocess.run(
+        [
+            "ffmpeg", "-hide_banner", "-i", str(encoded), "-i", str(reference),
+            "-lavfi", f"[0:v]{align}[a];[1:v]{align}[b];[a][b]psnr",
+            "-f", "null", "-",
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    match = PSNR_RE.findall(result.stderr)
+    if not match:
+        return float("nan")
+    return float("inf") if match[-1] == "inf" else float(match[-1])
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--profiles", default=",".join(encoder_utils.PROFILES), help="Comma-separated profile names")
+    parser.add_argument("--resolutions", default="hd,4k", help="Comma-separated resolution presets")
+    parser.add_argument("--seconds", type=float, default=3.0, help="Reference clip length")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--threads", type=int, default=0, help="ffmpeg threads per encode (0 = ffmpeg default)")
+    parser.add_argument("--json", type=Path, help="Optional path to write raw results as JSON")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    profiles = [encoder_utils.get_profile(name.strip()) for name in args.profiles.split(",") if name.strip()]
+    resolutions = [name.strip() for name in args.resolutions.split(",") if name.strip()]
+    frames = int(round(args.seconds * args.fps))
+    threads = args.threads or None
+
+    results: List[Dict] = []
+    with tempfile.TemporaryDirectory(prefix="swav_bench_enc_") as tmp:
+        tmp_dir = Path(tmp)
+        for res_name in resolutions:
+            width, height = RESOLUTIONS[res_name]
+            reference = tmp_dir / f"reference_{res_name}.nut"
+            print(f"[{res_name}] generating {frames}-frame reference at {width}x{height}")
+            make_reference(width, height, args.seconds, args.fps, reference)
+            for profile in profiles:
+                out_path = tmp_dir / f"{res_name}_{profile.name}{profile.extension}"
+                wall = encode(reference, profile, threads, out_path)
+                row = {
+                    "resolution": res_name,
+                    "profile": profile.name,
+                    "fps": frames / wall if wall else 0.0,
+                    "seconds": wall,
+                    "size_mb": out_path.stat().st_size / 1e6,
+                    "psnr_db": psnr(reference, out_path, args.fps),
+                }
+                results.append(row)
+                print(
+                    f"  {profile.name:<20} {row['fps']:7.1f} fps  {row['size_mb']:9.1f} MB  "
+                    f"PSNR {row['psnr_db']:.2f} dB"
+                )
+                out_path.unlink(missing_ok=True)
+
+    print("\n========== MATRIX ==========")
+    print(f"{'resolution':<10} {'profile':<20} {'fps':>8} {'MB':>9} {'PSNR dB':>8}")
+    for row in results:
+        print(
+            f"{row['resolution']:<10} {row['profile']:<20} {row['fps']:8.1f} "
+            f"{row['size_mb']:9.1f} {row['psnr_db']:8.2f}"
+        )
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
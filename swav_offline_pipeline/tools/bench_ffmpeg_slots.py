@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark a storyboard's shot encodes through the shared ffmpeg runner with 1 vs N slots.
+
+Every selected storyboard row becomes the Ken Burns encode the t2v path runs
+(a synthetic still, the row's duration, the shot profile). All encodes are
+submitted at once and the runner's slot limit decides how many overlap, so
+``--slots 1`` is the old serial behaviour. Throughput is seconds of video
+encoded per wall-clock second.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import yaml
+from PIL import Image
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR))
+
+from utils import encoders as encoder_utils  # noqa: E402
+from utils import ffmpeg as ffmpeg_utils  # noqa: E402
+
+RESOLUTIONS: Dict[str, tuple] = {
+    "hd": (1920, 1080),
+    "4k": (3840, 2160),
+}
+
+
+def kenburns_cmd(still: Path, out_path: Path, duration: float, fps: int, size: tuple) -> List[str]:
+    """Same filter chain as video_utils.kenburns_from_still, for an already-written still."""
+    frames = max(int(round(duration * fps)), 1)
+    zoom = f"zoompan=z='1+{0.05 / frames}*on':d={frames}:s={size[0]}x{size[1]}"
+    return [
+        "ffmpeg", "-y", "-loop", "1", "-i", str(still), "-vf", f"{zoom},fps={fps}", "-t", f"{duration:.3f}",
+        *encoder_utils.profile_for("shot").ffmpeg_args(), str(out_path),
+    ]
+
+
+def run_encodes(cmds: List[List[str]], slots: int) -> float:
+    ffmpeg_utils.configure(slots)
+    start = time.perf_counter()
+    futures = [ffmpeg_utils.submit(cmd) for cmd in cmds]
+    for future in futures:
+        future.result()
+    return time.perf_counter() - start
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--storyboard", type=Path, default=BASE_DIR / "storyboard.swav2025.yaml")
+    parser.add_argument("--rows", default="1-8", help="Storyboard rows to encode, e.g. 1-8 or 2,5,9")
+    parser.add_argument("--resolution", choices=RESOLUTIONS.keys(), default="hd")
+    parser.add_argument("--slots", type=int, default=0, help="Parallel slots to compare against serial (0 = cores)")
+    parser.add_argument("--json", type=Path, help="Optional path to write raw results as JSON")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    rows = set()
+    for part in args.rows.split(","):
+        start, _, end = part.partition("-")
+        rows.update(range(int(start), int(end or start) + 1))
+    storyboard = yaml.safe_load(args.storyboard.read_text(encoding="utf-8"))
+    fps = storyboard["project"].get("fps", 30)
+    durations = [
+        float(shot["duration_s"])
+        for scene in storyboard["scenes"]
+        for shot in scene["shots"]
+        if int(shot["row_no"]) in rows
+    ]
+    size = RESOLUTIONS[args.resolution]
+    slots = args.slots or ffmpeg_utils.slots()
+
+    results: Dict[str, Dict] = {}
+    with tempfile.TemporaryDirectory(prefix="swav_slots_") as tmp_name:
+        tmp = Path(tmp_name)
+        still = tmp / "still.png"
+        rng = np.random.default_rng(0)
+        Image.fromarray(rng.integers(0, 255, (size[1], size[0], 3), dtype=np.uint8)).save(still)
+        for label, count in (("serial", 1), (f"{slots} slots", slots)):
+            cmds = [kenburns_cmd(still, tmp / f"{label[0]}_{idx:03d}.mp4", dur, fps, size) for idx, dur in enumerate(durations)]
+            wall = run_encodes(cmds, count)
+            results[label] = {"slots": count, "wall_s": wall, "video_s_per_s": sum(durations) / wall}
+
+    print(f"{len(durations)} encodes, {sum(durations):.0f} s of {size[0]}x{size[1]} video")
+    print(f"{'run':<10} {'wall s':>8} {'video s/s':>10}")
+    for label, row in results.items():
+        print(f"{label:<10} {row['wall_s']:8.2f} {row['video_s_per_s']:10.2f}")
+    if args.json:
+        args.json.write_text(json.dumps({"rows": args.rows, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
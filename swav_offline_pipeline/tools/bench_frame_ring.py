@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Benchmark handing generated frames to the encoder: in-process pipe vs pickled queue vs shared-memory ring.
+
+Each mode takes SVD-shaped float output (frames, 3, 576, 1024), converts and
+resizes it to the target resolution and streams rgb24 into ffmpeg. The sink
+is ``-f null`` by default so the numbers measure the hand-off rather than
+x264; use --sink encode to include the intermediate encode. Every mode runs
+in a fresh interpreter so peak RSS is not polluted by the previous one.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+from PIL import Image
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR))
+
+from utils import encoders as encoder_utils  # noqa: E402
+from utils import fakes  # noqa: E402
+from utils import framering  # noqa: E402
+from utils import video as video_utils  # noqa: E402
+
+RESOLUTIONS: Dict[str, tuple] = {
+    "hd": (1920, 1080),
+    "4k": (3840, 2160),
+}
+MODES = ("pipe", "queue", "ring")
+
+NULL_PROFILE = encoder_utils.EncoderProfile(
+    name="null", codec="rawvideo", args=["-f", "null"], pix_fmt="rgb24", description="Discard frames"
+)
+
+# Full-frame copies each mode makes between a converted frame (uint8 HWC at the
+# target size) and the ffmpeg pipe. Conversion/resize temporaries are the same
+# in every mode; the kernel copy into the pipe is common to all of them.
+COPIES_PER_FRAME = {
+    "pipe": "1: np.stack into a whole-clip array held until the encode starts",
+    "queue": "2: pickle into the queue, unpickle in the encoder process",
+    "ring": "1: write into a shared slot the ffmpeg runner pipes in place",
+}
+
+
+def _source(frames: int) -> np.ndarray:
+    still = fakes.FakeSDXLPipeline()(prompt="frame ring benchmark", width=1024, height=576).images[0]
+    return fakes.FakeSVDPipeline()(image=still, num_frames=frames).frames[0]
+
+
+def _convert(frame: np.ndarray, size: tuple) -> np.ndarray:
+    hwc = (frame * 255.0).clip(0, 255).astype("uint8").transpose(1, 2, 0)
+    return np.asarray(Image.fromarray(hwc).resize(size, Image.BICUBIC))
+
+
+def run_pipe(src: np.ndarray, size: tuple, fps: int, out: str, profile) -> None:
+    clip = np.stack([_convert(frame, size) for frame in src], axis=0)
+    video_utils.write_video(clip, out, fps, profile=profile)
+
+
+def _queue_worker(q, cmd) -> None:
+    process = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+    while True:
+        frame = q.get()
+        if frame is None:
+            break
+        process.stdin.write(frame.data)
+    process.stdin.close()
+    sys.exit(process.wait())
+
+
+def run_queue(src: np.ndarray, size: tuple, fps: int, out: str, profile) -> None:
+    ctx = framering._CTX
+    q = ctx.Queue(maxsize=8)
+    cmd = video_utils.rawvideo_cmd(size[0], size[1], fps, out, profile)
+    worker = ctx.Process(target=_queue_worker, args=(q, cmd))
+    worker.start()
+    for frame in src:
+        q.put(_convert(frame, size))
+    q.put(None)
+    worker.join()
+    if worker.exitcode != 0:
+        raise subprocess.CalledProcessError(worker.exitcode, cmd)
+
+
+def run_ring(src: np.ndarray, size: tuple, fps: int, out: str, profile) -> None:
+    with framering.RingEncoder(Path(out), size[0], size[1], fps, profile=profile, slots=8) as encoder:
+        for frame in src:
+            slot, buf = encoder.acquire()
+            buf[...] = _convert(frame, size)
+            encoder.submit(slot)
+
+
+def child(args: argparse.Namespace) -> None:
+    size = RESOLUTIONS[args.resolution]
+    src = _source(args.frames)
+    profile = NULL_PROFILE if args.sink == "null" else encoder_utils.get_profile("intermediate")
+    with tempfile.TemporaryDirectory(prefix="swav_ring_") as tmp:
+        out = "-" if args.sink == "null" else str(Path(tmp) / f"{args.mode}.mp4")
+        fn = {"pipe": run_pipe, "queue": run_queue, "ring": run_ring}[args.mode]
+        start = time.perf_counter()
+        fn(src, size, args.fps, out, profile)
+        wall = time.perf_counter() - start
+    # ru_maxrss is KiB on Linux; the encoder helper process is a child, so include it.
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    print(json.dumps({"mode": args.mode, "wall_s": wall, "fps": args.frames / wall, "peak_rss_mb": peak / 1024}))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--modes", default=",".join(MODES), help="Comma-separated hand-off modes")
+    parser.add_argument("--resolution", choices=RESOLUTIONS.keys(), default="4k")
+    parser.add_argument("--frames", type=int, default=40, help="Frames per run (SVD returns up to 40)")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--sink", choices=("null", "encode"), default="null")
+    parser.add_argument("--json", type=Path, help="Optional path to write raw results as JSON")
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if args.mode:
+        child(args)
+        return
+
+    results = []
+    print(f"{'mode':<8} {'wall s':>8} {'fps':>8} {'peak RSS MB':>12}  copies per frame")
+    for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+        cmd = [
+            sys.executable, __file__, "--mode", mode, "--resolution", args.resolution,
+            "--frames", str(args.frames), "--fps", str(args.fps), "--sink", args.sink,
+        ]
+        out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+        row = json.loads(out.strip().splitlines()[-1])
+        row["copies_per_frame"] = COPIES_PER_FRAME[mode]
+        results.append(row)
+        print(f"{mode:<8} {row['wall_s']:8.2f} {row['fps']:8.2f} {row['peak_rss_mb']:12.0f}  {row['copies_per_frame']}")
+
+    if args.json:
+        args.json.write_text(json.dumps({"resolution": args.resolution, "sink": args.sink, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark converting SVD output into the uint8 clip that gets encoded: time and peak memory per shot.
+
+The ``legacy`` path is the expression render_img2vid used before utils/frames.py
+(full-clip float temporaries, a transposed copy, then a per-frame PIL resize and
+np.stack). ``frames`` is to_uint8_hwc + retime_resize. Inputs are float arrays
+shaped like SVD output, lists of PIL images (render_single_shot) and, when
+torch is installed, CPU tensors. Peak memory is tracemalloc's peak, which
+includes NumPy buffers.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+from PIL import Image
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR))
+
+from utils import fakes  # noqa: E402
+from utils import frames as frame_utils  # noqa: E402
+
+RESOLUTIONS: Dict[str, tuple] = {
+    "hd": (1920, 1080),
+    "4k": (3840, 2160),
+}
+
+
+def legacy(frames, target_frames: int, size: tuple) -> np.ndarray:
+    if isinstance(frames, list):
+        frames = np.array([np.array(frame) for frame in frames]).transpose(0, 3, 1, 2) / 255.0
+    if hasattr(frames, "cpu"):
+        frames = frames.cpu().numpy()
+    frames = (frames * 255.0).clip(0, 255).astype("uint8").transpose(0, 2, 3, 1)
+    if frames.shape[0] != target_frames:
+        idx = np.linspace(0, frames.shape[0] - 1, target_frames).round().astype(int)
+        frames = frames[idx]
+    if (frames.shape[2], frames.shape[1]) != size:
+        resized = [Image.fromarray(frame).resize(size, Image.BICUBIC) for frame in frames]
+        frames = np.stack([np.array(f) for f in resized], axis=0)
+    return frames
+
+
+def current(frames, target_frames: int, size: tuple) -> np.ndarray:
+    return frame_utils.retime_resize(frame_utils.to_uint8_hwc(frames), target_frames, size)
+
+
+def measure(fn: Callable, frames, target_frames: int, size: tuple) -> Dict[str, float]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    clip = fn(frames, target_frames, size)
+    wall = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del clip
+    return {"wall_s": wall, "peak_mb": peak / 1e6}
+
+
+def inputs(source_frames: int) -> Dict[str, object]:
+    still = fakes.FakeSDXLPipeline()(prompt="frame conversion benchmark", width=1024, height=576).images[0]
+    svd = fakes.FakeSVDPipeline()(image=still, num_frames=source_frames).frames[0]
+    result: Dict[str, object] = {
+        "numpy_float": svd,
+        "pil_list": [Image.fromarray(f) for f in frame_utils.to_uint8_hwc(svd)],
+    }
+    try:
+        import torch
+
+        result["torch_cpu"] = torch.from_numpy(svd.copy())
+    except ImportError:
+        print("torch not installed; skipping tensor input")
+    return result
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--resolution", choices=RESOLUTIONS.keys(), default="4k")
+    parser.add_argument("--source-frames", type=int, default=40, help="Frames returned by SVD")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Shot duration")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--json", type=Path, help="Optional path to write raw results as JSON")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    size = RESOLUTIONS[args.resolution]
+    target_frames = int(round(args.seconds * args.fps))
+    clip_mb = target_frames * size[0] * size[1] * 3 / 1e6
+    print(f"{args.source_frames} source frames -> {target_frames} frames at {size[0]}x{size[1]} (clip {clip_mb:.0f} MB)")
+    print(f"{'input':<12} {'path':<8} {'wall s':>8} {'peak MB':>9}")
+
+    results: List[Dict] = []
+    for name, frames in inputs(args.source_frames).items():
+        for path, fn in (("legacy", legacy), ("frames", current)):
+            row = {"input": name, "path": path, **measure(fn, frames, target_frames, size)}
+            results.append(row)
+            print(f"{name:<12} {path:<8} {row['wall_s']:8.2f} {row['peak_mb']:9.0f}")
+
+    if args.json:
+        args.json.write_text(json.dumps({"resolution": args.resolution, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
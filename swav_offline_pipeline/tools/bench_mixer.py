@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark the in-process NumPy mixer against the ffmpeg loudnorm/sidechaincompress chain.
+
+A speech-like voiceover (24 kHz, phrases at varying levels with pauses) and
+the procedural music bed are mixed to 48 kHz 24-bit WAV by both engines.
+Loudness and true peak of each result are measured independently with
+ffmpeg's ebur128 filter and reported against the -16 LUFS / -1.5 dBTP target.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+import soundfile as sf
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR))
+
+from utils import audio as audio_utils  # noqa: E402
+from utils import mixer as mixer_utils  # noqa: E402
+from utils import music as music_utils  # noqa: E402
+
+
+def synthetic_voiceover(path: Path, seconds: float, sample_rate: int = 24000, seed: int = 0) -> None:
+    """Phrases of voiced syllables (harmonics of a drifting pitch) at -12..-30 dBFS with pauses between."""
+    rng = np.random.default_rng(seed)
+    with sf.SoundFile(str(path), "w", samplerate=sample_rate, channels=1) as fh:
+        written = 0
+        total = int(seconds * sample_rate)
+        while written < total:
+            phrase = int(rng.uniform(2.0, 6.0) * sample_rate)
+            t = np.arange(phrase) / sample_rate
+            pitch = rng.uniform(100, 180) * (1 + 0.05 * np.sin(2 * np.pi * 0.7 * t))
+            phase = 2 * np.pi * np.cumsum(pitch) / sample_rate
+            voiced = sum(np.sin(k * phase) / k for k in range(1, 12))
+            syllables = np.clip(np.sin(2 * np.pi * rng.uniform(3, 5) * t), 0, None) ** 2
+            level = 10 ** (rng.uniform(-30, -12) / 20)
+            phrase_wav = (level * voiced * syllables / np.abs(voiced).max()).astype(np.float32)
+            pause = np.zeros(int(rng.uniform(0.3, 1.2) * sample_rate), dtype=np.float32)
+            chunk = np.concatenate([phrase_wav, pause])[: total - written]
+            fh.write(chunk)
+            written += len(chunk)
+
+
+def ebur128(path: Path) -> Dict[str, float]:
+    """Integrated loudness and true peak as measured by ffmpeg's ebur128 filter."""
+    result = subprocess.run(
+        ["ffmpeg", "-nostats", "-i", str(path), "-af", "ebur128=peak=true", "-f", "null", "-"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    summary = result.stderr[result.stderr.rfind("Summary:") :]
+    return {
+        "lufs": float(re.search(r"I:\s+(-?[\d.]+) LUFS", summary).group(1)),
+        "true_peak_db": float(re.search(r"Peak:\s+(-?[\d.]+|-inf) dBFS", summary).group(1)),
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=420.0, help="Programme length")
+    parser.add_argument("--tag", default="ceremonial, dignified, 72 bpm", help="Music tag for the bed")
+    parser.add_argument("--json", type=Path, help="Optional path to write raw results as JSON")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    results: Dict[str, Dict] = {}
+    with tempfile.TemporaryDirectory(prefix="swav_mixer_") as tmp_name:
+        tmp = Path(tmp_name)
+        vo_wav, music_wav = tmp / "vo.wav", tmp / "music.wav"
+        synthetic_voiceover(vo_wav, args.seconds)
+        music_utils.make_bed(args.tag, music_wav, args.seconds)
+
+        for name in ("ffmpeg", "numpy"):
+            out_wav = tmp / f"mix_{name}.wav"
+            start = time.perf_counter()
+            report = audio_utils.render_mix(vo_wav, music_wav, out_wav, mixer=name)
+            results[name] = {"wall_s": time.perf_counter() - start, "report": report}
+            results[name].update(ebur128(out_wav))
+            results[name]["native_lufs"] = mixer_utils.integrated_loudness(out_wav)
+
+    print(f"{args.seconds:.0f} s programme, target {mixer_utils.TARGET_LUFS} LUFS / {mixer_utils.TRUE_PEAK_DB} dBTP")
+    print(f"{'mixer':<8} {'wall s':>8} {'LUFS':>7} {'error':>6} {'dBTP':>6} {'native LUFS':>12}")
+    for name, row in results.items():
+        error = row["lufs"] - mixer_utils.TARGET_LUFS
+        print(
+            f"{name:<8} {row['wall_s']:8.2f} {row['lufs']:7.1f} {error:+6.1f} {row['true_peak_db']:6.1f} "
+            f"{row['native_lufs']:12.2f}"
+        )
+    if args.json:
+        args.json.write_text(json.dumps({"seconds": args.seconds, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
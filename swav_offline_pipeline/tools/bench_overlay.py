@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-frame cost of the overlay text: pre-rendered layer vs the old drawtext chain.
+
+A synthetic clip (testsrc2 + noise) is filtered to the null muxer, so the
+text filters are timed without an encode on top:
+
+* ``baseline``: the source alone, subtracted from the other two;
+* ``drawtext``: one ``drawtext`` per line with its shadow, as ``overlay_texts``
+  used to build it, rasterising every line on every frame (skipped when
+  ffmpeg was built without drawtext/libfreetype);
+* ``layer``: ``textlayer.render`` once (reported separately, and free on a
+  cache hit) and a single ``overlay`` of the cached RGBA layer.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR))
+
+from utils import textlayer  # noqa: E402
+from utils import video as video_utils  # noqa: E402
+
+RESOLUTIONS: Dict[str, tuple] = {
+    "hd": (1920, 1080),
+    "4k": (3840, 2160),
+}
+# The row 1 / row 54 title card.
+LINES = [
+    "SWAVLAMBAN 2025 · Manekshaw Centre · 25–26 Nov 2025",
+    "STRENGTH & POWER THROUGH INNOVATION AND INDIGENISATION",
+    "नवाचार एवं स्वदेशीकरण से सशक्तिकरण",
+]
+
+
+def _has_filter(name: str) -> bool:
+    result = subprocess.run(["ffmpeg", "-hide_banner", "-filters"], capture_output=True, text=True, check=True)
+    return any(line.split()[1:2] == [name] for line in result.stdout.splitlines() if line.strip())
+
+
+def _escape_drawtext(text: str) -> str:
+    return text.replace("\\", r"\\\\").replace(":", r"\:").replace("'", r"\'")
+
+
+def drawtext_chain(lines: Sequence[str], font: str = video_utils.DEFAULT_FONT) -> str:
+    size = textlayer.LINE_HEIGHT
+    parts = []
+    for idx, line in enumerate(lines):
+        y_expr = f"(h/2 - {size * (len(lines) - 1) / 2} + {idx}*{size})"
+        parts.append(
+            f"drawtext=fontfile={font}:text='{_escape_drawtext(line)}':"
+            f"fontcolor=white:fontsize={size}:x=(w-text_w)/2:"
+            f"y={y_expr}:shadowcolor=0x000000AA:shadowx=2:shadowy=2"
+        )
+    return ",".join(parts)
+
+
+def _filter(source: str, inputs: List[str], graph: str | None, repeat: int) -> float:
+    cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-nostdin", "-f", "lavfi", "-i", source, *inputs]
+    if graph:
+        cmd += ["-filter_complex", f"{graph}[v]", "-map", "[v]"]
+    cmd += ["-f", "null", "-"]
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(cmd, check=True)
+        runs.append(time.perf_counter() - start)
+    return min(runs)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--resolution", choices=RESOLUTIONS.keys(), default="4k")
+    parser.add_argument("--frames", type=int, default=150)
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per mode; the fastest counts")
+    parser.add_argument("--json", type=Path, help="Optional path to write raw results as JSON")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    size = RESOLUTIONS[args.resolution]
+    source = f"testsrc2=size={size[0]}x{size[1]}:rate={args.fps},noise=alls=6:allf=t,format=yuv420p"
+    source += f",trim=end_frame={args.frames}"
+    results: Dict[str, Dict] = {}
+    with tempfile.TemporaryDirectory(prefix="swav_overlay_") as tmp_name:
+        textlayer.configure(Path(tmp_name))
+        start = time.perf_counter()
+        layer = textlayer.render(LINES, size)
+        render_s = time.perf_counter() - start
+
+        results["baseline"] = {"wall_s": _filter(source, [], None, args.repeat)}
+        if _has_filter("drawtext"):
+            results["drawtext"] = {"wall_s": _filter(source, [], f"[0:v]{drawtext_chain(LINES)}", args.repeat)}
+        else:
+            print("  skipping drawtext: ffmpeg built without the drawtext filter")
+        wall = _filter(source, ["-i", str(layer.path)], textlayer.overlay_filter(layer), args.repeat)
+        results["layer"] = {"wall_s": wall, "render_s": render_s, "layout": layer.layout}
+
+    baseline = results["baseline"]["wall_s"]
+    for row in results.values():
+        row["ms_per_frame"] = 1000 * max(row["wall_s"] - baseline, 0.0) / args.frames
+    print(f"{len(LINES)} lines over {args.frames} frames at {size[0]}x{size[1]} (source cost subtracted)")
+    for mode in ("drawtext", "layer"):
+        if mode in results:
+            print(f"  {mode:<9}: {results[mode]['ms_per_frame']:7.3f} ms/frame ({results[mode]['wall_s']:.2f} s)")
+    print(f"  layer render (once, cached): {render_s * 1000:.1f} ms, {layer.layout} layout")
+    if args.json:
+        payload = {"resolution": args.resolution, "frames": args.frames, "results": results}
+        args.json.write_text(json.dumps(payload, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Benchmark SDXL calls with prompt strings against cached prompt embeddings.
+
+Each mode runs in its own process so memory figures are not mixed:
+
+* ``prompt``: the stock pipeline with both text encoders loaded and CPU
+  offload, called with ``prompt=...`` (the old render path).
+* ``cached``: ``models.get_t2i()`` without text encoders; the storyboard's
+  prompts are encoded in one batched pass and every call passes embeddings.
+
+Per-shot latency is the wall time of one ``pipe(...)`` call (few steps and a
+small size by default, so the prompt overhead is not buried in denoising);
+memory is process RSS after loading and peak CUDA allocation. Needs the real
+models under models/.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import yaml
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR))
+
+from utils import models as model_utils  # noqa: E402
+from utils import prompt_cache  # noqa: E402
+
+
+def storyboard_prompts(path: Path, limit: int) -> List[str]:
+    storyboard = yaml.safe_load(path.read_text(encoding="utf-8"))
+    prompts = [
+        shot["prompt"]
+        for scene in storyboard["scenes"]
+        for shot in scene["shots"]
+        if shot.get("method") in ("t2v", "img2vid")
+    ]
+    return prompts[:limit]
+
+
+def _rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def run_mode(mode: str, prompts: List[str], steps: int, size: int) -> Dict:
+    import torch
+    from diffusers import StableDiffusionXLPipeline
+
+    if mode == "prompt":
+        pipe = StableDiffusionXLPipeline.from_pretrained(
+            model_utils.MODEL_ROOT / "sdxl-base",
+            torch_dtype=torch.float16,
+            variant="fp16",
+            use_safetensors=True,
+            local_files_only=True,
+        )
+        pipe.enable_model_cpu_offload()
+    else:
+        pipe = model_utils.get_t2i()
+    load_rss = _rss_mb()
+    encode_s = 0.0
+    if mode == "cached":
+        cache = prompt_cache.configure(None)
+        cache.expect(prompts)
+        start = time.perf_counter()
+        cache.embeds(pipe, prompts[0])
+        encode_s = time.perf_counter() - start
+
+    torch.cuda.reset_peak_memory_stats()
+    latencies = []
+    for prompt in prompts:
+        kwargs = {"prompt": prompt} if mode == "prompt" else prompt_cache.default().embeds(pipe, prompt)
+        torch.cuda.synchronize()
+        start = time.perf_counter()
+        pipe(**kwargs, num_inference_steps=steps, height=size, width=size, output_type="np")
+        torch.cuda.synchronize()
+        latencies.append(time.perf_counter() - start)
+    return {
+        "mode": mode,
+        "shots": len(prompts),
+        "encode_pass_s": encode_s,
+        "mean_shot_s": statistics.mean(latencies),
+        "median_shot_s": statistics.median(latencies),
+        "rss_after_load_mb": load_rss,
+        "peak_rss_mb": _rss_mb(),
+        "peak_cuda_mb": torch.cuda.max_memory_allocated() / 2**20,
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--storyboard", type=Path, default=BASE_DIR / "storyboard.swav2025.yaml")
+    parser.add_argument("--shots", type=int, default=12, help="Number of storyboard prompts to render")
+    parser.add_argument("--steps", type=int, default=4)
+    parser.add_argument("--size", type=int, default=512)
+    parser.add_argument("--mode", choices=("prompt", "cached"), help=argparse.SUPPRESS)
+    parser.add_argument("--json", type=Path, help="Optional path to write raw results as JSON")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    prompts = storyboard_prompts(args.storyboard, args.shots)
+    if args.mode:
+        result = run_mode(args.mode, prompts, args.steps, args.size)
+        args.json.write_text(json.dumps(result))
+        return
+
+    results: Dict[str, Dict] = {}
+    with tempfile.TemporaryDirectory(prefix="swav_prompts_") as tmp_name:
+        for mode in ("prompt", "cached"):
+            out = Path(tmp_name) / f"{mode}.json"
+            cmd = [sys.executable, __file__, "--storyboard", str(args.storyboard), "--shots", str(args.shots),
+                   "--steps", str(args.steps), "--size", str(args.size), "--mode", mode, "--json", str(out)]
+            subprocess.run(cmd, check=True)
+            results[mode] = json.loads(out.read_text())
+
+    print(f"{len(prompts)} shots, {args.steps} steps at {args.size}x{args.size}")
+    print(f"{'mode':<8} {'encode s':>9} {'shot s':>8} {'RSS MB':>8} {'peak RSS':>9} {'peak CUDA':>10}")
+    for mode, row in results.items():
+        print(
+            f"{mode:<8} {row['encode_pass_s']:9.2f} {row['mean_shot_s']:8.3f} {row['rss_after_load_mb']:8.0f} "
+            f"{row['peak_rss_mb']:9.0f} {row['peak_cuda_mb']:10.0f}"
+        )
+    saved = results["prompt"]["mean_shot_s"] - results["cached"]["mean_shot_s"]
+    print(f"Per-shot latency saved: {saved:.3f} s; "
+          f"RSS saved: {results['prompt']['peak_rss_mb'] - results['cached']['peak_rss_mb']:.0f} MB")
+    if args.json:
+        args.json.write_text(json.dumps({"prompts": len(prompts), "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
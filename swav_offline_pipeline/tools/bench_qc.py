@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark the shot QC tap against the encode it rides on.
+
+SVD-shaped fake frames are retimed and resized to the target resolution, then
+encoded with the shot profile twice per path, once plain and once inside
+``qc.tap()``:
+
+* ``write_video``: the whole clip as one array, reduced in vectorised chunks;
+* ``stream_video``: frame by frame as ffmpeg pulls them (cards, the ring path).
+
+Reported per path: encode wall time without and with the tap, the seconds
+spent in the tap itself and that as a share of the plain encode. The tap
+share is the figure to watch; wall differences at this scale are mostly noise.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR))
+
+from utils import fakes  # noqa: E402
+from utils import frames as frame_utils  # noqa: E402
+from utils import qc  # noqa: E402
+from utils import video as video_utils  # noqa: E402
+
+RESOLUTIONS: Dict[str, tuple] = {
+    "hd": (1920, 1080),
+    "4k": (3840, 2160),
+}
+
+
+def make_frames(size: tuple, count: int) -> np.ndarray:
+    still = fakes.FakeSDXLPipeline()(prompt="qc benchmark", width=1024, height=576).images[0]
+    source = frame_utils.to_uint8_hwc(fakes.FakeSVDPipeline()(image=still, num_frames=min(count, 40)).frames[0])
+    return frame_utils.retime_resize(source, count, size)
+
+
+def _timed(encode: Callable[[], None], tapped: bool) -> Dict:
+    start = time.perf_counter()
+    if not tapped:
+        encode()
+        return {"wall_s": time.perf_counter() - start}
+    with qc.tap() as frame_tap:
+        encode()
+    return {"wall_s": time.perf_counter() - start, "tap_s": frame_tap.seconds, "frames": len(frame_tap.luma)}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--resolution", choices=RESOLUTIONS.keys(), default="4k")
+    parser.add_argument("--frames", type=int, default=60)
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--json", type=Path, help="Optional path to write raw results as JSON")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    size = RESOLUTIONS[args.resolution]
+    frames = make_frames(size, args.frames)
+    results: Dict[str, Dict] = {}
+    with tempfile.TemporaryDirectory(prefix="swav_qc_") as tmp_name:
+        out = Path(tmp_name) / "clip.mp4"
+        paths = {
+            "write_video": lambda: video_utils.write_video(frames, out, args.fps),
+            "stream_video": lambda: video_utils.stream_video(iter(frames), size, out, args.fps),
+        }
+        for name, encode in paths.items():
+            plain, tapped = _timed(encode, False), _timed(encode, True)
+            results[name] = {
+                "plain_wall_s": plain["wall_s"],
+                "tapped_wall_s": tapped["wall_s"],
+                "tap_s": tapped["tap_s"],
+                "frames": tapped["frames"],
+                "tap_share": tapped["tap_s"] / max(plain["wall_s"], 1e-9),
+            }
+
+    print(f"{args.frames} frames at {size[0]}x{size[1]}, shot encoder profile")
+    print(f"{'path':<13} {'plain s':>8} {'tapped s':>9} {'tap ms':>8} {'ms/frame':>9} {'tap share':>10}")
+    for name, row in results.items():
+        print(
+            f"{name:<13} {row['plain_wall_s']:8.2f} {row['tapped_wall_s']:9.2f} {row['tap_s'] * 1000:8.1f} "
+            f"{row['tap_s'] * 1000 / max(row['frames'], 1):9.2f} {row['tap_share']:10.1%}"
+        )
+    if args.json:
+        args.json.write_text(json.dumps({"resolution": args.resolution, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
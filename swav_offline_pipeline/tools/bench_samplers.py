@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Benchmark SDXL sampler profiles: render time against similarity to a reference profile.
+
+A fixed prompt set (the storyboard's first t2v/img2vid prompts) is rendered
+once per profile with the same seed per prompt, so differences come from the
+sampler alone. Each image is scored against the reference profile's image by
+SSIM on luma (Gaussian window, sigma 1.5): 1.0 is identical, and
+structure-level changes such as lost detail or different composition pull it
+down well before per-pixel metrics notice. The cheapest profile whose mean
+score meets ``--min-ssim`` is reported as the pick.
+
+Prompt embeddings are computed once up front, so timings cover denoising and
+VAE decode only. Images are written to ``--outdir`` for eyeballing.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import yaml
+from PIL import Image
+from scipy.ndimage import gaussian_filter
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR))
+
+from utils import models as model_utils  # noqa: E402
+from utils import prompt_cache  # noqa: E402
+from utils import samplers as sampler_utils  # noqa: E402
+
+
+def ssim(a: np.ndarray, b: np.ndarray, sigma: float = 1.5) -> float:
+    """Mean SSIM of two uint8 RGB images, computed on BT.601 luma."""
+    weights = np.array([0.299, 0.587, 0.114], dtype=np.float64)
+    x, y = (img.astype(np.float64) @ weights for img in (a, b))
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+    mu_x, mu_y = gaussian_filter(x, sigma), gaussian_filter(y, sigma)
+    var_x = gaussian_filter(x * x, sigma) - mu_x**2
+    var_y = gaussian_filter(y * y, sigma) - mu_y**2
+    cov = gaussian_filter(x * y, sigma) - mu_x * mu_y
+    score = ((2 * mu_x * mu_y + c1) * (2 * cov + c2)) / ((mu_x**2 + mu_y**2 + c1) * (var_x + var_y + c2))
+    return float(score.mean())
+
+
+def storyboard_prompts(path: Path, limit: int) -> List[str]:
+    storyboard = yaml.safe_load(path.read_text(encoding="utf-8"))
+    prompts = [
+        shot["prompt"]
+        for scene in storyboard["scenes"]
+        for shot in scene["shots"]
+        if shot.get("method") in sampler_utils.METHODS
+    ]
+    return list(dict.fromkeys(prompts))[:limit]
+
+
+def render(pipe, profile: sampler_utils.SamplerProfile, prompt: str, seed: int, size: tuple) -> tuple:
+    model_utils.set_sdxl_scheduler(pipe, profile.scheduler, profile.karras)
+    kwargs = prompt_cache.default().embeds(pipe, prompt)
+    start = time.perf_counter()
+    image = pipe(
+        **kwargs,
+        **profile.pipe_kwargs(),
+        width=size[0],
+        height=size[1],
+        generator=model_utils.generator(seed),
+        output_type="pil",
+    ).images[0]
+    return np.asarray(image.convert("RGB")), time.perf_counter() - start
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--storyboard", type=Path, default=BASE_DIR / "storyboard.swav2025.yaml")
+    parser.add_argument("--prompts", type=int, default=8, help="Number of storyboard prompts to render")
+    parser.add_argument("--profiles", help="Comma-separated profiles to compare (default: all)")
+    parser.add_argument("--reference", default="dpmpp_2m_karras_30", choices=sorted(sampler_utils.PROFILES))
+    parser.add_argument("--min-ssim", type=float, default=0.80, help="Quality bar for the recommended profile")
+    parser.add_argument("--width", type=int, default=1344)
+    parser.add_argument("--height", type=int, default=768)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--outdir", type=Path, default=BASE_DIR / "benchmarks" / "samplers")
+    parser.add_argument("--fake-models", action="store_true", help="Smoke-test the tool with the CPU fakes")
+    parser.add_argument("--json", type=Path, help="Optional path to write raw results as JSON")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if args.fake_models:
+        from utils import fakes
+
+        fakes.install()
+    names = args.profiles.split(",") if args.profiles else sorted(sampler_utils.PROFILES)
+    profiles = [sampler_utils.get_profile(name) for name in dict.fromkeys([args.reference, *names])]
+    prompts = storyboard_prompts(args.storyboard, args.prompts)
+    size = (args.width, args.height)
+
+    pipe = model_utils.get_t2i()
+    cache = prompt_cache.configure(None)
+    cache.expect(prompts)
+    args.outdir.mkdir(parents=True, exist_ok=True)
+
+    reference: Dict[int, np.ndarray] = {}
+    results: Dict[str, Dict] = {}
+    for profile in profiles:
+        times, scores = [], []
+        for idx, prompt in enumerate(prompts):
+            image, wall = render(pipe, profile, prompt, args.seed + idx, size)
+            Image.fromarray(image).save(args.outdir / f"{profile.name}_{idx:02d}.png")
+            times.append(wall)
+            if profile.name == args.reference:
+                reference[idx] = image
+            scores.append(ssim(image, reference[idx]))
+        results[profile.name] = {
+            "scheduler": profile.scheduler,
+            "karras": profile.karras,
+            "steps": profile.steps,
+            "guidance": profile.guidance,
+            "mean_s": statistics.mean(times),
+            "mean_ssim": statistics.mean(scores),
+            "min_ssim": min(scores),
+        }
+        print(f"{profile.name}: {results[profile.name]['mean_s']:.2f} s/image, SSIM {results[profile.name]['mean_ssim']:.3f}")
+
+    print(f"\n{len(prompts)} prompts at {size[0]}x{size[1]}, reference {args.reference}")
+    print(f"{'profile':<20} {'sched':<10} {'steps':>5} {'cfg':>5} {'s/image':>8} {'SSIM':>6} {'min':>6}")
+    for name, row in sorted(results.items(), key=lambda item: item[1]["mean_s"]):
+        sched = row["scheduler"] + ("+K" if row["karras"] else "")
+        print(
+            f"{name:<20} {sched:<10} {row['steps']:>5} {row['guidance']:>5.1f} {row['mean_s']:>8.2f} "
+            f"{row['mean_ssim']:>6.3f} {row['min_ssim']:>6.3f}"
+        )
+    passing = [(row["mean_s"], name) for name, row in results.items() if row["mean_ssim"] >= args.min_ssim]
+    if passing:
+        print(f"Cheapest profile with mean SSIM >= {args.min_ssim:.2f}: {min(passing)[1]}")
+    else:
+        print(f"No profile reaches mean SSIM {args.min_ssim:.2f}")
+    if args.json:
+        args.json.write_text(json.dumps({"prompts": prompts, "reference": args.reference, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
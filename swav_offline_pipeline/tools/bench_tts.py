@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Benchmark voiceover synthesis with cached speaker conditioning against per-block ``TTS.tts``.
+
+Each mode runs in its own process so memory figures are not mixed:
+
+* ``tts``: one ``TTS.tts`` call per narration block (the old render path),
+  which resolves the speaker's conditioning on every call, recomputing it from
+  the reference clips when ``--voice`` is a cloned voice.
+* ``cached``: ``audio.synthesize_voiceover``, with the conditioning computed
+  once through the speaker cache and each block synthesised sentence by
+  sentence and streamed to the WAV.
+
+Reported per mode: the one-off conditioning cost, seconds of audio generated
+per wall second (higher is better) and peak RSS. Runs on CPU unless
+``--device cuda``; ``--fake-models`` smoke-tests the tool.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import soundfile as sf
+import yaml
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR))
+
+from utils import audio as audio_utils  # noqa: E402
+from utils import backends as backend_utils  # noqa: E402
+from utils import speaker_cache  # noqa: E402
+
+
+def narration_blocks(path: Path, limit: int) -> List[Dict]:
+    storyboard = yaml.safe_load(path.read_text(encoding="utf-8"))
+    blocks = [
+        {"row_no": shot.get("row_no"), "text": shot["narration"]}
+        for scene in storyboard["scenes"]
+        for shot in scene["shots"]
+        if (shot.get("narration") or "").strip()
+    ]
+    return blocks[:limit]
+
+
+def _rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def run_mode(args: argparse.Namespace, blocks: List[Dict], out_wav: Path) -> Dict:
+    if args.fake_models:
+        from utils import fakes
+
+        fakes.install()
+    if args.device == "cpu":
+        backend_utils.configure("cpu", args.threads)
+    tts = audio_utils._load_tts()
+    load_rss = _rss_mb()
+    clips = audio_utils.reference_clips(args.voice)
+    conditioning_s = 0.0
+    start = time.perf_counter()
+    if args.mode == "tts":
+        if clips:
+            kwargs = {"speaker_wav": [str(clip) for clip in clips]}
+        else:
+            kwargs = {"speaker": audio_utils._select_speaker(tts, args.voice)}
+        audio = [np.asarray(tts.tts(text=block["text"], language="en", **kwargs), dtype=np.float32) for block in blocks]
+        sample_rate = getattr(tts.synthesizer, "output_sample_rate", 24000)
+        sf.write(out_wav, np.concatenate(audio), sample_rate)
+    else:
+        speaker_cache.configure(None)
+        audio_utils.voice_synthesizer(args.voice)
+        conditioning_s = time.perf_counter() - start
+        start = time.perf_counter()
+        audio_utils.synthesize_voiceover(blocks, out_wav, voice=args.voice)
+    wall = time.perf_counter() - start + conditioning_s
+    seconds = sf.info(str(out_wav)).duration
+    return {
+        "mode": args.mode,
+        "blocks": len(blocks),
+        "audio_s": seconds,
+        "wall_s": wall,
+        "conditioning_s": conditioning_s,
+        "audio_s_per_wall_s": seconds / max(wall, 1e-9),
+        "rss_after_load_mb": load_rss,
+        "peak_rss_mb": _rss_mb(),
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--storyboard", type=Path, default=BASE_DIR / "storyboard.swav2025.yaml")
+    parser.add_argument("--blocks", type=int, default=8, help="Number of narration blocks to synthesise")
+    parser.add_argument("--voice", default="male", help="Speaker name, or a reference clip (or directory of clips)")
+    parser.add_argument("--device", choices=("cpu", "cuda"), default="cpu")
+    parser.add_argument("--threads", type=int, default=0, help="Intra-op threads on CPU (0 = all usable cores)")
+    parser.add_argument("--fake-models", action="store_true", help="Smoke-test the tool with the CPU fakes")
+    parser.add_argument("--mode", choices=("tts", "cached"), help=argparse.SUPPRESS)
+    parser.add_argument("--out-wav", type=Path, help=argparse.SUPPRESS)
+    parser.add_argument("--json", type=Path, help="Optional path to write raw results as JSON")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    blocks = narration_blocks(args.storyboard, args.blocks)
+    if args.mode:
+        args.json.write_text(json.dumps(run_mode(args, blocks, args.out_wav)))
+        return
+
+    env = dict(os.environ)
+    if args.device == "cpu":
+        env["CUDA_VISIBLE_DEVICES"] = ""
+    results: Dict[str, Dict] = {}
+    with tempfile.TemporaryDirectory(prefix="swav_tts_") as tmp_name:
+        for mode in ("tts", "cached"):
+            out = Path(tmp_name) / f"{mode}.json"
+            cmd = [sys.executable, __file__, "--storyboard", str(args.storyboard), "--blocks", str(args.blocks),
+                   "--voice", args.voice, "--device", args.device, "--threads", str(args.threads), "--mode", mode,
+                   "--out-wav", str(Path(tmp_name) / f"{mode}.wav"), "--json", str(out)]
+            if args.fake_models:
+                cmd.append("--fake-models")
+            subprocess.run(cmd, check=True, env=env)
+            results[mode] = json.loads(out.read_text())
+
+    print(f"{len(blocks)} narration blocks, voice {args.voice}, {args.device}")
+    print(f"{'mode':<8} {'audio s':>8} {'wall s':>8} {'cond s':>7} {'audio s/s':>10} {'peak RSS':>9}")
+    for mode, row in results.items():
+        print(
+            f"{mode:<8} {row['audio_s']:8.1f} {row['wall_s']:8.2f} {row['conditioning_s']:7.2f} "
+            f"{row['audio_s_per_wall_s']:10.2f} {row['peak_rss_mb']:9.0f}"
+        )
+    if args.json:
+        args.json.write_text(json.dumps({"blocks": len(blocks), "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
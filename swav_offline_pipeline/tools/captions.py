@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Rebuild SRT/WebVTT/ASS captions for a finished render without re-rendering.
+
+Uses the storyboard narration plus the voiceover and its measured block
+timings from <outdir>/intermediate, so caption settings (--max-cps,
+--max-line) and caption-text fixes can be iterated on in well under a second.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import soundfile as sf
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR))
+
+import orchestrate  # noqa: E402
+from utils import subtitles as subtitle_utils  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("outdir", type=Path, help="Render output directory")
+    parser.add_argument("--storyboard", type=Path, default=BASE_DIR / "storyboard.swav2025.yaml")
+    parser.add_argument("--shot-range", help="Rows the render covered (default: all)")
+    parser.add_argument("--preset", choices=orchestrate.PRESET_RESOLUTIONS.keys(), default="4k", help="ASS canvas size")
+    parser.add_argument("--max-cps", type=float, default=subtitle_utils.MAX_CPS)
+    parser.add_argument("--max-line", type=int, default=subtitle_utils.MAX_LINE_CHARS)
+    parser.add_argument("--no-words", action="store_true", help="Skip energy-based word timings")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    intermediate = args.outdir / "intermediate"
+    storyboard = orchestrate.load_storyboard(args.storyboard)
+    shots = orchestrate.collect_shots(storyboard, orchestrate.parse_shot_range(args.shot_range))
+    rendered = [orchestrate.RenderedShot(spec=spec, video_path=Path(), scene_index=idx) for idx, _, spec in shots]
+    blocks = orchestrate.build_voice_blocks(rendered)
+
+    timings_path = intermediate / "voiceover_timings.json"
+    timings = json.loads(timings_path.read_text(encoding="utf-8")) if timings_path.exists() else None
+    wav, sample_rate = sf.read(str(intermediate / "voiceover.wav"), dtype="float32", always_2d=False)
+
+    start = time.perf_counter()
+    cues = subtitle_utils.build_cues(
+        blocks,
+        timings,
+        wav=wav,
+        sample_rate=sample_rate,
+        max_cps=args.max_cps,
+        max_line=args.max_line,
+        word_timings=not args.no_words,
+    )
+    subtitle_utils.write_srt(cues, args.outdir / "captions.srt")
+    subtitle_utils.write_vtt(cues, args.outdir / "captions.vtt")
+    subtitle_utils.write_ass(cues, args.outdir / "captions.ass", size=orchestrate.PRESET_RESOLUTIONS[args.preset])
+    print(f"{len(cues)} cues from {len(blocks)} blocks in {time.perf_counter() - start:.3f} s -> {args.outdir}")
+
+
+if __name__ == "__main__":
+    main()
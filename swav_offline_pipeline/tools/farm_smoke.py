@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Kill a farm worker mid-job and check the coordinator still finishes the film.
+
+Starts ``orchestrate.py --farm-coordinator`` and N ``--farm-worker`` processes
+on this host with --fake-models, waits until a worker holds a lease (as seen in
+farm_status.json), SIGKILLs it, and then requires the coordinator to exit 0
+with a final master on disk and at least one job retried after lease expiry.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+
+
+def read_status(path: Path) -> Dict:
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--storyboard", type=Path, default=BASE_DIR / "storyboard.swav2025.yaml")
+    parser.add_argument("--shot-range", default="2-4")
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8791)
+    parser.add_argument("--lease", type=float, default=3.0, help="Lease TTL so the killed job expires quickly")
+    parser.add_argument("--kill-kind", default="shot", help="Kill the worker holding the first lease of this job kind")
+    parser.add_argument("--timeout", type=float, default=900.0)
+    parser.add_argument("--outdir", type=Path, help="Keep outputs here instead of a temporary directory")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    with tempfile.TemporaryDirectory(prefix="swav_farm_") as tmp_name:
+        outdir = args.outdir or Path(tmp_name)
+        common = [
+            sys.executable, str(BASE_DIR / "orchestrate.py"), "--storyboard", str(args.storyboard),
+            "--outdir", str(outdir), "--preset", "hd", "--fake-models", "--shot-range", args.shot_range,
+        ]
+        coordinator = subprocess.Popen(
+            [*common, "--farm-coordinator", f"127.0.0.1:{args.port}", "--farm-lease", str(args.lease)],
+            cwd=BASE_DIR,
+        )
+        time.sleep(2.0)
+        workers: Dict[str, subprocess.Popen] = {}
+        for idx in range(args.workers):
+            name = f"smoke{idx}"
+            workers[name] = subprocess.Popen(
+                [*common, "--farm-worker", f"127.0.0.1:{args.port}", "--worker-id", name],
+                cwd=BASE_DIR,
+                stdout=subprocess.DEVNULL,
+            )
+
+        status_path = outdir / "farm_status.json"
+        killed: List[str] = []
+        deadline = time.monotonic() + args.timeout
+        try:
+            while coordinator.poll() is None and time.monotonic() < deadline:
+                if not killed:
+                    for job in read_status(status_path).get("jobs", []):
+                        if job["state"] == "leased" and job["kind"] == args.kill_kind and job["worker"] in workers:
+                            workers[job["worker"]].send_signal(signal.SIGKILL)
+                            killed.append(f"{job['worker']} ({job['id']})")
+                            print(f"SIGKILL {killed[-1]}", flush=True)
+                            break
+                time.sleep(0.2)
+        finally:
+            for proc in (coordinator, *workers.values()):
+                if proc.poll() is None:
+                    proc.kill()
+                proc.wait()
+
+        status = read_status(status_path)
+        master = outdir / "final_swavlamban.mp4"
+        checks = {
+            "coordinator exited 0": coordinator.returncode == 0,
+            "a worker was killed mid-job": bool(killed),
+            "final master written": master.exists() and master.stat().st_size > 0,
+            "killed job retried": status.get("retries", 0) >= 1,
+            "every job done": set(status.get("counts", {})) == {"done"},
+        }
+        for label, ok in checks.items():
+            print(f"  {'ok  ' if ok else 'FAIL'} {label}")
+        retried = [job["id"] for job in status.get("jobs", []) if job.get("attempts", 0) > 1]
+        print(f"Retried jobs: {', '.join(retried) or 'none'}")
+        return 0 if all(checks.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Rewrite title-card t2v rows of a storyboard as ``method: card`` shots.
+
+Rows whose prompt is a title card ("navy blue title card for ...",
+"SECTION SLATE — ...") get ``method: card`` and a ``card`` mapping with the
+detected title; the prompt is kept for reference. Card rows whose title is
+a prompt fragment matching the scene name get the scene name's spelling.
+Without ``--write`` the changes are only listed.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+import yaml
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR))
+
+from utils import cards as card_utils  # noqa: E402
+
+
+def migrate(storyboard: dict, template: str) -> list:
+    changed = []
+    for scene in storyboard["scenes"]:
+        for idx, shot in enumerate(scene["shots"]):
+            if shot.get("method") == "card":
+                title = card_utils.detect_title(shot.get("prompt", ""), scene.get("name"))
+                card = shot.get("card") or {}
+                if title and title != card.get("title") and title == scene.get("name"):
+                    card["title"] = title
+                    changed.append((shot.get("row_no", shot.get("id")), title))
+                continue
+            if shot.get("method") != "t2v":
+                continue
+            title = card_utils.detect_title(shot.get("prompt", ""), scene.get("name"))
+            if not title:
+                continue
+            # Keep key order readable: card follows method.
+            items = []
+            for key, value in shot.items():
+                items.append((key, "card" if key == "method" else value))
+                if key == "method":
+                    items.append(("card", {"title": title, "template": template}))
+            scene["shots"][idx] = dict(items)
+            changed.append((shot.get("row_no", shot.get("id")), title))
+    return changed
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("storyboard", type=Path)
+    parser.add_argument("--template", default="navy", choices=sorted(card_utils.TEMPLATES))
+    parser.add_argument("--write", action="store_true", help="Rewrite the storyboard in place")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    storyboard = yaml.safe_load(args.storyboard.read_text(encoding="utf-8"))
+    changed = migrate(storyboard, args.template)
+    for row, title in changed:
+        print(f"row {row}: card '{title}'")
+    print(f"{len(changed)} title-card row(s){'' if args.write else ' (dry run, use --write)'}")
+    if args.write and changed:
+        args.storyboard.write_text(yaml.safe_dump(storyboard, sort_keys=False, allow_unicode=True), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Rebuild the Markdown/HTML run report from a run_events.jsonl log.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR))
+
+from utils import report as report_utils  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("events", type=Path, help="Path to run_events.jsonl")
+    parser.add_argument("--outdir", type=Path, help="Where to write run_report.{md,html} (default: next to events)")
+    parser.add_argument("--run-id", help="Run to summarise (default: the most recent run in the log)")
+    args = parser.parse_args()
+
+    if not args.events.exists():
+        print(f"ERROR: {args.events} not found.", file=sys.stderr)
+        sys.exit(1)
+    md_path, html_path = report_utils.write_report(args.events, args.outdir or args.events.parent, args.run_id)
+    print(f"Wrote {md_path} and {html_path}")
+
+
+if __name__ == "__main__":
+    main()
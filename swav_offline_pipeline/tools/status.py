@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Show live render progress aggregated across all orchestrator workers.
+
+Reads worker status files below a render root directly, or queries a running
+status endpoint (orchestrate.py --status-port/--status-socket, or this tool with --serve).
+"""
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import socket
+import sys
+import time
+import urllib.request
+from pathlib import Path
+from typing import Dict
+
+from rich.console import Console
+from rich.table import Table
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR))
+
+from utils import progress as progress_utils  # noqa: E402
+
+DEFAULT_ROOT = BASE_DIR / "renders" / "swav2025"
+
+console = Console()
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: str) -> None:
+        super().__init__("localhost")
+        self._socket_path = path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self._socket_path)
+
+
+def fetch(args: argparse.Namespace) -> Dict:
+    if args.socket:
+        conn = _UnixHTTPConnection(str(args.socket))
+        conn.request("GET", "/status")
+        return json.loads(conn.getresponse().read().decode("utf-8"))
+    if args.url:
+        with urllib.request.urlopen(args.url, timeout=5) as resp:
+            return json.loads(resp.read().decode("utf-8"))
+    return progress_utils.aggregate(args.root)
+
+
+def _fmt_duration(seconds: float) -> str:
+    seconds = max(int(seconds), 0)
+    hours, rem = divmod(seconds, 3600)
+    minutes, secs = divmod(rem, 60)
+    return f"{hours:d}:{minutes:02d}:{secs:02d}"
+
+
+def render(status: Dict) -> None:
+    console.rule("[bold blue]Swavlamban 2025 render progress")
+    console.print(
+        f"Shots: [bold]{status['shots_done']} / {status['shots_total']}[/bold] ({status['percent']:.1f}%)   "
+        f"ETA: [bold]{_fmt_duration(status['eta_s'])}[/bold]   "
+        f"Throughput: {status['shots_per_hour']:.1f} shots/h"
+    )
+    table = Table(show_lines=False)
+    for column in ("worker", "state", "shots", "current", "elapsed", "ETA", "shots/h", "updated"):
+        table.add_column(column)
+    now = time.time()
+    for worker in status["workers"]:
+        current = worker.get("current") or {}
+        current_text = "—"
+        if current.get("stage"):
+            row = f"row {current['row_no']} " if current.get("row_no") is not None else ""
+            current_text = f"{row}{current.get('method') or ''} {current['stage']}".strip()
+        stale = now - worker.get("updated_at", now)
+        table.add_row(
+            worker.get("worker_id", "?"),
+            worker.get("state", "?"),
+            f"{worker.get('shots_done', 0)}/{worker.get('shots_total', 0)}",
+            current_text,
+            _fmt_duration(worker.get("elapsed_s", 0)),
+            _fmt_duration(worker.get("eta_s", 0)),
+            f"{worker.get('throughput', {}).get('shots_per_hour', 0.0):.1f}",
+            f"{stale:.0f}s ago",
+        )
+    console.print(table)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("root", nargs="?", type=Path, default=DEFAULT_ROOT, help="Render root containing worker outdirs")
+    parser.add_argument("--url", help="Query a status endpoint, e.g. http://127.0.0.1:8765/status")
+    parser.add_argument("--socket", type=Path, help="Unix socket to query (or to serve on with --serve)")
+    parser.add_argument("--watch", type=float, default=0.0, help="Refresh every N seconds")
+    parser.add_argument("--json", action="store_true", help="Print raw JSON instead of a table")
+    parser.add_argument("--serve", action="store_true", help="Serve aggregated progress for ROOT instead of printing")
+    parser.add_argument("--port", type=int, default=8765, help="TCP port used with --serve")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if args.serve:
+        server = progress_utils.start_server(args.root, port=args.port, unix_socket=args.socket)
+        if server is None:
+            print("ERROR: status address already in use.", file=sys.stderr)
+            sys.exit(1)
+        console.print(f"Serving {args.root} on {args.socket or f'http://127.0.0.1:{args.port}/status'}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            server.shutdown()
+        return
+
+    while True:
+        status = fetch(args)
+        if args.json:
+            print(json.dumps(status, indent=2, ensure_ascii=False))
+        else:
+            if args.watch:
+                console.clear()
+            render(status)
+        if not args.watch:
+            break
+        time.sleep(args.watch)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,37 @@
 from __future__ import annotations
 
-import subprocess
+import hashlib
+import re
 from pathlib import Path
-from typing import Dict, List
+from typing import TYPE_CHECKING, Callable, Dict, List
 
 import numpy as np
 import soundfile as sf
-import torch
-from TTS.api import TTS
+
+from . import ffmpeg, speaker_cache, storage
+from . import models as model_utils
+
+if TYPE_CHECKING:
+    from TTS.api import TTS
 
 MODEL_ROOT = Path(__file__).resolve().parents[1] / "models"
 
+AUDIO_SUFFIXES = (".wav", ".flac", ".mp3", ".ogg")
+# XTTS v2's per-utterance limit for English; longer sentences are split at clause, then word boundaries.
+MAX_SENTENCE_CHARS = 250
+BLOCK_GAP_S = 0.25
+# Pause between sentences of one block, as Coqui's synthesizer inserts when it splits text itself.
+SENTENCE_GAP_S = 0.4
+
 _TTS_INSTANCE: TTS | None = None
 
 
 def _load_tts() -> TTS:
     global _TTS_INSTANCE
     if _TTS_INSTANCE is None:
+        import torch
+        from TTS.api import TTS
+
         model_dir = MODEL_ROOT / "xtts-v2"
         if not model_dir.exists():
             raise FileNotFoundError(f"XTTS v2 model not found at {model_dir}. Run download_models.sh first.")
@@ -25,6 +40,17 @@ def _load_tts() -> TTS:
     return _TTS_INSTANCE
 
 
+def xtts_fingerprint() -> str:
+    """Identity of the XTTS checkpoint: config, vocabulary and speaker file contents plus weight sizes and mtimes."""
+    digest = hashlib.sha256()
+    for path in sorted((MODEL_ROOT / "xtts-v2").glob("*")):
+        stat = path.stat()
+        digest.update(f"{path.name}:{stat.st_size}:{int(stat.st_mtime)}".encode("utf-8"))
+        if path.suffix == ".json":
+            digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
 def _select_speaker(tts: TTS, voice: str) -> str:
     speakers = getattr(tts, "speakers", None) or []
     if voice in speakers:
@@ -36,47 +62,164 @@ def _select_speaker(tts: TTS, voice: str) -> str:
     return speakers[0] if speakers else voice
 
 
-def synthesize_voiceover(blocks: List[Dict], out_wav: Path | str, voice: str = "male") -> None:
-    """Synthesize narration for each block and concatenate into a single WAV file."""
+def reference_clips(voice: str) -> List[Path]:
+    """Reference recordings of a cloned voice (an audio file or a directory of them); [] for a built-in speaker."""
+    path = Path(voice)
+    if path.suffix.lower() in AUDIO_SUFFIXES:
+        if not path.is_file():
+            raise FileNotFoundError(f"Voice reference clip not found: {path}")
+        return [path]
+    if path.is_dir():
+        clips = sorted(clip for clip in path.iterdir() if clip.suffix.lower() in AUDIO_SUFFIXES)
+        if not clips:
+            raise FileNotFoundError(f"No reference clips ({', '.join(AUDIO_SUFFIXES)}) in {path}")
+        return clips
+    return []
+
+
+def _split_long(sentence: str, max_chars: int) -> List[str]:
+    """Pieces of an over-long sentence, broken after clause punctuation where possible, else between words."""
+    chunks: List[str] = []
+    for clause in re.split(r"(?<=[,;:—])\s+", sentence):
+        line = ""
+        for word in clause.split():
+            if line and len(line) + 1 + len(word) > max_chars:
+                chunks.append(line)
+                line = word
+            else:
+                line = f"{line} {word}" if line else word
+        chunks.append(line)
+    merged: List[str] = []
+    for chunk in chunks:
+        if merged and len(merged[-1]) + 1 + len(chunk) <= max_chars:
+            merged[-1] = f"{merged[-1]} {chunk}"
+        else:
+            merged.append(chunk)
+    return merged
+
+
+def split_sentences(text: str, max_chars: int = MAX_SENTENCE_CHARS) -> List[str]:
+    """Sentences of ``text`` (Latin and Devanagari stops), each at most ``max_chars`` long."""
+    sentences: List[str] = []
+    for sentence in re.split(r"(?<=[.!?।])\s+", " ".join(text.split())):
+        if len(sentence) <= max_chars:
+            sentences.append(sentence)
+        else:
+            sentences.extend(_split_long(sentence, max_chars))
+    return [sentence for sentence in sentences if sentence]
+
+
+def voice_synthesizer(voice: str) -> Callable[[str], np.ndarray]:
+    """Synthesiser for one voice: text in, mono float32 audio at the model's output rate out.
+
+    For XTTS the voice's conditioning (from ``speaker_cache`` for cloned
+    voices, the checkpoint for built-in speakers) is resolved once and fed to
+    ``inference`` for every sentence; other Coqui models go through
+    ``TTS.tts`` with the selected speaker.
+    """
+    tts = _load_tts()
+    model = getattr(tts.synthesizer, "tts_model", None)
+    if model is None or not hasattr(model, "get_conditioning_latents"):
+        name = _select_speaker(tts, voice)
+        return lambda text: np.asarray(tts.tts(text=text, speaker=name, language="en"), dtype=np.float32)
+
+    clips = reference_clips(voice)
+    if clips:
+        entry = speaker_cache.default().conditioning(model, xtts_fingerprint(), clips)
+        conditioning = {field: model_utils.as_tensor(array, model.device) for field, array in entry.items()}
+    else:
+        # Built-in speakers ship their conditioning with the checkpoint; there is nothing to compute or cache.
+        stored = model.speaker_manager.speakers[_select_speaker(tts, voice)]
+        conditioning = {field: stored[field] for field in speaker_cache.FIELDS}
+    config = model.config
+    settings = {
+        "temperature": config.temperature,
+        "length_penalty": config.length_penalty,
+        "repetition_penalty": config.repetition_penalty,
+        "top_k": config.top_k,
+        "top_p": config.top_p,
+    }
+
+    def speak(text: str) -> np.ndarray:
+        wav = model.inference(text, "en", **conditioning, **settings)["wav"]
+        return speaker_cache.to_numpy(wav).reshape(-1)
+
+    return speak
+
+
+def synthesize_voiceover(blocks: List[Dict], out_wav: Path | str, voice: str = "male") -> List[Dict]:
+    """Synthesize narration for each block and write them, in order, to a single WAV file.
+
+    ``voice`` is a speaker name or the path of a reference clip (or a
+    directory of clips) to clone. Blocks are synthesised sentence by sentence
+    and streamed to the file, so memory stays bounded however long a block is.
+
+    Returns the measured ``{"row_no", "start", "end"}`` span of every spoken
+    block in the WAV, in seconds, for caption alignment.
+    """
     out_wav = Path(out_wav)
     out_wav.parent.mkdir(parents=True, exist_ok=True)
 
-    if not blocks:
+    if not any(block["text"].strip() for block in blocks):
         silence = np.zeros(int(0.5 * 24000), dtype=np.float32)
         sf.write(out_wav, silence, 24000)
-        return
+        return []
 
-    tts = _load_tts()
-    speaker = _select_speaker(tts, voice)
-    sample_rate = getattr(tts.synthesizer, "output_sample_rate", 24000)
+    speak = voice_synthesizer(voice)
+    sample_rate = getattr(_load_tts().synthesizer, "output_sample_rate", 24000)
+    block_gap = np.zeros(int(sample_rate * BLOCK_GAP_S), dtype=np.float32)
+    sentence_gap = np.zeros(int(sample_rate * SENTENCE_GAP_S), dtype=np.float32)
+    timings: List[Dict] = []
+    cursor = 0
 
-    gap = int(sample_rate * 0.25)
-    segments: List[np.ndarray] = []
+    with sf.SoundFile(str(out_wav), "w", samplerate=sample_rate, channels=1) as out:
+        for block in blocks:
+            sentences = split_sentences(block["text"])
+            if not sentences:
+                continue
+            if timings:
+                out.write(block_gap)
+                cursor += block_gap.size
+            start = cursor
+            for number, sentence in enumerate(sentences):
+                if number:
+                    out.write(sentence_gap)
+                    cursor += sentence_gap.size
+                audio = speak(sentence)
+                out.write(audio)
+                cursor += audio.size
+            timings.append({"row_no": block.get("row_no"), "start": start / sample_rate, "end": cursor / sample_rate})
+    return timings
 
-    for idx, block in enumerate(blocks):
-        text = block["text"].strip()
-        if not text:
-            continue
-        wav = tts.tts(text=text, speaker=speaker, language="en")
-        audio = np.asarray(wav, dtype=np.float32)
-        if idx:
-            segments.append(np.zeros(gap, dtype=np.float32))
-        segments.append(audio)
 
-    if not segments:
-        segments.append(np.zeros(int(0.5 * sample_rate), dtype=np.float32))
+def make_music(tag: str, out_wav: Path | str, duration: float, sample_rate: int = 48000, seed: int = 0) -> str:
+    """Write a stereo music bed for ``tag`` and return its source ("musicgen", "stems" or "procedural")."""
+    from . import music
 
-    full = np.concatenate(segments)
-    sf.write(out_wav, full, sample_rate)
+    return music.make_bed(tag, out_wav, duration, sample_rate=sample_rate, seed=seed)
 
 
-def make_music(tag: str, out_wav: Path | str, duration: float, sample_rate: int = 48000) -> None:
-    """Placeholder music bed: currently generates silence for the requested duration."""
-    out_wav = Path(out_wav)
-    out_wav.parent.mkdir(parents=True, exist_ok=True)
-    samples = int(max(duration, 0.1) * sample_rate)
-    silence = np.zeros(samples, dtype=np.float32)
-    sf.write(out_wav, silence, sample_rate)
+def mix_filter(vo_input: int = 1, music_input: int = 2) -> str:
+    """The ffmpeg loudnorm/sidechaincompress/amix chain; output pad ``[out]``."""
+    return (
+        f"[{vo_input}:a]loudnorm=I=-16:LRA=11:TP=-1.5:print_format=none,asplit=2[vo][vo_key];"
+        f"[{music_input}:a]volume=0.35[music_pre];"
+        "[music_pre][vo_key]sidechaincompress=threshold=-28dB:ratio=6:attack=50:release=300:makeup=6[music_ducked];"
+        "[vo][music_ducked]amix=inputs=2:weights=1 1:normalize=0[mix];"
+        "[mix]loudnorm=I=-16:LRA=11:TP=-1.5:print_format=none,aresample=48000[out]"
+    )
+
+
+def render_mix(vo_wav: str | Path, music_wav: str | Path, mix_wav: str | Path, mixer: str = "numpy") -> Dict[str, float] | None:
+    """Mix voiceover and music into a 48 kHz 24-bit PCM WAV; returns the numpy mixer's loudness report."""
+    if mixer == "numpy":
+        from . import mixer as mixer_utils
+
+        return mixer_utils.mix(vo_wav, music_wav, mix_wav).as_dict()
+    cmd = ["ffmpeg", "-y", "-i", str(vo_wav), "-i", str(music_wav), "-filter_complex", mix_filter(0, 1)]
+    cmd.extend(["-map", "[out]", "-c:a", "pcm_s24le", str(mix_wav)])
+    ffmpeg.run(cmd)
+    return None
 
 
 def mix_audio(
@@ -85,21 +228,32 @@ def mix_audio(
     music_wav: str,
     out_path: str,
     codec: str = "h264",
-) -> None:
-    """Combine video with voiceover and ducked music, applying loudness normalization."""
+    mixer: str = "ffmpeg",
+) -> Dict[str, float] | None:
+    """Combine video with voiceover and ducked music, applying loudness normalization.
+
+    ``mixer="numpy"`` mixes in-process (utils/mixer.py) to a scratch WAV and only
+    muxes with ffmpeg, copying the PCM track for non-h264
+    masters; its loudness report is returned.
+    """
     out_file = Path(out_path)
     out_file.parent.mkdir(parents=True, exist_ok=True)
 
     audio_codec = "aac" if codec == "h264" else "pcm_s24le"
     audio_bitrate = "224k" if codec == "h264" else None
 
-    filter_complex = (
-        "[1:a]loudnorm=I=-16:LRA=11:TP=-1.5:print_format=never[vo];"
-        "[2:a]volume=0.35[music_pre];"
-        "[music_pre][vo]sidechaincompress=threshold=-28:ratio=6:attack=50:release=300:makeup=6[music_ducked];"
-        "[vo][music_ducked]amix=inputs=2:weights=1 1:normalize=0[mix];"
-        "[mix]loudnorm=I=-16:LRA=11:TP=-1.5:print_format=never[out]"
-    )
+    if mixer == "numpy":
+        # 24-bit stereo at 48 kHz.
+        mix_wav = storage.scratch_file(".wav", int(sf.info(str(vo_wav)).duration * 48000 * 6))
+        try:
+            report = render_mix(vo_wav, music_wav, mix_wav, mixer=mixer)
+            cmd = ["ffmpeg", "-y", "-i", video_in, "-i", str(mix_wav), "-map", "0:v", "-map", "1:a", "-c:v", "copy"]
+            cmd.extend(["-c:a", "aac", "-b:a", audio_bitrate] if audio_bitrate else ["-c:a", "copy"])
+            cmd.append(str(out_file))
+            ffmpeg.run(cmd)
+        finally:
+            mix_wav.unlink(missing_ok=True)
+        return report
 
     cmd = [
         "ffmpeg",
@@ -111,7 +265,7 @@ def mix_audio(
         "-i",
         music_wav,
         "-filter_complex",
-        filter_complex,
+        mix_filter(),
         "-map",
         "0:v",
         "-map",
@@ -124,4 +278,5 @@ def mix_audio(
     if audio_bitrate:
         cmd.extend(["-b:a", audio_bitrate])
     cmd.append(str(out_file))
-    subprocess.run(cmd, check=True)
+    ffmpeg.run(cmd)
+    return None
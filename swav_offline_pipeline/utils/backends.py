@@ -0,0 +1,184 @@
+"""Inference backends: where and how the diffusion models run.
+
+A backend fixes the device, dtype and placement of the torch pipelines, and
+optionally swaps SDXL for an exported OpenVINO or ONNX Runtime graph (via
+optimum; SVD always runs on torch). CPU backends cap the SDXL generation size,
+since the still is scaled to the output size anyway and a CPU node's job is
+title stills, previews and low-priority shots, not 4K hero frames.
+
+``configure`` also sets the intra-op thread count and can pin the process to
+one NUMA node, so several CPU workers on a multi-socket box each keep their
+threads and memory on one socket. ``plan_workers`` spreads local farm workers
+across nodes and splits each node's cores between the workers on it.
+"""
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+NODE_ROOT = Path("/sys/devices/system/node")
+
+
+@dataclass(frozen=True)
+class Backend:
+    name: str
+    device: str = "cuda"
+    dtype: str = "float16"  # float16 | bfloat16 | float32 | auto (bf16 where the CPU has native support)
+    offload: bool = True  # enable_model_cpu_offload instead of moving the whole pipeline to the device
+    runtime: str = "torch"  # torch | openvino | onnx (SDXL only)
+    max_size: Optional[Tuple[int, int]] = None  # cap on the SDXL generation size
+    threads: int = 0  # intra-op threads; 0 = every CPU this process may run on
+    description: str = ""
+
+    @property
+    def cpu(self) -> bool:
+        return self.device == "cpu"
+
+    @property
+    def dtype_name(self) -> str:
+        """``dtype`` with ``auto`` resolved for this machine."""
+        if self.dtype == "auto":
+            return "bfloat16" if cpu_has_bf16() else "float32"
+        return self.dtype
+
+    def torch_dtype(self):
+        import torch
+
+        return getattr(torch, self.dtype_name)
+
+    def generation_size(self, width: int, height: int) -> Tuple[int, int]:
+        """SDXL size for an output of ``width`` x ``height``: scaled down to fit ``max_size``, multiples of 8."""
+        if self.max_size is None:
+            return width, height
+        scale = min(self.max_size[0] / width, self.max_size[1] / height, 1.0)
+        return max(int(width * scale) // 8 * 8, 64), max(int(height * scale) // 8 * 8, 64)
+
+
+BACKENDS: Dict[str, Backend] = {
+    "cuda": Backend(name="cuda", description="fp16 on the GPU with model CPU offload (low VRAM)"),
+    "cuda_resident": Backend(
+        name="cuda_resident", offload=False, description="fp16 with the whole pipeline resident on the GPU (>= 24 GB)"
+    ),
+    "cpu": Backend(
+        name="cpu",
+        device="cpu",
+        dtype="auto",
+        offload=False,
+        max_size=(1344, 768),
+        description="torch on CPU, bf16 where supported (AMX/AVX-512 BF16) else fp32",
+    ),
+    "cpu_fp32": Backend(
+        name="cpu_fp32", device="cpu", dtype="float32", offload=False, max_size=(1344, 768),
+        description="torch on CPU in fp32",
+    ),
+    "openvino": Backend(
+        name="openvino",
+        device="cpu",
+        dtype="float32",
+        offload=False,
+        runtime="openvino",
+        max_size=(1024, 576),
+        description="SDXL exported to OpenVINO IR (optimum-intel) at reduced resolution",
+    ),
+    "onnx": Backend(
+        name="onnx",
+        device="cpu",
+        dtype="float32",
+        offload=False,
+        runtime="onnx",
+        max_size=(1024, 576),
+        description="SDXL exported to ONNX Runtime (optimum) at reduced resolution",
+    ),
+}
+
+_CURRENT: Backend = BACKENDS["cuda"]
+
+
+def cpu_has_bf16() -> bool:
+    try:
+        flags = Path("/proc/cpuinfo").read_text(encoding="utf-8")
+    except OSError:
+        return False
+    return "amx_bf16" in flags or "avx512_bf16" in flags
+
+
+def _parse_cpulist(text: str) -> List[int]:
+    cpus: List[int] = []
+    for part in text.strip().split(","):
+        if part:
+            start, _, end = part.partition("-")
+            cpus.extend(range(int(start), int(end or start) + 1))
+    return cpus
+
+
+def numa_nodes() -> Dict[int, List[int]]:
+    """CPUs of each NUMA node with CPUs; one pseudo-node with every CPU where the topology is not exposed."""
+    nodes: Dict[int, List[int]] = {}
+    for path in sorted(NODE_ROOT.glob("node[0-9]*")):
+        try:
+            cpus = _parse_cpulist((path / "cpulist").read_text(encoding="utf-8"))
+        except OSError:
+            continue
+        if cpus:
+            nodes[int(path.name[4:])] = cpus
+    return nodes or {0: sorted(os.sched_getaffinity(0))}
+
+
+def pin(node: int) -> List[int]:
+    """Restrict this process (and the threads it starts later) to the CPUs of ``node``."""
+    nodes = numa_nodes()
+    if node not in nodes:
+        raise ValueError(f"NUMA node {node} not found (nodes: {', '.join(map(str, nodes))})")
+    os.sched_setaffinity(0, nodes[node])
+    return nodes[node]
+
+
+def plan_workers(count: int) -> List[Tuple[int, int]]:
+    """``(numa_node, threads)`` for ``count`` local workers: round-robin over nodes, cores split per node."""
+    nodes = numa_nodes()
+    ids = sorted(nodes)
+    assigned = [ids[idx % len(ids)] for idx in range(count)]
+    return [(node, max(len(nodes[node]) // assigned.count(node), 1)) for node in assigned]
+
+
+def get_backend(name: str) -> Backend:
+    try:
+        return BACKENDS[name]
+    except KeyError as exc:
+        raise ValueError(f"Unknown backend '{name}'. Known: auto, {', '.join(sorted(BACKENDS))}") from exc
+
+
+def detect() -> str:
+    try:
+        import torch
+    except ImportError:
+        return "cpu"
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def configure(name: str = "auto", threads: int = 0, numa_node: Optional[int] = None) -> Backend:
+    """Select the backend for this process; call before any model is loaded."""
+    global _CURRENT
+    backend = get_backend(detect() if name == "auto" else name)
+    if numa_node is not None:
+        pin(numa_node)
+    if backend.cpu:
+        threads = threads or len(os.sched_getaffinity(0))
+        # OpenMP-based runtimes read these when they start their pools.
+        os.environ["OMP_NUM_THREADS"] = str(threads)
+        os.environ.setdefault("KMP_AFFINITY", "granularity=fine,compact,1,0")
+        if backend.runtime == "torch":
+            try:
+                import torch
+            except ImportError:
+                pass
+            else:
+                torch.set_num_threads(threads)
+    _CURRENT = replace(backend, threads=threads)
+    return _CURRENT
+
+
+def current() -> Backend:
+    return _CURRENT
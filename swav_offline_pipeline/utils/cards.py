@@ -0,0 +1,258 @@
+"""Deterministic title cards rendered with NumPy/PIL instead of a diffusion model.
+
+A template fixes the look (gradient background, vignette, typography, accent
+rule, optional logo) and the motion (the title fades in while rising a few
+pixels, the rule wipes out from the centre, everything fades out at the end).
+The background is drawn once per card; each frame only recomposites the text
+band, and frames after the intro animation are reused as-is, so a 4K card is
+dominated by the encode rather than the drawing.
+
+Storyboard rows opt in with ``method: card`` and a ``card`` mapping::
+
+    method: card
+    card:
+      title: Autonomy at Sea
+      subtitle: optional second line (or a list of lines)
+      template: navy
+
+``detect_title`` recognises the older "navy blue title card for ..." and
+"SECTION SLATE — ..." t2v prompts so existing storyboards can be migrated.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from . import video as video_utils
+
+ASSETS_DIR = Path(__file__).resolve().parents[1] / "assets"
+FONT_DIR = Path("/usr/share/fonts/truetype/dejavu")
+
+RGB = Tuple[int, int, int]
+
+
+@dataclass(frozen=True)
+class CardTemplate:
+    name: str
+    background: Tuple[RGB, RGB]  # top and bottom of the vertical gradient
+    text_color: RGB
+    accent_color: RGB
+    title_font: str
+    subtitle_font: str
+    title_scale: float = 0.06  # cap height relative to frame height
+    subtitle_scale: float = 0.034
+    max_width: float = 0.78  # fraction of frame width before the title wraps
+    vignette: float = 0.35
+    logo: Optional[str] = None  # relative to assets/; skipped when the file is missing
+    logo_scale: float = 0.09
+    fade_in_s: float = 0.9
+    fade_out_s: float = 0.5
+    rise: float = 0.015  # fraction of frame height the title travels while fading in
+    description: str = ""
+
+
+TEMPLATES: Dict[str, CardTemplate] = {
+    "navy": CardTemplate(
+        name="navy",
+        background=((16, 38, 82), (6, 18, 44)),
+        text_color=(244, 246, 250),
+        accent_color=(201, 162, 74),
+        title_font=str(FONT_DIR / "DejaVuSans-Bold.ttf"),
+        subtitle_font=str(FONT_DIR / "DejaVuSans.ttf"),
+        logo="logos/niio.png",
+        description="Section title on a navy gradient with a gold rule",
+    ),
+    "slate": CardTemplate(
+        name="slate",
+        background=((8, 22, 52), (2, 8, 22)),
+        text_color=(236, 238, 244),
+        accent_color=(201, 162, 74),
+        title_font=str(FONT_DIR / "DejaVuSerif-Bold.ttf"),
+        subtitle_font=str(FONT_DIR / "DejaVuSans.ttf"),
+        title_scale=0.06,
+        subtitle_scale=0.03,
+        vignette=0.5,
+        logo="logos/niio.png",
+        fade_in_s=1.4,
+        fade_out_s=1.0,
+        rise=0.0,
+        description="Darker opening/closing slate with serif title and slow fades",
+    ),
+    "pending": CardTemplate(
+        name="pending",
+        background=((46, 48, 54), (22, 23, 27)),
+        text_color=(170, 174, 182),
+        accent_color=(110, 114, 122),
+        title_font=str(FONT_DIR / "DejaVuSans.ttf"),
+        subtitle_font=str(FONT_DIR / "DejaVuSans.ttf"),
+        title_scale=0.04,
+        subtitle_scale=0.025,
+        vignette=0.2,
+        fade_in_s=0.0,
+        fade_out_s=0.0,
+        rise=0.0,
+        description="Static placeholder slate for shots still rendering (timeline preview)",
+    ),
+}
+
+_TITLE_PATTERNS = (
+    re.compile(r"title card (?:reading|for)\s+(?P<title>.+?)(?:\s+with clean typography)?\s*$", re.IGNORECASE),
+    re.compile(r"^section slate\s*[—–-]+\s*(?P<title>.+?)\s*$", re.IGNORECASE),
+)
+
+
+def _normalise(text: str) -> str:
+    # Prompts spell out the scene name's "&" as "and".
+    return re.sub(r"[^a-z0-9]+", " ", text.lower().replace("&", " and ")).strip()
+
+
+def detect_title(prompt: str, scene_name: str | None = None) -> Optional[str]:
+    """Title of a title-card prompt, or None for any other prompt.
+
+    Prompts often carry a lower-cased copy of the scene name; the scene's own
+    capitalisation and punctuation are used when the two match.
+    """
+    for pattern in _TITLE_PATTERNS:
+        match = pattern.search(" ".join(prompt.split()))
+        if match:
+            title = match.group("title").strip(" '\"“”.")
+            if scene_name and _normalise(title) == _normalise(scene_name):
+                return scene_name
+            return title
+    return None
+
+
+def get_template(name: str) -> CardTemplate:
+    try:
+        return TEMPLATES[name]
+    except KeyError as exc:
+        raise ValueError(f"Unknown card template '{name}'. Known: {', '.join(sorted(TEMPLATES))}") from exc
+
+
+def _ease(x: float) -> float:
+    x = min(max(x, 0.0), 1.0)
+    return x * x * (3 - 2 * x)
+
+
+def _background(template: CardTemplate, width: int, height: int, seed: int) -> np.ndarray:
+    top, bottom = (np.array(color, dtype=np.float32) for color in template.background)
+    ramp = np.linspace(0.0, 1.0, height, dtype=np.float32)[:, None, None]
+    image = np.broadcast_to(top + (bottom - top) * ramp, (height, width, 3)).copy()
+    if template.vignette:
+        yy = np.linspace(-1.0, 1.0, height, dtype=np.float32)[:, None]
+        xx = np.linspace(-1.0, 1.0, width, dtype=np.float32)[None, :]
+        image *= (1.0 - template.vignette * np.clip((xx * xx + yy * yy) / 2.0, 0.0, 1.0))[..., None]
+    # A little fixed grain keeps the encoder from banding the gradient.
+    image += np.random.default_rng(seed).uniform(-1.5, 1.5, size=(height, width, 1)).astype(np.float32)
+    return np.clip(image, 0, 255).astype(np.uint8)
+
+
+def _wrap(draw: ImageDraw.ImageDraw, text: str, font: ImageFont.FreeTypeFont, max_width: int) -> List[str]:
+    lines: List[str] = []
+    for word in text.split():
+        if lines and draw.textlength(f"{lines[-1]} {word}", font=font) <= max_width:
+            lines[-1] = f"{lines[-1]} {word}"
+        else:
+            lines.append(word)
+    return lines or [""]
+
+
+def _text_mask(
+    template: CardTemplate, title: str, subtitles: Sequence[str], width: int, height: int
+) -> Tuple[np.ndarray, Tuple[int, int, int]]:
+    """Coverage mask of the centred title and subtitle lines, plus the accent rule's (y, half-width, thickness)."""
+    mask = Image.new("L", (width, height), 0)
+    draw = ImageDraw.Draw(mask)
+    title_font = ImageFont.truetype(template.title_font, max(int(template.title_scale * height / 0.72), 8))
+    sub_font = ImageFont.truetype(template.subtitle_font, max(int(template.subtitle_scale * height / 0.72), 8))
+    max_width = int(template.max_width * width)
+    title_lines = _wrap(draw, title, title_font, max_width)
+    sub_lines = [line for text in subtitles for line in _wrap(draw, text, sub_font, max_width)]
+
+    title_step = int(title_font.size * 1.18)
+    sub_step = int(sub_font.size * 1.35)
+    gap = int(height * 0.035)
+    rule_thickness = max(height // 360, 2)
+    block = title_step * len(title_lines) + gap * 2 + rule_thickness + sub_step * len(sub_lines)
+    y = (height - block) // 2
+    for line in title_lines:
+        draw.text((width // 2, y), line, font=title_font, fill=255, anchor="mt")
+        y += title_step
+    rule_y = y + gap
+    y = rule_y + rule_thickness + gap
+    for line in sub_lines:
+        draw.text((width // 2, y), line, font=sub_font, fill=255, anchor="mt")
+        y += sub_step
+    rule_half = int(min(max(draw.textlength(line, font=title_font) for line in title_lines) * 0.35, width * 0.2))
+    return np.asarray(mask), (rule_y, rule_half, rule_thickness)
+
+
+def _paste_logo(image: np.ndarray, template: CardTemplate) -> None:
+    if not template.logo or not (ASSETS_DIR / template.logo).exists():
+        return
+    height, width = image.shape[:2]
+    logo = Image.open(ASSETS_DIR / template.logo).convert("RGBA")
+    target_h = int(template.logo_scale * height)
+    logo = logo.resize((max(int(logo.width * target_h / logo.height), 1), target_h), Image.LANCZOS)
+    margin = int(0.045 * height)
+    x0, y0 = width - logo.width - margin, height - logo.height - margin
+    rgba = np.asarray(logo, dtype=np.float32)
+    alpha = rgba[..., 3:] / 255.0
+    region = image[y0 : y0 + logo.height, x0 : x0 + logo.width].astype(np.float32)
+    image[y0 : y0 + logo.height, x0 : x0 + logo.width] = (region * (1 - alpha) + rgba[..., :3] * alpha).astype(np.uint8)
+
+
+def card_frames(card: Dict, size: Tuple[int, int], duration: float, fps: int, seed: int = 0) -> Iterator[np.ndarray]:
+    """Yield the card's frames (uint8 HWC); held frames are the same array, so copy before modifying."""
+    template = get_template(card.get("template", "navy"))
+    subtitles = card.get("subtitle") or []
+    subtitles = [subtitles] if isinstance(subtitles, str) else list(subtitles)
+    width, height = size
+    background = _background(template, width, height, seed)
+    _paste_logo(background, template)
+    mask, (rule_y, rule_half, rule_thickness) = _text_mask(template, card["title"], subtitles, width, height)
+
+    # Only the band that holds text (plus the rise offset) ever changes.
+    rise_px = int(round(template.rise * height))
+    rows = np.flatnonzero(mask.any(axis=1))
+    top = int(min(rows[0] if rows.size else rule_y, rule_y))
+    bottom = int(max(rows[-1] + 1 if rows.size else rule_y, rule_y + rule_thickness)) + rise_px
+    band_bg = background[top:bottom].astype(np.float32)
+    color = np.array(template.text_color, dtype=np.float32)
+    accent = np.array(template.accent_color, dtype=np.float32)
+
+    total = max(int(round(duration * fps)), 1)
+    frame = background.copy()
+    held: Optional[Tuple[int, float]] = None
+    for index in range(total):
+        t = index / fps
+        fade_in = _ease(t / template.fade_in_s) if template.fade_in_s else 1.0
+        fade_out = _ease((duration - t) / template.fade_out_s) if template.fade_out_s else 1.0
+        opacity = min(fade_in, fade_out)
+        offset = int(round(rise_px * (1.0 - fade_in)))
+        state = (offset, round(opacity, 3), round(fade_in, 3))
+        if state != held:
+            coverage = np.zeros((bottom - top, width), dtype=np.float32)
+            src = mask[top : bottom - offset] if offset else mask[top:bottom]
+            coverage[offset : offset + src.shape[0]] = src / 255.0
+            band = band_bg + (color - band_bg) * (coverage * opacity)[..., None]
+            half = int(rule_half * fade_in)
+            if half:
+                ry = rule_y - top + offset
+                rule = band[ry : ry + rule_thickness, width // 2 - half : width // 2 + half]
+                rule += (accent - rule) * opacity
+            frame[top:bottom] = np.clip(band, 0, 255).astype(np.uint8)
+            held = state
+        yield frame
+
+
+def render_card(card: Dict, out_path, duration: float, fps: int, size: Tuple[int, int] = (3840, 2160)) -> None:
+    """Render and encode a title card (shot encoder profile), streaming frames straight into ffmpeg."""
+    if not card.get("title"):
+        raise ValueError("Card shots need a 'title'")
+    video_utils.stream_video(card_frames(card, size, duration, fps), size, out_path, fps)
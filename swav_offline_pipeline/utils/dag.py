@@ -0,0 +1,361 @@
+"""Dependency-graph execution of pipeline tasks with make-style skipping and per-pool concurrency."""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from . import instrument
+
+
+@dataclass
+class Task:
+    name: str
+    kind: str
+    run: Callable[[], Any]
+    inputs: List[Path] = field(default_factory=list)
+    outputs: List[Path] = field(default_factory=list)
+    deps: List[str] = field(default_factory=list)
+    pool: str = "cpu"
+    signature: str = ""
+
+
+@dataclass
+class TaskResult:
+    name: str
+    kind: str
+    pool: str
+    state: str = "pending"  # pending | skipped | done | failed | cancelled
+    reason: str = ""
+    ready: float = 0.0
+    start: float = 0.0
+    end: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def wall_s(self) -> float:
+        return max(self.end - self.start, 0.0)
+
+    @property
+    def queued_s(self) -> float:
+        """Time spent waiting for a pool slot after the dependencies had finished."""
+        return max(self.start - self.ready, 0.0)
+
+
+def signature(*values: Any) -> str:
+    """Stable short hash of the settings a task's outputs depend on."""
+    payload = json.dumps(values, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class Graph:
+    """Validated task graph: unique names, one producer per output, no cycles."""
+
+    def __init__(self, tasks: Sequence[Task]) -> None:
+        self.tasks: Dict[str, Task] = {}
+        self.producers: Dict[Path, str] = {}
+        for task in tasks:
+            if task.name in self.tasks:
+                raise ValueError(f"Duplicate task '{task.name}'")
+            self.tasks[task.name] = task
+            for path in task.outputs:
+                if path in self.producers:
+                    raise ValueError(f"{path} is produced by both '{self.producers[path]}' and '{task.name}'")
+                self.producers[path] = task.name
+
+        self.deps: Dict[str, List[str]] = {}
+        for task in tasks:
+            deps = list(task.deps) + [self.producers[path] for path in task.inputs if path in self.producers]
+            unknown = [dep for dep in deps if dep not in self.tasks]
+            if unknown:
+                raise ValueError(f"Task '{task.name}' depends on unknown task(s): {', '.join(unknown)}")
+            self.deps[task.name] = list(dict.fromkeys(dep for dep in deps if dep != task.name))
+        self.order = self._toposort()
+
+    def _toposort(self) -> List[str]:
+        order: List[str] = []
+        state: Dict[str, int] = {}  # 1 = visiting, 2 = done
+
+        def visit(name: str, chain: List[str]) -> None:
+            if state.get(name) == 2:
+                return
+            if state.get(name) == 1:
+                raise ValueError(f"Dependency cycle: {' -> '.join(chain + [name])}")
+            state[name] = 1
+            for dep in self.deps[name]:
+                visit(dep, chain + [name])
+            state[name] = 2
+            order.append(name)
+
+        for name in self.tasks:
+            visit(name, [])
+        return order
+
+    def dependents(self) -> Dict[str, List[str]]:
+        out: Dict[str, List[str]] = {name: [] for name in self.tasks}
+        for name, deps in self.deps.items():
+            for dep in deps:
+                out[dep].append(name)
+        return out
+
+
+def _mtime(path: Path) -> Optional[int]:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+class Scheduler:
+    """Run a ``Graph`` across named resource pools (e.g. ``{"gpu": 1, "cpu": 4}``)."""
+
+    def __init__(
+        self,
+        graph: Graph,
+        pools: Dict[str, int],
+        state_path: Path | None = None,
+        force: bool = False,
+        log: Callable[[str], None] = print,
+        on_finish: Callable[[TaskResult], None] | None = None,
+        evicted: Dict[Path, int] | None = None,
+        requeue: Dict[str, str] | None = None,
+    ) -> None:
+        unknown = {task.pool for task in graph.tasks.values()} - set(pools)
+        if unknown:
+            raise ValueError(f"Tasks use unknown pool(s): {', '.join(sorted(unknown))}")
+        self.graph = graph
+        self.pools = {name: max(int(size), 1) for name, size in pools.items()}
+        self.state_path = state_path
+        self.force = force
+        self.log = log
+        self.on_finish = on_finish
+        self.evicted: Dict[Path, int] = dict(evicted or {})
+        self.requeue: Dict[str, str] = dict(requeue or {})
+        self.results: Dict[str, TaskResult] = {
+            name: TaskResult(name, task.kind, task.pool) for name, task in graph.tasks.items()
+        }
+        self._lock = threading.Lock()
+        self._state: Dict[str, str] = {}
+        if state_path is not None and state_path.exists():
+            try:
+                self._state = json.loads(state_path.read_text(encoding="utf-8"))
+            except ValueError:
+                self._state = {}
+
+    # -- up-to-date checks ---------------------------------------------------
+    def _signature(self, task: Task) -> str:
+        # The input list is part of the signature: a different shot selection changes the timeline.
+        return signature(task.signature, [str(path) for path in task.inputs])
+
+    def _stamp(self, path: Path) -> Optional[int]:
+        stamp = _mtime(path)
+        return self.evicted.get(path) if stamp is None else stamp
+
+    def stale_reason(self, task: Task) -> str:
+        """Why ``task`` must run, or ``""`` if its outputs are up to date."""
+        if self.force:
+            return "forced"
+        if task.name in self.requeue:
+            return self.requeue[task.name]
+        if not task.outputs:
+            return "no declared outputs"
+        if self._state.get(task.name) != self._signature(task):
+            return "settings changed" if task.name in self._state else "not built"
+        output_times = [self._stamp(path) for path in task.outputs]
+        if any(stamp is None for stamp in output_times):
+            return "output missing"
+        input_times = [self._stamp(path) for path in task.inputs]
+        if any(stamp is None for stamp in input_times):
+            return "input missing"
+        if input_times and max(input_times) > min(output_times):
+            return "inputs newer"
+        return ""
+
+    def _restores(self, stale: Dict[str, str]) -> Dict[str, str]:
+        """Producers to re-run because a stale task reads an evicted file they wrote."""
+        restores: Dict[str, str] = {}
+        # Consumers come before producers in reverse order, so a restored task's own evicted inputs are seen too.
+        for name in reversed(self.graph.order):
+            if not (stale.get(name) or restores.get(name)):
+                continue
+            for path in self.graph.tasks[name].inputs:
+                producer = self.graph.producers.get(path)
+                if producer and path in self.evicted and not path.exists() and not stale.get(producer):
+                    restores.setdefault(producer, f"restore evicted {path.name}")
+        return restores
+
+    def _stale(self) -> Dict[str, str]:
+        stale: Dict[str, str] = {}
+        for name in self.graph.order:
+            reason = self.stale_reason(self.graph.tasks[name])
+            if not reason:
+                rebuilt = [dep for dep in self.graph.deps[name] if stale.get(dep)]
+                reason = f"after {', '.join(rebuilt)}" if rebuilt else ""
+            stale[name] = reason
+        return stale
+
+    def plan(self) -> List[Tuple[str, str]]:
+        """``(task, reason)`` in execution order for a dry run; staleness propagates to dependents."""
+        stale = self._stale()
+        stale.update(self._restores(stale))
+        return [(name, stale[name] or "up to date") for name in self.graph.order]
+
+    def _save_state(self) -> None:
+        if self.state_path is None:
+            return
+        tmp = self.state_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self._state, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, self.state_path)
+
+    # -- execution -----------------------------------------------------------
+    def _execute(self, task: Task) -> None:
+        result = self.results[task.name]
+        result.start = time.time()
+        self.log(f"{task.name}: running on {task.pool} ({result.reason})")
+        stamps = {path: self._stamp(path) for path in task.outputs}
+        try:
+            task.run()
+            if result.reason.startswith("restore"):
+                # Same inputs and settings, so the same files: keep the timestamps their consumers were built against.
+                for path, stamp in stamps.items():
+                    if stamp is not None and path.exists():
+                        os.utime(path, ns=(stamp, stamp))
+        finally:
+            result.end = time.time()
+
+    def run(self) -> Dict[str, TaskResult]:
+        """Run every stale task; re-raises the first task failure once running tasks have drained."""
+        remaining = {name: set(deps) for name, deps in self.graph.deps.items()}
+        dependents = self.graph.dependents()
+        executors = {
+            name: ThreadPoolExecutor(max_workers=size, thread_name_prefix=f"dag-{name}") for name, size in self.pools.items()
+        }
+        running: Dict[Future, str] = {}
+        failure: Optional[BaseException] = None
+        started = time.time()
+        restores = self._restores(self._stale())
+
+        def release(name: str) -> List[str]:
+            now = time.time()
+            ready: List[str] = []
+            for child in dependents[name]:
+                remaining[child].discard(name)
+                if not remaining[child] and self.results[child].state == "pending":
+                    self.results[child].ready = now
+                    ready.append(child)
+            return ready
+
+        def finish(result: TaskResult) -> None:
+            instrument.emit(
+                {
+                    "event": "dag_task",
+                    "task": result.name,
+                    "kind": result.kind,
+                    "pool": result.pool,
+                    "state": result.state,
+                    "reason": result.reason,
+                    "start": result.start,
+                    "end": result.end,
+                    "wall_s": result.wall_s,
+                    "queued_s": result.queued_s,
+                    "error": result.error,
+                }
+            )
+            if self.on_finish is not None:
+                self.on_finish(result)
+
+        queue = [name for name in self.graph.order if not remaining[name]]
+        for name in queue:
+            self.results[name].ready = started
+        try:
+            while queue or running:
+                while queue and failure is None:
+                    name = queue.pop(0)
+                    task, result = self.graph.tasks[name], self.results[name]
+                    reason = self.stale_reason(task) or restores.get(name, "")
+                    if not reason:
+                        # Skipped tasks take no time and release their dependents straight away.
+                        result.state, result.reason = "skipped", "up to date"
+                        result.start = result.end = result.ready
+                        finish(result)
+                        queue.extend(release(name))
+                        continue
+                    result.reason = reason
+                    with self._lock:
+                        self._state.pop(name, None)
+                        self._save_state()
+                    running[executors[task.pool].submit(self._execute, task)] = name
+                if not running:
+                    break
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    task, result = self.graph.tasks[name], self.results[name]
+                    error = future.exception()
+                    if error is None:
+                        result.state = "done"
+                        with self._lock:
+                            self._state[name] = self._signature(task)
+                            self._save_state()
+                        queue.extend(release(name))
+                    else:
+                        result.state, result.error = "failed", f"{type(error).__name__}: {error}"
+                        self.log(f"{name}: failed ({result.error}); waiting for running tasks")
+                        failure = failure or error
+                    finish(result)
+        finally:
+            for executor in executors.values():
+                executor.shutdown(wait=True)
+        for result in self.results.values():
+            if result.state == "pending":
+                result.state = "cancelled"
+        if failure is not None:
+            raise failure
+        path = critical_path(self.graph, self.results)
+        instrument.emit(
+            {
+                "event": "critical_path",
+                "wall_s": time.time() - started,
+                "tasks": [
+                    {"task": r.name, "pool": r.pool, "wall_s": r.wall_s, "queued_s": r.queued_s, "state": r.state}
+                    for r in path
+                ],
+            }
+        )
+        return self.results
+
+
+def critical_path(graph: Graph, results: Dict[str, TaskResult]) -> List[TaskResult]:
+    """Tasks that bounded the run, first to last.
+
+    Starting from the task that finished last, repeatedly step to the
+    dependency that finished last before it, i.e. the one it was waiting on.
+    A task's ``queued_s`` on this path is time lost waiting for a pool slot.
+    """
+    finished = [r for r in results.values() if r.state in ("done", "skipped")]
+    if not finished:
+        return []
+    current = max(finished, key=lambda r: r.end)
+    path = [current]
+    while True:
+        deps = [results[dep] for dep in graph.deps[current.name] if results[dep].state in ("done", "skipped")]
+        if not deps:
+            break
+        current = max(deps, key=lambda r: r.end)
+        path.append(current)
+    return list(reversed(path))
+
+
+def format_critical_path(path: Sequence[TaskResult]) -> List[str]:
+    lines = []
+    for result in path:
+        queued = f", queued {result.queued_s:.1f} s for {result.pool}" if result.queued_s >= 0.05 else ""
+        note = " (up to date)" if result.state == "skipped" else ""
+        lines.append(f"{result.name:<16} {result.wall_s:8.1f} s on {result.pool}{queued}{note}")
+    return lines
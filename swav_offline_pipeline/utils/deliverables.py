@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from . import encoders as encoder_utils
+from . import ffmpeg
+from . import video as video_utils
+
+_ENC_THREAD = re.compile(r"^enc(\d+):")
+
+
+@dataclass(frozen=True)
+class Deliverable:
+    """One output variant derived from the assembled timeline and the final mix."""
+
+    name: str
+    size: Tuple[int, int]
+    profile: str
+    audio: List[str] = field(default_factory=list)
+    description: str = ""
+
+    def path(self, outdir: Path, stem: str = "final_swavlamban") -> Path:
+        return outdir / f"{stem}_{self.name}{encoder_utils.get_profile(self.profile).extension}"
+
+
+DELIVERABLES: Dict[str, Deliverable] = {
+    "4k-prores": Deliverable(
+        name="4k-prores",
+        size=(3840, 2160),
+        profile="prores_master",
+        audio=["-c:a", "copy"],
+        description="ProRes 422 HQ archive with the 24-bit PCM mix",
+    ),
+    "4k-h264": Deliverable(
+        name="4k-h264",
+        size=(3840, 2160),
+        profile="delivery",
+        audio=["-c:a", "aac", "-b:a", "224k"],
+        description="4K H.264 projection master",
+    ),
+    "hd-h264": Deliverable(
+        name="hd-h264",
+        size=(1920, 1080),
+        profile="delivery",
+        audio=["-c:a", "aac", "-b:a", "224k"],
+        description="1080p H.264 for projection",
+    ),
+    "web": Deliverable(
+        name="web",
+        size=(1280, 720),
+        profile="web",
+        audio=["-c:a", "aac", "-b:a", "128k"],
+        description="720p rate-capped H.264 web proxy",
+    ),
+}
+
+
+def parse(value: str) -> List[Deliverable]:
+    """Parse a comma-separated deliverable list such as ``"4k-prores,hd-h264,web"``."""
+    names = [part.strip() for part in value.split(",") if part.strip()]
+    unknown = [name for name in names if name not in DELIVERABLES]
+    if unknown or not names:
+        raise ValueError(f"Unknown deliverable(s) {', '.join(unknown) or value!r}. Known: {', '.join(DELIVERABLES)}")
+    return [DELIVERABLES[name] for name in dict.fromkeys(names)]
+
+
+def filter_graph(deliverables: Sequence[Deliverable], source_size: Tuple[int, int], captions: Path | None = None) -> str:
+    """Decode once, optionally burn captions, then split into one scaled branch per deliverable."""
+    head = f"[0:v]{video_utils.caption_filter(captions)}," if captions else "[0:v]"
+    branches = [f"{head}split={len(deliverables)}" + "".join(f"[s{idx}]" for idx in range(len(deliverables)))]
+    for idx, item in enumerate(deliverables):
+        if tuple(item.size) == tuple(source_size):
+            branches.append(f"[s{idx}]null[v{idx}]")
+        else:
+            branches.append(f"[s{idx}]scale={item.size[0]}:{item.size[1]}:flags=lanczos[v{idx}]")
+    return ";".join(branches)
+
+
+class _EncoderThreads:
+    """Sample per-thread CPU time of an ffmpeg process, grouped by output encoder.
+
+    ffmpeg names its encoder threads ``enc<output>:<stream>:<codec>`` and codec
+    worker threads inherit that name, so /proc/<pid>/task gives CPU time per
+    deliverable and the moment each encoder finishes, even though all outputs
+    share one process and one decode. Without /proc only the total is known.
+    """
+
+    def __init__(self, pid: int, interval: float = 0.2):
+        self.pid = pid
+        self.interval = interval
+        self.start = time.perf_counter()
+        self.cpu: Dict[int, Dict[int, float]] = {}
+        self.last_seen: Dict[int, float] = {}
+        self._tick = 1.0 / os.sysconf("SC_CLK_TCK")
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _sample(self) -> None:
+        now = time.perf_counter() - self.start
+        for task in Path(f"/proc/{self.pid}/task").glob("*"):
+            try:
+                name = (task / "comm").read_text().strip()
+                fields = (task / "stat").read_text().rsplit(")", 1)[1].split()
+            except OSError:
+                continue
+            match = _ENC_THREAD.match(name)
+            if not match:
+                continue
+            output = int(match.group(1))
+            self.cpu.setdefault(output, {})[int(task.name)] = (int(fields[11]) + int(fields[12])) * self._tick
+            self.last_seen[output] = now
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._sample()
+            self._stop.wait(self.interval)
+
+    def stop(self) -> Dict[int, Dict[str, float]]:
+        self._stop.set()
+        self._thread.join()
+        return {
+            output: {"cpu_s": sum(threads.values()), "wall_s": self.last_seen.get(output, 0.0)}
+            for output, threads in self.cpu.items()
+        }
+
+
+def encode(
+    timeline: Path,
+    mix_wav: Path,
+    deliverables: Sequence[Deliverable],
+    outdir: Path,
+    source_size: Tuple[int, int],
+    captions: Path | None = None,
+    threads: Optional[int] = None,
+) -> Dict[str, Dict[str, float]]:
+    """Encode every deliverable in one ffmpeg process from a single decode of ``timeline``.
+
+    Returns per-deliverable ``{"path", "wall_s", "cpu_s", "bytes"}``; ``wall_s`` is
+    when that deliverable's encoder finished, measured from the start of the run.
+    """
+    cmd = ["ffmpeg", "-y", "-i", str(timeline), "-i", str(mix_wav)]
+    cmd.extend(["-filter_complex", filter_graph(deliverables, source_size, captions)])
+    paths = [item.path(outdir) for item in deliverables]
+    for idx, (item, path) in enumerate(zip(deliverables, paths)):
+        profile = encoder_utils.get_profile(item.profile)
+        cmd.extend(["-map", f"[v{idx}]", "-map", "1:a", *profile.ffmpeg_args(threads=threads), *item.audio, str(path)])
+
+    monitors: List[_EncoderThreads] = []
+    try:
+        total = ffmpeg.run(cmd, on_start=lambda pid: monitors.append(_EncoderThreads(pid))).wall_s
+    finally:
+        per_output = monitors[0].stop() if monitors else {}
+
+    results: Dict[str, Dict[str, float]] = {}
+    for idx, (item, path) in enumerate(zip(deliverables, paths)):
+        measured = per_output.get(idx, {})
+        results[item.name] = {
+            "path": str(path),
+            "wall_s": measured.get("wall_s") or total,
+            "cpu_s": measured.get("cpu_s", 0.0),
+            "bytes": path.stat().st_size if path.exists() else 0,
+        }
+    return results
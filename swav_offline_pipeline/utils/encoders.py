@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+# Pipeline stages that encode video. Each stage is mapped to a profile name
+# below and can be remapped at runtime with ``set_stage_profile``.
+STAGES = ("shot", "overlay", "assembly")
+
+
+@dataclass(frozen=True)
+class EncoderProfile:
+    name: str
+    codec: str
+    args: List[str] = field(default_factory=list)
+    pix_fmt: str = "yuv420p"
+    extension: str = ".mp4"
+    description: str = ""
+
+    def ffmpeg_args(self, threads: Optional[int] = None) -> List[str]:
+        """Return the ``-c:v ...`` argument block for this profile."""
+        cmd = ["-c:v", self.codec, *self.args, "-pix_fmt", self.pix_fmt]
+        threads = _THREADS if threads is None else threads
+        if threads:
+            cmd.extend(["-threads", str(threads)])
+        return cmd
+
+
+PROFILES: Dict[str, EncoderProfile] = {
+    "intermediate": EncoderProfile(
+        name="intermediate",
+        codec="libx264",
+        args=["-preset", "veryfast", "-crf", "12", "-tune", "film"],
+        description="Fast near-lossless H.264 for per-shot intermediates",
+    ),
+    "intermediate_intra": EncoderProfile(
+        name="intermediate_intra",
+        codec="libx264",
+        args=["-preset", "ultrafast", "-qp", "0", "-g", "1"],
+        description="Lossless all-intra H.264; large but cheap to encode and cut",
+    ),
+    "intermediate_ffv1": EncoderProfile(
+        name="intermediate_ffv1",
+        codec="ffv1",
+        args=["-level", "3", "-g", "1", "-slices", "16", "-slicecrc", "0"],
+        pix_fmt="yuv420p",
+        extension=".mkv",
+        description="Lossless FFV1 intra intermediates (Matroska)",
+    ),
+    "legacy": EncoderProfile(
+        name="legacy",
+        codec="libx264",
+        args=["-preset", "slow", "-crf", "10"],
+        description="Previous hardcoded settings (libx264 slow CRF 10)",
+    ),
+    "delivery": EncoderProfile(
+        name="delivery",
+        codec="libx264",
+        args=["-preset", "slow", "-crf", "16", "-profile:v", "high", "-movflags", "+faststart"],
+        description="Slow high-quality H.264 for projection/delivery masters",
+    ),
+    "web": EncoderProfile(
+        name="web",
+        codec="libx264",
+        args=["-preset", "medium", "-crf", "24", "-maxrate", "3M", "-bufsize", "6M", "-profile:v", "main",
+              "-movflags", "+faststart"],
+        description="Rate-capped H.264 for web proxies and review links",
+    ),
+    "prores_master": EncoderProfile(
+        name="prores_master",
+        codec="prores_ks",
+        args=["-profile:v", "3", "-vendor", "apl0"],
+        pix_fmt="yuv422p10le",
+        extension=".mov",
+        description="ProRes 422 HQ archive master",
+    ),
+}
+
+_STAGE_PROFILES: Dict[str, str] = {
+    "shot": "intermediate",
+    "overlay": "intermediate",
+    "assembly": "delivery",
+}
+
+_THREADS: Optional[int] = None
+
+
+def get_profile(name: str) -> EncoderProfile:
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown encoder profile '{name}'. Known: {', '.join(sorted(PROFILES))}") from None
+
+
+def set_stage_profile(stage: str, name: str) -> None:
+    if stage not in STAGES:
+        raise ValueError(f"Unknown encode stage '{stage}'. Known: {', '.join(STAGES)}")
+    get_profile(name)
+    _STAGE_PROFILES[stage] = name
+
+
+def profile_for(stage: str) -> EncoderProfile:
+    """Resolve the encoder profile currently selected for a pipeline stage."""
+    return get_profile(_STAGE_PROFILES[stage])
+
+
+def threads_per_job(jobs: int, cores: Optional[int] = None) -> int:
+    """Split available cores evenly so ``jobs`` concurrent encodes do not oversubscribe."""
+    cores = cores or os.cpu_count() or 1
+    return max(1, cores // max(jobs, 1))
+
+
+def set_threads(threads: Optional[int]) -> None:
+    """Set the default ``-threads`` value applied to every profile (None lets ffmpeg decide)."""
+    global _THREADS
+    _THREADS = threads if threads and threads > 0 else None
+
+
+def get_threads() -> Optional[int]:
+    return _THREADS
@@ -0,0 +1,144 @@
+"""Deterministic stand-ins for SDXL, SVD and XTTS.
+
+They mimic the call signatures and output shapes the pipeline relies on so the
+render, encode and audio stages can be exercised on a CPU-only box with just
+ffmpeg installed (benchmarks, farm smoke tests). Output depends only on the
+inputs, so repeated runs produce identical media.
+"""
+from __future__ import annotations
+
+import contextlib
+import hashlib
+from pathlib import Path
+from types import SimpleNamespace
+from typing import List
+
+import numpy as np
+from PIL import Image
+
+SVD_SIZE = (1024, 576)
+TTS_SAMPLE_RATE = 24000
+TTS_CHARS_PER_SECOND = 15.0
+
+
+def _seed(*parts) -> int:
+    digest = hashlib.sha256("\x1f".join(str(p) for p in parts).encode("utf-8")).digest()
+    return int.from_bytes(digest[:4], "little")
+
+
+def _gradient(width: int, height: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    top, bottom = rng.integers(0, 256, size=(2, 3)).astype(np.float32)
+    ramp = np.linspace(0.0, 1.0, height, dtype=np.float32)[:, None, None]
+    img = top + (bottom - top) * ramp
+    img = np.broadcast_to(img, (height, width, 3)).copy()
+    # A few soft blobs give encoders and QC something other than a flat field.
+    yy, xx = np.mgrid[0:height:8, 0:width:8]
+    for _ in range(3):
+        cy, cx = rng.uniform(0, height), rng.uniform(0, width)
+        radius = rng.uniform(0.1, 0.3) * max(width, height)
+        blob = np.exp(-(((yy - cy) ** 2 + (xx - cx) ** 2) / (2 * radius**2))).astype(np.float32)
+        blob = np.kron(blob, np.ones((8, 8), dtype=np.float32))[:height, :width]
+        img += blob[..., None] * rng.uniform(-80, 80, size=3).astype(np.float32)
+    return np.clip(img, 0, 255).astype(np.uint8)
+
+
+class FakeSDXLPipeline:
+    """Returns a seeded gradient still; ``pipe(...).images[0]`` like diffusers.
+
+    Prompts may also arrive as ``prompt_embeds`` from ``encode_prompt``; the
+    fake embedding is a hash of the prompt, so both routes give the same still.
+    """
+
+    _execution_device = "cpu"
+
+    def encode_prompt(self, prompt, device=None, num_images_per_prompt: int = 1, **kwargs):
+        prompts = [prompt] if isinstance(prompt, str) else list(prompt)
+        embeds = np.array([[_seed("sdxl", text)] for text in prompts], dtype=np.int64)[:, :, None]
+        pooled = embeds[:, :, 0].copy()
+        return embeds, np.zeros_like(embeds), pooled, np.zeros_like(pooled)
+
+    def __call__(self, prompt: str = "", height: int = 1024, width: int = 1024, **kwargs) -> SimpleNamespace:
+        embeds = kwargs.get("prompt_embeds")
+        seed = int(np.asarray(embeds).ravel()[0]) if embeds is not None else _seed("sdxl", prompt)
+        generator = kwargs.get("generator")
+        if generator is not None:
+            seed = _seed(seed, generator)
+        image = Image.fromarray(_gradient(width, height, seed))
+        return SimpleNamespace(images=[image])
+
+
+class FakeSVDPipeline:
+    """Returns ``frames`` as a per-batch list of (frames, channels, height, width) arrays in [0, 1]."""
+
+    def __call__(self, image: Image.Image, num_frames: int = 25, height: int | None = None, width: int | None = None, **kwargs):
+        width = width or SVD_SIZE[0]
+        height = height or SVD_SIZE[1]
+        base = np.asarray(image.convert("RGB").resize((width, height), Image.BILINEAR), dtype=np.float32) / 255.0
+        frames = np.empty((num_frames, 3, height, width), dtype=np.float32)
+        chw = base.transpose(2, 0, 1)
+        for idx in range(num_frames):
+            frames[idx] = np.roll(chw, idx * 4, axis=2)
+        return SimpleNamespace(frames=[frames])
+
+
+def _tone(text: str, pitch: float) -> np.ndarray:
+    seconds = max(len(text) / TTS_CHARS_PER_SECOND, 0.3)
+    t = np.arange(int(seconds * TTS_SAMPLE_RATE), dtype=np.float32) / TTS_SAMPLE_RATE
+    # Syllable-rate amplitude modulation so energy-based segmentation has gaps to find.
+    envelope = 0.5 * (1.0 + np.sin(2 * np.pi * 4.0 * t)) ** 2 / 4.0
+    return (0.3 * np.sin(2 * np.pi * pitch * t) * envelope).astype(np.float32)
+
+
+class FakeXtts:
+    """The XTTS model surface used with cached conditioning; the voice sets the tone's pitch."""
+
+    device = "cpu"
+    config = SimpleNamespace(temperature=0.75, length_penalty=1.0, repetition_penalty=10.0, top_k=50, top_p=0.85)
+
+    def __init__(self, speakers: List[str]) -> None:
+        self.speaker_manager = SimpleNamespace(speakers={name: self._latents(name) for name in speakers})
+
+    @staticmethod
+    def _latents(voice: str) -> dict:
+        pitch = np.full((1, 1, 1), _seed("tts", voice) % 60, dtype=np.float32)
+        return {"gpt_cond_latent": pitch, "speaker_embedding": np.zeros((1, 512, 1), dtype=np.float32)}
+
+    def get_conditioning_latents(self, audio_path: List[str], **kwargs):
+        voice = "|".join(hashlib.sha256(Path(path).read_bytes()).hexdigest() for path in audio_path)
+        latents = self._latents(voice)
+        return latents["gpt_cond_latent"], latents["speaker_embedding"]
+
+    def inference(self, text: str, language: str, gpt_cond_latent, speaker_embedding, **kwargs) -> dict:
+        return {"wav": _tone(text, 110.0 + float(np.asarray(gpt_cond_latent).ravel()[0]))}
+
+
+class FakeTTS:
+    """XTTS-shaped synthesiser producing a tone whose length tracks the text."""
+
+    speakers: List[str] = ["male-en-2", "female-en-5"]
+
+    def __init__(self) -> None:
+        self.synthesizer = SimpleNamespace(output_sample_rate=TTS_SAMPLE_RATE, tts_model=FakeXtts(self.speakers))
+
+    def tts(self, text: str, speaker: str | None = None, language: str = "en", **kwargs) -> List[float]:
+        model = self.synthesizer.tts_model
+        latents = model.speaker_manager.speakers.get(speaker) or model._latents(str(speaker))
+        return model.inference(text, language, **latents)["wav"].tolist()
+
+
+def install() -> None:
+    """Route the model loaders in ``utils.models`` and ``utils.audio`` to the fakes."""
+    from . import audio, models
+
+    sdxl, svd, tts = FakeSDXLPipeline(), FakeSVDPipeline(), FakeTTS()
+    models.get_t2i = lambda: sdxl
+    models.get_img2vid = lambda: svd
+    models.generator = lambda seed: seed  # the fakes fold a plain seed into their own hashing
+    models.sdxl_text_encoders = lambda pipe: contextlib.nullcontext(pipe)
+    models.sdxl_fingerprint = lambda: "fake"
+    models.generation_fingerprint = lambda *names: "fake"
+    models.as_tensor = lambda array, device=None: array
+    models.set_sdxl_scheduler = lambda pipe, name, karras=False: None
+    audio._load_tts = lambda: tts
+    audio.xtts_fingerprint = lambda: "fake"
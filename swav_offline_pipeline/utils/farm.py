@@ -0,0 +1,341 @@
+"""Coordinator/worker render farm over local TCP: leased jobs, heartbeats, retries and a completion journal."""
+from __future__ import annotations
+
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+import traceback
+import uuid
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_LEASE_S = 60.0
+DEFAULT_MAX_ATTEMPTS = 3
+_CONNECT_TIMEOUT_S = 10.0
+_IDLE_POLL_S = 1.0
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    payload: Dict[str, Any] = field(default_factory=dict)
+    deps: List[str] = field(default_factory=list)
+    role: str = "cpu"
+    state: str = "pending"  # pending | leased | done | failed
+    attempts: int = 0
+    lease: Optional[str] = None
+    worker: Optional[str] = None
+    expires: float = 0.0
+    started: float = 0.0
+    wall_s: float = 0.0
+    error: Optional[str] = None
+    result: Dict[str, Any] = field(default_factory=dict)
+
+
+class JobGraph:
+    """Thread-safe job states, leases and retries; ``journal`` records completions for resume."""
+
+    def __init__(
+        self,
+        jobs: Sequence[Job],
+        lease_s: float = DEFAULT_LEASE_S,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        journal: Path | None = None,
+        signature: str = "",
+    ) -> None:
+        self.jobs: Dict[str, Job] = {job.id: job for job in jobs}
+        missing = {dep for job in jobs for dep in job.deps if dep not in self.jobs}
+        if missing:
+            raise ValueError(f"Jobs depend on unknown job(s): {', '.join(sorted(missing))}")
+        self.lease_s = lease_s
+        self.max_attempts = max_attempts
+        self.journal = journal
+        self.signature = signature
+        self.retries = 0
+        self.changed = threading.Event()
+        self._lock = threading.Lock()
+        self._by_lease: Dict[str, str] = {}
+        if journal is not None and journal.exists():
+            self._replay(journal)
+
+    def _replay(self, journal: Path) -> None:
+        for line in journal.read_text(encoding="utf-8").splitlines():
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            job = self.jobs.get(entry.get("id"))
+            if job is not None and entry.get("sig", "") == self.signature:
+                job.state, job.result, job.wall_s = "done", entry.get("result", {}), entry.get("wall_s", 0.0)
+
+    def _ready(self, job: Job) -> bool:
+        return job.state == "pending" and all(self.jobs[dep].state == "done" for dep in job.deps)
+
+    def lease(self, worker: str, roles: Sequence[str]) -> Optional[Job]:
+        with self._lock:
+            for job in self.jobs.values():
+                if self._ready(job) and job.role in roles:
+                    job.state, job.worker = "leased", worker
+                    job.lease = uuid.uuid4().hex
+                    job.attempts += 1
+                    job.started = time.time()
+                    job.expires = job.started + self.lease_s
+                    self._by_lease[job.lease] = job.id
+                    self.changed.set()
+                    return job
+        return None
+
+    def _held(self, lease: str) -> Optional[Job]:
+        job = self.jobs.get(self._by_lease.get(lease, ""))
+        return job if job is not None and job.state == "leased" and job.lease == lease else None
+
+    def heartbeat(self, lease: str) -> bool:
+        with self._lock:
+            job = self._held(lease)
+            if job is None:
+                return False
+            job.expires = time.time() + self.lease_s
+            return True
+
+    def complete(self, lease: str, result: Dict[str, Any]) -> bool:
+        with self._lock:
+            job = self._held(lease)
+            if job is None:
+                return False
+            job.state, job.result, job.error = "done", result or {}, None
+            job.wall_s = time.time() - job.started
+            self._by_lease.pop(lease, None)
+            if self.journal is not None:
+                with self.journal.open("a", encoding="utf-8") as fh:
+                    entry = {"id": job.id, "sig": self.signature, "result": job.result, "wall_s": job.wall_s}
+                    fh.write(json.dumps(entry) + "\n")
+            self.changed.set()
+            return True
+
+    def fail(self, lease: str, error: str) -> bool:
+        with self._lock:
+            job = self._held(lease)
+            if job is None:
+                return False
+            self._release(job, error)
+            return True
+
+    def expire(self, now: float | None = None) -> List[str]:
+        """Requeue (or fail) jobs whose lease was not renewed in time; returns their ids."""
+        now = time.time() if now is None else now
+        expired = []
+        with self._lock:
+            for job in self.jobs.values():
+                if job.state == "leased" and job.expires < now:
+                    self._release(job, f"lease expired on {job.worker}")
+                    expired.append(job.id)
+        return expired
+
+    def _release(self, job: Job, error: str) -> None:
+        self._by_lease.pop(job.lease or "", None)
+        job.error, job.lease, job.worker = error, None, None
+        job.state = "failed" if job.attempts >= self.max_attempts else "pending"
+        if job.state == "pending":
+            self.retries += 1
+        self.changed.set()
+
+    def done(self) -> bool:
+        return all(job.state == "done" for job in self.jobs.values())
+
+    def stuck(self) -> List[str]:
+        """Ids of failed jobs; any failure leaves its dependents unrunnable."""
+        return [job.id for job in self.jobs.values() if job.state == "failed"]
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for job in self.jobs.values():
+                counts[job.state] = counts.get(job.state, 0) + 1
+            return {
+                "counts": counts,
+                "retries": self.retries,
+                "jobs": [
+                    {key: value for key, value in asdict(job).items() if key not in ("payload", "lease")}
+                    for job in self.jobs.values()
+                ],
+            }
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        graph: JobGraph = self.server.graph  # type: ignore[attr-defined]
+        try:
+            request = json.loads(self.rfile.readline().decode("utf-8") or "{}")
+            response = _dispatch(graph, request)
+        except Exception as exc:  # a malformed request must not take the coordinator down
+            response = {"error": str(exc)}
+        self.wfile.write((json.dumps(response, default=str) + "\n").encode("utf-8"))
+
+
+def _dispatch(graph: JobGraph, request: Dict[str, Any]) -> Dict[str, Any]:
+    op = request.get("op")
+    if op == "lease":
+        if graph.done():
+            return {"done": True}
+        if graph.stuck():
+            return {"done": True, "failed": graph.stuck()}
+        job = graph.lease(request.get("worker", "?"), request.get("roles") or ["gpu", "lite", "cpu"])
+        if job is None:
+            return {"wait": _IDLE_POLL_S}
+        return {"job": {"id": job.id, "kind": job.kind, "payload": job.payload}, "lease": job.lease, "ttl": graph.lease_s}
+    if op == "heartbeat":
+        return {"ok": graph.heartbeat(request.get("lease", ""))}
+    if op == "complete":
+        return {"ok": graph.complete(request.get("lease", ""), request.get("result") or {})}
+    if op == "fail":
+        return {"ok": graph.fail(request.get("lease", ""), request.get("error", ""))}
+    if op == "status":
+        return graph.status()
+    return {"error": f"unknown op {op!r}"}
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def serve(
+    graph: JobGraph,
+    address: Tuple[str, int],
+    status_path: Path | None = None,
+    on_change: Callable[[JobGraph], None] | None = None,
+) -> bool:
+    """Serve leases until every job is done (True) or a job has exhausted its attempts (False)."""
+    server = _Server(address, _Handler)
+    server.graph = graph  # type: ignore[attr-defined]
+    thread = threading.Thread(target=server.serve_forever, name="farm-coordinator", daemon=True)
+    thread.start()
+    try:
+        while True:
+            graph.expire()
+            if graph.changed.wait(timeout=min(graph.lease_s / 4, 1.0)):
+                graph.changed.clear()
+                if status_path is not None:
+                    _write_status(status_path, graph.status())
+                if on_change is not None:
+                    on_change(graph)
+            if graph.done() or graph.stuck():
+                # Give idle workers one poll interval to hear "done" before the port closes.
+                time.sleep(_IDLE_POLL_S * 2)
+                return graph.done()
+    finally:
+        server.shutdown()
+        server.server_close()
+        if status_path is not None:
+            _write_status(status_path, graph.status())
+
+
+def _write_status(path: Path, payload: Dict[str, Any]) -> None:
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(payload, indent=2, default=str), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def parse_address(value: str, default_host: str = "127.0.0.1") -> Tuple[str, int]:
+    """``"host:port"`` or ``"port"`` -> ``(host, port)``."""
+    host, _, port = value.rpartition(":")
+    return host or default_host, int(port)
+
+
+def request(address: Tuple[str, int], payload: Dict[str, Any], timeout: float = _CONNECT_TIMEOUT_S) -> Dict[str, Any]:
+    with socket.create_connection(address, timeout=timeout) as conn:
+        conn.sendall((json.dumps(payload) + "\n").encode("utf-8"))
+        with conn.makefile("rb") as fh:
+            line = fh.readline()
+    if not line:
+        raise ConnectionError(f"coordinator at {address[0]}:{address[1]} closed the connection")
+    return json.loads(line.decode("utf-8"))
+
+
+class _Heartbeat:
+    """Renew a lease every third of its TTL; ``lost`` is set if the coordinator revoked it."""
+
+    def __init__(self, address: Tuple[str, int], lease: str, ttl: float) -> None:
+        self.address, self.lease, self.interval = address, lease, max(ttl / 3, 0.2)
+        self.lost = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="farm-heartbeat", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                if not request(self.address, {"op": "heartbeat", "lease": self.lease}).get("ok"):
+                    self.lost.set()
+                    return
+            except OSError:
+                continue  # coordinator briefly unreachable; the lease may still be renewed next time
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def run_worker(
+    address: Tuple[str, int],
+    worker: str,
+    execute: Callable[[Dict[str, Any], str], Optional[Dict[str, Any]]],
+    roles: Sequence[str] = ("gpu", "lite", "cpu"),
+    give_up_s: float = 120.0,
+    log: Callable[[str], None] = print,
+) -> int:
+    """Lease and run jobs until the coordinator reports the graph finished; returns the number of jobs run.
+
+    ``execute(job, lease)`` runs one job and returns a JSON-able result. The lease id
+    is unique per attempt, so it can name temporary outputs that are renamed into
+    place only when the job succeeds.
+    """
+    ran = 0
+    unreachable_since: Optional[float] = None
+    while True:
+        try:
+            response = request(address, {"op": "lease", "worker": worker, "roles": list(roles)})
+            unreachable_since = None
+        except OSError as exc:
+            unreachable_since = unreachable_since or time.time()
+            if time.time() - unreachable_since > give_up_s:
+                raise ConnectionError(f"coordinator unreachable for {give_up_s:.0f} s: {exc}") from exc
+            time.sleep(_IDLE_POLL_S)
+            continue
+        if response.get("done"):
+            if response.get("failed"):
+                log(f"coordinator gave up on: {', '.join(response['failed'])}")
+            return ran
+        if "job" not in response:
+            time.sleep(float(response.get("wait", _IDLE_POLL_S)))
+            continue
+
+        job, lease = response["job"], response["lease"]
+        heartbeat = _Heartbeat(address, lease, float(response.get("ttl", DEFAULT_LEASE_S)))
+        log(f"{worker}: running {job['id']}")
+        try:
+            result = execute(job, lease) or {}
+        except Exception as exc:
+            heartbeat.stop()
+            error = f"{type(exc).__name__}: {exc}\n{traceback.format_exc(limit=5)}"
+            log(f"{worker}: {job['id']} failed: {exc}")
+            _report(address, {"op": "fail", "lease": lease, "error": error})
+            continue
+        heartbeat.stop()
+        ran += 1
+        if heartbeat.lost.is_set() or not _report(address, {"op": "complete", "lease": lease, "result": result}):
+            log(f"{worker}: lease on {job['id']} was revoked; result discarded")
+
+
+def _report(address: Tuple[str, int], payload: Dict[str, Any], attempts: int = 5) -> bool:
+    for attempt in range(attempts):
+        try:
+            return bool(request(address, payload).get("ok"))
+        except OSError:
+            time.sleep(_IDLE_POLL_S * (attempt + 1))
+    return False
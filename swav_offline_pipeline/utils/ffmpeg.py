@@ -0,0 +1,261 @@
+"""Shared asyncio runner for every ffmpeg subprocess.
+
+One event loop on a background thread owns all ffmpeg processes. At most
+``slots`` run at once (default: one per core), so parallel callers (scene
+encodes, DAG tasks, deliverable benchmarks) queue here instead of
+oversubscribing the machine. Each call adds ``-progress pipe:1`` and parses it
+into a progress dict (out_time_s, frame, fps, speed), keeps the tail of stderr
+instead of dumping it on the console and attaches that tail to ``FFmpegError``
+on failure. Timeouts and cancellation (Ctrl-C in the calling thread) terminate
+the process.
+
+Blocking callers use ``run``; ``submit`` returns a ``concurrent.futures.Future``
+so synchronous code can overlap several encodes; ``run_async`` is the coroutine
+for callers already on the runner's loop.
+"""
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import os
+import subprocess
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from . import profiling
+
+STDERR_TAIL_LINES = 40
+_STDIN_CHUNK = 8 << 20
+_TERMINATE_GRACE_S = 5.0
+
+_SLOTS = max(os.cpu_count() or 1, 1)
+_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_SEMAPHORE: Optional[asyncio.Semaphore] = None
+_LOOP_LOCK = threading.Lock()
+
+
+class FFmpegError(subprocess.CalledProcessError):
+    """A failed ffmpeg call; ``stderr`` holds the last lines ffmpeg printed."""
+
+    def __str__(self) -> str:
+        tail = (self.stderr or "").strip()
+        return super().__str__() + (f"\n--- ffmpeg stderr (tail) ---\n{tail}" if tail else "")
+
+
+class FFmpegTimeout(FFmpegError):
+    def __init__(self, cmd: Sequence[str], timeout: float, stderr: str) -> None:
+        super().__init__(-9, list(cmd), stderr=stderr)
+        self.timeout = timeout
+
+    def __str__(self) -> str:
+        return f"ffmpeg timed out after {self.timeout:.0f} s\n" + super().__str__()
+
+
+@dataclass
+class FFmpegResult:
+    cmd: List[str]
+    returncode: int
+    wall_s: float
+    queued_s: float
+    progress: Dict[str, Any] = field(default_factory=dict)
+    stderr: str = ""
+
+
+def configure(slots: int) -> None:
+    """Limit concurrent ffmpeg processes (0 = one per core). Takes effect before the first call."""
+    global _SLOTS
+    _SLOTS = max(int(slots), 0) or max(os.cpu_count() or 1, 1)
+    if _LOOP is not None:
+        asyncio.run_coroutine_threadsafe(_resize(_SLOTS), _LOOP).result()
+
+
+def slots() -> int:
+    return _SLOTS
+
+
+async def _resize(size: int) -> None:
+    global _SEMAPHORE
+    _SEMAPHORE = asyncio.Semaphore(size)
+
+
+def _loop() -> asyncio.AbstractEventLoop:
+    global _LOOP
+    with _LOOP_LOCK:
+        if _LOOP is None or not _LOOP.is_running():
+            loop = asyncio.new_event_loop()
+            started = threading.Event()
+
+            def serve() -> None:
+                asyncio.set_event_loop(loop)
+                loop.call_soon(started.set)
+                loop.run_forever()
+
+            threading.Thread(target=serve, name="ffmpeg-runner", daemon=True).start()
+            started.wait()
+            _LOOP = loop
+            asyncio.run_coroutine_threadsafe(_resize(_SLOTS), loop).result()
+    return _LOOP
+
+
+def _parse_progress(lines: List[str]) -> Dict[str, Any]:
+    raw = dict(line.split("=", 1) for line in lines if "=" in line)
+    progress: Dict[str, Any] = {"state": raw.get("progress", "")}
+    if raw.get("out_time_us", "N/A").lstrip("-").isdigit():
+        progress["out_time_s"] = int(raw["out_time_us"]) / 1e6
+    for key in ("frame", "fps", "total_size"):
+        try:
+            progress[key] = float(raw[key])
+        except (KeyError, ValueError):
+            pass
+    speed = raw.get("speed", "").rstrip("x").strip()
+    try:
+        progress["speed"] = float(speed)
+    except ValueError:
+        pass
+    return progress
+
+
+async def _read_progress(stream: asyncio.StreamReader, result: FFmpegResult, callback) -> None:
+    block: List[str] = []
+    async for raw in stream:
+        line = raw.decode("utf-8", errors="replace").strip()
+        block.append(line)
+        if line.startswith("progress="):
+            result.progress = _parse_progress(block)
+            block = []
+            if callback is not None:
+                callback(result.progress)
+
+
+async def _read_stderr(stream: asyncio.StreamReader, tail: deque) -> None:
+    async for raw in stream:
+        tail.append(raw.decode("utf-8", errors="replace").rstrip())
+
+
+async def _write_stdin(stream: asyncio.StreamWriter, data) -> None:
+    """Feed a bytes-like object, or an iterator of them produced off-loop (e.g. frames rendered on demand)."""
+    try:
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            view = memoryview(data).cast("B")
+            for offset in range(0, len(view), _STDIN_CHUNK):
+                stream.write(view[offset : offset + _STDIN_CHUNK])
+                await stream.drain()
+        else:
+            loop = asyncio.get_running_loop()
+            chunks = iter(data)
+            while True:
+                chunk = await loop.run_in_executor(None, next, chunks, None)
+                if chunk is None:
+                    break
+                stream.write(memoryview(chunk).cast("B"))
+                await stream.drain()
+    except (BrokenPipeError, ConnectionResetError):
+        pass  # ffmpeg exited early; its return code and stderr explain why
+    finally:
+        stream.close()
+
+
+async def _stop(proc: asyncio.subprocess.Process) -> None:
+    if proc.returncode is not None:
+        return
+    proc.terminate()
+    try:
+        await asyncio.wait_for(proc.wait(), _TERMINATE_GRACE_S)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+
+
+async def run_async(
+    cmd: Sequence[str],
+    timeout: float | None = None,
+    progress: Callable[[Dict[str, Any]], None] | None = None,
+    stdin: Any = None,
+    on_start: Callable[[int], None] | None = None,
+) -> FFmpegResult:
+    """Run one ffmpeg command once a slot is free; raises ``FFmpegError`` on a non-zero exit."""
+    cmd = list(cmd)
+    cmd[1:1] = ["-hide_banner", "-nostats", "-progress", "pipe:1"]
+    queued = time.perf_counter()
+    async with _SEMAPHORE:
+        start = time.perf_counter()
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=asyncio.subprocess.PIPE if stdin is not None else asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        if on_start is not None:
+            on_start(proc.pid)
+        result = FFmpegResult(cmd, 0, 0.0, start - queued)
+        tail: deque = deque(maxlen=STDERR_TAIL_LINES)
+        io_tasks = [
+            asyncio.ensure_future(_read_progress(proc.stdout, result, progress)),
+            asyncio.ensure_future(_read_stderr(proc.stderr, tail)),
+        ]
+        if stdin is not None:
+            io_tasks.append(asyncio.ensure_future(_write_stdin(proc.stdin, stdin)))
+        try:
+            result.returncode = await asyncio.wait_for(proc.wait(), timeout)
+            await asyncio.gather(*io_tasks)
+        except asyncio.TimeoutError:
+            await _stop(proc)
+            await asyncio.gather(*io_tasks, return_exceptions=True)
+            raise FFmpegTimeout(cmd, timeout or 0.0, "\n".join(tail)) from None
+        except BaseException:
+            await _stop(proc)
+            for task in io_tasks:
+                task.cancel()
+            raise
+        result.wall_s = time.perf_counter() - start
+        result.stderr = "\n".join(tail)
+    if result.returncode != 0:
+        raise FFmpegError(result.returncode, cmd, stderr=result.stderr)
+    return result
+
+
+def submit(
+    cmd: Sequence[str],
+    timeout: float | None = None,
+    progress: Callable[[Dict[str, Any]], None] | None = None,
+    stdin: Any = None,
+    on_start: Callable[[int], None] | None = None,
+) -> concurrent.futures.Future:
+    """Schedule ``cmd`` on the runner and return a future for its ``FFmpegResult``."""
+    coro = run_async(cmd, timeout=timeout, progress=progress, stdin=stdin, on_start=on_start)
+    return asyncio.run_coroutine_threadsafe(coro, _loop())
+
+
+def run(
+    cmd: Sequence[str],
+    timeout: float | None = None,
+    progress: Callable[[Dict[str, Any]], None] | None = None,
+    stdin: Any = None,
+    on_start: Callable[[int], None] | None = None,
+) -> FFmpegResult:
+    """Run ``cmd`` and block until it finishes; interrupting the caller terminates ffmpeg.
+
+    Inside a profiled shot the captured stderr is handed to profiling so its
+    ``-benchmark`` figures are still recorded.
+    """
+    with profiling.ffmpeg_call(cmd) as (cmd, stderr_sink):
+        future = submit(cmd, timeout=timeout, progress=progress, stdin=stdin, on_start=on_start)
+        try:
+            result = future.result()
+        except FFmpegError as exc:
+            if stderr_sink is not None:
+                stderr_sink.write((exc.stderr or "").encode("utf-8"))
+            raise
+        except BaseException:
+            future.cancel()
+            try:
+                future.result(timeout=_TERMINATE_GRACE_S + 1)
+            except BaseException:
+                pass
+            raise
+        if stderr_sink is not None:
+            stderr_sink.write(result.stderr.encode("utf-8"))
+        return result
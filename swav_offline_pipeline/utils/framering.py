@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import multiprocessing as mp
+import queue
+import subprocess
+import threading
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from . import ffmpeg, profiling, qc
+from .encoders import EncoderProfile
+from .video import rawvideo_cmd
+
+_END = -1
+_POLL_S = 1.0
+
+# Never fork: by the time a ring exists the parent runs the DAG pools, the
+# ffmpeg runner and maybe the status server, and a fork can inherit their
+# locks held. Consumers in other processes are spawned and attach by pickling.
+_CTX = mp.get_context("spawn")
+
+_DEFAULT_SLOTS = 0
+
+
+def configure(slots: int) -> None:
+    """Set the ring size used by the render path (0 keeps in-process encoding)."""
+    global _DEFAULT_SLOTS
+    _DEFAULT_SLOTS = max(int(slots), 0)
+
+
+def default_slots() -> int:
+    return _DEFAULT_SLOTS
+
+
+class FrameRing:
+    """Fixed pool of uint8 HWC frame slots in shared memory with per-slot reference counts.
+
+    The producer acquires a free slot, writes a frame straight into its view and
+    publishes it to every consumer. Consumers read the same shared buffer and
+    release it; the slot is recycled when the last consumer is done. Frames
+    reach each consumer in publish order.
+    """
+
+    def __init__(self, shape: Tuple[int, int, int], slots: int = 8, consumers: int = 1) -> None:
+        if slots < 1 or consumers < 1:
+            raise ValueError("FrameRing needs at least one slot and one consumer")
+        self.shape = tuple(shape)
+        self.slots = slots
+        self.consumers = consumers
+        self.frame_bytes = int(np.prod(self.shape))
+        self._shm = shared_memory.SharedMemory(create=True, size=self.frame_bytes * slots)
+        self._refs = _CTX.Array("i", slots)
+        self._free = _CTX.Queue()
+        self._ready = [_CTX.Queue() for _ in range(consumers)]
+        for slot in range(slots):
+            self._free.put(slot)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def view(self, slot: int) -> np.ndarray:
+        """Writable array over one slot; it must not outlive ``close()``."""
+        return np.ndarray(self.shape, dtype=np.uint8, buffer=self._shm.buf, offset=slot * self.frame_bytes)
+
+    # -- producer ------------------------------------------------------------
+    def acquire(self, timeout: Optional[float] = None) -> int:
+        """Block until a slot is free and return its index (``queue.Empty`` on timeout)."""
+        return self._free.get(timeout=timeout)
+
+    def publish(self, slot: int) -> None:
+        with self._refs.get_lock():
+            self._refs[slot] = self.consumers
+        for ready in self._ready:
+            ready.put(slot)
+
+    def end(self) -> None:
+        """Tell every consumer that no more frames follow."""
+        for ready in self._ready:
+            ready.put(_END)
+
+    # -- consumer ------------------------------------------------------------
+    def release(self, slot: int) -> None:
+        with self._refs.get_lock():
+            self._refs[slot] -= 1
+            recycled = self._refs[slot] == 0
+        if recycled:
+            self._free.put(slot)
+
+    def frames(self, consumer: int = 0) -> Iterator[np.ndarray]:
+        """Yield published frames in order; each view is released when the loop advances."""
+        while True:
+            slot = self._ready[consumer].get()
+            if slot == _END:
+                return
+            frame = self.view(slot)
+            try:
+                yield frame
+            finally:
+                del frame
+                self.release(slot)
+
+    def close(self, unlink: bool = True) -> None:
+        try:
+            self._shm.close()
+        except BufferError:
+            # A caller still holds a slot view; the mapping goes away with it.
+            pass
+        if unlink:
+            self._shm.unlink()
+
+
+class RingEncoder:
+    """Encode frames handed over through a ``FrameRing`` while the producer keeps rendering.
+
+    ffmpeg runs through the shared runner (``ffmpeg.run`` with the ring as its
+    stdin iterator) from a feeder thread, so it takes an ffmpeg slot, failures
+    raise ``FFmpegError`` with the stderr tail and a profiled shot records it.
+    The runner writes each shared slot into the pipe in place; the slot is
+    recycled once ffmpeg has it.
+
+    Usage::
+
+        with RingEncoder(out_path, width, height, fps) as enc:
+            for ...:
+                slot, buf = enc.acquire()
+                buf[...] = frame          # or convert/resize directly into buf
+                enc.submit(slot)
+    """
+
+    def __init__(
+        self,
+        out_path: Path,
+        width: int,
+        height: int,
+        fps: int,
+        profile: EncoderProfile | None = None,
+        slots: int | None = None,
+    ) -> None:
+        Path(out_path).parent.mkdir(parents=True, exist_ok=True)
+        self.cmd = rawvideo_cmd(width, height, fps, out_path, profile)
+        self.ring = FrameRing((height, width, 3), slots=slots or _DEFAULT_SLOTS or 8)
+        self._views = [self.ring.view(slot) for slot in range(self.ring.slots)]
+        self._thread = threading.Thread(target=self._encode, name="ring-encoder", daemon=True)
+        self._aborted = False
+        self._error: Optional[BaseException] = None
+        self.frames_submitted = 0
+        self._tap = qc.current()
+        self._session = profiling.current()
+
+    def _frames(self) -> Iterator[np.ndarray]:
+        yield from self.ring.frames(0)
+        if self._aborted:
+            # Fails the runner's stdin writer, which terminates ffmpeg instead of finishing a truncated file.
+            raise RuntimeError("frame producer failed; encode abandoned")
+
+    def _encode(self) -> None:
+        with profiling.bind(self._session):
+            try:
+                ffmpeg.run(self.cmd, stdin=self._frames())
+            except BaseException as exc:
+                self._error = exc
+
+    def __enter__(self) -> "RingEncoder":
+        self._thread.start()
+        return self
+
+    def acquire(self) -> Tuple[int, np.ndarray]:
+        while True:
+            try:
+                slot = self.ring.acquire(timeout=_POLL_S)
+                return slot, self._views[slot]
+            except queue.Empty:
+                if not self._thread.is_alive():
+                    raise self._error or subprocess.CalledProcessError(1, self.cmd)
+
+    def submit(self, slot: int) -> None:
+        if self._tap is not None:
+            self._tap.observe(self._views[slot])
+        self.ring.publish(slot)
+        self.frames_submitted += 1
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            self._aborted = exc_type is not None
+            self.ring.end()
+            self._thread.join()
+        finally:
+            self._views.clear()
+            self.ring.close()
+        if exc_type is None and self._error is not None:
+            raise self._error
@@ -0,0 +1,165 @@
+"""Conversion of pipeline frame output to contiguous (T, H, W, 3) uint8.
+
+Generators hand back torch tensors, NumPy float arrays in [0, 1] (channels
+first or last) or lists of PIL images depending on the pipeline and
+``output_type``. Everything here writes into a caller-supplied or single
+preallocated output and works a few frames at a time, so converting a clip
+never materialises full-clip float temporaries.
+"""
+from __future__ import annotations
+
+from typing import Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+DEFAULT_CHUNK = 8
+
+
+def _is_tensor(obj) -> bool:
+    return type(obj).__module__.split(".", 1)[0] == "torch"
+
+
+def _channels_first(shape: Tuple[int, ...]) -> bool:
+    return shape[1] in (1, 3, 4) and shape[-1] not in (1, 3, 4)
+
+
+def first_batch(frames):
+    """Strip the batch axis from ``pipe(...).frames`` (list of clips, 5D array or 5D tensor)."""
+    if isinstance(frames, (list, tuple)):
+        if frames and isinstance(frames[0], Image.Image):
+            return frames
+        return frames[0]
+    if getattr(frames, "ndim", 4) == 5:
+        return frames[0]
+    return frames
+
+
+def _alloc(out: np.ndarray | None, count: int, height: int, width: int) -> np.ndarray:
+    if out is None:
+        return np.empty((count, height, width, 3), dtype=np.uint8)
+    if out.shape != (count, height, width, 3) or out.dtype != np.uint8:
+        raise ValueError(f"out must be uint8 {(count, height, width, 3)}, got {out.dtype} {out.shape}")
+    return out
+
+
+def _from_pil(images: Sequence[Image.Image], out: np.ndarray | None) -> np.ndarray:
+    width, height = images[0].size
+    out = _alloc(out, len(images), height, width)
+    for idx, image in enumerate(images):
+        out[idx] = image if image.mode == "RGB" else image.convert("RGB")
+    return out
+
+
+def _from_array(frames: np.ndarray, out: np.ndarray | None, chunk: int) -> np.ndarray:
+    if frames.ndim != 4:
+        raise ValueError(f"Expected 4D frames, got shape {frames.shape}")
+    hwc = frames.transpose(0, 2, 3, 1) if _channels_first(frames.shape) else frames
+    if hwc.shape[-1] == 4:
+        hwc = hwc[..., :3]
+    elif hwc.shape[-1] != 3:
+        raise ValueError(f"Frames must have 3 or 4 channels, got shape {frames.shape}")
+    count, height, width, _ = hwc.shape
+
+    if hwc.dtype == np.uint8:
+        if out is None and hwc.flags.c_contiguous:
+            return hwc
+        out = _alloc(out, count, height, width)
+        np.copyto(out, hwc)
+        return out
+
+    out = _alloc(out, count, height, width)
+    scratch = np.empty((min(chunk, count), height, width, 3), dtype=np.float32)
+    for start in range(0, count, chunk):
+        part = hwc[start : start + chunk]
+        tmp = scratch[: part.shape[0]]
+        # Scale, clip and cast through one reused float scratch; the HWC transpose
+        # is absorbed by the strided read so no transposed copy is made.
+        np.multiply(part, 255.0, out=tmp)
+        np.clip(tmp, 0.0, 255.0, out=tmp)
+        np.copyto(out[start : start + chunk], tmp, casting="unsafe")
+    return out
+
+
+def _from_tensor(frames, out: np.ndarray | None, chunk: int) -> np.ndarray:
+    import torch
+
+    frames = frames.detach()
+    if frames.ndim != 4:
+        raise ValueError(f"Expected 4D frames, got shape {tuple(frames.shape)}")
+    if _channels_first(tuple(frames.shape)):
+        frames = frames.permute(0, 2, 3, 1)
+    frames = frames[..., :3]
+    count, height, width, _ = frames.shape
+    out = _alloc(out, count, height, width)
+    for start in range(0, count, chunk):
+        part = frames[start : start + chunk]
+        if part.is_floating_point():
+            # Quantise on the device so only uint8 crosses the bus (4x less than float32).
+            part = part.mul(255.0).clamp_(0.0, 255.0).to(torch.uint8)
+        out[start : start + part.shape[0]] = part.contiguous().cpu().numpy()
+    return out
+
+
+def to_uint8_hwc(frames, out: np.ndarray | None = None, chunk: int = DEFAULT_CHUNK) -> np.ndarray:
+    """Convert one clip of frames to contiguous uint8 (T, H, W, 3).
+
+    Accepts a torch tensor or NumPy array shaped (T, C, H, W) or (T, H, W, C),
+    float in [0, 1] or uint8, or a list of PIL images / per-frame arrays.
+    Floats are scaled by 255, clipped and truncated, matching
+    ``(x * 255).clip(0, 255).astype(uint8)``. Pass ``out`` to fill an existing
+    buffer (for example a shared-memory slot range).
+    """
+    if isinstance(frames, (list, tuple)):
+        if not frames:
+            raise ValueError("No frames to convert")
+        if isinstance(frames[0], Image.Image):
+            return _from_pil(frames, out)
+        first = to_uint8_hwc(frames[0][None], chunk=1)
+        out = _alloc(out, len(frames), first.shape[1], first.shape[2])
+        out[0] = first[0]
+        for idx in range(1, len(frames)):
+            to_uint8_hwc(frames[idx][None], out=out[idx : idx + 1], chunk=1)
+        return out
+    if _is_tensor(frames):
+        return _from_tensor(frames, out, chunk)
+    return _from_array(np.asarray(frames), out, chunk)
+
+
+def retime_indices(source_frames: int, target_frames: int) -> np.ndarray:
+    """Nearest-frame mapping used to stretch ``source_frames`` over ``target_frames``."""
+    return np.linspace(0, source_frames - 1, target_frames).round().astype(int)
+
+
+def resize_into(frame: np.ndarray, dst: np.ndarray) -> None:
+    """Write ``frame`` (uint8 HWC) into ``dst``, bicubic-resizing when the sizes differ."""
+    height, width = dst.shape[:2]
+    if frame.shape[:2] == (height, width):
+        np.copyto(dst, frame)
+    else:
+        dst[...] = Image.fromarray(frame).resize((width, height), Image.BICUBIC)
+
+
+def retime_resize(
+    frames: np.ndarray,
+    target_frames: int,
+    size: Tuple[int, int],
+    out: np.ndarray | None = None,
+) -> np.ndarray:
+    """Retime uint8 HWC frames to ``target_frames`` and resize to ``size`` (width, height).
+
+    Repeated source frames are resized once and copied. Returns ``frames``
+    untouched when neither the length nor the size changes.
+    """
+    width, height = size
+    if out is None and frames.shape[0] == target_frames and frames.shape[1:3] == (height, width):
+        return frames
+    out = _alloc(out, target_frames, height, width)
+    previous = -1
+    for dst_idx, src_idx in enumerate(retime_indices(frames.shape[0], target_frames)):
+        if src_idx == previous:
+            np.copyto(out[dst_idx], out[dst_idx - 1])
+        else:
+            resize_into(frames[src_idx], out[dst_idx])
+        previous = src_idx
+    return out
@@ -0,0 +1,140 @@
+"""Content-addressed store of raw SDXL stills and SVD frames, keyed by generation inputs only."""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from . import instrument
+
+# zlib level 1: most of the size win of PNG at a fraction of level 6's encode time.
+PNG_COMPRESS_LEVEL = 1
+
+_DEFAULT: Optional["FrameStore"] = None
+
+
+@dataclass
+class Entry:
+    key: str
+    path: Path
+    meta: Dict[str, Any]
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return tuple(self.meta["size"])
+
+    @property
+    def frames(self) -> int:
+        return int(self.meta.get("frames", 1))
+
+
+class FrameStore:
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def key(self, *inputs: Any) -> str:
+        """Key of a generation; pass every input that changes what the model produces, model fingerprint included."""
+        payload = json.dumps(inputs, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+    def _dir(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def lookup(self, key: str, size: Tuple[int, int] | None = None, frames: int = 1) -> Optional[Entry]:
+        """The entry for ``key`` if it holds at least ``frames`` frames of at least ``size``, else None."""
+        path = self._dir(key)
+        try:
+            meta = json.loads((path / "meta.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        entry = Entry(key, path, meta)
+        if entry.frames < frames:
+            return None
+        if size is not None and (entry.size[0] < size[0] or entry.size[1] < size[1]):
+            return None
+        return entry
+
+    def record(self, hit: bool, row_no: int | None = None, method: str | None = None) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        instrument.emit({"event": "frame_store", "row_no": row_no, "method": method, "hit": hit})
+
+    def load_still(self, entry: Entry) -> Image.Image:
+        with instrument.stage("frame_store", op="load", frames=1):
+            image = Image.open(entry.path / "000.png")
+            image.load()
+        return image
+
+    def load_frames(self, entry: Entry) -> np.ndarray:
+        """All stored frames as one uint8 (T, H, W, 3) array."""
+        count = entry.frames
+        width, height = entry.size
+        out = np.empty((count, height, width, 3), dtype=np.uint8)
+        with instrument.stage("frame_store", op="load", frames=count):
+
+            def read(idx: int) -> None:
+                with Image.open(entry.path / f"{idx:03d}.png") as image:
+                    out[idx] = np.asarray(image.convert("RGB"))
+
+            # PIL drops the GIL while inflating, so the frames decode in parallel.
+            with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as pool:
+                list(pool.map(read, range(count)))
+        return out
+
+    def put_still(self, key: str, image: Image.Image, **meta: Any) -> Entry:
+        return self._put(key, [image.convert("RGB")], image.size, **meta)
+
+    def put_frames(self, key: str, frames: np.ndarray, **meta: Any) -> Entry:
+        """Store uint8 (T, H, W, 3) frames."""
+        return self._put(key, [Image.fromarray(frame) for frame in frames], (frames.shape[2], frames.shape[1]), **meta)
+
+    def _put(self, key: str, images, size: Tuple[int, int], **meta: Any) -> Entry:
+        final = self._dir(key)
+        tmp = final.with_name(f"{key}.tmp-{os.getpid()}-{threading.get_ident()}")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        with instrument.stage("frame_store", op="store", frames=len(images), outputs=[tmp]):
+            with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as pool:
+                list(
+                    pool.map(
+                        lambda item: item[1].save(tmp / f"{item[0]:03d}.png", compress_level=PNG_COMPRESS_LEVEL),
+                        enumerate(images),
+                    )
+                )
+            meta = {**meta, "size": list(size), "frames": len(images), "created": time.time()}
+            (tmp / "meta.json").write_text(json.dumps(meta, indent=2, default=str), encoding="utf-8")
+            # Replacing a smaller entry: drop it first, since a directory rename cannot overwrite.
+            shutil.rmtree(final, ignore_errors=True)
+            try:
+                tmp.rename(final)
+            except OSError:
+                # Another worker stored the same generation first; keep theirs.
+                shutil.rmtree(tmp, ignore_errors=True)
+        return Entry(key, final, meta)
+
+
+def configure(root: Path | str | None) -> Optional[FrameStore]:
+    """Set the store used by the render path (None disables it)."""
+    global _DEFAULT
+    _DEFAULT = FrameStore(Path(root)) if root else None
+    return _DEFAULT
+
+
+def default() -> Optional[FrameStore]:
+    return _DEFAULT
@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import functools
+import json
+import os
+import resource
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+_SAMPLE_INTERVAL = 0.05
+
+_EVENTS_PATH: Optional[Path] = None
+_RUN_ID: str = ""
+_LOCK = threading.Lock()
+_LOCAL = threading.local()
+_LISTENERS: List[Callable[[str, "StageRecord"], None]] = []
+
+
+@dataclass(eq=False)
+class StageRecord:
+    stage: str
+    run_id: str = ""
+    row_no: Optional[int] = None
+    method: Optional[str] = None
+    parent: Optional[str] = None
+    ts_start: float = 0.0
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    child_cpu_s: float = 0.0
+    peak_rss_mb: float = 0.0
+    peak_device_mb: Optional[float] = None
+    peak_shared: bool = False  # another thread's stage overlapped: peaks are the process's over this window
+    bytes_written: int = 0
+    ok: bool = True
+    error: Optional[str] = None
+    tags: Dict[str, Any] = field(default_factory=dict)
+
+
+def configure(events_path: Path | str, run_id: str | None = None) -> str:
+    """Start recording stage events as JSONL at ``events_path`` (appending)."""
+    global _EVENTS_PATH, _RUN_ID
+    _EVENTS_PATH = Path(events_path)
+    _EVENTS_PATH.parent.mkdir(parents=True, exist_ok=True)
+    _RUN_ID = run_id or time.strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+    return _RUN_ID
+
+
+def add_listener(listener: Callable[[str, StageRecord], None]) -> None:
+    """Call ``listener("start"|"end", record)`` around every stage (e.g. live progress)."""
+    if listener not in _LISTENERS:
+        _LISTENERS.append(listener)
+
+
+def remove_listener(listener: Callable[[str, StageRecord], None]) -> None:
+    if listener in _LISTENERS:
+        _LISTENERS.remove(listener)
+
+
+def _notify(phase: str, record: StageRecord) -> None:
+    for listener in list(_LISTENERS):
+        try:
+            listener(phase, record)
+        except Exception:  # listeners must never break a render
+            pass
+
+
+def enabled() -> bool:
+    return _EVENTS_PATH is not None
+
+
+def events_path() -> Optional[Path]:
+    return _EVENTS_PATH
+
+
+def emit(event: Dict[str, Any]) -> None:
+    """Append a raw event to the run's JSONL log."""
+    if _EVENTS_PATH is None:
+        return
+    event.setdefault("run_id", _RUN_ID)
+    event.setdefault("ts", time.time())
+    line = json.dumps(event, ensure_ascii=False, default=str)
+    with _LOCK:
+        with _EVENTS_PATH.open("a", encoding="utf-8") as fh:
+            fh.write(line + "\n")
+
+
+def _current_rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm", "rb") as fh:
+            return int(fh.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        # ru_maxrss is in KiB on Linux; it is a lifetime peak but better than nothing.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _children_cpu() -> float:
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _cuda():
+    torch = sys.modules.get("torch")
+    if torch is None:
+        return None
+    try:
+        return torch.cuda if torch.cuda.is_available() and torch.cuda.is_initialized() else None
+    except Exception:  # pragma: no cover - defensive against odd builds
+        return None
+
+
+class _PeakSampler:
+    """Single background thread that raises ``peak_rss`` and ``peak_device`` on every active stage.
+
+    RSS and device memory belong to the process, not to a stage. While stages
+    of one thread are the only ones open, device peaks come from CUDA's exact
+    peak counter, reset as each stage starts; once another thread's stage
+    overlaps, no stage may reset that device-wide counter, so every stage open
+    at that point is marked ``peak_shared`` and keeps the sampled peak of the
+    whole process over its window instead.
+    """
+
+    def __init__(self) -> None:
+        self._active: List[Tuple[StageRecord, int]] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, record: StageRecord, cuda) -> None:
+        me = threading.get_ident()
+        with self._lock:
+            if any(thread != me for _, thread in self._active):
+                record.peak_shared = True
+                for other, _ in self._active:
+                    other.peak_shared = True
+            elif cuda is not None:
+                # Fold the peak so far into the enclosing stages before the counter restarts for this one.
+                peak_mb = cuda.max_memory_allocated() / 1e6
+                for other, _ in self._active:
+                    other.peak_device_mb = max(other.peak_device_mb or 0.0, peak_mb)
+                cuda.reset_peak_memory_stats()
+            self._active.append((record, me))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="instrument-peaks", daemon=True)
+                self._thread.start()
+        self._bump()
+
+    def remove(self, record: StageRecord, cuda) -> None:
+        self._bump()
+        with self._lock:
+            self._active = [(other, thread) for other, thread in self._active if other is not record]
+            if cuda is not None and not record.peak_shared:
+                record.peak_device_mb = max(record.peak_device_mb or 0.0, cuda.max_memory_allocated() / 1e6)
+
+    def _bump(self) -> None:
+        rss_mb = _current_rss_bytes() / 1e6
+        cuda = _cuda()
+        device_mb = cuda.memory_allocated() / 1e6 if cuda is not None else None
+        with self._lock:
+            for record, _ in self._active:
+                if rss_mb > record.peak_rss_mb:
+                    record.peak_rss_mb = rss_mb
+                if device_mb is not None:
+                    record.peak_device_mb = max(record.peak_device_mb or 0.0, device_mb)
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                if not self._active:
+                    self._thread = None
+                    return
+            self._bump()
+            time.sleep(_SAMPLE_INTERVAL)
+
+
+_SAMPLER = _PeakSampler()
+
+
+def _stack() -> List[StageRecord]:
+    stack = getattr(_LOCAL, "stack", None)
+    if stack is None:
+        stack = _LOCAL.stack = []
+    return stack
+
+
+def _path_size(path: Path | str) -> int:
+    try:
+        return Path(path).stat().st_size
+    except OSError:
+        return 0
+
+
+@contextmanager
+def stage(
+    name: str,
+    row_no: int | None = None,
+    method: str | None = None,
+    outputs: Sequence[Path | str] = (),
+    **tags: Any,
+) -> Iterator[StageRecord]:
+    """Measure wall/CPU time, peak RSS, peak device memory and bytes written for a block.
+
+    Stages nest: row/method are inherited from the enclosing stage and memory
+    peaks of children are folded into their parent. Memory peaks are exact per
+    stage only while no other thread has a stage open; see ``_PeakSampler``.
+    Nothing is recorded unless ``configure`` has been called or a listener is
+    registered.
+    """
+    stack = _stack()
+    parent = stack[-1] if stack else None
+    record = StageRecord(
+        stage=name,
+        run_id=_RUN_ID,
+        row_no=row_no if row_no is not None else (parent.row_no if parent else None),
+        method=method or (parent.method if parent else None),
+        parent=parent.stage if parent else None,
+        tags=dict(tags),
+    )
+    if _EVENTS_PATH is None and not _LISTENERS:
+        yield record
+        return
+
+    cuda = _cuda()
+    stack.append(record)
+    _SAMPLER.add(record, cuda)
+    record.ts_start = time.time()
+    _notify("start", record)
+    wall0 = time.perf_counter()
+    cpu0 = time.process_time()
+    child0 = _children_cpu()
+    try:
+        yield record
+    except BaseException as exc:
+        record.ok = False
+        record.error = f"{type(exc).__name__}: {exc}"
+        raise
+    finally:
+        record.wall_s = time.perf_counter() - wall0
+        record.cpu_s = time.process_time() - cpu0
+        record.child_cpu_s = _children_cpu() - child0
+        _SAMPLER.remove(record, cuda or _cuda())
+        stack.pop()
+        if parent is not None:
+            parent.peak_rss_mb = max(parent.peak_rss_mb, record.peak_rss_mb)
+            if record.peak_device_mb is not None:
+                parent.peak_device_mb = max(parent.peak_device_mb or 0.0, record.peak_device_mb)
+        record.bytes_written += sum(_path_size(p) for p in outputs)
+        emit({"event": "stage", **asdict(record)})
+        _notify("end", record)
+
+
+def wrap_method(obj: Any, attr: str, stage_name: str) -> None:
+    """Instrument ``obj.attr`` in place so every call is recorded as ``stage_name``."""
+    original: Callable = getattr(obj, attr)
+    if getattr(original, "_instrumented", False):
+        return
+
+    @functools.wraps(original)
+    def wrapper(*args, **kwargs):
+        with stage(stage_name):
+            return original(*args, **kwargs)
+
+    wrapper._instrumented = True  # type: ignore[attr-defined]
+    setattr(obj, attr, wrapper)
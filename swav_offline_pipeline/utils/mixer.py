@@ -0,0 +1,324 @@
+"""In-process streaming voiceover/music mixer: BS.1770 loudness, sidechain ducking and a true-peak limiter."""
+from __future__ import annotations
+
+import math
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+import soundfile as sf
+from scipy.signal import resample_poly, sosfilt
+
+from . import storage
+
+SAMPLE_RATE = 48000
+CHANNELS = 2
+BLOCK_S = 10.0
+RESAMPLE_PAD = 64  # input samples of context per side, times the decimation factor
+
+TARGET_LUFS = -16.0
+TRUE_PEAK_DB = -1.5
+OVERSAMPLE = 4
+
+MUSIC_GAIN = 0.35
+DUCK_THRESHOLD_DB = -28.0
+DUCK_RATIO = 6.0
+DUCK_HOP_S = 0.01
+DUCK_ATTACK_DB_S = 200.0
+DUCK_RELEASE_DB_S = 30.0
+
+LIMITER_HOP_S = 0.001
+LIMITER_ATTACK_DB_S = 2000.0
+LIMITER_RELEASE_DB_S = 60.0
+LIMITER_ITERATIONS = 4
+
+_ABSOLUTE_GATE = -70.0
+_RELATIVE_GATE = -10.0
+
+
+@dataclass
+class MixReport:
+    vo_lufs: float
+    mix_lufs: float
+    gain_db: float
+    output_lufs: float
+    output_peak_db: float
+    max_limit_db: float
+    duration_s: float
+
+    def as_dict(self) -> Dict[str, float]:
+        return {key: round(value, 3) for key, value in asdict(self).items()}
+
+
+def _k_weighting(sample_rate: int) -> np.ndarray:
+    """BS.1770 K-weighting (high shelf + RLB high-pass) as second-order sections for ``sample_rate``."""
+    # Pre-filter: +4 dB high shelf.
+    k = math.tan(math.pi * 1681.974450955533 / sample_rate)
+    q = 0.7071752369554196
+    vh = 10 ** (3.999843853973347 / 20)
+    vb = vh**0.4996667741545416
+    a0 = 1 + k / q + k * k
+    shelf = [
+        (vh + vb * k / q + k * k) / a0,
+        2 * (k * k - vh) / a0,
+        (vh - vb * k / q + k * k) / a0,
+        1.0,
+        2 * (k * k - 1) / a0,
+        (1 - k / q + k * k) / a0,
+    ]
+    # RLB weighting: second-order high-pass at ~38 Hz.
+    k = math.tan(math.pi * 38.13547087602444 / sample_rate)
+    q = 0.5003270373238773
+    a0 = 1 + k / q + k * k
+    highpass = [1.0, -2.0, 1.0, 1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0]
+    return np.array([shelf, highpass])
+
+
+class LoudnessMeter:
+    """Streaming BS.1770 integrated loudness for (n, channels) float blocks."""
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE, channels: int = CHANNELS):
+        self.sos = _k_weighting(sample_rate)
+        self.zi = np.zeros((self.sos.shape[0], 2, channels))
+        self.step = int(round(0.1 * sample_rate))  # 100 ms sub-blocks; gating blocks are 4 of them
+        self.pending = np.zeros(0)
+        self.powers: List[np.ndarray] = []
+
+    def add(self, block: np.ndarray) -> np.ndarray:
+        """Meter ``block`` and return its per-sample K-weighted power (summed over channels)."""
+        weighted, self.zi = sosfilt(self.sos, block, axis=0, zi=self.zi)
+        sample_power = np.square(weighted).sum(axis=1)
+        power = np.concatenate([self.pending, sample_power])
+        whole = len(power) // self.step * self.step
+        if whole:
+            self.powers.append(power[:whole].reshape(-1, self.step).mean(axis=1))
+        self.pending = power[whole:]
+        return sample_power
+
+    def subblocks(self) -> np.ndarray:
+        """Mean K-weighted power of each complete 100 ms sub-block so far."""
+        return np.concatenate(self.powers) if self.powers else np.zeros(0)
+
+    def integrated(self) -> float:
+        return gated_loudness(self.subblocks())
+
+
+def gated_loudness(sub: np.ndarray) -> float:
+    """BS.1770 gated integrated loudness from 100 ms sub-block powers."""
+    if len(sub) < 4:
+        return float("-inf")
+    blocks = np.lib.stride_tricks.sliding_window_view(sub, 4).mean(axis=1)
+    with np.errstate(divide="ignore"):
+        loudness = -0.691 + 10 * np.log10(blocks)
+    gated = blocks[loudness > _ABSOLUTE_GATE]
+    if not len(gated):
+        return float("-inf")
+    relative = -0.691 + 10 * np.log10(gated.mean()) + _RELATIVE_GATE
+    gated = blocks[(loudness > _ABSOLUTE_GATE) & (loudness > relative)]
+    return float(-0.691 + 10 * np.log10(gated.mean()))
+
+
+def integrated_loudness(path: Path | str, block_s: float = BLOCK_S) -> float:
+    """Integrated loudness of a WAV file in LUFS."""
+    with sf.SoundFile(str(path)) as fh:
+        meter = LoudnessMeter(fh.samplerate, fh.channels)
+        for block in fh.blocks(blocksize=int(block_s * fh.samplerate), dtype="float32", always_2d=True):
+            meter.add(block)
+    return meter.integrated()
+
+
+def _as_channels(block: np.ndarray, channels: int) -> np.ndarray:
+    if block.shape[1] == channels:
+        return block
+    return np.repeat(block[:, :1], channels, axis=1)
+
+
+def _blocks(path: Path | str, sample_rate: int, block: int, channels: int) -> Iterator[np.ndarray]:
+    """Yield float32 (n, channels) blocks of ``path`` at ``sample_rate``.
+
+    Resampling is block-wise with enough input context on each side that the
+    output matches resampling the whole file with ``resample_poly``.
+    """
+    with sf.SoundFile(str(path)) as fh:
+        src = fh.samplerate
+        if src == sample_rate:
+            for chunk in fh.blocks(blocksize=block, dtype="float32", always_2d=True):
+                yield _as_channels(chunk, channels)
+            return
+        g = math.gcd(src, sample_rate)
+        up, down = sample_rate // g, src // g
+        in_block = max(block // up, 1) * down
+        pad = RESAMPLE_PAD * down
+        total = fh.frames
+        for start in range(0, total, in_block):
+            lo, stop = max(start - pad, 0), min(start + in_block, total)
+            fh.seek(lo)
+            chunk = fh.read(min(stop + pad, total) - lo, dtype="float32", always_2d=True)
+            out = resample_poly(chunk, up, down, axis=0)
+            skip = (start - lo) * up // down
+            count = -(-(stop - start) * up // down)
+            yield _as_channels(out[skip : skip + count].astype(np.float32), channels)
+
+
+def _ramps(gain_db: np.ndarray, attack_db: float, release_db: float) -> np.ndarray:
+    """Limit how fast a gain-reduction curve (dB, <= 0) may fall and recover.
+
+    Falls are spread backwards from each dip (look-ahead), so the gain is
+    already down when the dip arrives; recoveries are spread forwards. Both are
+    ``g[n] = min(g[n], g[n -/+ 1] + rate)``, i.e. a running minimum of
+    ``g - n * rate``.
+    """
+    ramp = np.arange(len(gain_db), dtype=np.float64)
+    backward = gain_db[::-1] - ramp * attack_db
+    gain = (np.minimum.accumulate(backward) + ramp * attack_db)[::-1]
+    return np.minimum.accumulate(gain - ramp * release_db) + ramp * release_db
+
+
+def _sample_gain(curve_db: np.ndarray, hop: int, start: int, count: int) -> np.ndarray:
+    """Linear gain for samples [start, start + count) from a per-hop dB curve, never above any hop it spans."""
+    edges = np.empty(len(curve_db) + 1)
+    edges[0], edges[-1] = curve_db[0], curve_db[-1]
+    edges[1:-1] = np.minimum(curve_db[:-1], curve_db[1:])
+    positions = np.arange(start, start + count, dtype=np.float64)
+    return np.power(10.0, np.interp(positions, np.arange(len(edges)) * hop, edges) / 20).astype(np.float32)
+
+
+def _true_peaks(block: np.ndarray) -> np.ndarray:
+    """Per-sample true peak (max over channels of the 4x-oversampled magnitude)."""
+    over = np.abs(resample_poly(block, OVERSAMPLE, 1, axis=0)).reshape(len(block), OVERSAMPLE, -1)
+    return np.maximum(over.max(axis=(1, 2)), np.abs(block).max(axis=1))
+
+
+def _hop_reduce(values: np.ndarray, pending: np.ndarray, hop: int, reduce) -> Tuple[np.ndarray, np.ndarray]:
+    values = np.concatenate([pending, values])
+    whole = len(values) // hop * hop
+    return reduce(values[:whole].reshape(-1, hop), axis=1), values[whole:]
+
+
+def _aligned(vo: np.ndarray, music_wav: Path | str, sample_rate: int, block: int) -> Iterator[Tuple[int, np.ndarray, np.ndarray]]:
+    """Yield ``(start, vo, music)`` blocks of equal length covering the longer of the two inputs."""
+    start = 0
+    for music in _blocks(music_wav, sample_rate, block, CHANNELS):
+        count = len(music)
+        voice = np.zeros(count, dtype=np.float32)
+        avail = max(min(count, len(vo) - start), 0)
+        voice[:avail] = vo[start : start + avail]
+        yield start, voice, music
+        start += count
+    while start < len(vo):
+        count = min(block, len(vo) - start)
+        yield start, np.asarray(vo[start : start + count]), np.zeros((count, CHANNELS), dtype=np.float32)
+        start += count
+
+
+def mix(
+    vo_wav: Path | str,
+    music_wav: Path | str,
+    out_wav: Path | str,
+    sample_rate: int = SAMPLE_RATE,
+    target_lufs: float = TARGET_LUFS,
+    true_peak_db: float = TRUE_PEAK_DB,
+    block_s: float = BLOCK_S,
+) -> MixReport:
+    """Mix ``vo_wav`` over ducked ``music_wav`` into a loudness-normalised, true-peak-limited 24-bit WAV."""
+    out_wav = Path(out_wav)
+    out_wav.parent.mkdir(parents=True, exist_ok=True)
+    block = int(block_s * sample_rate)
+    duck_hop = int(DUCK_HOP_S * sample_rate)
+    limit_hop = int(LIMITER_HOP_S * sample_rate)
+
+    # Pass 1: voiceover at the mix rate into a memory map, with loudness and RMS envelope.
+    with sf.SoundFile(str(vo_wav)) as fh:
+        vo_frames = -(-fh.frames * sample_rate // fh.samplerate)
+    scratch = storage.scratch_file(".vo.npy", vo_frames * 4)
+    vo = np.lib.format.open_memmap(scratch, mode="w+", dtype=np.float32, shape=(max(vo_frames, 1),))
+    try:
+        vo_meter = LoudnessMeter(sample_rate, CHANNELS)
+        energy, pending, cursor = [], np.zeros(0, dtype=np.float32), 0
+        for chunk in _blocks(vo_wav, sample_rate, block, 1):
+            chunk = chunk[: len(vo) - cursor, 0]
+            vo[cursor : cursor + len(chunk)] = chunk
+            cursor += len(chunk)
+            vo_meter.add(np.repeat(chunk[:, None], CHANNELS, axis=1))
+            means, pending = _hop_reduce(np.square(chunk), pending, duck_hop, np.mean)
+            energy.append(means)
+        if len(pending):
+            energy.append(np.array([pending.mean()]))
+        vo_lufs = vo_meter.integrated()
+        vo_gain_db = target_lufs - vo_lufs if np.isfinite(vo_lufs) else 0.0
+        vo_gain = np.float32(10 ** (vo_gain_db / 20))
+
+        # Duck curve: RMS level of the normalised voiceover through a downward compressor.
+        with np.errstate(divide="ignore"):
+            level = 10 * np.log10(np.concatenate(energy) if energy else np.zeros(1)) + vo_gain_db
+        reduction = -np.maximum(level - DUCK_THRESHOLD_DB, 0.0) * (1 - 1 / DUCK_RATIO)
+        duck_db = _ramps(reduction, DUCK_ATTACK_DB_S * DUCK_HOP_S, DUCK_RELEASE_DB_S * DUCK_HOP_S)
+
+        def render(start: int, voice: np.ndarray, music: np.ndarray) -> np.ndarray:
+            duck = _sample_gain(duck_db, duck_hop, start, len(voice)) * np.float32(MUSIC_GAIN)
+            return music * duck[:, None] + (voice * vo_gain)[:, None]
+
+        # Pass 2: mix loudness, plus K-weighted power and true peak per limiter hop.
+        mix_meter = LoudnessMeter(sample_rate, CHANNELS)
+        peaks, powers = [], []
+        pending_peaks, pending_power = np.zeros(0), np.zeros(0)
+        for start, voice, music in _aligned(vo, music_wav, sample_rate, block):
+            mixed = render(start, voice, music)
+            hop_power, pending_power = _hop_reduce(mix_meter.add(mixed), pending_power, limit_hop, np.mean)
+            hop_peaks, pending_peaks = _hop_reduce(_true_peaks(mixed), pending_peaks, limit_hop, np.max)
+            powers.append(hop_power)
+            peaks.append(hop_peaks)
+        if len(pending_peaks):
+            peaks.append(np.array([pending_peaks.max()]))
+        mix_lufs = mix_meter.integrated()
+        gain_db = target_lufs - mix_lufs if np.isfinite(mix_lufs) else 0.0
+        with np.errstate(divide="ignore"):
+            peak_db = 20 * np.log10(np.concatenate(peaks))
+
+        # Limiting costs loudness, most of it where the programme is loudest. Re-estimate the
+        # limited loudness from the per-hop power and raise the gain until it meets the target.
+        power = np.concatenate(powers) if powers else np.zeros(0)
+        per_sub = mix_meter.step // limit_hop
+        usable = len(power) // per_sub * per_sub
+        for iteration in range(LIMITER_ITERATIONS + 1):
+            limit_db = _ramps(
+                np.minimum(true_peak_db - (peak_db + gain_db), 0.0),
+                LIMITER_ATTACK_DB_S * LIMITER_HOP_S,
+                LIMITER_RELEASE_DB_S * LIMITER_HOP_S,
+            )
+            if iteration == LIMITER_ITERATIONS or not usable or not np.isfinite(mix_lufs):
+                break
+            limited = power[:usable] * np.power(10.0, limit_db[:usable] / 10)
+            estimate = gated_loudness(limited.reshape(-1, per_sub).mean(axis=1)) + gain_db
+            if abs(target_lufs - estimate) < 0.05:
+                break
+            gain_db += target_lufs - estimate
+        curve_db = limit_db + gain_db
+
+        # Pass 3: render with loudness gain and limiter, write 24-bit PCM.
+        ceiling = np.float32(10 ** (true_peak_db / 20))
+        out_meter = LoudnessMeter(sample_rate, CHANNELS)
+        out_peak, total = 0.0, 0
+        with sf.SoundFile(str(out_wav), "w", samplerate=sample_rate, channels=CHANNELS, subtype="PCM_24") as out:
+            for start, voice, music in _aligned(vo, music_wav, sample_rate, block):
+                mixed = render(start, voice, music)
+                mixed *= _sample_gain(curve_db, limit_hop, start, len(mixed))[:, None]
+                np.clip(mixed, -ceiling, ceiling, out=mixed)
+                out.write(mixed)
+                out_meter.add(mixed)
+                out_peak = max(out_peak, float(np.abs(mixed).max(initial=0.0)))
+                total += len(mixed)
+    finally:
+        del vo
+        scratch.unlink(missing_ok=True)
+
+    return MixReport(
+        vo_lufs=vo_lufs,
+        mix_lufs=mix_lufs,
+        gain_db=gain_db,
+        output_lufs=out_meter.integrated(),
+        output_peak_db=20 * math.log10(out_peak) if out_peak > 0 else float("-inf"),
+        max_limit_db=float(-limit_db.min()) if len(limit_db) else 0.0,
+        duration_s=total / sample_rate,
+    )
@@ -1,15 +1,22 @@
 from __future__ import annotations
 
+import gc
+import hashlib
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Iterator, Optional
 
-import torch
-from diffusers import StableDiffusionXLPipeline, StableVideoDiffusionPipeline
+from . import backends, instrument
+
+if TYPE_CHECKING:
+    from diffusers import StableDiffusionXLPipeline, StableVideoDiffusionPipeline
 
 MODEL_ROOT = Path(__file__).resolve().parents[1] / "models"
 
 _SDXL_PIPE: Optional[StableDiffusionXLPipeline] = None
 _SVD_PIPE: Optional[StableVideoDiffusionPipeline] = None
+_SCHEDULERS: dict = {}  # (id(pipe), scheduler, karras) -> scheduler instance
+_FINGERPRINTS: dict = {}  # (model names, device, runtime, dtype) -> generation_fingerprint
 
 
 def _resolve_model_dir(name: str) -> Path:
@@ -19,31 +26,205 @@ def _resolve_model_dir(name: str) -> Path:
     return path
 
 
+def _place(pipe, backend: backends.Backend) -> None:
+    if backend.offload:
+        pipe.enable_model_cpu_offload()
+    else:
+        pipe.to(backend.device)
+
+
+def _load_exported_sdxl(backend: backends.Backend):
+    """SDXL as an OpenVINO or ONNX Runtime pipeline, exported from the diffusers weights on first use."""
+    source = _resolve_model_dir("sdxl-base")
+    export_dir = MODEL_ROOT / f"sdxl-base-{backend.runtime}"
+    exported = export_dir.exists()
+    if backend.runtime == "openvino":
+        from optimum.intel import OVStableDiffusionXLPipeline
+
+        ov_config = {"INFERENCE_NUM_THREADS": str(backend.threads)} if backend.threads else None
+        pipe = OVStableDiffusionXLPipeline.from_pretrained(
+            export_dir if exported else source, export=not exported, compile=False, ov_config=ov_config
+        )
+    elif backend.runtime == "onnx":
+        import onnxruntime as ort
+        from optimum.onnxruntime import ORTStableDiffusionXLPipeline
+
+        options = ort.SessionOptions()
+        if backend.threads:
+            options.intra_op_num_threads = backend.threads
+        pipe = ORTStableDiffusionXLPipeline.from_pretrained(
+            export_dir if exported else source,
+            export=not exported,
+            provider="CPUExecutionProvider",
+            session_options=options,
+        )
+    else:
+        raise ValueError(f"Unknown runtime '{backend.runtime}'")
+    if not exported:
+        pipe.save_pretrained(export_dir)
+    if backend.runtime == "openvino":
+        pipe.compile()
+    return pipe
+
+
 def get_t2i() -> StableDiffusionXLPipeline:
-    """Load SDXL pipeline once and enable CPU offload for memory efficiency."""
+    """Load SDXL once on the configured backend (``utils.backends``; default fp16 with CPU offload).
+
+    On torch backends the two text encoders are left out: prompts arrive as
+    cached embeddings (``utils.prompt_cache``), and ``sdxl_text_encoders``
+    attaches the encoders only while a batch of new prompts is encoded.
+    Exported OpenVINO/ONNX pipelines keep their own encoders.
+    """
     global _SDXL_PIPE
     if _SDXL_PIPE is None:
-        model_dir = _resolve_model_dir("sdxl-base")
-        _SDXL_PIPE = StableDiffusionXLPipeline.from_pretrained(
-            model_dir,
-            torch_dtype=torch.float16,
-            variant="fp16",
-            use_safetensors=True,
-            local_files_only=True,
-        )
-        _SDXL_PIPE.enable_model_cpu_offload()
+        backend = backends.current()
+        with instrument.stage("model_load", model="sdxl", backend=backend.name):
+            if backend.runtime != "torch":
+                _SDXL_PIPE = _load_exported_sdxl(backend)
+            else:
+                from diffusers import StableDiffusionXLPipeline
+
+                _SDXL_PIPE = StableDiffusionXLPipeline.from_pretrained(
+                    _resolve_model_dir("sdxl-base"),
+                    torch_dtype=backend.torch_dtype(),
+                    variant="fp16",
+                    use_safetensors=True,
+                    local_files_only=True,
+                    text_encoder=None,
+                    text_encoder_2=None,
+                )
+                _place(_SDXL_PIPE, backend)
+        if hasattr(_SDXL_PIPE, "vae"):
+            instrument.wrap_method(_SDXL_PIPE.vae, "decode", "vae_decode")
     return _SDXL_PIPE
 
 
 def get_img2vid() -> StableVideoDiffusionPipeline:
-    """Load Stable Video Diffusion img2vid XT pipeline with CPU offload."""
+    """Load Stable Video Diffusion img2vid XT once on the configured backend (always torch)."""
     global _SVD_PIPE
     if _SVD_PIPE is None:
+        from diffusers import StableVideoDiffusionPipeline
+
+        backend = backends.current()
         model_dir = _resolve_model_dir("svd-img2vid")
-        _SVD_PIPE = StableVideoDiffusionPipeline.from_pretrained(
-            model_dir,
-            torch_dtype=torch.float16,
-            local_files_only=True,
-        )
-        _SVD_PIPE.enable_model_cpu_offload()
+        with instrument.stage("model_load", model="svd", backend=backend.name):
+            _SVD_PIPE = StableVideoDiffusionPipeline.from_pretrained(
+                model_dir,
+                torch_dtype=backend.torch_dtype(),
+                local_files_only=True,
+            )
+            _place(_SVD_PIPE, backend)
+        instrument.wrap_method(_SVD_PIPE.vae, "decode", "vae_decode")
     return _SVD_PIPE
+
+
+def generator(seed: int | None):
+    """Seeded torch generator for a pipeline call, or None to leave sampling unseeded."""
+    if seed is None:
+        return None
+    import torch
+
+    return torch.Generator("cpu").manual_seed(int(seed))
+
+
+@contextmanager
+def sdxl_text_encoders(pipe: StableDiffusionXLPipeline) -> Iterator[StableDiffusionXLPipeline]:
+    """Attach SDXL's text encoders to ``pipe`` on its execution device for the block, then free them."""
+    if getattr(pipe, "text_encoder_2", None) is not None:
+        # Exported pipelines load their encoders with the rest of the graph.
+        yield pipe
+        return
+    import torch
+    from transformers import CLIPTextModel, CLIPTextModelWithProjection
+
+    model_dir = _resolve_model_dir("sdxl-base")
+    device = pipe._execution_device
+    with instrument.stage("model_load", model="sdxl_text_encoders"):
+        dtype = backends.current().torch_dtype()
+        options = dict(torch_dtype=dtype, variant="fp16", use_safetensors=True, local_files_only=True)
+        encoder = CLIPTextModel.from_pretrained(model_dir, subfolder="text_encoder", **options).to(device)
+        encoder_2 = CLIPTextModelWithProjection.from_pretrained(model_dir, subfolder="text_encoder_2", **options).to(device)
+    pipe.text_encoder, pipe.text_encoder_2 = encoder, encoder_2
+    try:
+        yield pipe
+    finally:
+        pipe.text_encoder = pipe.text_encoder_2 = None
+        del encoder, encoder_2
+        gc.collect()
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+
+def _hash_weights(digest, model_dir: Path, paths) -> None:
+    for path in paths:
+        stat = path.stat()
+        digest.update(f"{path.relative_to(model_dir)}:{stat.st_size}:{int(stat.st_mtime)}".encode("utf-8"))
+        if path.suffix in (".json", ".txt"):
+            digest.update(path.read_bytes())
+
+
+def sdxl_fingerprint() -> str:
+    """Identity of the SDXL text-conditioning weights: encoder/tokenizer configs plus weight sizes and mtimes."""
+    model_dir = _resolve_model_dir("sdxl-base")
+    digest = hashlib.sha256()
+    for sub in ("text_encoder", "text_encoder_2", "tokenizer", "tokenizer_2"):
+        _hash_weights(digest, model_dir, sorted((model_dir / sub).glob("*")))
+    return digest.hexdigest()[:16]
+
+
+def generation_fingerprint(*names: str) -> str:
+    """Identity of what the models ``names`` generate here: weights plus the backend's device, runtime and dtype."""
+    backend = backends.current()
+    key = (names, backend.device, backend.runtime, backend.dtype_name)
+    if key not in _FINGERPRINTS:
+        digest = hashlib.sha256("\x1f".join(key[1:]).encode("utf-8"))
+        for name in names:
+            model_dir = _resolve_model_dir(name)
+            digest.update(name.encode("utf-8"))
+            _hash_weights(digest, model_dir, sorted(path for path in model_dir.rglob("*") if path.is_file()))
+        _FINGERPRINTS[key] = digest.hexdigest()[:16]
+    return _FINGERPRINTS[key]
+
+
+def as_tensor(array, device=None):
+    """Pipeline input from a cached NumPy array (moved to ``device`` when given)."""
+    import torch
+
+    tensor = torch.from_numpy(array)
+    return tensor if device is None else tensor.to(device)
+
+
+def set_sdxl_scheduler(pipe: StableDiffusionXLPipeline, name: str, karras: bool = False) -> None:
+    """Switch ``pipe`` to a scheduler from ``samplers.SCHEDULERS``, built from the model's own scheduler config."""
+    from diffusers import (
+        DDIMScheduler,
+        DPMSolverMultistepScheduler,
+        EulerAncestralDiscreteScheduler,
+        EulerDiscreteScheduler,
+        UniPCMultistepScheduler,
+    )
+
+    shipped = _SCHEDULERS.setdefault((id(pipe), "default", False), pipe.scheduler)
+    key = (id(pipe), name, karras if name != "default" else False)
+    if key not in _SCHEDULERS:
+        config = shipped.config
+        if name == "dpmpp_2m":
+            scheduler = DPMSolverMultistepScheduler.from_config(
+                config, algorithm_type="dpmsolver++", solver_order=2, use_karras_sigmas=karras
+            )
+        elif name == "dpmpp_2m_sde":
+            scheduler = DPMSolverMultistepScheduler.from_config(
+                config, algorithm_type="sde-dpmsolver++", solver_order=2, use_karras_sigmas=karras
+            )
+        elif name == "euler":
+            scheduler = EulerDiscreteScheduler.from_config(config, use_karras_sigmas=karras)
+        elif name == "euler_a":
+            scheduler = EulerAncestralDiscreteScheduler.from_config(config)
+        elif name == "unipc":
+            scheduler = UniPCMultistepScheduler.from_config(config)
+        elif name == "ddim":
+            scheduler = DDIMScheduler.from_config(config)
+        else:
+            raise ValueError(f"Unknown scheduler '{name}'")
+        _SCHEDULERS[key] = scheduler
+    pipe.scheduler = _SCHEDULERS[key]
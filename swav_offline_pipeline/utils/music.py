@@ -0,0 +1,298 @@
+"""Music bed generation from cached, crossfaded loop segments (stems, MusicGen or procedural)."""
+from __future__ import annotations
+
+import hashlib
+import importlib.util
+import os
+import re
+import uuid
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+import soundfile as sf
+
+from . import storage
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+MUSICGEN_DIR = BASE_DIR / "models" / "musicgen-small"
+STEMS_DIR = BASE_DIR / "assets" / "music"
+
+CHANNELS = 2
+CROSSFADE_S = 2.0
+FADE_OUT_S = 3.0
+BLOCK_S = 5.0
+MUSICGEN_SEGMENT_S = 30.0
+MUSICGEN_MAX_SEGMENTS = 3
+DEFAULT_BPM = 72.0
+
+_MUSICGEN = None
+_CACHE_DIR: Optional[Path] = None
+
+# (semitone offsets of the chord roots within the key, minor?) per mood keyword.
+_PROGRESSIONS = {
+    "major": [(0, False), (5, False), (9, True), (7, False)],  # I - IV - vi - V
+    "minor": [(0, True), (8, False), (3, False), (10, False)],  # i - VI - III - VII
+}
+_MINOR_WORDS = ("tense", "suspense", "dark", "sombre", "somber", "urgent", "minor")
+_PULSE_WORDS = ("ceremonial", "dignified", "march", "martial", "heroic", "epic", "majestic")
+_CALM_WORDS = ("calm", "ambient", "reflective", "soft", "gentle")
+
+
+def _slug(tag: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", tag.lower()).strip("-") or "untagged"
+
+
+def _seed(*parts) -> int:
+    digest = hashlib.sha256("\x1f".join(str(p) for p in parts).encode("utf-8")).digest()
+    return int.from_bytes(digest[:4], "little")
+
+
+def _bpm(tag: str) -> float:
+    match = re.search(r"(\d{2,3})\s*bpm", tag.lower())
+    return float(match.group(1)) if match else DEFAULT_BPM
+
+
+def musicgen_available() -> bool:
+    return (
+        MUSICGEN_DIR.exists()
+        and importlib.util.find_spec("torch") is not None
+        and importlib.util.find_spec("transformers") is not None
+    )
+
+
+def _resample(wav: np.ndarray, src_rate: int, dst_rate: int) -> np.ndarray:
+    if src_rate == dst_rate:
+        return wav
+    from math import gcd
+
+    from scipy.signal import resample_poly
+
+    g = gcd(src_rate, dst_rate)
+    return resample_poly(wav, dst_rate // g, src_rate // g, axis=0).astype(np.float32)
+
+
+def _as_channels(wav: np.ndarray) -> np.ndarray:
+    wav = np.asarray(wav, dtype=np.float32)
+    if wav.ndim == 1:
+        wav = wav[:, None]
+    if wav.shape[1] == CHANNELS:
+        return wav
+    return np.repeat(wav[:, :1], CHANNELS, axis=1)
+
+
+# -- segment sources ---------------------------------------------------------
+def _procedural_segment(tag: str, seed: int, variation: int, sample_rate: int) -> np.ndarray:
+    """One 8-bar loop: detuned chord pads, a bass line and (for ceremonial tags) a low pulse."""
+    words = tag.lower()
+    bpm = _bpm(tag)
+    rng = np.random.default_rng(_seed("procedural", tag, seed, variation))
+    minor = any(w in words for w in _MINOR_WORDS)
+    progression = list(_PROGRESSIONS["minor" if minor else "major"])
+    if variation % 2:
+        progression = progression[2:] + progression[:2]
+    key_root = 48 + int(rng.integers(0, 12))  # MIDI C3..B3
+
+    beat = 60.0 / bpm
+    chord_len = int(round(8 * beat * sample_rate))  # two bars of 4/4 per chord
+    total = chord_len * len(progression)
+    t = np.arange(chord_len, dtype=np.float32) / sample_rate
+    out = np.zeros((total, CHANNELS), dtype=np.float32)
+
+    # Raised-cosine swell so consecutive chords blend without clicks.
+    ramp = min(int(0.6 * sample_rate), chord_len // 4)
+    swell = np.ones(chord_len, dtype=np.float32)
+    swell[:ramp] = 0.5 - 0.5 * np.cos(np.linspace(0, np.pi, ramp, dtype=np.float32))
+    swell[-ramp:] = swell[:ramp][::-1]
+
+    beat_len = int(round(beat * sample_rate))
+    beat_t = np.arange(beat_len, dtype=np.float32) / sample_rate
+    pluck = np.exp(-beat_t * 3.0).astype(np.float32)
+    thump = (np.sin(2 * np.pi * 55.0 * beat_t * np.exp(-beat_t * 2.0)) * np.exp(-beat_t * 6.0)).astype(np.float32)
+    pulse = any(w in words for w in _PULSE_WORDS) and not any(w in words for w in _CALM_WORDS)
+    detune = np.array([-0.0015, 0.0015], dtype=np.float32)  # L/R cents-ish spread
+
+    for idx, (offset, chord_minor) in enumerate(progression):
+        root = key_root + offset
+        notes = [root, root + (3 if chord_minor else 4), root + 7, root + 12]
+        freqs = 440.0 * 2 ** ((np.array(notes, dtype=np.float32) - 69) / 12)
+        # (notes, channels) x time in one broadcast: pads are 4 voices x 2 channels.
+        phase = 2 * np.pi * freqs[:, None, None] * (1 + detune[None, :, None]) * t[None, None, :]
+        pad = (np.sin(phase) + 0.3 * np.sin(2 * phase)).sum(axis=0).T * (0.05 * swell[:, None])
+
+        seg = out[idx * chord_len : (idx + 1) * chord_len]
+        seg += pad
+        bass_f = 440.0 * 2 ** ((root - 12 - 69) / 12)
+        bass_tone = np.sin(2 * np.pi * bass_f * beat_t).astype(np.float32) * pluck * 0.12
+        for beat_idx in range(0, 8, 2):
+            start = beat_idx * beat_len
+            seg[start : start + beat_len] += bass_tone[: len(seg) - start, None]
+            if pulse and beat_idx % 4 == 0:
+                seg[start : start + beat_len] += (thump * 0.15)[: len(seg) - start, None]
+
+    peak = float(np.abs(out).max()) or 1.0
+    out *= 0.5 / peak
+    return out
+
+
+def stem_files(tag: str) -> List[Path]:
+    """The WAV stems under ``assets/music/<tag-slug>/``, if any."""
+    stem_dir = STEMS_DIR / _slug(tag)
+    return sorted(stem_dir.glob("*.wav")) if stem_dir.is_dir() else []
+
+
+def bed_source(tag: str) -> str:
+    """Where ``segments_for`` takes the bed from: "stems", "musicgen" or "procedural"."""
+    if stem_files(tag):
+        return "stems"
+    return "musicgen" if musicgen_available() else "procedural"
+
+
+def _stem_segments(tag: str, sample_rate: int) -> List[np.ndarray]:
+    segments = []
+    for path in stem_files(tag):
+        wav, rate = sf.read(str(path), dtype="float32", always_2d=True)
+        if len(wav):  # an empty stem would stall the loop
+            segments.append(_as_channels(_resample(wav, rate, sample_rate)))
+    return segments
+
+
+def _get_musicgen():
+    global _MUSICGEN
+    if _MUSICGEN is None:
+        import torch
+        from transformers import AutoProcessor, MusicgenForConditionalGeneration
+
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        processor = AutoProcessor.from_pretrained(str(MUSICGEN_DIR))
+        model = MusicgenForConditionalGeneration.from_pretrained(str(MUSICGEN_DIR)).to(device)
+        _MUSICGEN = (processor, model, device)
+    return _MUSICGEN
+
+
+def _musicgen_segment(tag: str, seconds: float, seed: int, sample_rate: int) -> np.ndarray:
+    import torch
+
+    processor, model, device = _get_musicgen()
+    inputs = processor(text=[tag], padding=True, return_tensors="pt").to(device)
+    torch.manual_seed(seed)
+    tokens = int(seconds * model.config.audio_encoder.frame_rate)
+    with torch.inference_mode():
+        audio = model.generate(**inputs, do_sample=True, max_new_tokens=tokens)
+    wav = audio[0, 0].float().cpu().numpy()
+    return _as_channels(_resample(wav, model.config.audio_encoder.sampling_rate, sample_rate))
+
+
+def configure(root: Path | str | None) -> None:
+    """Set the segment cache directory (None: build segments on every call)."""
+    global _CACHE_DIR
+    _CACHE_DIR = Path(root) if root else None
+
+
+def _cached(key: Tuple, build, tier: str) -> np.ndarray:
+    if _CACHE_DIR is None:
+        return np.ascontiguousarray(build(), dtype=np.float32)
+    path = _CACHE_DIR / f"{hashlib.sha256(repr(key).encode('utf-8')).hexdigest()[:24]}.npy"
+    manager = storage.default()
+    if path.exists():
+        if manager is not None:
+            manager.touch([path])
+        return np.load(path, mmap_mode="r")
+    _CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    segment = np.ascontiguousarray(build(), dtype=np.float32)
+    # Farm workers can share the cache, so each writer gets its own temporary file.
+    tmp = path.with_name(f"{path.stem}.tmp-{os.getpid()}-{uuid.uuid4().hex[:8]}.npy")
+    np.save(tmp, segment)
+    os.replace(tmp, path)
+    if manager is not None:
+        manager.record([path], "music", tier)
+    return segment
+
+
+def segments_for(tag: str, duration: float, seed: int, sample_rate: int) -> Tuple[str, List[np.ndarray]]:
+    """Return ``(source, segments)`` for a bed, generating and caching segments as needed."""
+    stems = _stem_segments(tag, sample_rate)
+    if stems:
+        return "stems", stems
+    if musicgen_available():
+        count = int(min(max(np.ceil(duration / MUSICGEN_SEGMENT_S), 1), MUSICGEN_MAX_SEGMENTS))
+        segments = [
+            _cached(
+                ("musicgen", tag, MUSICGEN_SEGMENT_S, seed + idx, sample_rate),
+                lambda idx=idx: _musicgen_segment(tag, MUSICGEN_SEGMENT_S, seed + idx, sample_rate),
+                "generated",
+            )
+            for idx in range(count)
+        ]
+        return "musicgen", segments
+    segments = [
+        _cached(
+            ("procedural", tag, _bpm(tag), seed, variation, sample_rate),
+            lambda variation=variation: _procedural_segment(tag, seed, variation, sample_rate),
+            "derived",
+        )
+        for variation in range(2)
+    ]
+    return "procedural", segments
+
+
+# -- looping -----------------------------------------------------------------
+def _looped_blocks(segments: List[np.ndarray], total: int, crossfade: int) -> Iterator[np.ndarray]:
+    """Yield the segments cycled end to end with equal-power crossfades, ``total`` samples long."""
+    segments = [seg for seg in segments if len(seg)]
+    if not segments:
+        raise ValueError("Music bed has no non-empty segments to loop")
+    curve = np.linspace(0.0, np.pi / 2, crossfade, dtype=np.float32)[:, None]
+    fade_in, fade_out = np.sin(curve), np.cos(curve)
+    emitted = 0
+    previous_tail: Optional[np.ndarray] = None
+    idx = 0
+    while emitted < total:
+        seg = segments[idx % len(segments)]
+        xf = min(crossfade, len(seg) // 3)
+        if previous_tail is not None and xf:
+            head = seg[:xf] * fade_in[:xf] + previous_tail[-xf:] * fade_out[:xf]
+            body = seg[xf : len(seg) - xf]
+        else:
+            head = seg[:0]
+            body = seg[: len(seg) - xf]
+        for part in (head, body):
+            if emitted >= total or not len(part):
+                continue
+            part = np.asarray(part[: total - emitted], dtype=np.float32)
+            emitted += len(part)
+            yield part
+        previous_tail = seg[len(seg) - xf :]
+        idx += 1
+
+
+def make_bed(
+    tag: str,
+    out_wav: Path | str,
+    duration: float,
+    sample_rate: int = 48000,
+    seed: int = 0,
+) -> str:
+    """Write a ``duration``-second stereo music bed for ``tag`` and return the segment source used."""
+    out_wav = Path(out_wav)
+    out_wav.parent.mkdir(parents=True, exist_ok=True)
+    total = int(max(duration, 0.1) * sample_rate)
+    source, segments = segments_for(tag or "", duration, seed, sample_rate)
+
+    fade_len = min(int(FADE_OUT_S * sample_rate), total)
+    fade_start = total - fade_len
+    block = int(BLOCK_S * sample_rate)
+    written = 0
+    with sf.SoundFile(str(out_wav), "w", samplerate=sample_rate, channels=CHANNELS) as fh:
+        for part in _looped_blocks(segments, total, int(CROSSFADE_S * sample_rate)):
+            for start in range(0, len(part), block):
+                chunk = part[start : start + block]
+                end = written + len(chunk)
+                if end > fade_start:
+                    lo = max(fade_start - written, 0)
+                    ramp = (1.0 - (np.arange(written + lo, end) - fade_start) / max(fade_len, 1)).astype(np.float32)
+                    chunk = chunk.copy()
+                    chunk[lo:] *= ramp[:, None]
+                fh.write(chunk)
+                written = end
+    return source
@@ -0,0 +1,310 @@
+"""Progressive HLS preview of the timeline while the render is running.
+
+Every finished shot intermediate is stream-copied (no re-encode) into
+fragmented-MP4 HLS segments under ``<outdir>/preview/shots``. Shots that have
+not finished yet play a grey "rendering" slate of the same length: one slate
+clip as long as the longest shot is encoded with the shot profile, and each
+row takes a stream-copied cut of it. Once the voiceover exists it is added as
+an AAC audio rendition.
+
+Shots encoded with the same profile and size share one codec configuration,
+so the timeline names an init segment only where that configuration changes
+(with a discontinuity) and the fragments' decode times (``tfdt``) are shifted
+to each shot's start, making the timeline one continuous stream.
+libavformat-based players (mpv, ffplay) restart timestamps at every init
+segment switch, and ffmpeg's HLS muxer always starts fragments at zero (an
+output offset only becomes an edit list in the init segment), so the shift is
+patched into the fragments after muxing.
+
+``preview.m3u8`` (multivariant playlist) and ``timeline.m3u8`` (video) are
+rebuilt from what is on disk after each change, under a file lock and with
+an atomic rename, so farm workers sharing the output directory can update
+them too. The playlists are VOD snapshots: reopen ``preview.m3u8`` in any
+local HLS player (mpv, VLC, ffplay, Safari) to pick up newly finished shots.
+"""
+from __future__ import annotations
+
+import fcntl
+import math
+import os
+import struct
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from . import cards, encoders, ffmpeg, instrument
+from . import video as video_utils
+
+# Codecs that fragmented MP4 carries and HLS players decode; other shot profiles (FFV1, ProRes) get no preview.
+STREAMABLE_CODECS = ("libx264", "libx265")
+SEGMENT_S = 6
+AUDIO_BITRATE = "128k"
+
+_DEFAULT: Optional["Preview"] = None
+
+
+def supported(profile: encoders.EncoderProfile | None = None) -> bool:
+    """Whether intermediates encoded with ``profile`` (default: the shot profile) can be segmented by stream copy."""
+    profile = profile or encoders.profile_for("shot")
+    return profile.codec in STREAMABLE_CODECS and profile.extension in (".mp4", ".mov")
+
+
+def segment(src: Path, playlist: Path, offset: float, frames: int | None = None, audio: bool = False) -> None:
+    """Cut ``src`` (or its first ``frames``) into fMP4 HLS segments next to ``playlist``, starting at ``offset`` s."""
+    playlist.parent.mkdir(parents=True, exist_ok=True)
+    stem = playlist.stem
+    codec = ["-map", "0:a", "-c:a", "aac", "-b:a", AUDIO_BITRATE] if audio else ["-map", "0:v", "-c", "copy"]
+    if frames is not None:
+        # A frame count rather than -t: stream copy compares decode times, which lag by the B-frame delay.
+        codec += ["-frames:v", str(frames)]
+    ffmpeg.run(
+        [
+            "ffmpeg",
+            "-y",
+            "-i",
+            str(src),
+            *codec,
+            "-f",
+            "hls",
+            "-hls_time",
+            str(SEGMENT_S),
+            "-hls_playlist_type",
+            "vod",
+            "-hls_segment_type",
+            "fmp4",
+            "-hls_fmp4_init_filename",
+            f"{stem}_init.mp4",
+            "-hls_segment_filename",
+            str(playlist.parent / f"{stem}_%03d.m4s"),
+            str(playlist),
+        ]
+    )
+    if offset:
+        media = _read_media_playlist(playlist, "")
+        if media is None:
+            raise RuntimeError(f"ffmpeg wrote no complete playlist at {playlist}")
+        init, segments = media
+        ticks = round(offset * _timescale((playlist.parent / init).read_bytes()))
+        for _, uri in segments:
+            _shift_fragments(playlist.parent / uri, ticks)
+
+
+def _boxes(data, start: int, end: int) -> Iterator[Tuple[bytes, int, int]]:
+    """``(type, offset, size)`` of the ISO BMFF boxes in ``data[start:end]``."""
+    while start + 8 <= end:
+        size, kind = struct.unpack(">I4s", data[start : start + 8])
+        if size < 8:
+            return
+        yield kind, start, size
+        start += size
+
+
+def _timescale(init: bytes) -> int:
+    """Media timescale from the first ``mdhd`` box of an init segment."""
+    idx = init.find(b"mdhd")
+    version = init[idx + 4]
+    pos = idx + 8 + (16 if version else 8)
+    return struct.unpack(">I", init[pos : pos + 4])[0]
+
+
+def _shift_fragments(path: Path, ticks: int) -> None:
+    """Add ``ticks`` to the decode time (``moof/traf/tfdt``) of every fragment in a media segment."""
+    data = bytearray(path.read_bytes())
+    for kind, start, size in _boxes(data, 0, len(data)):
+        if kind != b"moof":
+            continue
+        for traf, traf_start, traf_size in _boxes(data, start + 8, start + size):
+            if traf != b"traf":
+                continue
+            for box, pos, _ in _boxes(data, traf_start + 8, traf_start + traf_size):
+                if box == b"tfdt":
+                    fmt = ">Q" if data[pos + 8] else ">I"
+                    field = slice(pos + 12, pos + 12 + struct.calcsize(fmt))
+                    data[field] = struct.pack(fmt, struct.unpack(fmt, data[field])[0] + ticks)
+    path.write_bytes(data)
+
+
+def _read_media_playlist(path: Path, prefix: str) -> Optional[Tuple[str, List[Tuple[float, str]]]]:
+    """``(init URI, [(duration, segment URI)])`` of a finished media playlist, URIs prefixed with ``prefix``."""
+    try:
+        lines = path.read_text(encoding="utf-8").splitlines()
+    except OSError:
+        return None
+    if "#EXT-X-ENDLIST" not in lines:
+        return None  # still being written
+    init, segments, duration = None, [], None
+    for line in lines:
+        if line.startswith("#EXT-X-MAP:URI="):
+            init = prefix + line.split("=", 1)[1].strip('"')
+        elif line.startswith("#EXTINF:"):
+            duration = float(line[len("#EXTINF:") :].split(",", 1)[0])
+        elif line and not line.startswith("#") and duration is not None:
+            segments.append((duration, prefix + line))
+            duration = None
+    return (init, segments) if init and segments else None
+
+
+def _codec_config(init: Path) -> bytes:
+    """Decoder configuration (``avcC``/``hvcC`` box: profile, size, parameter sets) of an init segment.
+
+    The rest of the sample description carries per-file details such as the bitrate box, which do not matter.
+    """
+    try:
+        data = init.read_bytes()
+    except OSError:
+        return b""
+    for box in (b"avcC", b"hvcC"):
+        idx = data.find(box)
+        if idx >= 4:
+            return data[idx - 4 : idx - 4 + int.from_bytes(data[idx - 4 : idx], "big")]
+    return data
+
+
+class Preview:
+    """Preview playlists for one timeline of ``(row_no, duration_s)`` shots under ``root``."""
+
+    def __init__(self, root: Path, shots: Sequence[Tuple[int, float]], size: Tuple[int, int], fps: int) -> None:
+        self.root = Path(root)
+        self.size = size
+        self.fps = fps
+        self.starts: Dict[int, float] = {}
+        self.durations: Dict[int, float] = {}
+        timeline = 0.0
+        for row, duration in shots:
+            self.starts[row], self.durations[row] = timeline, duration
+            timeline += duration
+        self.path = self.root / "preview.m3u8"
+        self._lock = threading.Lock()
+
+    # -- paths ---------------------------------------------------------------
+    def shot_playlist(self, row: int) -> Path:
+        return self.root / "shots" / f"shot_{row:03d}.m3u8"
+
+    def pending_playlist(self, row: int) -> Path:
+        return self.root / "pending" / f"shot_{row:03d}.m3u8"
+
+    def slate_path(self, duration: float) -> Path:
+        width, height = self.size
+        profile = encoders.profile_for("shot").name
+        name = f"slate_{profile}_{width}x{height}_{self.fps}fps_{int(round(duration * 1000))}ms.mp4"
+        return self.root / "slates" / name
+
+    @property
+    def audio_playlist(self) -> Path:
+        return self.root / "audio" / "voiceover.m3u8"
+
+    # -- updates ---------------------------------------------------------------
+    def add_shot(self, row: int, video_path: Path) -> None:
+        """Segment a finished shot intermediate into the timeline and republish the playlists."""
+        playlist = self.shot_playlist(row)
+        with instrument.stage("preview", row_no=row, outputs=[playlist]):
+            segment(video_path, playlist, self.starts[row])
+        self.write()
+
+    def add_slates(self, rows: Sequence[int] | None = None) -> None:
+        """Placeholder segments for ``rows`` (default: every shot), cut from one slate encode."""
+        rows = list(self.starts) if rows is None else rows
+        if not rows:
+            return
+        outputs = [self.pending_playlist(row) for row in rows]
+        with instrument.stage("preview", slates=len(rows), outputs=outputs):
+            longest = max(self.durations[row] for row in rows)
+            slate = self.slate_path(longest)
+            if not slate.exists():
+                slate.parent.mkdir(parents=True, exist_ok=True)
+                tmp = slate.with_name(f"{slate.stem}.tmp{slate.suffix}")
+                card = {"title": "Rendering", "subtitle": "shot not finished yet", "template": "pending"}
+                frames = cards.card_frames(card, self.size, longest, self.fps)
+                video_utils.stream_video(frames, self.size, tmp, self.fps)
+                os.replace(tmp, slate)
+            for row in rows:
+                frames = max(int(round(self.durations[row] * self.fps)), 1)
+                segment(slate, self.pending_playlist(row), self.starts[row], frames=frames)
+        self.write()
+
+    def add_voiceover(self, wav: Path) -> None:
+        with instrument.stage("preview", outputs=[self.audio_playlist]):
+            segment(wav, self.audio_playlist, 0.0, audio=True)
+        self.write()
+
+    # -- playlists -------------------------------------------------------------
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        self.root.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(self.root / ".lock", "w", encoding="utf-8") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _replace(self, path: Path, lines: List[str]) -> None:
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        os.replace(tmp, path)
+
+    def status(self) -> Tuple[int, int]:
+        """``(finished, total)`` shots currently in the timeline playlist."""
+        done = sum(_read_media_playlist(self.shot_playlist(row), "") is not None for row in self.starts)
+        return done, len(self.starts)
+
+    def write(self) -> None:
+        """Rebuild ``timeline.m3u8`` and ``preview.m3u8`` from the segments on disk."""
+        with self._locked():
+            entries: List[str] = []
+            longest, peak_bps, config = 1.0, 0.0, None
+            for row in self.starts:
+                media = _read_media_playlist(self.shot_playlist(row), "shots/") or _read_media_playlist(
+                    self.pending_playlist(row), "pending/"
+                )
+                if media is None:
+                    continue  # no slate yet either; the player skips ahead
+                init, segments = media
+                shot_config = _codec_config(self.root / init)
+                if shot_config != config:
+                    entries += (["#EXT-X-DISCONTINUITY"] if config is not None else []) + [f'#EXT-X-MAP:URI="{init}"']
+                    config = shot_config
+                for duration, uri in segments:
+                    entries += [f"#EXTINF:{duration:.6f},", uri]
+                    longest = max(longest, duration)
+                    try:
+                        peak_bps = max(peak_bps, (self.root / uri).stat().st_size * 8 / max(duration, 1e-3))
+                    except OSError:
+                        pass
+            self._replace(
+                self.root / "timeline.m3u8",
+                [
+                    "#EXTM3U",
+                    "#EXT-X-VERSION:7",
+                    f"#EXT-X-TARGETDURATION:{math.ceil(longest)}",
+                    "#EXT-X-MEDIA-SEQUENCE:0",
+                    "#EXT-X-PLAYLIST-TYPE:VOD",
+                    "#EXT-X-INDEPENDENT-SEGMENTS",
+                    *entries,
+                    "#EXT-X-ENDLIST",
+                ],
+            )
+            width, height = self.size
+            stream = f"BANDWIDTH={int(peak_bps) or 20_000_000},RESOLUTION={width}x{height}"
+            master = ["#EXTM3U", "#EXT-X-VERSION:7", "#EXT-X-INDEPENDENT-SEGMENTS"]
+            if _read_media_playlist(self.audio_playlist, "") is not None:
+                master.append(
+                    '#EXT-X-MEDIA:TYPE=AUDIO,GROUP-ID="vo",NAME="Voiceover",DEFAULT=YES,AUTOSELECT=YES,'
+                    'URI="audio/voiceover.m3u8"'
+                )
+                stream += ',AUDIO="vo"'
+            self._replace(self.path, master + [f"#EXT-X-STREAM-INF:{stream}", "timeline.m3u8"])
+
+
+def configure(
+    root: Path | None, shots: Sequence[Tuple[int, float]] = (), size: Tuple[int, int] = (1920, 1080), fps: int = 30
+) -> Optional[Preview]:
+    """Set (or with ``root=None`` disable) the process-wide preview."""
+    global _DEFAULT
+    _DEFAULT = Preview(root, shots, size, fps) if root is not None else None
+    return _DEFAULT
+
+
+def default() -> Optional[Preview]:
+    return _DEFAULT
@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+MODES = ("cprofile", "sample", "py-spy")
+BENCH_RE = re.compile(r"bench: utime=([0-9.]+)s stime=([0-9.]+)s rtime=([0-9.]+)s")
+MAXRSS_RE = re.compile(r"bench: maxrss=(\d+)\s*Ki?B")
+
+
+@dataclass
+class ProfileConfig:
+    shots: Optional[Set[int]] = None  # None = every shot
+    modes: Tuple[str, ...] = ("cprofile", "sample")
+    interval: float = 0.005
+    outdir: Path = Path("profiles")
+
+
+@dataclass
+class _ShotSession:
+    row_no: int
+    ffmpeg_calls: List[Dict] = field(default_factory=list)
+    started: float = 0.0
+
+
+_CONFIG: Optional[ProfileConfig] = None
+# The profiled shot of the calling thread: DAG tasks running alongside it must not be benchmarked into its capture.
+_LOCAL = threading.local()
+_NULL = nullcontext()
+
+
+def parse_spec(spec: str, outdir: Path) -> ProfileConfig:
+    """Parse ``--profile`` values such as ``shots=17,23`` or ``shots=all mode=sample interval=0.002``."""
+    config = ProfileConfig(outdir=outdir)
+    for part in re.split(r"[\s;]+", spec.strip()):
+        if not part:
+            continue
+        key, _, value = part.partition("=")
+        if key == "shots":
+            if value not in ("", "all", "*"):
+                config.shots = {int(x) for x in value.split(",") if x.strip()}
+        elif key == "mode":
+            modes = tuple(m.strip() for m in value.split(",") if m.strip())
+            unknown = set(modes) - set(MODES)
+            if unknown:
+                raise ValueError(f"Unknown profile mode(s) {sorted(unknown)}; choose from {', '.join(MODES)}")
+            config.modes = modes
+        elif key == "interval":
+            config.interval = float(value)
+        else:
+            raise ValueError(f"Unknown --profile option '{key}'")
+    return config
+
+
+def configure(config: ProfileConfig | None) -> None:
+    global _CONFIG
+    _CONFIG = config
+    if config is not None:
+        config.outdir.mkdir(parents=True, exist_ok=True)
+
+
+def enabled() -> bool:
+    return _CONFIG is not None
+
+
+class _StackSampler:
+    """Samples one thread's Python stack and accumulates py-spy style collapsed stacks."""
+
+    def __init__(self, thread_id: int, interval: float) -> None:
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack: List[str] = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.counts[";".join(reversed(stack))] += 1
+
+    def write(self, path: Path) -> None:
+        with path.open("w", encoding="utf-8") as fh:
+            for stack, count in self.counts.most_common():
+                fh.write(f"{stack} {count}\n")
+
+
+def _start_py_spy(path: Path, interval: float) -> Optional[subprocess.Popen]:
+    exe = shutil.which("py-spy")
+    if exe is None:
+        print("[profile] py-spy not found on PATH; skipping py-spy capture", file=sys.stderr)
+        return None
+    rate = max(int(round(1.0 / interval)), 1)
+    return subprocess.Popen(
+        [exe, "record", "--pid", str(os.getpid()), "--format", "raw", "--rate", str(rate),
+         "--subprocesses", "--output", str(path)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def shot(row_no: int):
+    """Context manager profiling one shot if it was selected with ``--profile``; free otherwise."""
+    if _CONFIG is None or (_CONFIG.shots is not None and row_no not in _CONFIG.shots):
+        return _NULL
+    return _profile_shot(row_no, _CONFIG)
+
+
+def current() -> Optional[_ShotSession]:
+    """The profiled shot the calling thread is working for, if any."""
+    return getattr(_LOCAL, "session", None)
+
+
+@contextmanager
+def bind(session: Optional[_ShotSession]) -> Iterator[None]:
+    """Record this thread's ffmpeg calls into ``session``, for helper threads a profiled shot starts."""
+    previous = current()
+    _LOCAL.session = session
+    try:
+        yield
+    finally:
+        _LOCAL.session = previous
+
+
+@contextmanager
+def _profile_shot(row_no: int, config: ProfileConfig) -> Iterator[None]:
+    stem = config.outdir / f"shot_{row_no:03d}"
+    session = _ShotSession(row_no=row_no, started=time.perf_counter())
+    previous = current()
+    _LOCAL.session = session
+
+    profiler = cProfile.Profile() if "cprofile" in config.modes else None
+    sampler = _StackSampler(threading.get_ident(), config.interval) if "sample" in config.modes else None
+    spy = _start_py_spy(stem.with_suffix(".pyspy.folded"), config.interval) if "py-spy" in config.modes else None
+    if sampler is not None:
+        sampler.start()
+    if profiler is not None:
+        try:
+            profiler.enable()
+        except ValueError:  # Python 3.12+ allows one cProfile at a time; an overlapping profiled shot holds it
+            print(f"[profile] cProfile busy with another shot; row {row_no} gets stack samples only", file=sys.stderr)
+            profiler = None
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        if sampler is not None:
+            sampler.stop()
+        if spy is not None:
+            spy.send_signal(signal.SIGINT)
+            spy.wait()
+        _LOCAL.session = previous
+        wall = time.perf_counter() - session.started
+        if profiler is not None:
+            profiler.dump_stats(str(stem.with_suffix(".pstats")))
+        if sampler is not None:
+            sampler.write(stem.with_suffix(".folded"))
+        summary = {
+            "row_no": row_no,
+            "wall_s": wall,
+            "ffmpeg_wall_s": sum(call["wall_s"] for call in session.ffmpeg_calls),
+            "ffmpeg_cpu_s": sum(call.get("utime_s", 0.0) + call.get("stime_s", 0.0) for call in session.ffmpeg_calls),
+            "ffmpeg_calls": session.ffmpeg_calls,
+        }
+        stem.with_suffix(".ffmpeg.json").write_text(json.dumps(summary, indent=2), encoding="utf-8")
+
+
+@contextmanager
+def ffmpeg_call(cmd: Sequence[str]) -> Iterator[Tuple[List[str], Optional[io.IOBase]]]:
+    """Yield ``(cmd, stderr)`` for an ffmpeg subprocess.
+
+    Inside a profiled shot ``-benchmark`` is added and stderr goes to a temp
+    file (never a pipe, so streaming encodes cannot deadlock); ffmpeg's own
+    utime/stime/rtime/maxrss and the subprocess wall time are then recorded.
+    Outside profiling, or on a thread that is not working for the profiled
+    shot, the command is passed through untouched.
+    """
+    session = current()
+    if session is None:
+        yield list(cmd), None
+        return
+
+    cmd = list(cmd)
+    cmd.insert(1, "-benchmark")
+    with tempfile.TemporaryFile(mode="w+b") as stderr:
+        start = time.perf_counter()
+        try:
+            yield cmd, stderr
+        finally:
+            wall = time.perf_counter() - start
+            stderr.seek(0)
+            text = stderr.read().decode("utf-8", errors="replace")
+            sys.stderr.write(text)
+            call: Dict = {"cmd": " ".join(cmd[:12]) + (" ..." if len(cmd) > 12 else ""), "wall_s": wall}
+            bench = BENCH_RE.findall(text)
+            if bench:
+                utime, stime, rtime = (float(x) for x in bench[-1])
+                call.update(utime_s=utime, stime_s=stime, rtime_s=rtime)
+            rss = MAXRSS_RE.findall(text)
+            if rss:
+                call["maxrss_kib"] = int(rss[-1])
+            session.ffmpeg_calls.append(call)
+
+
+def write_summary(top: int = 15) -> Optional[Path]:
+    """Write ``profile_summary.md`` with the hottest functions and ffmpeg share per profiled shot."""
+    if _CONFIG is None:
+        return None
+    lines = ["# Shot profiles", ""]
+    for ffmpeg_json in sorted(_CONFIG.outdir.glob("shot_*.ffmpeg.json")):
+        data = json.loads(ffmpeg_json.read_text(encoding="utf-8"))
+        stem = ffmpeg_json.with_name(ffmpeg_json.name[: -len(".ffmpeg.json")])
+        wall = data["wall_s"] or 1e-9
+        lines.extend(
+            [
+                f"## Row {data['row_no']}",
+                "",
+                f"- wall: {data['wall_s']:.2f} s",
+                f"- ffmpeg subprocess wall: {data['ffmpeg_wall_s']:.2f} s ({data['ffmpeg_wall_s'] / wall:.0%})",
+                f"- ffmpeg CPU (user+sys): {data['ffmpeg_cpu_s']:.2f} s over {len(data['ffmpeg_calls'])} call(s)",
+                f"- flamegraph input: `{stem.name}.folded` (flamegraph.pl / speedscope)",
+                "",
+            ]
+        )
+        pstats_path = stem.with_suffix(".pstats")
+        if pstats_path.exists():
+            buf = io.StringIO()
+            stats = pstats.Stats(str(pstats_path), stream=buf)
+            stats.sort_stats("cumulative").print_stats(top)
+            lines.extend(["```", buf.getvalue().strip(), "```", ""])
+    out_path = _CONFIG.outdir / "profile_summary.md"
+    out_path.write_text("\n".join(lines), encoding="utf-8")
+    return out_path
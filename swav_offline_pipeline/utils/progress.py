@@ -0,0 +1,302 @@
+from __future__ import annotations
+
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .instrument import StageRecord
+
+STATUS_NAME = "status.json"
+ETA_LOG_NAME = "eta_accuracy.jsonl"
+_MIN_PUBLISH_INTERVAL = 0.5
+
+# Seconds of wall time per second of finished video, used until a method has been
+# observed at least once. Deliberately pessimistic for the diffusion methods.
+DEFAULT_COSTS: Dict[str, float] = {
+    "t2v": 30.0,
+    "img2vid": 60.0,
+    "raw": 2.0,
+    "finalise": 1.0,
+}
+_EWMA_ALPHA = 0.3
+
+
+def _atomic_write_json(path: Path, payload: Dict) -> None:
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(payload, indent=2, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+class CostModel:
+    """Per-method wall-seconds per video-second, learned with an EWMA and persisted as JSON."""
+
+    def __init__(self, path: Path | None) -> None:
+        self.path = path
+        self.costs: Dict[str, float] = dict(DEFAULT_COSTS)
+        self.samples: Dict[str, int] = {}
+        if path is not None and path.exists():
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+                self.costs.update({k: float(v) for k, v in data.get("costs", {}).items()})
+                self.samples.update({k: int(v) for k, v in data.get("samples", {}).items()})
+            except (OSError, ValueError):
+                pass
+
+    def estimate(self, method: str, duration_s: float) -> float:
+        return self.costs.get(method, max(DEFAULT_COSTS.values())) * max(duration_s, 0.1)
+
+    def observe(self, method: str, duration_s: float, wall_s: float) -> None:
+        rate = wall_s / max(duration_s, 0.1)
+        if self.samples.get(method):
+            self.costs[method] = (1 - _EWMA_ALPHA) * self.costs[method] + _EWMA_ALPHA * rate
+        else:
+            self.costs[method] = rate
+        self.samples[method] = self.samples.get(method, 0) + 1
+        self.save()
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        costs, samples = dict(self.costs), dict(self.samples)
+        # Shards may share one cost file; keep whichever side has seen more samples.
+        if self.path.exists():
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+                for method, count in data.get("samples", {}).items():
+                    if int(count) > samples.get(method, 0):
+                        costs[method] = float(data["costs"][method])
+                        samples[method] = int(count)
+            except (OSError, ValueError, KeyError):
+                pass
+        _atomic_write_json(self.path, {"costs": costs, "samples": samples})
+
+
+class ProgressPublisher:
+    """Publish a worker's live progress to ``<outdir>/status.json``.
+
+    Registered as an ``instrument`` listener so the current stage follows the
+    stage instrumentation without extra calls in the render code.
+    """
+
+    def __init__(
+        self,
+        outdir: Path,
+        shots: Sequence[Tuple[int, str, float]],
+        worker_id: str | None = None,
+        costs_path: Path | None = None,
+    ) -> None:
+        self.outdir = outdir
+        self.status_path = outdir / STATUS_NAME
+        self.worker_id = worker_id or f"{socket.gethostname()}:{outdir.name}"
+        self.pending: Dict[int, Tuple[str, float]] = {row: (method, dur) for row, method, dur in shots}
+        self.total = len(self.pending)
+        self.total_video_s = sum(dur for _, _, dur in shots)
+        self.done = 0
+        self.done_video_s = 0.0
+        self.costs = CostModel(costs_path or outdir / "method_costs.json")
+        self.started_at = time.time()
+        self.current: Dict[str, Optional[object]] = {"row_no": None, "method": None, "stage": None}
+        self.state = "running"
+        self.predictions: List[Tuple[float, float]] = []
+        self._lock = threading.Lock()
+        self._shot_started: Dict[int, float] = {}
+        self._last_publish = 0.0
+        self._finalise_started: Optional[float] = None
+        self._finalised = False
+
+    # -- instrument listener -------------------------------------------------
+    def __call__(self, phase: str, record: StageRecord) -> None:
+        with self._lock:
+            if phase == "start":
+                self.current = {"row_no": record.row_no, "method": record.method, "stage": record.stage}
+                if record.stage == "shot" and record.row_no is not None:
+                    self._shot_started[record.row_no] = time.time()
+                elif record.stage == "finalise":
+                    self._finalise_started = time.time()
+                elif time.time() - self._last_publish < _MIN_PUBLISH_INTERVAL:
+                    # Chunked VAE decodes open many short stages; don't rewrite the file for each.
+                    return
+            elif record.stage == "shot" and record.row_no in self.pending and record.ok:
+                method, duration = self.pending.pop(record.row_no)
+                self.costs.observe(method, duration, record.wall_s)
+                self.done += 1
+                self.done_video_s += duration
+            elif record.stage == "finalise" and record.ok:
+                self.costs.observe("finalise", self.total_video_s, record.wall_s)
+                self._finalised = True
+            self._publish()
+
+    # -- estimates -----------------------------------------------------------
+    def eta_seconds(self) -> float:
+        remaining = sum(self.costs.estimate(method, dur) for method, dur in self.pending.values())
+        # The shot in flight has already consumed part of its estimate.
+        row = self.current.get("row_no")
+        if row in self.pending and row in self._shot_started:
+            method, dur = self.pending[row]
+            remaining -= min(time.time() - self._shot_started[row], self.costs.estimate(method, dur))
+        if self.state == "running" and not self._finalised:
+            finalise = self.costs.estimate("finalise", self.total_video_s)
+            if self._finalise_started is not None:
+                finalise -= min(time.time() - self._finalise_started, finalise)
+            remaining += finalise
+        return max(remaining, 0.0)
+
+    def snapshot(self) -> Dict:
+        now = time.time()
+        elapsed = now - self.started_at
+        eta = self.eta_seconds() if self.state == "running" else 0.0
+        return {
+            "worker_id": self.worker_id,
+            "host": socket.gethostname(),
+            "pid": os.getpid(),
+            "outdir": str(self.outdir),
+            "state": self.state,
+            "shots_done": self.done,
+            "shots_total": self.total,
+            "video_done_s": round(self.done_video_s, 2),
+            "video_total_s": round(self.total_video_s, 2),
+            "current": self.current,
+            "started_at": self.started_at,
+            "updated_at": now,
+            "elapsed_s": round(elapsed, 1),
+            "eta_s": round(eta, 1),
+            "eta_at": now + eta,
+            "throughput": {
+                "shots_per_hour": round(self.done / elapsed * 3600, 2) if elapsed > 0 else 0.0,
+                "video_s_per_hour": round(self.done_video_s / elapsed * 3600, 1) if elapsed > 0 else 0.0,
+            },
+            "method_costs": {k: round(v, 2) for k, v in self.costs.costs.items()},
+        }
+
+    def _publish(self) -> None:
+        snapshot = self.snapshot()
+        if self.state == "running":
+            self.predictions.append((snapshot["updated_at"], snapshot["eta_at"]))
+        self.outdir.mkdir(parents=True, exist_ok=True)
+        _atomic_write_json(self.status_path, snapshot)
+        self._last_publish = snapshot["updated_at"]
+
+    def publish(self) -> None:
+        with self._lock:
+            self._publish()
+
+    def finish(self, ok: bool = True) -> Dict:
+        """Mark the worker finished and log how far each ETA prediction was off."""
+        with self._lock:
+            finished_at = time.time()
+            self.state = "done" if ok else "failed"
+            errors = [
+                {"at_fraction": (ts - self.started_at) / max(finished_at - self.started_at, 1e-6),
+                 "error_s": eta_at - finished_at,
+                 "remaining_s": finished_at - ts}
+                for ts, eta_at in self.predictions
+            ]
+            summary = {
+                "worker_id": self.worker_id,
+                "ok": ok,
+                "started_at": self.started_at,
+                "finished_at": finished_at,
+                "predictions": len(errors),
+                "mean_abs_error_s": (
+                    sum(abs(e["error_s"]) for e in errors) / len(errors) if errors else 0.0
+                ),
+                "mean_abs_pct_error": (
+                    sum(abs(e["error_s"]) / max(e["remaining_s"], 1.0) for e in errors) / len(errors) * 100
+                    if errors else 0.0
+                ),
+            }
+            with (self.outdir / ETA_LOG_NAME).open("a", encoding="utf-8") as fh:
+                fh.write(json.dumps(summary) + "\n")
+            self._publish()
+            return summary
+
+
+def aggregate(root: Path) -> Dict:
+    """Combine every worker ``status.json`` below ``root`` into one view."""
+    workers = []
+    for path in sorted(root.rglob(STATUS_NAME)):
+        try:
+            workers.append(json.loads(path.read_text(encoding="utf-8")))
+        except (OSError, ValueError):
+            continue
+    now = time.time()
+    running = [w for w in workers if w.get("state") == "running"]
+    done = sum(w.get("shots_done", 0) for w in workers)
+    total = sum(w.get("shots_total", 0) for w in workers)
+    return {
+        "root": str(root),
+        "updated_at": now,
+        "shots_done": done,
+        "shots_total": total,
+        "percent": round(done / total * 100, 1) if total else 0.0,
+        "eta_s": max((w.get("eta_at", now) - now for w in running), default=0.0),
+        "shots_per_hour": round(sum(w.get("throughput", {}).get("shots_per_hour", 0.0) for w in running), 2),
+        "workers": workers,
+    }
+
+
+def _make_handler(root: Path):
+    class StatusHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802 - http.server naming
+            if self.path.rstrip("/") not in ("", "/status"):
+                self.send_error(404)
+                return
+            body = json.dumps(aggregate(root), ensure_ascii=False).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args) -> None:  # silence per-request logging
+            pass
+
+        def address_string(self) -> str:
+            return str(self.client_address or "unix")
+
+    return StatusHandler
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def start_server(
+    root: Path,
+    port: int | None = None,
+    unix_socket: Path | None = None,
+    host: str = "127.0.0.1",
+) -> Optional[socketserver.BaseServer]:
+    """Serve ``aggregate(root)`` on localhost HTTP or a Unix socket from a daemon thread.
+
+    Returns None when the address is already taken. The server lives only as
+    long as the process that started it, so a multi-shard batch runs it in a
+    process of its own (``tools/status.py ROOT --serve``) rather than in a
+    shard that may finish before the others.
+    """
+    handler = _make_handler(root)
+    try:
+        if unix_socket is not None:
+            if unix_socket.exists():
+                probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                try:
+                    probe.connect(str(unix_socket))
+                    return None  # another worker is already serving
+                except OSError:
+                    unix_socket.unlink()  # stale socket from a dead worker
+                finally:
+                    probe.close()
+            server: socketserver.BaseServer = _UnixHTTPServer(str(unix_socket), handler)
+        else:
+            server = ThreadingHTTPServer((host, port or 0), handler)
+    except OSError:
+        return None
+    threading.Thread(target=server.serve_forever, name="status-server", daemon=True).start()
+    return server
@@ -0,0 +1,135 @@
+"""Persistent cache of SDXL prompt embeddings, encoded in one batched pass per run."""
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from . import instrument
+from . import models as model_utils
+
+BATCH_SIZE = 16
+
+FIELDS = ("prompt_embeds", "negative_prompt_embeds", "pooled_prompt_embeds", "negative_pooled_prompt_embeds")
+
+_DEFAULT: Optional["PromptCache"] = None
+
+
+def _to_numpy(value: Any) -> np.ndarray:
+    # Encoders may run in bf16 (CPU backend), which NumPy cannot hold; float entries are stored as fp16.
+    if hasattr(value, "detach"):
+        value = value.detach()
+        value = (value.half() if value.is_floating_point() else value).cpu()
+    array = np.asarray(value)
+    return array.astype(np.float16) if array.dtype.kind == "f" else array
+
+
+class PromptCache:
+    def __init__(self, root: Path | None, fingerprint: str | None = None) -> None:
+        self.root = Path(root) if root else None
+        self._fingerprint = fingerprint
+        self.hits = 0
+        self.encoded = 0
+        self._memory: Dict[str, Dict[str, np.ndarray]] = {}
+        self._expected: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def fingerprint(self) -> str:
+        # Computed on first use, so configuring the cache never needs the model files.
+        if self._fingerprint is None:
+            self._fingerprint = model_utils.sdxl_fingerprint()
+        return self._fingerprint
+
+    def key(self, prompt: str, negative: str = "") -> str:
+        payload = "\x1f".join((self.fingerprint, prompt, negative))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+    def _path(self, key: str) -> Optional[Path]:
+        return self.root / f"{key}.npz" if self.root else None
+
+    def get(self, prompt: str, negative: str = "") -> Optional[Dict[str, np.ndarray]]:
+        key = self.key(prompt, negative)
+        entry = self._memory.get(key)
+        if entry is None:
+            path = self._path(key)
+            if path is None or not path.exists():
+                return None
+            with np.load(path) as data:
+                entry = {name: data[name] for name in FIELDS}
+            self._memory[key] = entry
+        return entry
+
+    def expect(self, prompts: Iterable[str], negative: str = "") -> int:
+        """Register prompts for the batched pass; returns how many still need encoding."""
+        for prompt in prompts:
+            if self.get(prompt, negative) is None:
+                self._expected[self.key(prompt, negative)] = (prompt, negative)
+        return len(self._expected)
+
+    def embeds(self, pipe: Any, prompt: str, negative: str = "") -> Dict[str, Any]:
+        """``pipe(...)`` keyword arguments for ``prompt``, encoding pending prompts first on a miss."""
+        with self._lock:
+            entry = self.get(prompt, negative)
+            if entry is None:
+                self._expected[self.key(prompt, negative)] = (prompt, negative)
+                self._encode_pending(pipe)
+                entry = self.get(prompt, negative)
+            else:
+                self.hits += 1
+        return {name: model_utils.as_tensor(array) for name, array in entry.items()}
+
+    def _encode_pending(self, pipe: Any) -> None:
+        pending = list(self._expected.values())
+        by_negative: Dict[str, List[str]] = {}
+        for prompt, negative in pending:
+            by_negative.setdefault(negative, []).append(prompt)
+        start = time.perf_counter()
+        with instrument.stage("prompt_encode", prompts=len(pending)), model_utils.sdxl_text_encoders(pipe):
+            for negative, prompts in by_negative.items():
+                for offset in range(0, len(prompts), BATCH_SIZE):
+                    batch = prompts[offset : offset + BATCH_SIZE]
+                    outputs = pipe.encode_prompt(
+                        prompt=batch,
+                        device=pipe._execution_device,
+                        num_images_per_prompt=1,
+                        do_classifier_free_guidance=True,
+                        negative_prompt=[negative] * len(batch) if negative else None,
+                    )
+                    arrays = [_to_numpy(value) for value in outputs]
+                    for idx, prompt in enumerate(batch):
+                        self._put(prompt, negative, {name: array[idx : idx + 1] for name, array in zip(FIELDS, arrays)})
+        self.encoded += len(pending)
+        self._expected.clear()
+        instrument.emit({"event": "prompt_cache", "encoded": len(pending), "wall_s": time.perf_counter() - start})
+
+    def _put(self, prompt: str, negative: str, entry: Dict[str, np.ndarray]) -> None:
+        key = self.key(prompt, negative)
+        self._memory[key] = entry
+        path = self._path(key)
+        if path is None:
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{key}.tmp-{os.getpid()}.npz")
+        np.savez(tmp, **entry)
+        os.replace(tmp, path)
+
+
+def configure(root: Path | str | None, fingerprint: str | None = None) -> PromptCache:
+    """Set the cache used by the render path; ``root=None`` keeps embeddings in memory only."""
+    global _DEFAULT
+    _DEFAULT = PromptCache(Path(root) if root else None, fingerprint)
+    return _DEFAULT
+
+
+def default() -> PromptCache:
+    """The configured cache, or an in-memory one if nothing was configured."""
+    global _DEFAULT
+    if _DEFAULT is None:
+        _DEFAULT = PromptCache(None)
+    return _DEFAULT
@@ -0,0 +1,327 @@
+"""Automatic shot QC from the frames on their way to the encoder, plus container checks.
+
+While a shot renders inside ``tap()``, every frame handed to the encoder
+(``video.write_video``, ``video.stream_video``, ``framering.RingEncoder``;
+the Ken Burns still once) is also reduced to a few numbers computed on a
+strided subsample of its luma, about ``SAMPLE_WIDTH`` pixels across:
+
+* mean luma, for black frames and flicker;
+* mean absolute luma change from the previous frame over the frame's mean
+  spatial gradient, which estimates how many pixels the picture moved, for
+  frozen motion (exact repeats from nearest-frame retiming are not counted);
+* the share of pixels clipped to black or white.
+
+``check`` adds the encoded file's duration, resolution and frame rate (read
+by a stream-copy pass through ffmpeg) and turns both into issues. ``fail``
+issues fail the shot and ``warn`` issues are only reported. Raw footage has no
+frames in Python, so it gets the container checks only.
+
+Reports are written to ``<root>/shot_NNN.json`` and logged as ``qc`` events.
+A generated shot that fails can be regenerated with a new seed derived from
+the storyboard's; the report records which attempt the shot was rendered
+with, so later renders of an unchanged row start from that seed.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from . import ffmpeg, instrument
+
+SAMPLE_WIDTH = 240  # luma samples per row: every 8th pixel of an HD frame, every 16th at 4K
+POOL = 2  # motion is measured on POOL x POOL means of the samples
+LUMA = np.array([0.299, 0.587, 0.114], dtype=np.float32)  # BT.601, as the yuv420p conversion in the encoders
+BLACK_LUMA = 16.0  # mean luma (0-255) under which a frame counts as black
+BLACK_MAX_SHARE = 0.25  # fail when more of the shot than this is black
+FROZEN_MOTION = 0.25  # fail motion shots moving less than this many pixels per new frame
+FLICKER_SWING = 8.0  # a mean-luma swing this large, reversed on the next frame, counts as flicker
+FLICKER_MAX_SHARE = 0.02
+CLIP_LOW, CLIP_HIGH = 2.0, 253.0
+CLIPPED_MAX_SHARE = 0.2  # warn when more pixels than this are clipped on average
+DURATION_TOLERANCE_S = 0.1
+
+MOTION_METHODS = ("img2vid",)  # shots expected to move; Ken Burns and cards may hold still
+RESEED_METHODS = ("t2v", "img2vid")  # shots a new seed can fix
+
+_CHUNK = 16  # frames per vectorised step of write_video's array
+_STREAM_RE = re.compile(r"Stream #\d+:\d+.*?: Video: .*?, (\d+)x(\d+)")
+_FPS_RE = re.compile(r"Stream #\d+:\d+.*?: Video: .*?, ([\d.]+) fps")
+_DURATION_RE = re.compile(r"Duration: (\d+):(\d+):([\d.]+)")
+
+_ROOT: Optional[Path] = None
+_LOCAL = threading.local()
+
+
+def configure(root: Path | str | None) -> None:
+    """Write QC reports under ``root``; ``None`` turns QC off."""
+    global _ROOT
+    _ROOT = Path(root) if root else None
+    if _ROOT is not None:
+        _ROOT.mkdir(parents=True, exist_ok=True)
+
+
+def enabled() -> bool:
+    return _ROOT is not None
+
+
+class FrameTap:
+    """Per-frame statistics of the frames one shot hands to its encoder."""
+
+    def __init__(self) -> None:
+        self.luma: List[float] = []
+        self.change: List[float] = []  # one per frame after the first
+        self.detail: List[float] = []  # mean absolute spatial luma gradient
+        self.clipped: List[float] = []
+        self.scale = POOL  # full-resolution pixels per motion sample
+        self.seconds = 0.0
+        self._previous: Optional[np.ndarray] = None
+
+    def observe(self, frames: np.ndarray) -> None:
+        """Add uint8 RGB frames, one (H, W, 3) or a batch (T, H, W, 3)."""
+        start = time.perf_counter()
+        batch = frames[None] if frames.ndim == 3 else frames
+        step = max(batch.shape[2] // SAMPLE_WIDTH, 1)
+        self.scale = step * POOL
+        for offset in range(0, batch.shape[0], _CHUNK):
+            luma = batch[offset : offset + _CHUNK, ::step, ::step] @ LUMA
+            self.luma.extend(luma.mean(axis=(1, 2)).tolist())
+            self.clipped.extend(((luma < CLIP_LOW) | (luma > CLIP_HIGH)).mean(axis=(1, 2)).tolist())
+            # Block means average out grain and sampling noise before frames are compared.
+            height, width = luma.shape[1] // POOL * POOL, luma.shape[2] // POOL * POOL
+            coarse = luma[:, :height, :width].reshape(luma.shape[0], height // POOL, POOL, width // POOL, POOL)
+            coarse = coarse.mean(axis=(2, 4))
+            gradient = np.abs(np.diff(coarse, axis=1)).mean(axis=(1, 2)) + np.abs(np.diff(coarse, axis=2)).mean(axis=(1, 2))
+            self.detail.extend((gradient / 2).tolist())
+            sequence = coarse if self._previous is None else np.concatenate([self._previous[None], coarse])
+            self.change.extend(np.abs(np.diff(sequence, axis=0)).mean(axis=(1, 2)).tolist())
+            self._previous = coarse[-1]
+        self.seconds += time.perf_counter() - start
+
+    def stream(self, frames: Iterable[np.ndarray]) -> Iterator[np.ndarray]:
+        for frame in frames:
+            self.observe(frame)
+            yield frame
+
+
+@contextmanager
+def tap() -> Iterator[FrameTap]:
+    """Collect statistics of every frame the encode helpers see on this thread."""
+    previous = getattr(_LOCAL, "tap", None)
+    _LOCAL.tap = FrameTap()
+    try:
+        yield _LOCAL.tap
+    finally:
+        _LOCAL.tap = previous
+
+
+def current() -> Optional[FrameTap]:
+    return getattr(_LOCAL, "tap", None)
+
+
+def observe(frames) -> None:
+    """Feed frames (array or PIL image) to the active tap, if any."""
+    active = current()
+    if active is not None:
+        active.observe(np.asarray(frames))
+
+
+def stream(frames: Iterable[np.ndarray]) -> Iterable[np.ndarray]:
+    """``frames``, observed by the active tap as the encoder pulls them (on whichever thread that is)."""
+    active = current()
+    return frames if active is None else active.stream(frames)
+
+
+@dataclass
+class Container:
+    width: Optional[int] = None
+    height: Optional[int] = None
+    fps: Optional[float] = None
+    duration_s: Optional[float] = None
+
+
+def probe(path: Path) -> Container:
+    """Duration, resolution and frame rate from the headers; the stream-copy pass also proves every packet reads."""
+    result = ffmpeg.run(["ffmpeg", "-i", str(path), "-map", "0:v:0", "-c", "copy", "-f", "null", "-"])
+    info = Container()
+    size = _STREAM_RE.search(result.stderr)
+    if size:
+        info.width, info.height = int(size.group(1)), int(size.group(2))
+    rate = _FPS_RE.search(result.stderr)
+    if rate:
+        info.fps = float(rate.group(1))
+    duration = _DURATION_RE.search(result.stderr)
+    if duration:
+        hours, minutes, seconds = duration.groups()
+        info.duration_s = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    return info
+
+
+@dataclass
+class Issue:
+    check: str  # black | frozen | flicker | clipped | resolution | fps | duration
+    severity: str  # fail | warn
+    detail: str
+
+
+@dataclass
+class ShotReport:
+    row_no: int
+    method: str
+    prompt: str
+    storyboard_seed: Optional[int]
+    seed: Optional[int]  # the seed this attempt rendered with
+    attempt: int
+    frames_tapped: int = 0
+    tap_s: float = 0.0
+    luma_mean: Optional[float] = None
+    black_frames: int = 0
+    motion: Optional[float] = None  # estimated pixels moved per new frame
+    flicker: int = 0
+    clipped: Optional[float] = None
+    container: Dict = field(default_factory=dict)
+    issues: List[Issue] = field(default_factory=list)
+
+    @property
+    def passed(self) -> bool:
+        return not self.failures
+
+    @property
+    def failures(self) -> List[Issue]:
+        return [issue for issue in self.issues if issue.severity == "fail"]
+
+    @property
+    def warnings(self) -> List[Issue]:
+        return [issue for issue in self.issues if issue.severity == "warn"]
+
+
+def _frame_checks(report: ShotReport, frame_tap: FrameTap) -> None:
+    luma = np.asarray(frame_tap.luma, dtype=np.float32)
+    change = np.asarray(frame_tap.change, dtype=np.float32)
+    count = luma.size
+    report.frames_tapped = count
+    report.tap_s = frame_tap.seconds
+    if not count:
+        return
+    report.luma_mean = float(luma.mean())
+    report.black_frames = int((luma < BLACK_LUMA).sum())
+    report.clipped = float(np.mean(frame_tap.clipped))
+    if report.black_frames > BLACK_MAX_SHARE * count:
+        report.issues.append(Issue("black", "fail", f"{report.black_frames} of {count} frames are black"))
+    if report.clipped > CLIPPED_MAX_SHARE:
+        report.issues.append(Issue("clipped", "warn", f"{report.clipped:.0%} of pixels clipped to black or white"))
+
+    # Frames repeated by retiming are identical; motion and flicker are measured over new frames only.
+    fresh = np.concatenate([[True], change > 0])
+    if count > 1:
+        detail = float(np.mean(np.asarray(frame_tap.detail)[fresh]))
+        moves = change[change > 0]
+        report.motion = float(moves.mean() / max(detail, 1e-3) * frame_tap.scale) if moves.size else 0.0
+        if report.method in MOTION_METHODS and report.motion < FROZEN_MOTION:
+            report.issues.append(
+                Issue("frozen", "fail", f"moves {report.motion:.2f} px per frame (under {FROZEN_MOTION})")
+            )
+    swings = np.diff(luma[fresh])
+    large = np.abs(swings) > FLICKER_SWING
+    report.flicker = int((large[:-1] & large[1:] & (np.sign(swings[:-1]) != np.sign(swings[1:]))).sum())
+    if report.flicker > max(1.0, FLICKER_MAX_SHARE * count):
+        report.issues.append(Issue("flicker", "fail", f"{report.flicker} brightness reversals over {count} frames"))
+
+
+def _container_checks(
+    report: ShotReport, info: Container, size: Tuple[int, int], fps: int, duration_s: float
+) -> None:
+    report.container = asdict(info)
+    if info.width is not None and (info.width, info.height) != tuple(size):
+        report.issues.append(Issue("resolution", "fail", f"{info.width}x{info.height}, expected {size[0]}x{size[1]}"))
+    if info.fps is not None and abs(info.fps - fps) > 0.01:
+        report.issues.append(Issue("fps", "fail", f"{info.fps:g} fps, expected {fps}"))
+    duration = info.duration_s
+    if duration is not None and abs(duration - duration_s) > DURATION_TOLERANCE_S:
+        report.issues.append(Issue("duration", "fail", f"{duration:.2f} s, expected {duration_s:.2f} s"))
+
+
+def check(
+    path: Path,
+    frame_tap: FrameTap | None,
+    *,
+    row_no: int,
+    method: str,
+    prompt: str,
+    storyboard_seed: Optional[int],
+    seed: Optional[int],
+    attempt: int,
+    size: Tuple[int, int],
+    fps: int,
+    duration_s: float,
+) -> ShotReport:
+    """QC one encoded shot against its storyboard row; also writes the report and logs the event."""
+    report = ShotReport(row_no, method, prompt, storyboard_seed, seed, attempt)
+    if frame_tap is not None:
+        _frame_checks(report, frame_tap)
+    _container_checks(report, probe(path), size, fps, duration_s)
+    _write(report, frame_tap)
+    instrument.emit({"event": "qc", **asdict(report), "passed": report.passed})
+    return report
+
+
+def _report_path(row_no: int) -> Path:
+    return _ROOT / f"shot_{row_no:03d}.json"
+
+
+def _replace(path: Path, text: str) -> None:
+    tmp = path.with_name(f"{path.stem}.tmp-{os.getpid()}-{threading.get_ident()}{path.suffix}")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _write(report: ShotReport, frame_tap: FrameTap | None) -> None:
+    if _ROOT is None:
+        return
+    data = {**asdict(report), "passed": report.passed}
+    if frame_tap is not None:
+        data["series"] = {
+            "luma": [round(value, 2) for value in frame_tap.luma],
+            "change": [round(value, 3) for value in frame_tap.change],
+            "clipped": [round(value, 4) for value in frame_tap.clipped],
+        }
+    _replace(_report_path(report.row_no), json.dumps(data, indent=1))
+
+
+def last_report(row_no: int) -> Optional[Dict]:
+    """The latest report written for a row, without its per-frame series."""
+    if _ROOT is None or not _report_path(row_no).exists():
+        return None
+    try:
+        data = json.loads(_report_path(row_no).read_text(encoding="utf-8"))
+    except ValueError:
+        return None
+    data.pop("series", None)
+    return data
+
+
+def reseed(row_no: int, seed: Optional[int], attempt: int) -> int:
+    """Seed for regeneration attempt ``attempt`` of a row, derived from the storyboard seed."""
+    digest = hashlib.sha256(f"qc\x1f{row_no}\x1f{seed}\x1f{attempt}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:4], "little") & 0x7FFFFFFF
+
+
+def last_render(row_no: int, prompt: str, seed: Optional[int]) -> Optional[Dict]:
+    """The row's latest report, if it was for the same prompt and storyboard seed."""
+    report = last_report(row_no)
+    if report is None or report.get("prompt") != prompt or report.get("storyboard_seed") != seed:
+        return None
+    return report
+
+
+def seed_for(row_no: int, seed: Optional[int], attempt: int) -> Optional[int]:
+    return seed if attempt == 0 else reseed(row_no, seed, attempt)
@@ -0,0 +1,303 @@
+from __future__ import annotations
+
+import html
+import json
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Columns shown in the per-shot breakdown, in pipeline order.
+SHOT_STAGES = (
+    "model_load",
+    "sdxl",
+    "svd",
+    "vae_decode",
+    "retime_resize",
+    "encode",
+    "qc",
+    "overlay",
+)
+
+
+def load_events(path: Path | str, run_id: str | None = None) -> List[Dict]:
+    """Read stage events from a JSONL log, keeping only ``run_id`` (default: the last run)."""
+    events: List[Dict] = []
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            events.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+    if run_id is None and events:
+        run_id = events[-1].get("run_id")
+    return [event for event in events if event.get("run_id") == run_id]
+
+
+def _fmt_seconds(value: float) -> str:
+    if value >= 120:
+        return f"{value / 60:.1f} min"
+    return f"{value:.2f} s"
+
+
+def _fmt_bytes(value: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if value < 1000:
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1000
+    return f"{value:.1f} TB"
+
+
+def _fmt_mb(value: Optional[float]) -> str:
+    return "—" if value is None else f"{value:,.0f}"
+
+
+def _fmt_float(value: Optional[float], spec: str = ".1f") -> str:
+    return "—" if value is None else format(value, spec)
+
+
+def summarise(events: Sequence[Dict]) -> Dict[str, Any]:
+    """Aggregate stage events into the tables rendered by the report."""
+    stages = [event for event in events if event.get("event") == "stage"]
+
+    by_stage: Dict[str, Dict] = defaultdict(
+        lambda: {
+            "count": 0, "wall": 0.0, "cpu": 0.0, "child_cpu": 0.0, "rss": 0.0, "device": None, "bytes": 0, "shared": False
+        }
+    )
+    for event in stages:
+        agg = by_stage[event["stage"]]
+        agg["count"] += 1
+        agg["wall"] += event.get("wall_s", 0.0)
+        agg["cpu"] += event.get("cpu_s", 0.0)
+        agg["child_cpu"] += event.get("child_cpu_s", 0.0)
+        agg["rss"] = max(agg["rss"], event.get("peak_rss_mb", 0.0))
+        device = event.get("peak_device_mb")
+        if device is not None:
+            agg["device"] = max(agg["device"] or 0.0, device)
+        agg["bytes"] += event.get("bytes_written", 0)
+        agg["shared"] = agg["shared"] or event.get("peak_shared", False)
+    stage_rows = sorted(
+        (
+            (
+                name, agg["count"], agg["wall"], agg["cpu"], agg["child_cpu"], agg["rss"], agg["device"], agg["bytes"],
+                agg["shared"],
+            )
+            for name, agg in by_stage.items()
+        ),
+        key=lambda row: row[2],
+        reverse=True,
+    )
+
+    shot_totals: Dict[int, Dict] = {}
+    for event in stages:
+        row_no = event.get("row_no")
+        if row_no is None:
+            continue
+        shot = shot_totals.setdefault(
+            row_no, {"method": event.get("method") or "?", "wall": 0.0, "stages": defaultdict(float)}
+        )
+        if event["stage"] == "shot":
+            shot["wall"] += event.get("wall_s", 0.0)
+        else:
+            shot["stages"][event["stage"]] += event.get("wall_s", 0.0)
+    shot_rows = [
+        (row_no, shot["method"], shot["wall"], *(shot["stages"].get(name, 0.0) for name in SHOT_STAGES))
+        for row_no, shot in sorted(shot_totals.items())
+    ]
+
+    by_method: Dict[str, Dict] = defaultdict(lambda: {"count": 0, "wall": 0.0, "stages": defaultdict(float)})
+    for _, method, wall, *stage_walls in shot_rows:
+        agg = by_method[method]
+        agg["count"] += 1
+        agg["wall"] += wall
+        for name, value in zip(SHOT_STAGES, stage_walls):
+            agg["stages"][name] += value
+    method_rows = [
+        (
+            method,
+            agg["count"],
+            agg["wall"],
+            agg["wall"] / agg["count"] if agg["count"] else 0.0,
+            *(agg["stages"][name] / agg["count"] if agg["count"] else 0.0 for name in SHOT_STAGES),
+        )
+        for method, agg in sorted(by_method.items(), key=lambda item: item[1]["wall"], reverse=True)
+    ]
+
+    # Stages on worker threads have no parent, so the run span is taken from timestamps.
+    if stages:
+        run_wall = max(e.get("ts_start", 0.0) + e.get("wall_s", 0.0) for e in stages) - min(
+            e.get("ts_start", 0.0) for e in stages
+        )
+    else:
+        run_wall = 0.0
+    deliverable_rows = [
+        (event["name"], event.get("wall_s", 0.0), event.get("cpu_s", 0.0), event.get("bytes", 0))
+        for event in events
+        if event.get("event") == "deliverable"
+    ]
+    critical = [event for event in events if event.get("event") == "critical_path"]
+    critical_rows = [
+        (task["task"], task.get("pool", ""), task.get("wall_s", 0.0), task.get("queued_s", 0.0), task.get("state", ""))
+        for task in (critical[-1]["tasks"] if critical else [])
+    ]
+    store_counts: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
+    for event in events:
+        if event.get("event") == "frame_store":
+            store_counts[event.get("method") or "?"][0 if event.get("hit") else 1] += 1
+    frame_store_rows = [(method, hits, misses) for method, (hits, misses) in sorted(store_counts.items())]
+    storage = [event for event in events if event.get("event") == "storage"]
+
+    # One QC event per render attempt; the last one describes the shot that was kept.
+    qc_attempts: Dict[int, List[Dict]] = defaultdict(list)
+    for event in events:
+        if event.get("event") == "qc":
+            qc_attempts[event["row_no"]].append(event)
+    qc_rows = []
+    for row_no, attempts in sorted(qc_attempts.items()):
+        last = attempts[-1]
+        encode = shot_totals[row_no]["stages"].get("encode", 0.0) if row_no in shot_totals else 0.0
+        tap = sum(event.get("tap_s", 0.0) for event in attempts)
+        issues = "; ".join(f"{issue['severity']}: {issue['detail']}" for issue in last.get("issues", []))
+        qc_rows.append(
+            (
+                row_no, last.get("method") or "?", len(attempts), last.get("seed"), last.get("frames_tapped", 0),
+                last.get("luma_mean"), last.get("black_frames", 0), last.get("motion"), last.get("flicker", 0),
+                last.get("clipped"), last.get("container", {}).get("duration_s"), tap / encode if encode else None,
+                issues or "pass",
+            )
+        )
+    return {
+        "stages": stage_rows,
+        "shots": shot_rows,
+        "methods": method_rows,
+        "deliverables": deliverable_rows,
+        "critical_path": critical_rows,
+        "frame_store": frame_store_rows,
+        "storage": storage[-1] if storage else None,
+        "qc": qc_rows,
+        "run_wall": run_wall,
+    }
+
+
+def _tables(summary: Dict[str, Any]) -> List[Tuple[str, List[str], List[List[str]]]]:
+    # A starred peak overlapped another thread's stages: it is the process's peak over the window, not the stage's own.
+    stage_table = [
+        [
+            name, str(count), _fmt_seconds(wall), _fmt_seconds(cpu), _fmt_seconds(child),
+            _fmt_mb(rss) + ("*" if shared else ""), _fmt_mb(device) + ("*" if shared and device is not None else ""),
+            _fmt_bytes(nbytes),
+        ]
+        for name, count, wall, cpu, child, rss, device, nbytes, shared in summary["stages"]
+    ]
+    stage_heading = "Per-stage totals"
+    if any(row[-1] for row in summary["stages"]):
+        stage_heading += " (* process-wide peak while other stages ran concurrently)"
+    method_table = [
+        [method, str(count), _fmt_seconds(total), _fmt_seconds(mean), *(f"{value:.2f}" for value in stage_means)]
+        for method, count, total, mean, *stage_means in summary["methods"]
+    ]
+    shot_table = [
+        [str(row_no), method, _fmt_seconds(wall), *(f"{value:.2f}" for value in stage_walls)]
+        for row_no, method, wall, *stage_walls in summary["shots"]
+    ]
+    tables = [
+        (
+            stage_heading,
+            ["stage", "calls", "wall", "cpu", "child cpu", "peak RSS MB", "peak device MB", "written"],
+            stage_table,
+        ),
+        ("Per-method breakdown (mean seconds per shot)", ["method", "shots", "total", "mean", *SHOT_STAGES], method_table),
+        ("Per-shot breakdown (seconds)", ["row", "method", "total", *SHOT_STAGES], shot_table),
+    ]
+    if summary.get("deliverables"):
+        deliverable_table = [
+            [name, _fmt_seconds(wall), _fmt_seconds(cpu), _fmt_bytes(nbytes)]
+            for name, wall, cpu, nbytes in summary["deliverables"]
+        ]
+        tables.append(("Deliverables (one shared decode)", ["deliverable", "done at", "encoder cpu", "size"], deliverable_table))
+    if summary.get("frame_store"):
+        store_table = [
+            [method, str(hits + misses), str(hits), str(misses)] for method, hits, misses in summary["frame_store"]
+        ]
+        tables.append(("Frame store", ["method", "shots", "from stored frames", "generated"], store_table))
+    storage = summary.get("storage")
+    if storage:
+        storage_table = [
+            [tier, str(row["files"]), _fmt_bytes(row["bytes"]), str(row["evicted"])]
+            for tier, row in storage["tiers"].items()
+        ]
+        tables.append(("Storage (tracked artefacts)", ["tier", "files", "size", "evicted"], storage_table))
+        io_table = [
+            ["artefacts", _fmt_bytes(storage["artefact_bytes_written"]), _fmt_bytes(storage["artefact_bytes_read"])],
+            ["block I/O", _fmt_bytes(storage["block_bytes_written"]), _fmt_bytes(storage["block_bytes_read"])],
+        ]
+        tables.append(("Run I/O", ["", "written", "read"], io_table))
+    if summary.get("qc"):
+        qc_table = [
+            [
+                str(row_no), method, str(attempts), "—" if seed is None else str(seed), str(frames), _fmt_float(luma),
+                str(black), _fmt_float(motion, ".2f"), str(flicker), _fmt_float(clipped, ".1%"),
+                _fmt_float(duration, ".2f"), _fmt_float(tap_share, ".1%"), result,
+            ]
+            for row_no, method, attempts, seed, frames, luma, black, motion, flicker, clipped, duration, tap_share, result
+            in summary["qc"]
+        ]
+        tables.append(
+            (
+                "Shot QC",
+                ["row", "method", "renders", "seed", "frames tapped", "mean luma", "black", "motion", "flicker",
+                 "clipped", "duration s", "tap / encode", "result"],
+                qc_table,
+            )
+        )
+    if summary.get("critical_path"):
+        critical_table = [
+            [task, pool, _fmt_seconds(wall), _fmt_seconds(queued), state]
+            for task, pool, wall, queued, state in summary["critical_path"]
+        ]
+        tables.append(("Critical path", ["task", "pool", "wall", "queued for pool", "state"], critical_table))
+    return tables
+
+
+def render_markdown(summary: Dict[str, Any], title: str = "Render run report") -> str:
+    lines = [f"# {title}", "", f"Run wall time: {_fmt_seconds(summary['run_wall'])}", ""]
+    for heading, header, rows in _tables(summary):
+        lines.extend([f"## {heading}", "", "| " + " | ".join(header) + " |", "|" + "---|" * len(header)])
+        lines.extend("| " + " | ".join(row) + " |" for row in rows)
+        lines.append("")
+    return "\n".join(lines)
+
+
+def render_html(summary: Dict[str, Any], title: str = "Render run report") -> str:
+    parts = [
+        "<!DOCTYPE html>",
+        f"<html><head><meta charset='utf-8'><title>{html.escape(title)}</title>",
+        "<style>body{font-family:sans-serif;margin:2em}table{border-collapse:collapse;margin-bottom:2em}"
+        "td,th{border:1px solid #ccc;padding:4px 8px;text-align:right}th{background:#002147;color:#fff}"
+        "td:first-child,th:first-child{text-align:left}</style></head><body>",
+        f"<h1>{html.escape(title)}</h1>",
+        f"<p>Run wall time: {_fmt_seconds(summary['run_wall'])}</p>",
+    ]
+    for heading, header, rows in _tables(summary):
+        parts.append(f"<h2>{html.escape(heading)}</h2><table><tr>")
+        parts.extend(f"<th>{html.escape(cell)}</th>" for cell in header)
+        parts.append("</tr>")
+        for row in rows:
+            parts.append("<tr>" + "".join(f"<td>{html.escape(cell)}</td>" for cell in row) + "</tr>")
+        parts.append("</table>")
+    parts.append("</body></html>")
+    return "\n".join(parts)
+
+
+def write_report(events_path: Path | str, out_dir: Path | str, run_id: str | None = None) -> Tuple[Path, Path]:
+    """Summarise a run's events into ``run_report.md`` and ``run_report.html``."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    summary = summarise(load_events(events_path, run_id))
+    md_path = out_dir / "run_report.md"
+    html_path = out_dir / "run_report.html"
+    md_path.write_text(render_markdown(summary), encoding="utf-8")
+    html_path.write_text(render_html(summary), encoding="utf-8")
+    return md_path, html_path
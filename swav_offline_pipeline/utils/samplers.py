@@ -0,0 +1,141 @@
+"""Sampler profiles for the SDXL calls: scheduler, step count and guidance.
+
+Profiles are named like encoder profiles and picked per method (``t2v`` for
+the Ken Burns stills, ``img2vid`` for the SVD base frame). The defaults keep
+the previous hardcoded settings; a storyboard can override them under
+``project.samplers`` with a profile name or a profile plus field overrides::
+
+    project:
+      samplers:
+        t2v: dpmpp_2m_karras_20
+        img2vid: {profile: dpmpp_2m_karras_20, steps: 16}
+
+``tools/bench_samplers.py`` renders a fixed prompt set with several profiles
+and scores each against a reference profile, to find the cheapest one that
+still meets the quality bar.
+"""
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, replace
+from typing import Any, Dict, Mapping
+
+# Scheduler names understood by ``models.set_sdxl_scheduler``; "default" keeps the one shipped with the model.
+SCHEDULERS = ("default", "dpmpp_2m", "dpmpp_2m_sde", "euler", "euler_a", "unipc", "ddim")
+
+METHODS = ("t2v", "img2vid")
+
+
+@dataclass(frozen=True)
+class SamplerProfile:
+    name: str
+    scheduler: str = "default"
+    steps: int = 30
+    guidance: float = 7.0
+    karras: bool = False  # Karras sigma spacing (DPM++ and Euler schedulers)
+    description: str = ""
+
+    def pipe_kwargs(self) -> Dict[str, Any]:
+        return {"num_inference_steps": self.steps, "guidance_scale": self.guidance}
+
+    def key(self) -> Dict[str, Any]:
+        """Fields that change the generated image (everything but the labels)."""
+        fields = asdict(self)
+        fields.pop("name")
+        fields.pop("description")
+        return fields
+
+
+PROFILES: Dict[str, SamplerProfile] = {
+    "legacy_t2v": SamplerProfile(
+        name="legacy_t2v", steps=30, guidance=7.0, description="Previous t2v settings: model scheduler, 30 steps"
+    ),
+    "legacy_img2vid": SamplerProfile(
+        name="legacy_img2vid", steps=25, guidance=6.5, description="Previous img2vid base-frame settings, 25 steps"
+    ),
+    "single_shot_t2v": SamplerProfile(
+        name="single_shot_t2v", steps=30, guidance=7.5, description="render_single_shot's t2v settings, guidance 7.5"
+    ),
+    "single_shot_img2vid": SamplerProfile(
+        name="single_shot_img2vid",
+        steps=25,
+        guidance=7.5,
+        description="render_single_shot's img2vid base-frame settings, guidance 7.5",
+    ),
+    "dpmpp_2m_karras_30": SamplerProfile(
+        name="dpmpp_2m_karras_30",
+        scheduler="dpmpp_2m",
+        karras=True,
+        steps=30,
+        guidance=7.0,
+        description="DPM++ 2M Karras, 30 steps; quality reference for benchmarks",
+    ),
+    "dpmpp_2m_karras_20": SamplerProfile(
+        name="dpmpp_2m_karras_20",
+        scheduler="dpmpp_2m",
+        karras=True,
+        steps=20,
+        guidance=6.5,
+        description="DPM++ 2M Karras, 20 steps",
+    ),
+    "dpmpp_2m_karras_12": SamplerProfile(
+        name="dpmpp_2m_karras_12",
+        scheduler="dpmpp_2m",
+        karras=True,
+        steps=12,
+        guidance=6.0,
+        description="DPM++ 2M Karras, 12 steps; drafts and previews",
+    ),
+    "euler_20": SamplerProfile(
+        name="euler_20", scheduler="euler", steps=20, guidance=6.5, description="Euler, 20 steps"
+    ),
+    "unipc_14": SamplerProfile(
+        name="unipc_14", scheduler="unipc", steps=14, guidance=6.5, description="UniPC, 14 steps"
+    ),
+}
+
+_METHOD_DEFAULTS: Dict[str, str] = {
+    "t2v": "legacy_t2v",
+    "img2vid": "legacy_img2vid",
+}
+
+_METHOD_PROFILES: Dict[str, SamplerProfile] = {method: PROFILES[name] for method, name in _METHOD_DEFAULTS.items()}
+
+
+def get_profile(name: str) -> SamplerProfile:
+    try:
+        return PROFILES[name]
+    except KeyError as exc:
+        raise ValueError(f"Unknown sampler profile '{name}'. Known: {', '.join(sorted(PROFILES))}") from exc
+
+
+def resolve(spec: str | Mapping[str, Any]) -> SamplerProfile:
+    """Profile from a name or a ``{profile: name, steps: ..., ...}`` mapping of overrides."""
+    if isinstance(spec, str):
+        return get_profile(spec)
+    overrides = dict(spec)
+    profile = get_profile(overrides.pop("profile", "legacy_t2v"))
+    unknown = set(overrides) - set(profile.key())
+    if unknown:
+        raise ValueError(f"Unknown sampler fields {sorted(unknown)} (allowed: {', '.join(profile.key())})")
+    if overrides.get("scheduler", profile.scheduler) not in SCHEDULERS:
+        raise ValueError(f"Unknown scheduler '{overrides['scheduler']}'. Known: {', '.join(SCHEDULERS)}")
+    return replace(profile, name=f"{profile.name}*", **overrides)
+
+
+def configure(config: Mapping[str, Any] | None, override: str | None = None) -> None:
+    """Apply ``project.samplers`` from the storyboard; ``override`` (a profile name) wins for every method."""
+    config = dict(config or {})
+    unknown = set(config) - set(METHODS)
+    if unknown:
+        raise ValueError(f"project.samplers has unknown methods {sorted(unknown)} (known: {', '.join(METHODS)})")
+    for method in METHODS:
+        if override:
+            _METHOD_PROFILES[method] = get_profile(override)
+        elif method in config:
+            _METHOD_PROFILES[method] = resolve(config[method])
+        else:
+            _METHOD_PROFILES[method] = PROFILES[_METHOD_DEFAULTS[method]]
+
+
+def profile_for(method: str) -> SamplerProfile:
+    return _METHOD_PROFILES[method]
@@ -0,0 +1,113 @@
+"""Persistent cache of XTTS speaker conditioning.
+
+XTTS conditions every utterance on two tensors, the GPT conditioning latents
+and the speaker embedding. ``TTS.tts`` recomputes them from the reference
+clips of a cloned voice on every call; ``audio.synthesize_voiceover`` instead
+resolves each cloned voice once through this cache and passes the tensors to
+``Xtts.inference`` directly. Built-in speakers already ship their tensors
+with the checkpoint and are not cached.
+
+Entries are keyed by a fingerprint of the XTTS checkpoint and the content
+hashes of the reference clips, so editing or replacing a clip makes a new
+entry. They are stored as ``.npz``
+files and shared safely between runs and farm workers.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+from . import instrument
+
+FIELDS = ("gpt_cond_latent", "speaker_embedding")
+
+_DEFAULT: Optional["SpeakerCache"] = None
+
+
+def to_numpy(value: Any) -> np.ndarray:
+    """A float32 array from a torch tensor (on any device) or anything array-like."""
+    if hasattr(value, "detach"):
+        value = value.detach().float().cpu()
+    return np.asarray(value, dtype=np.float32)
+
+
+def _file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SpeakerCache:
+    def __init__(self, root: Path | None) -> None:
+        self.root = Path(root) if root else None
+        self.hits = 0
+        self.computed = 0
+        self._memory: Dict[str, Dict[str, np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+    def key(self, fingerprint: str, clips: Sequence[Path]) -> str:
+        payload = "\x1f".join([fingerprint, *(_file_digest(Path(clip)) for clip in clips)])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+    def _path(self, key: str) -> Optional[Path]:
+        return self.root / f"{key}.npz" if self.root else None
+
+    def _get(self, key: str) -> Optional[Dict[str, np.ndarray]]:
+        entry = self._memory.get(key)
+        if entry is None:
+            path = self._path(key)
+            if path is None or not path.exists():
+                return None
+            with np.load(path) as data:
+                entry = {name: data[name] for name in FIELDS}
+            self._memory[key] = entry
+        return entry
+
+    def _put(self, key: str, entry: Dict[str, np.ndarray]) -> None:
+        self._memory[key] = entry
+        path = self._path(key)
+        if path is None:
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{key}.tmp-{os.getpid()}.npz")
+        np.savez(tmp, **entry)
+        os.replace(tmp, path)
+
+    def conditioning(self, model: Any, fingerprint: str, clips: Sequence[Path]) -> Dict[str, np.ndarray]:
+        """``gpt_cond_latent`` and ``speaker_embedding`` of the voice cloned from the reference ``clips``."""
+        if not clips:
+            raise ValueError("Speaker conditioning is only cached for voices cloned from reference clips")
+        with self._lock:
+            key = self.key(fingerprint, clips)
+            entry = self._get(key)
+            if entry is not None:
+                self.hits += 1
+                return entry
+            with instrument.stage("speaker_latents", clips=len(clips)):
+                latent, embedding = model.get_conditioning_latents(audio_path=[str(clip) for clip in clips])
+            entry = {"gpt_cond_latent": to_numpy(latent), "speaker_embedding": to_numpy(embedding)}
+            self._put(key, entry)
+            self.computed += 1
+            return entry
+
+
+def configure(root: Path | str | None) -> SpeakerCache:
+    """Set the cache used by the voiceover; ``root=None`` keeps conditioning in memory only."""
+    global _DEFAULT
+    _DEFAULT = SpeakerCache(Path(root) if root else None)
+    return _DEFAULT
+
+
+def default() -> SpeakerCache:
+    """The configured cache, or an in-memory one if nothing was configured."""
+    global _DEFAULT
+    if _DEFAULT is None:
+        _DEFAULT = SpeakerCache(None)
+    return _DEFAULT
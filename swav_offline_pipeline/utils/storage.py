@@ -0,0 +1,245 @@
+"""Intermediate storage: artefact manifest with retention tiers, LRU eviction under a quota, and scratch files."""
+from __future__ import annotations
+
+import json
+import os
+import resource
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from . import instrument
+
+TIERS = ("derived", "generated", "kept")  # eviction order; "kept" is never evicted
+EVICTABLE = ("derived", "generated")
+
+TMPFS = Path("/dev/shm")
+# Free space left on tmpfs after a scratch file (it is RAM shared with the models and ffmpeg).
+SCRATCH_RESERVE = 1 << 30
+
+_UNITS = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+
+_DEFAULT: Optional["StorageManager"] = None
+_SCRATCH: List[Path] = []
+
+
+def parse_size(text: str) -> int:
+    """Bytes in a size such as ``500M``, ``200G`` or ``1.5T`` (binary units; a bare number is bytes)."""
+    value = text.strip().upper().removesuffix("IB").removesuffix("B")
+    unit = value[-1:] if value[-1:] in _UNITS else ""
+    try:
+        return int(float(value[: len(value) - len(unit)]) * _UNITS[unit])
+    except ValueError as exc:
+        raise ValueError(f"Invalid size '{text}' (expected e.g. 500M, 200G, 1.5T)") from exc
+
+
+def format_size(value: float) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if value < 1024:
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} TiB"
+
+
+@dataclass
+class Artefact:
+    path: str  # relative to the output directory
+    producer: str
+    tier: str
+    size: int
+    mtime_ns: int
+    created: float
+    last_used: float
+    evicted: bool = False
+
+
+def _block_io() -> Dict[str, int]:
+    """Bytes read from and written to block devices by this process and its reaped children."""
+    own, children = resource.getrusage(resource.RUSAGE_SELF), resource.getrusage(resource.RUSAGE_CHILDREN)
+    return {
+        "read": (own.ru_inblock + children.ru_inblock) * 512,
+        "written": (own.ru_oublock + children.ru_oublock) * 512,
+    }
+
+
+class StorageManager:
+    """Manifest of the artefacts under ``root`` with an optional quota (bytes) on their total size."""
+
+    def __init__(self, root: Path, quota: int | None = None) -> None:
+        self.root = root
+        self.quota = quota
+        self.manifest_path = root / "intermediate" / "storage.json"
+        self.artefacts: Dict[str, Artefact] = {}
+        self.bytes_written = 0
+        self.bytes_read = 0
+        self.evictions: List[Artefact] = []
+        self._io_start = _block_io()
+        self._lock = threading.Lock()
+        if self.manifest_path.exists():
+            try:
+                entries = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+            except ValueError:
+                entries = []
+            for entry in entries:
+                artefact = Artefact(**entry)
+                # A tracked file removed by hand is simply gone: its producer rebuilds it as a missing output.
+                if artefact.evicted or self._path(artefact).exists():
+                    self.artefacts[artefact.path] = artefact
+
+    def _key(self, path: Path) -> str:
+        try:
+            return str(Path(path).resolve().relative_to(self.root.resolve()))
+        except ValueError:
+            return str(Path(path).resolve())
+
+    def _path(self, artefact: Artefact) -> Path:
+        return self.root / artefact.path
+
+    def save(self) -> None:
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.manifest_path.with_suffix(".tmp")
+        entries = [asdict(artefact) for _, artefact in sorted(self.artefacts.items())]
+        tmp.write_text(json.dumps(entries, indent=1), encoding="utf-8")
+        os.replace(tmp, self.manifest_path)
+
+    def record(self, paths: Iterable[Path], producer: str, tier: str) -> None:
+        """Register files just written by ``producer``."""
+        if tier not in TIERS:
+            raise ValueError(f"Unknown storage tier '{tier}'. Known: {', '.join(TIERS)}")
+        now = time.time()
+        with self._lock:
+            for path in paths:
+                try:
+                    stat = Path(path).stat()
+                except OSError:
+                    continue
+                key = self._key(path)
+                previous = self.artefacts.get(key)
+                self.artefacts[key] = Artefact(
+                    key, producer, tier, stat.st_size, stat.st_mtime_ns, previous.created if previous else now, now
+                )
+                self.bytes_written += stat.st_size
+            self.save()
+
+    def touch(self, paths: Iterable[Path]) -> None:
+        """Mark files as just read by a task."""
+        now = time.time()
+        with self._lock:
+            for path in paths:
+                artefact = self.artefacts.get(self._key(path))
+                if artefact is not None and not artefact.evicted:
+                    artefact.last_used = now
+                    self.bytes_read += artefact.size
+
+    def evicted(self) -> Dict[Path, int]:
+        """Recorded mtimes of evicted files, for the scheduler's up-to-date checks."""
+        with self._lock:
+            return {
+                self._path(artefact): artefact.mtime_ns
+                for artefact in self.artefacts.values()
+                if artefact.evicted and not self._path(artefact).exists()
+            }
+
+    def usage(self) -> int:
+        return sum(artefact.size for artefact in self.artefacts.values() if not artefact.evicted)
+
+    def enforce(self, pinned: Iterable[Path] = ()) -> List[Artefact]:
+        """Evict least recently used regenerable files, cheapest tier first, until usage fits the quota."""
+        if self.quota is None:
+            return []
+        keep = {self._key(path) for path in pinned}
+        evicted: List[Artefact] = []
+        with self._lock:
+            usage = self.usage()
+            candidates = sorted(
+                (
+                    artefact
+                    for artefact in self.artefacts.values()
+                    if artefact.tier in EVICTABLE and not artefact.evicted and artefact.path not in keep
+                ),
+                key=lambda artefact: (EVICTABLE.index(artefact.tier), artefact.last_used),
+            )
+            for artefact in candidates:
+                if usage <= self.quota:
+                    break
+                self._path(artefact).unlink(missing_ok=True)
+                artefact.evicted = True
+                usage -= artefact.size
+                evicted.append(artefact)
+            if evicted:
+                self.evictions.extend(evicted)
+                self.save()
+        for artefact in evicted:
+            instrument.emit(
+                {
+                    "event": "storage_evict",
+                    "path": artefact.path,
+                    "producer": artefact.producer,
+                    "tier": artefact.tier,
+                    "bytes": artefact.size,
+                }
+            )
+        return evicted
+
+    def summary(self) -> Dict:
+        """Per-run I/O and the current footprint per tier."""
+        io_now = _block_io()
+        tiers = {tier: {"files": 0, "bytes": 0, "evicted": 0} for tier in TIERS}
+        for artefact in self.artefacts.values():
+            if artefact.evicted:
+                tiers[artefact.tier]["evicted"] += 1
+            else:
+                tiers[artefact.tier]["files"] += 1
+                tiers[artefact.tier]["bytes"] += artefact.size
+        return {
+            "quota": self.quota,
+            "usage": self.usage(),
+            "tiers": tiers,
+            "artefact_bytes_written": self.bytes_written,
+            "artefact_bytes_read": self.bytes_read,
+            "block_bytes_written": io_now["written"] - self._io_start["written"],
+            "block_bytes_read": io_now["read"] - self._io_start["read"],
+            "evicted_files": len(self.evictions),
+            "evicted_bytes": sum(artefact.size for artefact in self.evictions),
+            "scratch": [str(path) for path in _SCRATCH],
+        }
+
+
+def configure(root: Path, quota: int | None = None, scratch: Path | None = None) -> StorageManager:
+    """Track artefacts under ``root`` and route scratch files to ``scratch`` (default: tmpfs, then intermediate/scratch)."""
+    global _DEFAULT
+    _DEFAULT = StorageManager(Path(root), quota)
+    _SCRATCH[:] = [Path(scratch)] if scratch else [TMPFS / "swav_scratch", Path(root) / "intermediate" / "scratch"]
+    return _DEFAULT
+
+
+def default() -> Optional[StorageManager]:
+    return _DEFAULT
+
+
+def _free(path: Path) -> int:
+    try:
+        path.mkdir(parents=True, exist_ok=True)
+        return shutil.disk_usage(path).free if os.access(path, os.W_OK) else 0
+    except OSError:
+        return 0
+
+
+def scratch_file(suffix: str, size_hint: int = 0) -> Path:
+    """A fresh path for a temporary file of about ``size_hint`` bytes; the caller deletes it.
+
+    The first scratch directory with room for the file wins; tmpfs keeps
+    ``SCRATCH_RESERVE`` free. Without ``configure`` this is the system temp dir.
+    """
+    name = f"{uuid.uuid4().hex}{suffix}"
+    for idx, directory in enumerate(_SCRATCH):
+        reserve = SCRATCH_RESERVE if directory.is_relative_to(TMPFS) else 0
+        if idx == len(_SCRATCH) - 1 or _free(directory) >= size_hint + reserve:
+            directory.mkdir(parents=True, exist_ok=True)
+            return directory / name
+    return Path(tempfile.gettempdir()) / name
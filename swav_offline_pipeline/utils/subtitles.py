@@ -1,52 +1,333 @@
 from __future__ import annotations
 
+import re
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Sequence
+from typing import Dict, List, Optional, Sequence, Tuple
 
-MIN_DURATION = 3.5
+import numpy as np
+
+MIN_DURATION = 1.0
 MAX_DURATION = 7.0
-GAP = 0.25
+MAX_CPS = 17.0
+MAX_LINE_CHARS = 42
+MAX_LINES = 2
+GAP = 0.08  # two frames at 25/30 fps between consecutive cues
+ENERGY_HOP_S = 0.01
+ENERGY_FLOOR_DB = -30.0
+
+# "Narrator (measured, ceremonial): ..." — a delivery note for the voice, not caption text.
+_DIRECTION_RE = re.compile(r"^\s*[\w .'-]{1,40}\([^)]*\)\s*:\s*")
+_SENTENCE_END = (".", "!", "?", "…", "।")
+_CLAUSE_END = (",", ";", ":", "—", "–")
+
+
+@dataclass
+class Cue:
+    start: float
+    end: float
+    text: str
+    row_no: Optional[int] = None
+    words: List[Tuple[float, str]] = field(default_factory=list)
+
+
+def _clean(text: str) -> str:
+    return " ".join(_DIRECTION_RE.sub("", text).split())
+
+
+def _split_text(text: str, max_chars: int, target_chars: float) -> List[str]:
+    """Greedy word packing that prefers breaking after sentence, then clause, punctuation."""
+    chunks: List[str] = []
+    current: List[str] = []
+    length = 0
+    for word in text.split():
+        add = len(word) + (1 if current else 0)
+        if current and length + add > max_chars:
+            chunks.append(" ".join(current))
+            current, length = [], 0
+            add = len(word)
+        current.append(word)
+        length += add
+        if word.endswith(_SENTENCE_END) and length >= 0.5 * target_chars:
+            chunks.append(" ".join(current))
+            current, length = [], 0
+        elif word.endswith(_CLAUSE_END) and length >= 0.8 * target_chars:
+            chunks.append(" ".join(current))
+            current, length = [], 0
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def _wrap(text: str, max_line: int = MAX_LINE_CHARS) -> List[str]:
+    """Break a cue into at most two lines at the space closest to the middle."""
+    if len(text) <= max_line:
+        return [text]
+    spaces = [i for i, ch in enumerate(text) if ch == " "]
+    if not spaces:
+        return [text]
+    middle = len(text) / 2
+    split = min(spaces, key=lambda i: abs(i - middle))
+    return [text[:split], text[split + 1 :]]
+
+
+def speech_activity(wav: np.ndarray, sample_rate: int) -> np.ndarray:
+    """Cumulative voiced seconds at each ENERGY_HOP_S boundary (frames + 1 values), from frame RMS energy."""
+    hop_s = ENERGY_HOP_S
+    hop = max(int(round(sample_rate * hop_s)), 1)
+    count = len(wav) // hop
+    if count == 0:
+        return np.zeros(1)
+    frames = np.asarray(wav[: count * hop], dtype=np.float32).reshape(count, hop)
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    loud = np.percentile(rms, 95)
+    voiced = rms > max(loud * 10 ** (ENERGY_FLOOR_DB / 20), 1e-5)
+    return np.concatenate([[0.0], np.cumsum(voiced) * hop_s])
+
+
+def _map_fraction(
+    fractions: np.ndarray,
+    block_start: np.ndarray,
+    block_end: np.ndarray,
+    voiced: Optional[np.ndarray],
+    onset: bool,
+) -> np.ndarray:
+    """Time at which each block has spoken ``fractions`` of its text.
+
+    Without audio, text is spread evenly over the block span. With a voiced
+    profile it is spread over voiced time only: onsets land where speech
+    resumes and offsets where it stops, so pauses fall between cues.
+    """
+    linear = block_start + fractions * (block_end - block_start)
+    if voiced is None:
+        return linear
+    last = len(voiced) - 1
+    first = np.clip(np.round(block_start / ENERGY_HOP_S).astype(int), 0, last)
+    final = np.clip(np.round(block_end / ENERGY_HOP_S).astype(int), 0, last)
+    v0, v1 = voiced[first], voiced[final]
+    target = v0 + fractions * (v1 - v0)
+    if onset:
+        idx = np.searchsorted(voiced, target, side="right") - 1
+    else:
+        idx = np.searchsorted(voiced, target, side="left")
+    mapped = np.clip(idx, first, final) * ENERGY_HOP_S
+    # Blocks without detectable speech fall back to even spreading.
+    return np.where(v1 > v0, mapped, linear)
+
+
+def build_cues(
+    blocks: Sequence[Dict],
+    timings: Optional[Sequence[Dict]] = None,
+    wav: Optional[np.ndarray] = None,
+    sample_rate: Optional[int] = None,
+    max_cps: float = MAX_CPS,
+    max_line: int = MAX_LINE_CHARS,
+    word_timings: bool = False,
+) -> List[Cue]:
+    """Split narration into readable cues timed to the voiceover.
+
+    ``blocks`` are the voice blocks (``row_no``, ``text``, ``start``,
+    ``duration``). ``timings`` are the measured per-block audio boundaries
+    returned by ``audio.synthesize_voiceover``; when missing, shot spans are
+    used. Passing the voiceover ``wav`` aligns text to voiced audio and
+    enables per-word timings. Timing for the whole timeline is computed in
+    one vectorised pass.
+    """
+    spans: Dict[int, Tuple[float, float]] = {}
+    for timing in timings or ():
+        spans[timing["row_no"]] = (float(timing["start"]), float(timing["end"]))
+
+    max_chars = max_line * MAX_LINES
+    texts: List[str] = []
+    rows: List[Optional[int]] = []
+    frac_start: List[float] = []
+    frac_end: List[float] = []
+    span_start: List[float] = []
+    span_end: List[float] = []
+    cue_words: List[List[str]] = []
+
+    for block in blocks:
+        text = _clean(block.get("text", ""))
+        if not text:
+            continue
+        row = block.get("row_no")
+        block_start = float(block.get("start", 0.0))
+        start, end = spans.get(row, (block_start, block_start + float(block.get("duration", MAX_DURATION))))
+        duration = max(end - start, 1e-3)
+        # Enough cues that each fits on two lines and none stays up longer than MAX_DURATION.
+        count = max(
+            int(np.ceil(len(text) / max_chars)),
+            int(np.ceil(duration / MAX_DURATION)),
+            1,
+        )
+        chunks = _split_text(text, max_chars, len(text) / count)
+        lengths = np.array([len(chunk) + 1 for chunk in chunks], dtype=np.float64)
+        bounds = np.concatenate([[0.0], np.cumsum(lengths)]) / lengths.sum()
+        texts.extend(chunks)
+        rows.extend([row] * len(chunks))
+        frac_start.extend(bounds[:-1])
+        frac_end.extend(bounds[1:])
+        span_start.extend([start] * len(chunks))
+        span_end.extend([end] * len(chunks))
+        if word_timings:
+            cue_words.extend(chunk.split() for chunk in chunks)
 
+    if not texts:
+        return []
 
-def _format_timestamp(seconds: float) -> str:
+    voiced = speech_activity(wav, sample_rate) if wav is not None and sample_rate else None
+    s0, s1 = np.asarray(span_start), np.asarray(span_end)
+    starts = _map_fraction(np.asarray(frac_start), s0, s1, voiced, onset=True)
+    ends = _map_fraction(np.asarray(frac_end), s0, s1, voiced, onset=False)
+
+    # Keep cues readable: at least MIN_DURATION and no faster than max_cps, borrowing
+    # time from the silence before the next cue but never overlapping it. The
+    # floors go first so the clamp to the next cue has the last word; only cues
+    # starting less than GAP apart give up the gap, and then end as the next begins.
+    chars = np.array([len(t) for t in texts], dtype=np.float64)
+    wanted = starts + np.maximum(chars / max_cps, MIN_DURATION)
+    following = np.append(starts[1:], np.inf)
+    ends = np.minimum(np.maximum(ends, wanted), starts + MAX_DURATION)
+    ends = np.minimum(ends, following - GAP)
+    ends = np.maximum(ends, np.minimum(starts + 0.5, following))
+
+    cues = [
+        Cue(start=float(a), end=float(b), text=text, row_no=row)
+        for a, b, text, row in zip(starts, ends, texts, rows)
+    ]
+
+    if word_timings:
+        # Word onsets use the same fraction -> time mapping, one array for the whole timeline.
+        offsets: List[float] = []
+        owners: List[int] = []
+        for idx, words in enumerate(cue_words):
+            span = frac_end[idx] - frac_start[idx]
+            total = sum(len(w) + 1 for w in words)
+            pos = 0
+            for word in words:
+                offsets.append(frac_start[idx] + span * pos / total)
+                owners.append(idx)
+                pos += len(word) + 1
+        owner_arr = np.asarray(owners)
+        onsets = _map_fraction(np.asarray(offsets), s0[owner_arr], s1[owner_arr], voiced, onset=True)
+        flat_words = [w for words in cue_words for w in words]
+        for onset, owner, word in zip(onsets, owners, flat_words):
+            cues[owner].words.append((float(onset), word))
+    return cues
+
+
+def _format_timestamp(seconds: float, sep: str = ",") -> str:
     ms = int(round(seconds * 1000))
     hours, ms = divmod(ms, 3_600_000)
     minutes, ms = divmod(ms, 60_000)
     secs, ms = divmod(ms, 1000)
-    return f"{hours:02}:{minutes:02}:{secs:02},{ms:03}"
+    return f"{hours:02}:{minutes:02}:{secs:02}{sep}{ms:03}"
+
 
+def _format_ass_timestamp(seconds: float) -> str:
+    cs = int(round(seconds * 100))
+    hours, cs = divmod(cs, 360_000)
+    minutes, cs = divmod(cs, 6000)
+    secs, cs = divmod(cs, 100)
+    return f"{hours:d}:{minutes:02}:{secs:02}.{cs:02}"
 
-def write_srt(blocks: Sequence[dict], out_path: Path | str) -> None:
-    """Create an SRT file with adaptive timings and 250ms gaps between entries."""
+
+def _prepare(out_path: Path | str) -> Path:
     out_path = Path(out_path)
     out_path.parent.mkdir(parents=True, exist_ok=True)
+    return out_path
 
-    entries: List[str] = []
-    previous_end = 0.0
-
-    for idx, block in enumerate(blocks, start=1):
-        start = max(block.get("start", 0.0), previous_end)
-        base_duration = float(block.get("duration", MIN_DURATION))
-        desired = max(MIN_DURATION, min(MAX_DURATION, base_duration))
-        end = start + desired
-        hard_end = block.get("start", start) + base_duration
-        if end > hard_end:
-            end = hard_end
-        if end - start < 0.75:
-            end = start + 0.75
-        text = block.get("text", "").strip()
-        if not text:
+
+def write_srt(cues: Sequence[Cue], out_path: Path | str) -> None:
+    """Write cues as SubRip."""
+    out_path = _prepare(out_path)
+    entries = [
+        f"{idx}\n{_format_timestamp(cue.start)} --> {_format_timestamp(cue.end)}\n" + "\n".join(_wrap(cue.text)) + "\n"
+        for idx, cue in enumerate(cues, start=1)
+    ]
+    out_path.write_text("\n".join(entries), encoding="utf-8")
+
+
+def _escape_vtt(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def write_vtt(cues: Sequence[Cue], out_path: Path | str) -> None:
+    """Write cues as WebVTT, with inline word timestamps when the cues carry them."""
+    out_path = _prepare(out_path)
+    entries = ["WEBVTT\n"]
+    for cue in cues:
+        if cue.words:
+            words = [_escape_vtt(cue.words[0][1])]
+            words += [f"<{_format_timestamp(t, '.')}>{_escape_vtt(w)}" for t, w in cue.words[1:]]
+            # Break between timestamp tags where _wrap breaks the plain text.
+            first = len(_wrap(cue.text)[0].split())
+            text = "\n".join(" ".join(line) for line in (words[:first], words[first:]) if line)
+        else:
+            text = _escape_vtt("\n".join(_wrap(cue.text)))
+        entries.append(f"{_format_timestamp(cue.start, '.')} --> {_format_timestamp(cue.end, '.')}\n{text}\n")
+    out_path.write_text("\n".join(entries), encoding="utf-8")
+
+
+def write_ass(
+    cues: Sequence[Cue],
+    out_path: Path | str,
+    size: Tuple[int, int] = (3840, 2160),
+    font: str = "DejaVu Sans",
+    offset: float = 0.0,
+) -> None:
+    """Write cues as an ASS script for burn-in, bottom-centred with an outline.
+
+    ``offset`` is subtracted from every timestamp so a script can be cut to a
+    segment of the timeline; cues entirely before the segment are dropped.
+    """
+    out_path = _prepare(out_path)
+    width, height = size
+    font_size = int(round(height * 0.045))
+    outline = max(int(round(height / 540)), 1)
+    margin_v = int(round(height * 0.06))
+    lines = [
+        "[Script Info]",
+        "ScriptType: v4.00+",
+        f"PlayResX: {width}",
+        f"PlayResY: {height}",
+        "WrapStyle: 2",
+        "ScaledBorderAndShadow: yes",
+        "",
+        "[V4+ Styles]",
+        "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, "
+        "Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, "
+        "MarginR, MarginV, Encoding",
+        f"Style: Caption,{font},{font_size},&H00FFFFFF,&H00FFFFFF,&H00000000,&H80000000,0,0,0,0,100,100,0,0,1,"
+        f"{outline},{outline},2,{margin_v},{margin_v},{margin_v},1",
+        "",
+        "[Events]",
+        "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text",
+    ]
+    for cue in cues:
+        start, end = cue.start - offset, cue.end - offset
+        if end <= 0:
             continue
-        entries.append(
-            "\n".join(
-                [
-                    str(idx),
-                    f"{_format_timestamp(start)} --> {_format_timestamp(end)}",
-                    text,
-                    "",
-                ]
-            )
+        text = r"\N".join(_wrap(cue.text)).replace("{", r"\{").replace("}", r"\}")
+        lines.append(
+            f"Dialogue: 0,{_format_ass_timestamp(max(start, 0.0))},{_format_ass_timestamp(end)},Caption,,0,0,0,,{text}"
         )
-        previous_end = end + GAP
+    out_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
 
-    out_path.write_text("\n".join(entries), encoding="utf-8")
+
+WRITERS = {"srt": write_srt, "vtt": write_vtt, "ass": write_ass}
+
+
+def write_captions(
+    cues: Sequence[Cue],
+    stem: Path,
+    formats: Sequence[str] = ("srt", "vtt", "ass"),
+    size: Tuple[int, int] = (3840, 2160),
+) -> List[Path]:
+    """Write ``stem.<fmt>`` for each requested format and return the paths; ``size`` is the ASS frame size."""
+    paths = []
+    for fmt in formats:
+        path = stem.with_suffix(f".{fmt}")
+        WRITERS[fmt](cues, path, **({"size": size} if fmt == "ass" else {}))
+        paths.append(path)
+    return paths
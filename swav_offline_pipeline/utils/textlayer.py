@@ -0,0 +1,169 @@
+"""Overlay text rasterised once into a cached RGBA layer.
+
+Each line is set in the first font of the stack that has glyphs for every
+character (DejaVu for Latin, Noto/Lohit Devanagari for the Hindi strapline),
+shaped with HarfBuzz through Pillow's raqm layout where Pillow was built with
+it, and drawn with its shadow into a transparent image cropped to the text.
+The PNG and its placement are cached under a key of the lines, font stack,
+size and frame resolution, so a shot's overlay is rendered once however many
+frames, re-runs or encodes use it, and ffmpeg composites it with a single
+``overlay`` filter instead of rasterising every line on every frame.
+
+Without raqm, complex scripts come out unshaped (Devanagari vowel signs and
+conjuncts in the wrong place); ``TextLayer.layout`` and ``unshaped`` say so.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import unicodedata
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+from PIL import Image, ImageDraw, ImageFont, features
+
+FONT_DIRS = (Path("/usr/share/fonts"), Path(__file__).resolve().parents[1] / "assets" / "fonts")
+FONT_STACK: Tuple[str, ...] = (
+    "truetype/dejavu/DejaVuSans.ttf",
+    "truetype/noto/NotoSansDevanagari-Regular.ttf",
+    "opentype/noto/NotoSansDevanagari-Regular.otf",
+    "truetype/lohit-devanagari/Lohit-Devanagari.ttf",
+    "truetype/freefont/FreeSans.ttf",
+)
+TEXT_COLOR = (255, 255, 255, 255)
+SHADOW_COLOR = (0, 0, 0, 0xAA)
+SHADOW_OFFSET = 2
+LINE_HEIGHT = 64  # pixels at any resolution, as the drawtext chain this replaces
+CACHE_VERSION = 1
+
+_ROOT: Optional[Path] = None
+_FONTS: Tuple[str, ...] = FONT_STACK
+# Scripts whose glyphs need contextual shaping to render correctly.
+_COMPLEX = ("DEVANAGARI", "BENGALI", "GURMUKHI", "GUJARATI", "TAMIL", "TELUGU", "KANNADA", "MALAYALAM", "ARABIC")
+
+
+@dataclass
+class TextLayer:
+    path: Path  # RGBA PNG cropped to the text and its shadow
+    x: int  # placement of the PNG's top-left corner in the frame
+    y: int
+    layout: str  # "raqm" (HarfBuzz shaping) or "basic"
+    fonts: List[str] = field(default_factory=list)  # font used for each line
+    unshaped: List[str] = field(default_factory=list)  # lines needing shaping that raqm was not there to do
+    uncovered: List[str] = field(default_factory=list)  # lines no font in the stack fully covers
+
+
+def configure(root: Path | str | None, fonts: Sequence[str] | None = None) -> None:
+    """Cache layers under ``root`` (default: the system temp dir) and set the font stack, first match wins."""
+    global _ROOT, _FONTS
+    _ROOT = Path(root) if root else None
+    _FONTS = tuple(fonts) if fonts else FONT_STACK
+
+
+def resolve_fonts(stack: Sequence[str] | None = None) -> List[Path]:
+    """Existing font files of ``stack``; relative entries are looked up under ``FONT_DIRS``."""
+    paths: List[Path] = []
+    for entry in stack or _FONTS:
+        candidates = [Path(entry)] if Path(entry).is_absolute() else [root / entry for root in FONT_DIRS]
+        found = next((path for path in candidates if path.is_file()), None)
+        if found is not None and found not in paths:
+            paths.append(found)
+    return paths
+
+
+def layout_engine() -> str:
+    return "raqm" if features.check("raqm") else "basic"
+
+
+@lru_cache(maxsize=None)
+def _font(path: str, size: int) -> ImageFont.FreeTypeFont:
+    engine = ImageFont.Layout.RAQM if layout_engine() == "raqm" else ImageFont.Layout.BASIC
+    return ImageFont.truetype(path, size, layout_engine=engine)
+
+
+@lru_cache(maxsize=None)
+def _glyph(path: str, char: str) -> bytes:
+    font = _font(path, 32)
+    image = Image.new("L", (64, 64))
+    ImageDraw.Draw(image).text((8, 8), char, font=font, fill=255)
+    return image.tobytes()
+
+
+def _covers(path: Path, text: str) -> bool:
+    # A character the font lacks renders as .notdef, the same box as an unassigned code point.
+    notdef = _glyph(str(path), "\U0010fffd")
+    return all(
+        char.isspace() or unicodedata.category(char).startswith("M") or _glyph(str(path), char) != notdef
+        for char in set(text)
+    )
+
+
+def _needs_shaping(text: str) -> bool:
+    return any(unicodedata.name(char, "").split(" ")[0] in _COMPLEX for char in text)
+
+
+def _pick_font(text: str, fonts: Sequence[Path]) -> Tuple[Path, bool]:
+    for path in fonts:
+        if _covers(path, text):
+            return path, True
+    return fonts[0], False
+
+
+def _key(lines: Sequence[str], fonts: Sequence[Path], size: int, resolution: Tuple[int, int]) -> str:
+    stamps = [f"{path}:{path.stat().st_size}:{int(path.stat().st_mtime)}" for path in fonts]
+    payload = json.dumps([CACHE_VERSION, list(lines), stamps, size, list(resolution), layout_engine()])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+def render(lines: Sequence[str], resolution: Tuple[int, int], size: int = LINE_HEIGHT) -> TextLayer:
+    """The cached layer for ``lines`` centred in a ``resolution`` frame, rendering it on a miss."""
+    fonts = resolve_fonts()
+    if not fonts:
+        raise FileNotFoundError(f"None of the overlay fonts exist: {', '.join(_FONTS)}")
+    root = _ROOT or Path(tempfile.gettempdir()) / "swav_text_layers"
+    key = _key(lines, fonts, size, resolution)
+    png, meta = root / f"{key}.png", root / f"{key}.json"
+    if png.exists() and meta.exists():
+        fields = json.loads(meta.read_text(encoding="utf-8"))
+        return TextLayer(path=png, **fields)
+
+    width, height = resolution
+    canvas = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(canvas)
+    used, unshaped, uncovered = [], [], []
+    # Same placement as the drawtext chain: lines ``size`` apart, the block centred on the frame.
+    top = height / 2 - size * (len(lines) - 1) / 2
+    for idx, line in enumerate(lines):
+        path, covered = _pick_font(line, fonts)
+        font = _font(str(path), size)
+        y = top + idx * size
+        # Shadow first, so the text stays on top where the two overlap.
+        draw.text((width / 2 + SHADOW_OFFSET, y + SHADOW_OFFSET), line, font=font, fill=SHADOW_COLOR, anchor="ma")
+        draw.text((width / 2, y), line, font=font, fill=TEXT_COLOR, anchor="ma")
+        used.append(path.name)
+        if not covered:
+            uncovered.append(line)
+        if _needs_shaping(line) and layout_engine() != "raqm":
+            unshaped.append(line)
+    bbox = canvas.getbbox() or (0, 0, 2, 2)
+    x0, y0 = bbox[0] // 2 * 2, bbox[1] // 2 * 2  # even offsets keep chroma-subsampled placement exact
+    layer = canvas.crop((x0, y0, bbox[2], bbox[3]))
+
+    root.mkdir(parents=True, exist_ok=True)
+    tmp = png.with_name(f"{key}.tmp-{os.getpid()}.png")
+    layer.save(tmp, compress_level=1)
+    os.replace(tmp, png)
+    fields = {"x": x0, "y": y0, "layout": layout_engine(), "fonts": used, "unshaped": unshaped, "uncovered": uncovered}
+    tmp = meta.with_name(f"{key}.tmp-{os.getpid()}.json")
+    tmp.write_text(json.dumps(fields), encoding="utf-8")
+    os.replace(tmp, meta)
+    return TextLayer(path=png, **fields)
+
+
+def overlay_filter(layer: TextLayer, video: str = "0:v", image: str = "1:v") -> str:
+    """One ``overlay`` of the layer (a single still input, repeated by ``eof_action``) onto every frame."""
+    return f"[{video}][{image}]overlay=x={layer.x}:y={layer.y}:eof_action=repeat:format=auto"
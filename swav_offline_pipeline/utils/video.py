@@ -1,13 +1,15 @@
 from __future__ import annotations
 
-import subprocess
-import tempfile
+import shutil
 from pathlib import Path
 from typing import Iterable, Sequence, Tuple
 
 import numpy as np
 from PIL import Image
 
+from . import encoders, ffmpeg, qc, storage, textlayer
+from .encoders import EncoderProfile
+
 DEFAULT_FONT = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
 
 
@@ -25,18 +27,20 @@ def kenburns_from_still(
     duration: float,
     fps: int,
     size: Tuple[int, int] = (3840, 2160),
+    profile: EncoderProfile | None = None,
 ) -> None:
     """Create a gentle Ken Burns move from a still image using ffmpeg zoompan."""
+    profile = profile or encoders.profile_for("shot")
     out_path = _as_path(out_path)
     _ensure_parent(out_path)
 
     width, height = size
     frames = max(int(round(duration * fps)), 1)
 
-    with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmp:
-        resized = pil_img.convert("RGB").resize((width, height), Image.BICUBIC)
-        resized.save(tmp.name)
-        tmp_path = tmp.name
+    tmp_path = str(storage.scratch_file(".png", width * height * 3))
+    still = pil_img.convert("RGB").resize((width, height), Image.BICUBIC)
+    still.save(tmp_path)
+    qc.observe(still)
 
     zoom_increment = 0.05 / max(frames, 1)
     zoom_filter = f"zoompan=z='1+{zoom_increment}*on':d={frames}:s={width}x{height}"
@@ -51,79 +55,95 @@ def kenburns_from_still(
         f"{zoom_filter},fps={fps}",
         "-t",
         f"{duration:.3f}",
-        "-c:v",
-        "libx264",
-        "-crf",
-        "10",
-        "-preset",
-        "slow",
-        "-pix_fmt",
-        "yuv420p",
+        *profile.ffmpeg_args(),
         str(out_path),
     ]
-    subprocess.run(cmd, check=True)
+    ffmpeg.run(cmd)
     Path(tmp_path).unlink(missing_ok=True)
 
 
-def _escape_drawtext(text: str) -> str:
-    return text.replace("\\", r"\\\\").replace(":", r"\:").replace("'", r"\'")
+def _escape_filter_path(path) -> str:
+    # Escaped once for the option parser and once for the filtergraph parser.
+    return str(path).replace("\\", "\\\\\\\\").replace("'", "\\\\\\'").replace(":", "\\\\:")
 
 
-def overlay_texts(in_path, lines: Sequence[str], font: str = DEFAULT_FONT) -> None:
-    """Overlay centered multiline text with subtle shadow using ffmpeg drawtext."""
-    in_path = _as_path(in_path)
-    temp_out = in_path.with_suffix(".tmp.mp4")
-    _ensure_parent(temp_out)
-
-    line_height = 64
-    filter_parts = []
-    line_count = len(lines)
-    for idx, line in enumerate(lines):
-        y_expr = f"(h/2 - {line_height * (line_count - 1) / 2} + {idx}*{line_height})"
-        filter_parts.append(
-            f"drawtext=fontfile={font}:text='{_escape_drawtext(line)}':"
-            f"fontcolor=white:fontsize={line_height}:x=(w-text_w)/2:"
-            f"y={y_expr}:shadowcolor=0x000000AA:shadowx=2:shadowy=2"
-        )
-    filter_chain = ",".join(filter_parts)
+def caption_filter(ass_path, font: str = DEFAULT_FONT) -> str:
+    """libass filter burning an ASS caption script, with fonts resolved from the overlay font's directory."""
+    return f"ass=filename={_escape_filter_path(ass_path)}:fontsdir={_escape_filter_path(Path(font).parent)}"
+
+
+def burn_captions(in_path, ass_path, out_path, font: str = DEFAULT_FONT, profile: EncoderProfile | None = None) -> None:
+    """Re-encode ``in_path`` with the captions in ``ass_path`` burned in (standalone pass)."""
+    profile = profile or encoders.profile_for("assembly")
+    out_path = _as_path(out_path)
+    _ensure_parent(out_path)
     cmd = [
         "ffmpeg",
         "-y",
         "-i",
         str(in_path),
         "-vf",
-        filter_chain,
-        "-c:v",
-        "libx264",
-        "-crf",
-        "10",
-        "-preset",
-        "slow",
-        "-pix_fmt",
-        "yuv420p",
+        caption_filter(ass_path, font),
+        *profile.ffmpeg_args(),
         "-c:a",
         "copy",
-        str(temp_out),
+        str(out_path),
     ]
-    subprocess.run(cmd, check=True)
-    temp_out.replace(in_path)
+    ffmpeg.run(cmd)
 
 
-def write_video(frames: np.ndarray, out_path, fps: int) -> None:
-    """Encode an array of uint8 frames (T, H, W, C) into an H.264 video."""
-    if frames.ndim != 4:
-        raise ValueError("Frames array must be 4D: (T, H, W, C)")
-    if frames.dtype != np.uint8:
-        raise ValueError("Frames array must be uint8.")
+def overlay_texts(
+    in_path,
+    lines: Sequence[str],
+    size: Tuple[int, int] = (3840, 2160),
+    profile: EncoderProfile | None = None,
+    out_path=None,
+) -> textlayer.TextLayer:
+    """Overlay centered multiline text with a subtle shadow, composited from a cached pre-rendered layer.
 
-    out_path = _as_path(out_path)
-    _ensure_parent(out_path)
+    Writes ``out_path`` when given, otherwise replaces ``in_path`` via a scratch file.
+    """
+    in_path = _as_path(in_path)
+    profile = profile or encoders.profile_for("overlay")
+    layer = textlayer.render(lines, size)
+    if out_path is not None:
+        temp_out = _as_path(out_path)
+        _ensure_parent(temp_out)
+    else:
+        temp_out = storage.scratch_file(in_path.suffix, in_path.stat().st_size * 2)
+    cmd = [
+        "ffmpeg",
+        "-y",
+        "-i",
+        str(in_path),
+        "-i",
+        str(layer.path),
+        "-filter_complex",
+        f"{textlayer.overlay_filter(layer)}[v]",
+        "-map",
+        "[v]",
+        "-map",
+        "0:a?",
+        *profile.ffmpeg_args(),
+        "-c:a",
+        "copy",
+        str(temp_out),
+    ]
+    if out_path is not None:
+        ffmpeg.run(cmd)
+        return layer
+    try:
+        ffmpeg.run(cmd)
+        shutil.move(temp_out, in_path)
+    finally:
+        temp_out.unlink(missing_ok=True)
+    return layer
 
-    frame_count, height, width, channels = frames.shape
-    if channels != 3:
-        raise ValueError("Frames must have 3 channels (RGB).")
 
-    cmd = [
+def rawvideo_cmd(width: int, height: int, fps: int, out_path, profile: EncoderProfile | None = None) -> list:
+    """ffmpeg command encoding rgb24 frames read from stdin with the given (default: shot) profile."""
+    profile = profile or encoders.profile_for("shot")
+    return [
         "ffmpeg",
         "-y",
         "-f",
@@ -138,23 +158,34 @@ def write_video(frames: np.ndarray, out_path, fps: int) -> None:
         str(fps),
         "-i",
         "-",
-        "-c:v",
-        "libx264",
-        "-crf",
-        "10",
-        "-preset",
-        "slow",
-        "-pix_fmt",
-        "yuv420p",
+        *profile.ffmpeg_args(),
         str(out_path),
     ]
-    process = subprocess.Popen(cmd, stdin=subprocess.PIPE)
-    try:
-        process.stdin.write(frames.tobytes())
-        process.stdin.close()
-        return_code = process.wait()
-        if return_code != 0:
-            raise subprocess.CalledProcessError(return_code, cmd)
-    finally:
-        if process.poll() is None:
-            process.terminate()
+
+
+def write_video(frames: np.ndarray, out_path, fps: int, profile: EncoderProfile | None = None) -> None:
+    """Encode an array of uint8 frames (T, H, W, C) with the shot encoder profile."""
+    if frames.ndim != 4:
+        raise ValueError("Frames array must be 4D: (T, H, W, C)")
+    if frames.dtype != np.uint8:
+        raise ValueError("Frames array must be uint8.")
+
+    out_path = _as_path(out_path)
+    _ensure_parent(out_path)
+
+    frame_count, height, width, channels = frames.shape
+    if channels != 3:
+        raise ValueError("Frames must have 3 channels (RGB).")
+
+    qc.observe(frames)
+    # Contiguous input is written straight from its buffer, without a tobytes() copy.
+    ffmpeg.run(rawvideo_cmd(width, height, fps, out_path, profile), stdin=np.ascontiguousarray(frames).data)
+
+
+def stream_video(
+    frames: Iterable[np.ndarray], size: Tuple[int, int], out_path, fps: int, profile: EncoderProfile | None = None
+) -> None:
+    """Encode uint8 (H, W, 3) frames as they are produced, without holding the clip in memory."""
+    out_path = _as_path(out_path)
+    _ensure_parent(out_path)
+    ffmpeg.run(rawvideo_cmd(size[0], size[1], fps, out_path, profile), stdin=qc.stream(frames))